@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Benchmark embedding-text normalization on a workspace.
+
+Reports how many tokens the embedder would receive for raw versus normalized
+chunk text. With --retrieval (requires a running Ollama), both variants are
+embedded in memory and the tests/comprehensive query suite is run against
+each; the top-k overlap shows whether normalization preserves retrieval.
+
+Usage:
+    python scripts/benchmarks/embedding_text_normalization.py --workspace . --config code_index.json
+    python scripts/benchmarks/embedding_text_normalization.py --workspace . --retrieval --top-k 10
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+ROOT = os.path.join(os.path.dirname(__file__), "..", "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "tests", "comprehensive"))
+
+import numpy as np
+
+from code_index.chunking import LineChunkingStrategy, TreeSitterChunkingStrategy
+from code_index.config import Config
+from code_index.errors import ErrorHandler
+from code_index.parser import CodeParser
+from code_index.services.batch.batch_manager import BatchManager
+from code_index.services.embedding.text_normalizer import EmbeddingTextNormalizer
+from code_index.services.shared.file_processing_helpers import get_relative_path
+
+_APPROX_TOKEN = re.compile(r"\w+|[^\w\s]|\s+")
+
+
+def token_counter() -> Tuple[str, Callable[[str], int]]:
+    """Return a tokenizer name and counting function (tiktoken when installed)."""
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return "tiktoken/cl100k_base", lambda text: len(encoding.encode(text))
+    except ImportError:
+        def approximate(text: str) -> int:
+            # Words and punctuation are one token each; whitespace runs cost one
+            # token per four characters, as in common BPE vocabularies.
+            count = 0
+            for piece in _APPROX_TOKEN.findall(text):
+                count += max(1, len(piece) // 4) if piece.isspace() else 1
+            return count
+        return "approximate", approximate
+
+
+def collect_chunks(workspace: str, config: Config, limit: int) -> List[Tuple[str, str, str]]:
+    """Return (relative path, symbol, content) for up to ``limit`` chunks."""
+    if getattr(config, "chunking_strategy", "lines") == "treesitter":
+        strategy = TreeSitterChunkingStrategy(config)
+    else:
+        strategy = LineChunkingStrategy(config)
+    parser = CodeParser(config, strategy)
+    files = BatchManager(config, ErrorHandler()).get_file_paths(workspace, config)
+    chunks = []
+    for file_path in files:
+        rel_path = get_relative_path(file_path, workspace, None)
+        for block in parser.parse_file(file_path):
+            if block.content.strip():
+                chunks.append((rel_path, block.identifier, block.content))
+                if len(chunks) >= limit:
+                    return chunks
+    return chunks
+
+
+def embed_all(embedder, texts: List[str], batch_size: int) -> Tuple[np.ndarray, float]:
+    start = time.perf_counter()
+    vectors = []
+    for i in range(0, len(texts), batch_size):
+        vectors.extend(embedder.create_embeddings(texts[i:i + batch_size])["embeddings"])
+    elapsed = time.perf_counter() - start
+    matrix = np.asarray(vectors, dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+    return matrix, elapsed
+
+
+def top_k(matrix: np.ndarray, query: np.ndarray, k: int) -> List[int]:
+    scores = matrix @ query
+    k = min(k, len(scores))
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx])].tolist()
+
+
+def retrieval_parity(config: Config, raw: List[str], normalized: List[str], k: int, batch_size: int) -> Dict:
+    from code_index.embedder import OllamaEmbedder
+    from comprehensive_search_test import ComprehensiveSearchTester
+
+    embedder = OllamaEmbedder(config)
+    raw_matrix, raw_seconds = embed_all(embedder, raw, batch_size)
+    norm_matrix, norm_seconds = embed_all(embedder, normalized, batch_size)
+
+    queries = ComprehensiveSearchTester.BASIC_QUERIES + ComprehensiveSearchTester.SEMANTIC_QUERIES
+    query_matrix, _ = embed_all(embedder, queries, batch_size)
+
+    overlaps, first_hit_agreement = [], 0
+    per_query = []
+    for query, vector in zip(queries, query_matrix):
+        raw_top = top_k(raw_matrix, vector, k)
+        norm_top = top_k(norm_matrix, vector, k)
+        overlap = len(set(raw_top) & set(norm_top)) / max(1, len(raw_top))
+        overlaps.append(overlap)
+        first_hit_agreement += int(raw_top[:1] == norm_top[:1])
+        per_query.append({"query": query, f"overlap@{k}": round(overlap, 3)})
+
+    return {
+        "queries": len(queries),
+        f"mean_overlap@{k}": round(statistics.mean(overlaps), 3),
+        "top1_agreement": round(first_hit_agreement / len(queries), 3),
+        "embed_seconds_raw": round(raw_seconds, 2),
+        "embed_seconds_normalized": round(norm_seconds, 2),
+        "per_query": per_query,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workspace", default=".", help="Workspace to chunk")
+    parser.add_argument("--config", default="code_index.json", help="Configuration file")
+    parser.add_argument("--limit", type=int, default=2000, help="Maximum chunks to sample")
+    parser.add_argument("--retrieval", action="store_true", help="Embed both variants and compare retrieval (needs Ollama)")
+    parser.add_argument("--top-k", type=int, default=10, help="k for the retrieval overlap")
+    parser.add_argument("--batch-size", type=int, default=32, help="Embedding batch size")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    workspace = os.path.abspath(args.workspace)
+    config = Config.from_file(args.config)
+    config.workspace_path = workspace
+    normalizer = EmbeddingTextNormalizer(
+        prefix_metadata=bool(getattr(config, "embedding_text_metadata_prefix", True)),
+        strip_banners=bool(getattr(config, "embedding_text_strip_banners", True)),
+        max_blank_lines=int(getattr(config, "embedding_text_max_blank_lines", 1)),
+        strip_patterns=getattr(config, "embedding_text_strip_patterns", None) or {},
+    )
+
+    chunks = collect_chunks(workspace, config, args.limit)
+    if not chunks:
+        print("No chunks found.")
+        return 1
+
+    raw = [content for _, _, content in chunks]
+    normalized = [normalizer.normalize(content, rel_path, symbol) for rel_path, symbol, content in chunks]
+
+    tokenizer_name, count = token_counter()
+    raw_tokens = [count(text) for text in raw]
+    norm_tokens = [count(text) for text in normalized]
+    report = {
+        "workspace": workspace,
+        "chunks": len(chunks),
+        "tokenizer": tokenizer_name,
+        "raw_tokens": sum(raw_tokens),
+        "normalized_tokens": sum(norm_tokens),
+        "reduction_pct": round(100.0 * (1 - sum(norm_tokens) / max(1, sum(raw_tokens))), 1),
+        "median_tokens_raw": statistics.median(raw_tokens),
+        "median_tokens_normalized": statistics.median(norm_tokens),
+    }
+    if args.retrieval:
+        report["retrieval"] = retrieval_parity(config, raw, normalized, args.top_k, args.batch_size)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print(f"Chunks sampled:      {report['chunks']} ({tokenizer_name} tokens)")
+    print(f"Raw tokens:          {report['raw_tokens']} (median {report['median_tokens_raw']})")
+    print(f"Normalized tokens:   {report['normalized_tokens']} (median {report['median_tokens_normalized']})")
+    print(f"Reduction:           {report['reduction_pct']}%")
+    if "retrieval" in report:
+        retrieval = report["retrieval"]
+        print(f"Mean overlap@{args.top_k}:     {retrieval[f'mean_overlap@{args.top_k}']} over {retrieval['queries']} queries")
+        print(f"Top-1 agreement:     {retrieval['top1_agreement']}")
+        print(f"Embedding time:      raw {retrieval['embed_seconds_raw']}s, normalized {retrieval['embed_seconds_normalized']}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark recall and latency of Qdrant quantization modes.
+
+Creates one temporary collection per mode (none, scalar, binary, product)
+with the same vectors, using the collection settings code-index applies from
+code_index.json. Each query is searched with the configured search
+parameters and compared with an exact (brute-force) search on the
+unquantized collection.
+
+Reported per mode:
+
+  recall@k    overlap of the top-k ids with the exact top-k
+  p50/p95 ms  client-side search latency
+  build s     time until the collection was green after upload
+
+Vectors are clustered Gaussian noise by default; pass --vectors with a .npy
+matrix of real embeddings for representative numbers. Requires a running
+Qdrant; the temporary collections are deleted afterwards.
+
+Usage:
+    python scripts/benchmarks/quantization_recall.py --points 50000 --dim 768
+    python scripts/benchmarks/quantization_recall.py --vectors embeddings.npy --oversampling 3
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+
+ROOT = os.path.join(os.path.dirname(__file__), "..", "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import CollectionStatus, Distance, SearchParams, VectorParams
+
+from code_index.qdrant_settings import build_hnsw_config, build_quantization_config, build_search_params
+
+MODES = ("none", "scalar", "binary", "product")
+
+
+def make_vectors(points: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=points)
+    vectors = centers[labels] + 0.4 * rng.standard_normal((points, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def wait_green(client: QdrantClient, name: str, timeout: float) -> float:
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if client.get_collection(name).status == CollectionStatus.GREEN:
+            break
+        time.sleep(0.5)
+    return time.perf_counter() - start
+
+
+def build_collection(client: QdrantClient, name: str, settings, vectors: np.ndarray, timeout: float) -> float:
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    client.create_collection(
+        collection_name=name,
+        vectors_config=VectorParams(size=vectors.shape[1], distance=Distance.COSINE,
+                                    on_disk=settings.qdrant_vectors_on_disk or None),
+        hnsw_config=build_hnsw_config(settings),
+        quantization_config=build_quantization_config(settings),
+    )
+    client.upload_collection(collection_name=name, vectors=vectors, ids=range(len(vectors)),
+                             batch_size=256, parallel=2)
+    return wait_green(client, name, timeout)
+
+
+def search_ids(client: QdrantClient, name: str, query: np.ndarray, k: int, params) -> List[int]:
+    response = client.query_points(collection_name=name, query=query.tolist(), limit=k,
+                                   search_params=params, with_payload=False)
+    return [point.id for point in response.points]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--qdrant-url", default=os.environ.get("QDRANT_URL", "http://localhost:6333"))
+    parser.add_argument("--vectors", help="Optional .npy matrix of embeddings to use instead of synthetic data")
+    parser.add_argument("--points", type=int, default=20000, help="Synthetic vectors to generate")
+    parser.add_argument("--dim", type=int, default=768, help="Synthetic vector dimension")
+    parser.add_argument("--clusters", type=int, default=200, help="Synthetic cluster count")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per mode")
+    parser.add_argument("--k", type=int, default=10, help="Results per query")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--oversampling", type=float, default=2.0)
+    parser.add_argument("--no-rescore", action="store_true", help="Disable rescoring with original vectors")
+    parser.add_argument("--on-disk", action="store_true", help="Store original vectors on disk")
+    parser.add_argument("--hnsw-m", type=int)
+    parser.add_argument("--hnsw-ef-construct", type=int)
+    parser.add_argument("--hnsw-ef", type=int, help="Search-time ef")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Seconds to wait for each index build")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    vectors = np.load(args.vectors).astype(np.float32) if args.vectors else \
+        make_vectors(args.points, args.dim, args.clusters, seed=0)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(len(vectors), size=args.queries, replace=False)]
+    queries = queries + 0.05 * rng.standard_normal(queries.shape).astype(np.float32)
+
+    client = QdrantClient(url=args.qdrant_url, timeout=300)
+    results: List[Dict] = []
+    truth: List[List[int]] = []
+    created: List[str] = []
+    try:
+        for mode in ["none"] + [m for m in args.modes if m != "none"]:
+            settings = SimpleNamespace(
+                qdrant_quantization=mode, qdrant_quantization_always_ram=True,
+                qdrant_scalar_quantile=0.99, qdrant_product_compression="x16",
+                qdrant_quantization_rescore=not args.no_rescore,
+                qdrant_quantization_oversampling=args.oversampling,
+                qdrant_vectors_on_disk=args.on_disk, qdrant_hnsw_m=args.hnsw_m,
+                qdrant_hnsw_ef_construct=args.hnsw_ef_construct, qdrant_search_hnsw_ef=args.hnsw_ef,
+            )
+            name = f"bench_quantization_{mode}"
+            created.append(name)
+            build_seconds = build_collection(client, name, settings, vectors, args.timeout)
+            if mode == "none":
+                exact = SearchParams(exact=True)
+                truth = [search_ids(client, name, q, args.k, exact) for q in queries]
+                if "none" not in args.modes:
+                    continue
+
+            params = build_search_params(settings)
+            latencies, overlap = [], 0
+            for query, expected in zip(queries, truth):
+                start = time.perf_counter()
+                ids = search_ids(client, name, query, args.k, params)
+                latencies.append((time.perf_counter() - start) * 1000)
+                overlap += len(set(ids) & set(expected))
+            results.append({
+                "mode": mode,
+                "recall": overlap / (len(queries) * args.k),
+                "p50_ms": float(np.percentile(latencies, 50)),
+                "p95_ms": float(np.percentile(latencies, 95)),
+                "build_seconds": build_seconds,
+            })
+    finally:
+        for name in created:
+            try:
+                client.delete_collection(name)
+            except Exception:
+                pass
+
+    if args.json:
+        print(json.dumps({"points": len(vectors), "dim": vectors.shape[1], "k": args.k, "results": results}, indent=2))
+        return 0
+
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, {args.queries} queries, k={args.k}, "
+          f"oversampling={args.oversampling}, rescore={not args.no_rescore}, on_disk={args.on_disk}")
+    print(f"{'mode':<10}{'recall@k':>10}{'p50 ms':>10}{'p95 ms':>10}{'build s':>10}")
+    for row in results:
+        print(f"{row['mode']:<10}{row['recall']:>10.3f}{row['p50_ms']:>10.2f}"
+              f"{row['p95_ms']:>10.2f}{row['build_seconds']:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark how embedding vectors travel from the embedder to Qdrant points.
+
+Simulates one large file: the embedder returns JSON for --chunks vectors of
+--dim floats in batches of --batch-size. The vectors are held until every
+batch is back, as FileProcessor does, and then become PointStructs in
+upsert batches. Peak traced memory and wall time are reported for:
+
+  lists    vectors kept as Python lists from response.json() onwards
+  float32  vectors kept as rows of a NumPy matrix and converted per upsert batch
+  float16  as float32, with half-precision storage until the Qdrant boundary
+
+No services are needed; only the Qdrant client models are used.
+
+Usage:
+    python scripts/benchmarks/vector_transport.py --chunks 5000 --dim 768
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+ROOT = os.path.join(os.path.dirname(__file__), "..", "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+import numpy as np
+from qdrant_client.models import PointStruct
+
+from code_index.vector_codec import as_matrix, vectors_to_lists
+
+
+def make_responses(chunks: int, dim: int, batch_size: int) -> List[bytes]:
+    rng = np.random.default_rng(0)
+    responses = []
+    for start in range(0, chunks, batch_size):
+        rows = rng.standard_normal((min(batch_size, chunks - start), dim)).astype(np.float32)
+        responses.append(json.dumps({"embeddings": rows.tolist()}).encode())
+    return responses
+
+
+def run_lists(responses: List[bytes], upsert_batch: int) -> int:
+    vectors = []
+    for body in responses:
+        vectors.extend(json.loads(body)["embeddings"])
+    points = [{"id": i, "vector": vector, "payload": {}} for i, vector in enumerate(vectors)]
+    built = 0
+    for start in range(0, len(points), upsert_batch):
+        batch = points[start:start + upsert_batch]
+        built += len([PointStruct(id=p["id"], vector=p["vector"], payload=p["payload"]) for p in batch])
+    return built
+
+
+def run_matrix(dtype) -> Callable[[List[bytes], int], int]:
+    def run(responses: List[bytes], upsert_batch: int) -> int:
+        matrices = [as_matrix(json.loads(body)["embeddings"], dtype) for body in responses]
+        matrix = np.concatenate(matrices)
+        del matrices
+        points = [{"id": i, "vector": matrix[i], "payload": {}} for i in range(len(matrix))]
+        built = 0
+        for start in range(0, len(points), upsert_batch):
+            batch = points[start:start + upsert_batch]
+            vectors = vectors_to_lists([p["vector"] for p in batch])
+            built += len([PointStruct(id=p["id"], vector=v, payload=p["payload"]) for p, v in zip(batch, vectors)])
+        return built
+    return run
+
+
+def measure(name: str, func, responses: List[bytes], upsert_batch: int, repeat: int) -> Dict:
+    # Time without tracing; tracemalloc slows allocation-heavy code unevenly.
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func(responses, upsert_batch)
+        timings.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    func(responses, upsert_batch)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"variant": name, "seconds": min(timings), "peak_mb": peak / (1024 * 1024)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=5000, help="Vectors in the simulated file")
+    parser.add_argument("--dim", type=int, default=768, help="Embedding dimension")
+    parser.add_argument("--batch-size", type=int, default=64, help="Texts per embedder request")
+    parser.add_argument("--upsert-batch", type=int, default=256, help="Points per Qdrant upsert")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per variant (best time reported)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    responses = make_responses(args.chunks, args.dim, args.batch_size)
+    results = [
+        measure("lists", run_lists, responses, args.upsert_batch, args.repeat),
+        measure("float32", run_matrix(np.float32), responses, args.upsert_batch, args.repeat),
+        measure("float16", run_matrix(np.float16), responses, args.upsert_batch, args.repeat),
+    ]
+    baseline = results[0]
+    for row in results:
+        row["chunks_per_second"] = args.chunks / row["seconds"]
+        row["memory_vs_lists"] = row["peak_mb"] / baseline["peak_mb"]
+
+    if args.json:
+        print(json.dumps({"chunks": args.chunks, "dim": args.dim, "results": results}, indent=2))
+        return 0
+
+    print(f"{args.chunks} chunks x {args.dim} dims, embed batch {args.batch_size}, upsert batch {args.upsert_batch}")
+    print(f"{'variant':<10}{'seconds':>10}{'chunks/s':>12}{'peak MB':>10}{'vs lists':>10}")
+    for row in results:
+        print(f"{row['variant']:<10}{row['seconds']:>10.2f}{row['chunks_per_second']:>12.0f}"
+              f"{row['peak_mb']:>10.1f}{row['memory_vs_lists']:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,8 +8,10 @@ import json
 import os
 import hashlib
 import logging
+import shutil
+import threading
 from pathlib import Path
-from typing import Dict, Optional, Any, Callable
+from typing import Dict, Iterable, Optional, Any, Callable, Set
 
 logger = logging.getLogger(__name__)
 
@@ -67,6 +69,8 @@ def delete_collection_cache(canonical_id: str, config: Optional[Any] = None) ->
 
     Behavior:
         - Remove file matching exactly 'cache_{id}.json' in the resolved cache dir.
+        - Also remove the point-ID sidecar and the 'lexical_{id}', 'symbols_{id}',
+          'graph_{id}' and 'trigram_{id}' index directories (not counted).
         - Return integer count of files removed (0 or 1).
         - Missing directory: return 0 (no error).
         - On removal errors: log WARNING and continue.
@@ -88,6 +92,18 @@ def delete_collection_cache(canonical_id: str, config: Optional[Any] = None) ->
             removed = 1
         except (OSError, IOError) as e:
             logger.warning(f"Cache cleanup: could not remove '{target}': {e}")
+    # Point-ID sidecar of the same collection; not counted as a separate cache
+    sidecar = cache_dir / f"cache_{canonical_id}_points.json"
+    if sidecar.exists():
+        try:
+            sidecar.unlink()
+        except (OSError, IOError) as e:
+            logger.warning(f"Cache cleanup: could not remove '{sidecar}': {e}")
+    # Lexical index, symbol table, code graph and trigram directories of the same workspace; also not counted
+    for prefix in ("lexical", "symbols", "graph", "trigram"):
+        index_dir = cache_dir / f"{prefix}_{canonical_id}"
+        if index_dir.is_dir():
+            shutil.rmtree(index_dir, ignore_errors=True)
 
     logger.info(
         f"Cache cleanup: removed {removed} file(s) for collection id {canonical_id} from {cache_dir}"
@@ -101,6 +117,8 @@ def clear_all_caches(config: Optional[Any] = None) -> int:
 
     Behavior:
         - Remove all files matching 'cache_*.json' under the resolved cache directory.
+        - Also remove lexical index, symbol table, code graph and trigram index directories
+          ('lexical_*', 'symbols_*', 'graph_*', 'trigram_*'; not counted).
         - Return integer count of files removed.
         - Missing directory: return 0 (no error).
         - On removal errors: log WARNING and continue.
@@ -124,6 +142,10 @@ def clear_all_caches(config: Optional[Any] = None) -> int:
                 removed += 1
             except (OSError, IOError) as e:
                 logger.warning(f"Cache cleanup: could not remove '{p}': {e}")
+        for pattern in ("lexical_*", "symbols_*", "graph_*", "trigram_*"):
+            for p in cache_dir.glob(pattern):
+                if p.is_dir():
+                    shutil.rmtree(p, ignore_errors=True)
     except Exception as e:  # pragma: no cover - unexpected filesystem errors
         logger.warning(f"Cache cleanup: directory scan error for '{cache_dir}': {e}")
 
@@ -132,7 +154,15 @@ def clear_all_caches(config: Optional[Any] = None) -> int:
 
 
 class CacheManager:
-    """Manages file hashes to avoid reprocessing unchanged files."""
+    """Manages file hashes to avoid reprocessing unchanged files.
+
+    Alongside the hashes it keeps, in a ``_points.json`` sidecar, the Qdrant
+    point IDs stored for each file version, so a changed file can be
+    re-indexed by deleting only the IDs that went away.
+    """
+
+    # Point-ID sets are written in bulk; an entry only counts while its hash matches
+    POINT_IDS_SAVE_INTERVAL = 200
 
     def __init__(self, workspace_path: str, config: Optional[Any] = None):
         """Initialize cache manager for a workspace."""
@@ -140,6 +170,11 @@ class CacheManager:
         self._config = config
         self.cache_path = self._generate_cache_path()
         self.file_hashes: Dict[str, str] = self._load_cache()
+        self.point_ids_path = self.cache_path[:-len(".json")] + "_points.json"
+        self._point_ids: Optional[Dict[str, Dict[str, Any]]] = None
+        self._point_ids_dirty = 0
+        # Guards both files; the vector spool drainer commits from its own thread
+        self._lock = threading.RLock()
 
     def _generate_cache_path(self) -> str:
         """Generate cache file path based on workspace path."""
@@ -163,7 +198,7 @@ class CacheManager:
         try:
             # Create directory if it doesn't exist
             os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
-            with open(self.cache_path, "w") as f:
+            with self._lock, open(self.cache_path, "w") as f:
                 json.dump(self.file_hashes, f, indent=2)
         except (IOError, OSError) as e:
             print(f"Warning: Could not save cache to {self.cache_path}: {e}")
@@ -174,24 +209,82 @@ class CacheManager:
 
     def update_hash(self, file_path: str, file_hash: str) -> None:
         """Update hash for file path."""
-        self.file_hashes[file_path] = file_hash
-        self._save_cache()
+        with self._lock:
+            self.file_hashes[file_path] = file_hash
+            self._save_cache()
 
     def delete_hash(self, file_path: str) -> None:
         """Delete hash for file path."""
-        if file_path in self.file_hashes:
-            del self.file_hashes[file_path]
-            self._save_cache()
+        with self._lock:
+            if file_path in self.file_hashes:
+                del self.file_hashes[file_path]
+                self._save_cache()
+            if self._load_point_ids().pop(file_path, None) is not None:
+                self._point_ids_dirty += 1
+                self.save_point_ids()
+
+    def get_point_ids(self, file_path: str) -> Optional[Set[str]]:
+        """
+        Return the point IDs stored for the cached version of a file.
+
+        Returns:
+            The ID set, or None when it is unknown (never recorded, or
+            recorded for a different version than the cached hash)
+        """
+        entry = self._load_point_ids().get(file_path)
+        if not entry or entry.get("hash") != self.file_hashes.get(file_path):
+            return None
+        return set(entry.get("ids", []))
+
+    def set_point_ids(self, file_path: str, file_hash: str, point_ids: Iterable[str]) -> None:
+        """Record the point IDs written for one version of a file."""
+        with self._lock:
+            self._load_point_ids()[file_path] = {"hash": file_hash, "ids": sorted(point_ids)}
+            self._point_ids_dirty += 1
+            if self._point_ids_dirty >= self.POINT_IDS_SAVE_INTERVAL:
+                self.save_point_ids()
+
+    def save_point_ids(self) -> None:
+        """Write pending point-ID changes to the sidecar file."""
+        if self._point_ids is None or not self._point_ids_dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.point_ids_path), exist_ok=True)
+            tmp_path = self.point_ids_path + ".tmp"
+            with self._lock, open(tmp_path, "w") as f:
+                json.dump(self._point_ids, f)
+            os.replace(tmp_path, self.point_ids_path)
+            self._point_ids_dirty = 0
+        except (IOError, OSError) as e:
+            logger.warning(f"Could not save point IDs to {self.point_ids_path}: {e}")
+
+    def _load_point_ids(self) -> Dict[str, Dict[str, Any]]:
+        if self._point_ids is None:
+            self._point_ids = {}
+            if os.path.exists(self.point_ids_path):
+                try:
+                    with open(self.point_ids_path, "r") as f:
+                        loaded = json.load(f)
+                    if isinstance(loaded, dict):
+                        self._point_ids = loaded
+                except (json.JSONDecodeError, IOError, OSError):
+                    pass
+        return self._point_ids
 
     def get_all_hashes(self) -> Dict[str, str]:
         """Get a copy of all file hashes."""
-        return self.file_hashes.copy()
+        with self._lock:
+            return self.file_hashes.copy()
 
     def clear_cache(self) -> None:
         """Clear all cache data for this workspace."""
         self.file_hashes.clear()
+        self._point_ids = {}
+        self._point_ids_dirty = 0
         try:
             if os.path.exists(self.cache_path):
                 os.remove(self.cache_path)
+            if os.path.exists(self.point_ids_path):
+                os.remove(self.point_ids_path)
         except (IOError, OSError) as e:
             print(f"Warning: Could not delete cache file {self.cache_path}: {e}")
\ No newline at end of file
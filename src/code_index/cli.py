@@ -42,6 +42,10 @@ from code_index.path_utils import PathUtils
 from code_index.services.shared.command_context import CommandContext
 from code_index.services.command.config_overrides import build_index_overrides, build_search_overrides
 from code_index.logging_utils import LoggingConfigurator
+from code_index.search_fusion import SEARCH_MODES
+from code_index.symbol_index import SymbolIndex
+from code_index.code_graph import CodeGraph
+from code_index.trigram_index import TrigramIndex
 
 # Global error handler instance
 error_handler = ErrorHandler()
@@ -436,6 +440,108 @@ def _process_single_workspace(workspace: str, config: str, embed_timeout: int |
     return result.processed_files, result.total_blocks, len(result.timed_out_files)
 
 
+def _load_queries_file(queries_file: str) -> List[str]:
+    """Read one query per line, skipping blank lines and '#' comments."""
+    with open(queries_file, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def _create_code_snippet(code_chunk: str, preview_length: int) -> str:
+    """
+    Create a well-formatted code snippet for search results.
+
+    Args:
+        code_chunk: Full code content
+        preview_length: Maximum length for the snippet
+
+    Returns:
+        Formatted code snippet with proper truncation
+    """
+    if not code_chunk:
+        return ""
+
+    # Clean up the code chunk - preserve some structure but make it readable
+    lines = code_chunk.split('\n')
+
+    # Remove excessive empty lines but preserve some structure
+    cleaned_lines = []
+    prev_empty = False
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            if not prev_empty:
+                cleaned_lines.append("")
+                prev_empty = True
+        else:
+            cleaned_lines.append(line.rstrip())
+            prev_empty = False
+
+    # Join back and truncate
+    cleaned_code = '\n'.join(cleaned_lines).strip()
+
+    if len(cleaned_code) <= preview_length:
+        return cleaned_code
+
+    # Truncate at word boundary if possible
+    truncated = cleaned_code[:preview_length]
+
+    # Try to truncate at a reasonable boundary (space, newline, or punctuation)
+    for boundary in ['\n', ' ', ';', ',', ')', '}', ']']:
+        last_boundary = truncated.rfind(boundary)
+        if last_boundary > preview_length * 0.8:  # Don't truncate too early
+            truncated = truncated[:last_boundary + 1]
+            break
+
+    return truncated.rstrip() + "..."
+
+
+def _search_result_items(result, config) -> List[dict]:
+    """JSON items of a search result's matches."""
+    output = []
+    preview_chars = getattr(config, "search_snippet_preview_chars", 500)
+    for match in result.matches:
+        snippet = _create_code_snippet(match.code_chunk, preview_chars)
+        item = {
+            "filePath": match.file_path,
+            "startLine": match.start_line,
+            "endLine": match.end_line,
+            "type": match.match_type,
+            "score": match.score,
+            "adjustedScore": match.adjusted_score,
+            "snippet": snippet.replace("\n", "\\n"),
+        }
+        if match.metadata.get("cluster_siblings"):
+            item["siblings"] = match.metadata["cluster_siblings"]
+        output.append(item)
+    return output
+
+
+def _print_search_result(result, config) -> None:
+    """Print the errors or matches of one search result."""
+    if not result.is_successful():
+        print(f"Search completed with errors: {len(result.errors)} errors")
+        for error in result.errors[:5]:  # Show first 5 errors
+            print(f"  - {error}")
+        if len(result.errors) > 5:
+            print(f"  ... and {len(result.errors) - 5} more errors")
+        return
+
+    if not result.has_matches():
+        print("No results found.")
+        return
+
+    print(f"Found {result.total_found} results:")
+    preview_chars = getattr(config, "search_snippet_preview_chars", 500)
+    for i, match in enumerate(result.matches, 1):
+        print(f"\n{i}. Score: {match.score:.3f} (adj {match.adjusted_score:.3f})")
+        print(f"   File: {match.file_path}:{match.start_line}-{match.end_line}")
+        siblings = match.metadata.get("cluster_siblings") or []
+        if siblings:
+            print(f"   Near-duplicates: {len(siblings)} more (e.g. {siblings[0]['filePath']}:{siblings[0]['startLine']}-{siblings[0]['endLine']})")
+        snippet = _create_code_snippet(match.code_chunk, preview_chars)
+        print(f"   Preview:\n{snippet}")
+
+
 @cli.command()
 @helptree_options
 @click.pass_context
@@ -446,11 +552,19 @@ def _process_single_workspace(workspace: str, config: str, embed_timeout: int |
 @click.option('--json', 'json_output', is_flag=True, help='Output results as JSON')
 @click.option('--filetype', '-ft', type=str, default=None, help='Filter by file type/language (e.g. go, py, rs, md, js). Skips language weight boosting.')
 @click.option('--name', '--collection-name', type=str, default=None, help='Search a specific collection by name instead of workspace path.')
-@click.argument('query')
-def search(ctx, help_tree: bool, help_tree_json: bool, workspace: str, config: str, min_score: float, max_results: int, json_output: bool, filetype: str, name: str, query: str):
+@click.option('--path', 'path_prefix', type=str, default=None, help='Only return results below this workspace-relative directory (e.g. src/api).')
+@click.option('--mode', type=click.Choice(SEARCH_MODES), default=None, help='Search mode: vector (semantic), lexical (BM25) or hybrid (both, fused). Defaults to search_mode.')
+@click.option('--queries-file', type=click.Path(exists=True, dir_okay=False), default=None, help='Run every query in this file (one per line) as one batch instead of QUERY.')
+@click.argument('query', required=False)
+def search(ctx, help_tree: bool, help_tree_json: bool, workspace: str, config: str, min_score: float, max_results: int, json_output: bool, filetype: str, name: str, path_prefix: str, mode: str, queries_file: str | None, query: str | None):
     """Search indexed code using semantic similarity."""
     ctx = click.get_current_context()
     handle_helptree_invocation(ctx, search)
+    if bool(query) == bool(queries_file):
+        raise click.UsageError("Give either QUERY or --queries-file")
+    queries = _load_queries_file(queries_file) if queries_file else [query]
+    if not queries:
+        raise click.UsageError(f"No queries in {queries_file}")
     cli_overrides = build_search_overrides(
         min_score=min_score,
         max_results=max_results,
@@ -465,96 +579,184 @@ def search(ctx, help_tree: bool, help_tree_json: bool, workspace: str, config: s
     if name:
         deps.config.collection_name_override = name
 
-    result = deps.search_service.search_code(query, deps.config, filetype=filetype)
+    search_kwargs = {"filetype": filetype}
+    if path_prefix:
+        search_kwargs["path_prefix"] = path_prefix
+    if mode:
+        search_kwargs["mode"] = mode
+
+    if queries_file:
+        # One embedding request and one vector store round trip for the whole file
+        results = deps.search_service.search_batch(queries, deps.config, **search_kwargs)
+        if json_output:
+            output = [{"query": result.query, "errors": result.errors,
+                       "results": _search_result_items(result, deps.config) if result.is_successful() else []}
+                      for result in results]
+            print(json.dumps(output, indent=2, ensure_ascii=False))
+            return
+        if filetype:
+            print(f"[Filetype filter: {filetype}]")
+        for result in results:
+            print(f"\n=== {result.query} ===")
+            _print_search_result(result, deps.config)
+        return
+
+    result = deps.search_service.search_code(query, deps.config, **search_kwargs)
 
     # Display results
     if not result.is_successful():
-        print(f"Search completed with errors: {len(result.errors)} errors")
-        for error in result.errors[:5]:  # Show first 5 errors
-            print(f"  - {error}")
-        if len(result.errors) > 5:
-            print(f"  ... and {len(result.errors) - 5} more errors")
+        _print_search_result(result, deps.config)
         return
 
     if filetype:
         print(f"[Filetype filter: {filetype}]")
 
-    if not result.has_matches():
-        print("No results found.")
+    if json_output and result.has_matches():
+        print(json.dumps(_search_result_items(result, deps.config), indent=2, ensure_ascii=False))
         return
 
-    def create_code_snippet(code_chunk: str, preview_length: int) -> str:
-        """
-        Create a well-formatted code snippet for search results.
-        
-        Args:
-            code_chunk: Full code content
-            preview_length: Maximum length for the snippet
-            
-        Returns:
-            Formatted code snippet with proper truncation
-        """
-        if not code_chunk:
-            return ""
-        
-        # Clean up the code chunk - preserve some structure but make it readable
-        lines = code_chunk.split('\n')
-        
-        # Remove excessive empty lines but preserve some structure
-        cleaned_lines = []
-        prev_empty = False
-        for line in lines:
-            stripped = line.strip()
-            if not stripped:
-                if not prev_empty:
-                    cleaned_lines.append("")
-                    prev_empty = True
-            else:
-                cleaned_lines.append(line.rstrip())
-                prev_empty = False
-        
-        # Join back and truncate
-        cleaned_code = '\n'.join(cleaned_lines).strip()
-        
-        if len(cleaned_code) <= preview_length:
-            return cleaned_code
-        
-        # Truncate at word boundary if possible
-        truncated = cleaned_code[:preview_length]
-        
-        # Try to truncate at a reasonable boundary (space, newline, or punctuation)
-        for boundary in ['\n', ' ', ';', ',', ')', '}', ']']:
-            last_boundary = truncated.rfind(boundary)
-            if last_boundary > preview_length * 0.8:  # Don't truncate too early
-                truncated = truncated[:last_boundary + 1]
-                break
-        
-        return truncated.rstrip() + "..."
+    _print_search_result(result, deps.config)
+
+
 
+@cli.command()
+@helptree_options
+@click.pass_context
+@click.option('--workspace', default='.', help='Workspace path')
+@click.option('--config', default='code_index.json', help='Configuration file')
+@click.option('--prefix', 'match', flag_value='prefix', help='Match names starting with NAME')
+@click.option('--fuzzy', 'match', flag_value='fuzzy', help='Match names containing NAME or spelled like it')
+@click.option('--kind', type=click.Choice(['class', 'function']), default=None, help='Only show this kind of definition')
+@click.option('--limit', type=int, default=20, show_default=True, help='Maximum number of definitions')
+@click.option('--json', 'json_output', is_flag=True, help='Output results as JSON')
+@click.argument('name')
+def symbols(ctx, help_tree: bool, help_tree_json: bool, workspace: str, config: str, match: str, kind: str, limit: int, json_output: bool, name: str):
+    """Find where classes and functions are defined (needs symbol_index_enabled)."""
+    ctx = click.get_current_context()
+    handle_helptree_invocation(ctx, symbols)
+    cfg = command_context.load_local_config(workspace_path=workspace, config_path=config)
+    index = SymbolIndex.for_workspace(cfg)
+    if not index.exists():
+        print("No symbol table for this workspace. Set symbol_index_enabled and re-index.")
+        sys.exit(1)
+
+    results = index.lookup(name, match=match or "exact", kind=kind, limit=limit)
     if json_output:
-        output = []
-        preview_chars = getattr(deps.config, "search_snippet_preview_chars", 500)
-        for match in result.matches:
-            snippet = create_code_snippet(match.code_chunk, preview_chars)
-            output.append({
-                "filePath": match.file_path,
-                "startLine": match.start_line,
-                "endLine": match.end_line,
-                "type": match.match_type,
-                "score": match.score,
-                "adjustedScore": match.adjusted_score,
-                "snippet": snippet.replace("\n", "\\n"),
-            })
-        print(json.dumps(output, indent=2, ensure_ascii=False))
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        return
+    if not results:
+        print("No definitions found.")
         return
+    for item in results:
+        qualified = f"{item['scope']}.{item['name']}" if item["scope"] else item["name"]
+        print(f"{item['kind']:<8} {qualified}  {item['filePath']}:{item['startLine']}-{item['endLine']}")
 
-    print(f"Found {result.total_found} results:")
-    preview_chars = getattr(deps.config, "search_snippet_preview_chars", 500)
-    for i, match in enumerate(result.matches, 1):
-        print(f"\n{i}. Score: {match.score:.3f} (adj {match.adjusted_score:.3f})")
-        print(f"   File: {match.file_path}:{match.start_line}-{match.end_line}")
-        snippet = create_code_snippet(match.code_chunk, preview_chars)
-        print(f"   Preview:\n{snippet}")
+
+
+def _graph_query(relation: str, workspace: str, config: str, name: str, depth: int, limit: int, json_output: bool):
+    """Run a call/import graph query and print the reached nodes."""
+    cfg = command_context.load_local_config(workspace_path=workspace, config_path=config)
+    graph = CodeGraph.for_workspace(cfg)
+    if not graph.exists():
+        print("No code graph for this workspace. Set code_graph_enabled and re-index.")
+        sys.exit(1)
+    max_depth = getattr(cfg, "code_graph_max_depth", 5)
+    if depth > max_depth:
+        print(f"Depth limited to code_graph_max_depth ({max_depth})")
+        depth = max_depth
+
+    results = graph.query(relation, name, depth=depth, limit=limit)
+    if json_output:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        return
+    if not results:
+        print(f"No {relation} found for {name}.")
+        return
+    for item in results:
+        qualified = f"{item['scope']}.{item['name']}" if item["scope"] else item["name"]
+        location = ""
+        if item["filePath"] and item["kind"] != "file":
+            location = f"  {item['filePath']}:{item['startLine']}-{item['endLine']}"
+        print(f"{'  ' * (item['depth'] - 1)}{item['kind']:<8} {qualified}{location}")
+
+
+def graph_options(f):
+    """Options shared by the call/import graph commands."""
+    f = click.option('--json', 'json_output', is_flag=True, help='Output results as JSON')(f)
+    f = click.option('--limit', type=int, default=50, show_default=True, help='Maximum number of results')(f)
+    f = click.option('--depth', type=click.IntRange(min=1), default=1, show_default=True, help='Number of hops to follow')(f)
+    f = click.option('--config', default='code_index.json', help='Configuration file')(f)
+    f = click.option('--workspace', default='.', help='Workspace path')(f)
+    return f
+
+
+@cli.command()
+@helptree_options
+@click.pass_context
+@graph_options
+@click.argument('name')
+def callers(ctx, help_tree: bool, help_tree_json: bool, workspace: str, config: str, depth: int, limit: int, json_output: bool, name: str):
+    """Show what calls a function (needs code_graph_enabled)."""
+    handle_helptree_invocation(click.get_current_context(), callers)
+    _graph_query("callers", workspace, config, name, depth, limit, json_output)
+
+
+@cli.command()
+@helptree_options
+@click.pass_context
+@graph_options
+@click.argument('name')
+def callees(ctx, help_tree: bool, help_tree_json: bool, workspace: str, config: str, depth: int, limit: int, json_output: bool, name: str):
+    """Show what a function or file calls (needs code_graph_enabled)."""
+    handle_helptree_invocation(click.get_current_context(), callees)
+    _graph_query("callees", workspace, config, name, depth, limit, json_output)
+
+
+@cli.command()
+@helptree_options
+@click.pass_context
+@graph_options
+@click.argument('target')
+def importers(ctx, help_tree: bool, help_tree_json: bool, workspace: str, config: str, depth: int, limit: int, json_output: bool, target: str):
+    """Show which files import a file or module (needs code_graph_enabled)."""
+    handle_helptree_invocation(click.get_current_context(), importers)
+    _graph_query("importers", workspace, config, target, depth, limit, json_output)
+
+
+@cli.command()
+@helptree_options
+@click.pass_context
+@click.option('--workspace', default='.', help='Workspace path')
+@click.option('--config', default='code_index.json', help='Configuration file')
+@click.option('--regex', '-E', is_flag=True, help='Treat PATTERN as a (Python) regular expression')
+@click.option('--ignore-case', '-i', is_flag=True, help='Match case-insensitively')
+@click.option('--path', 'path_prefix', type=str, default=None, help='Only search below this workspace-relative directory (e.g. src/api).')
+@click.option('--filetype', '-ft', type=str, default=None, help='Only search files of this type/language (e.g. go, py, rs).')
+@click.option('--limit', type=int, default=100, show_default=True, help='Maximum number of matching lines')
+@click.option('--json', 'json_output', is_flag=True, help='Output results as JSON')
+@click.argument('pattern')
+def grep(ctx, help_tree: bool, help_tree_json: bool, workspace: str, config: str, regex: bool, ignore_case: bool, path_prefix: str, filetype: str, limit: int, json_output: bool, pattern: str):
+    """Find every line containing a string or regex (needs trigram_index_enabled)."""
+    handle_helptree_invocation(click.get_current_context(), grep)
+    cfg = command_context.load_local_config(workspace_path=workspace, config_path=config)
+    index = TrigramIndex.for_workspace(cfg)
+    if not index.exists():
+        print("No trigram index for this workspace. Set trigram_index_enabled and re-index.")
+        sys.exit(1)
+
+    try:
+        result = index.grep(pattern, regex=regex, ignore_case=ignore_case, max_results=limit,
+                            filetype=filetype, path_prefix=path_prefix)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if json_output:
+        print(json.dumps(result.hits, indent=2, ensure_ascii=False))
+        return
+    for hit in result.hits:
+        print(f"{hit['filePath']}:{hit['line']}:{hit['column']}: {hit['text']}")
+    summary = f"{len(result.hits)} matching lines; searched {result.candidate_files} of {result.total_files} files"
+    print(summary + (f" (stopped at --limit {limit})" if result.truncated else ""))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,351 @@
+"""
+Call and import graph of a workspace.
+
+The relationship queries of the tree-sitter chunker capture calls and
+imports next to the definitions; the extractor records the callee and the
+calling definition of every call and the modules named by every import.
+During indexing those facts are kept per file and, on ``save()``, resolved
+best effort against the workspace:
+
+- a call links its calling definition (or the file, for top-level code) to
+  the definitions of the callee's name, preferring the same file, then the
+  files it imports; names defined nowhere become ``external`` nodes
+- an import links the importing file to the workspace file the module
+  resolves to (relative paths, dotted and ``::`` paths, package
+  ``__init__``/``index``/``mod`` files), or to a ``module`` node
+
+Edges are stored as CSR arrays (an offsets array and a targets array per
+direction), so callers, callees and importers are slices of one array and a
+bounded-depth traversal touches only the nodes it returns.
+
+The graph lives in ``graph_<workspace id>`` under the cache directory::
+
+    graph.json          files, their hashes and extracted facts, and the node table
+    graph.<gen>.npz     offsets and targets of the calls, callers, imports and
+                        importers adjacency
+"""
+import os
+import posixpath
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from code_index.per_file_index import PerFileIndex
+from code_index.symbol_index import SymbolEntry
+
+RELATIONS = ("callers", "callees", "importers")
+# A call to a name defined in several unrelated files links to at most this many definitions
+MAX_CALL_CANDIDATES = 8
+# Files that stand for the directory (package) they are in
+_PACKAGE_FILES = ("__init__", "index", "mod")
+# Adjacency each relation walks
+_RELATION_ARRAYS = {"callers": "callers", "callees": "calls", "importers": "importers"}
+
+
+@dataclass
+class FileFacts:
+    """Definitions, calls and imports extracted from one file."""
+
+    definitions: List[SymbolEntry] = field(default_factory=list)
+    # (qualified name of the calling definition, "" at top level; callee name)
+    calls: List[Tuple[str, str]] = field(default_factory=list)
+    imports: List[str] = field(default_factory=list)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "defs": [[d.name, d.kind, d.start_line, d.end_line, d.scope] for d in self.definitions],
+            "calls": [list(call) for call in self.calls],
+            "imports": list(self.imports),
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "FileFacts":
+        return cls([SymbolEntry(*row) for row in data.get("defs", [])],
+                   [(caller, callee) for caller, callee in data.get("calls", [])],
+                   list(data.get("imports", [])))
+
+
+def _module_stems(names: List[str]) -> Dict[str, int]:
+    """Extension-less path of every file (and the directory of package files) -> file index."""
+    stems: Dict[str, int] = {}
+    for file_index, name in enumerate(names):
+        stem = os.path.splitext(name)[0]
+        stems.setdefault(stem, file_index)
+        directory, base = posixpath.split(stem)
+        if base in _PACKAGE_FILES and directory:
+            stems.setdefault(directory, file_index)
+    return stems
+
+
+def resolve_module(module: str, importer: str, stems: Dict[str, int]) -> Optional[int]:
+    """Index of the workspace file an import of ``module`` in ``importer`` refers to, if any."""
+    directory = posixpath.dirname(importer)
+    if module.startswith("."):
+        if "/" in module:
+            candidates = [posixpath.normpath(posixpath.join(directory, module))]
+        else:
+            # Python relative import: one leading dot per package level
+            levels = len(module) - len(module.lstrip("."))
+            base = directory
+            for _ in range(levels - 1):
+                base = posixpath.dirname(base)
+            rest = module.lstrip(".").replace(".", "/")
+            candidates = [posixpath.join(base, rest) if rest else base]
+    else:
+        path = module.replace("::", "/")
+        if "/" not in path:
+            path = path.replace(".", "/")
+        for prefix in ("crate/", "self/"):
+            if path.startswith(prefix):
+                path = path[len(prefix):]
+        candidates = [posixpath.normpath(posixpath.join(directory, path)), path]
+    for candidate in candidates:
+        for key in (candidate, os.path.splitext(candidate)[0]):
+            if key in stems:
+                return stems[key]
+    if "/" in candidates[-1]:
+        # Package paths are usually rooted below the workspace root (src/, lib/)
+        suffix = "/" + candidates[-1]
+        matches = sorted((stem for stem in stems if stem.endswith(suffix)), key=len)
+        if matches:
+            return stems[matches[0]]
+    return None
+
+
+def _csr(sources: List[int], targets: List[int], node_count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Offsets and targets arrays of an edge list, targets sorted per source."""
+    offsets = np.zeros(node_count + 1, dtype=np.int32)
+    if not sources:
+        return offsets, np.zeros(0, dtype=np.int32)
+    src = np.asarray(sources, dtype=np.int64)
+    dst = np.asarray(targets, dtype=np.int64)
+    order = np.lexsort((dst, src))
+    np.cumsum(np.bincount(src, minlength=node_count), out=offsets[1:])
+    return offsets, dst[order].astype(np.int32)
+
+
+class CodeGraph(PerFileIndex):
+    """Per-workspace call and import graph with bounded-depth traversal."""
+
+    META_FILE = "graph.json"
+    DATA_FILE = "graph.{generation}.npz"
+    DIRECTORY_PREFIX = "graph"
+    ENABLED_FLAG = "code_graph_enabled"
+
+    def _reset_view(self) -> None:
+        # Query view: node table and adjacency arrays of the saved generation
+        super()._reset_view()
+        self._stored_facts: List[Dict[str, Any]] = []
+        self._node_name: List[str] = []
+        self._node_kind: List[str] = []
+        self._node_file: List[int] = []
+        self._node_start: List[int] = []
+        self._node_end: List[int] = []
+        self._node_scope: List[str] = []
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._by_name: Optional[Dict[str, List[int]]] = None
+
+    # ------------------------------
+    # Loading
+    # ------------------------------
+    def _load(self, meta: Dict[str, Any]) -> None:
+        self._stored_facts = list(meta.get("files", {}).get("facts", []))
+        nodes = meta.get("nodes", {})
+        self._node_name = list(nodes.get("name", []))
+        self._node_kind = list(nodes.get("kind", []))
+        self._node_file = list(nodes.get("file", []))
+        self._node_start = list(nodes.get("start", []))
+        self._node_end = list(nodes.get("end", []))
+        self._node_scope = list(nodes.get("scope", []))
+        arrays_path = self._data_path(self._generation)
+        if os.path.isfile(arrays_path):
+            with np.load(arrays_path) as data:
+                self._arrays = {key: data[key] for key in data.files}
+
+    # ------------------------------
+    # Updates
+    # ------------------------------
+    def _split_by_file(self) -> Dict[str, Tuple[str, FileFacts]]:
+        """Per-file facts as stored with the graph."""
+        return {
+            name: (self._file_hashes.get(name, ""), FileFacts.from_json(facts))
+            for name, facts in zip(self._file_names, self._stored_facts)
+        }
+
+    def update_file(self, rel_path: str, file_hash: str, facts: FileFacts) -> None:
+        """Replace the facts of a file with those of its current version."""
+        self._set_file(rel_path, file_hash, facts)
+
+    def _build(self, names: List[str]) -> Tuple[Dict[str, List[Any]], Dict[str, np.ndarray]]:
+        """Resolve the facts of all files into the node table and adjacency arrays."""
+        files = self._files or {}
+        nodes: Dict[str, List[Any]] = {"name": [], "kind": [], "file": [], "start": [], "end": [], "scope": []}
+        external: Dict[Tuple[str, str], int] = {}
+
+        def add_node(name: str, kind: str, file_index: int = -1, start: int = 0, end: int = 0,
+                     scope: str = "") -> int:
+            for key, value in zip(("name", "kind", "file", "start", "end", "scope"),
+                                  (name, kind, file_index, start, end, scope)):
+                nodes[key].append(value)
+            return len(nodes["name"]) - 1
+
+        def external_node(name: str, kind: str) -> int:
+            node = external.get((kind, name))
+            if node is None:
+                node = external[(kind, name)] = add_node(name, kind)
+            return node
+
+        file_nodes = [add_node(name, "file", file_index) for file_index, name in enumerate(names)]
+        definitions: Dict[str, List[int]] = {}
+        qualified: Dict[Tuple[int, str], int] = {}
+        for file_index, name in enumerate(names):
+            for entry in files[name][1].definitions:
+                node = add_node(entry.name, entry.kind, file_index, entry.start_line, entry.end_line, entry.scope)
+                definitions.setdefault(entry.name, []).append(node)
+                qualified.setdefault((file_index, entry.qualified_name), node)
+
+        stems = _module_stems(names)
+        import_edges: Set[Tuple[int, int]] = set()
+        imported_files: Dict[int, Set[int]] = {}
+        for file_index, name in enumerate(names):
+            for module in files[name][1].imports:
+                target = resolve_module(module, name, stems)
+                if target is None:
+                    import_edges.add((file_nodes[file_index], external_node(module, "module")))
+                elif target != file_index:
+                    import_edges.add((file_nodes[file_index], file_nodes[target]))
+                    imported_files.setdefault(file_index, set()).add(target)
+
+        call_edges: Set[Tuple[int, int]] = set()
+        for file_index, name in enumerate(names):
+            imports = imported_files.get(file_index, set())
+            for caller, callee in files[name][1].calls:
+                source = qualified.get((file_index, caller), file_nodes[file_index]) if caller else file_nodes[file_index]
+                candidates = definitions.get(callee, [])
+                targets = [n for n in candidates if nodes["file"][n] == file_index]
+                if not targets:
+                    targets = [n for n in candidates if nodes["file"][n] in imports] or candidates[:MAX_CALL_CANDIDATES]
+                if not targets:
+                    targets = [external_node(callee, "external")]
+                call_edges.update((source, target) for target in targets)
+
+        count = len(nodes["name"])
+        arrays: Dict[str, np.ndarray] = {}
+        for forward, reverse, edges in (("calls", "callers", call_edges), ("imports", "importers", import_edges)):
+            sources = [edge[0] for edge in edges]
+            targets = [edge[1] for edge in edges]
+            arrays[f"{forward}_offsets"], arrays[f"{forward}_targets"] = _csr(sources, targets, count)
+            arrays[f"{reverse}_offsets"], arrays[f"{reverse}_targets"] = _csr(targets, sources, count)
+        return nodes, arrays
+
+    def _write_generation(self, names: List[str], generation: int, meta: Dict[str, Any]) -> None:
+        """Resolve the facts of all files and write the adjacency arrays."""
+        nodes, arrays = self._build(names)
+        self._write_atomic(self._data_path(generation), lambda f: np.savez(f, **arrays))
+        files = self._files or {}
+        meta["files"]["facts"] = [files[name][1].to_json() for name in names]
+        meta["nodes"] = nodes
+
+    # ------------------------------
+    # Queries
+    # ------------------------------
+    @property
+    def node_count(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._node_name)
+
+    def _start_nodes(self, relation: str, name: str) -> List[int]:
+        """Nodes a query starts from: definitions (optionally scope-qualified) or files and modules."""
+        if self._by_name is None:
+            self._by_name = {}
+            for node, node_name in enumerate(self._node_name):
+                self._by_name.setdefault(node_name.lower(), []).append(node)
+        query = name.strip().replace("\\", "/")
+        if relation == "importers":
+            wanted = query.lower()
+            stems = {os.path.splitext(wanted)[0], wanted.replace(".", "/").replace("::", "/")}
+            nodes = []
+            for node, kind in enumerate(self._node_kind):
+                node_name = self._node_name[node].lower()
+                if kind == "module" and node_name == wanted:
+                    nodes.append(node)
+                elif kind == "file":
+                    node_stems = set(_module_stems([node_name]))
+                    if node_name == wanted or any(node_stem == s or node_stem.endswith("/" + s)
+                                                  for node_stem in node_stems for s in stems):
+                        nodes.append(node)
+            return nodes
+        nodes = [node for node in self._by_name.get(query.lower(), []) if self._node_kind[node] in ("file", "external")]
+        scope, _, symbol = query.rpartition(".")
+        if "/" in query:
+            return nodes
+        wanted_scope = scope.lower()
+        for node in self._by_name.get(symbol.lower(), []):
+            if self._node_kind[node] in ("file", "module", "external"):
+                continue
+            node_scope = self._node_scope[node].lower()
+            if not scope or node_scope == wanted_scope or node_scope.endswith("." + wanted_scope):
+                nodes.append(node)
+        return nodes
+
+    def _describe(self, node: int, depth: int) -> Dict[str, Any]:
+        file_index = self._node_file[node]
+        kind = self._node_kind[node]
+        located = file_index >= 0 and kind != "file"
+        return {
+            "name": self._node_name[node],
+            "kind": kind,
+            "filePath": self._file_names[file_index] if file_index >= 0 else None,
+            "startLine": self._node_start[node] if located else None,
+            "endLine": self._node_end[node] if located else None,
+            "scope": self._node_scope[node],
+            "depth": depth,
+        }
+
+    def query(self, relation: str, name: str, depth: int = 1, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Walk the graph from the definitions (or files) named ``name``.
+
+        Args:
+            relation: ``callers`` (who calls it), ``callees`` (what it calls) or
+                ``importers`` (which files import a file or module)
+            name: Definition name, optionally qualified by scope (``Reader.parse_file``),
+                or a workspace-relative file path / module name
+            depth: Number of hops to follow; 1 returns direct neighbours only
+            limit: Maximum number of nodes to return
+
+        Returns:
+            Reached nodes, nearest first, with ``name``, ``kind``, ``filePath``,
+            ``startLine``, ``endLine``, ``scope`` and ``depth``
+        """
+        if relation not in RELATIONS:
+            raise ValueError(f"relation must be one of {list(RELATIONS)}")
+        if depth < 1 or limit <= 0:
+            return []
+        with self._lock:
+            self._ensure_loaded()
+            array = _RELATION_ARRAYS[relation]
+            offsets = self._arrays.get(f"{array}_offsets")
+            targets = self._arrays.get(f"{array}_targets")
+            if offsets is None or targets is None:
+                return []
+            frontier = self._start_nodes(relation, name)
+            seen = set(frontier)
+            reached: List[Tuple[int, int]] = []
+            for level in range(1, depth + 1):
+                next_frontier: List[int] = []
+                for node in frontier:
+                    for target in targets[offsets[node]:offsets[node + 1]].tolist():
+                        if target in seen:
+                            continue
+                        seen.add(target)
+                        next_frontier.append(target)
+                        reached.append((target, level))
+                        if len(reached) >= limit:
+                            return [self._describe(n, d) for n, d in reached]
+                if not next_frontier:
+                    break
+                frontier = next_frontier
+            return [self._describe(n, d) for n, d in reached]
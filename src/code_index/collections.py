@@ -9,6 +9,11 @@ from typing import List, Dict, Any, Optional
 from qdrant_client import QdrantClient
 from qdrant_client.models import Filter, FieldCondition, MatchValue
 from code_index.config import Config
+from code_index.qdrant_local import is_local_url, local_client
+from code_index.qdrant_settings import describe_storage
+from code_index.tenancy import (
+    TENANT_FIELD, list_tenants, resolve_tenant, shared_collection_name, split_tenant_ref, tenant_ref,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -23,24 +28,30 @@ class CollectionManager:
         
         # Parse Qdrant URL
         url = config.qdrant_url
-        if url.startswith("http://"):
-            host = url[7:]
-            https = False
-        elif url.startswith("https://"):
-            host = url[8:]
-            https = True
+        if is_local_url(url):
+            # Embedded storage, shared with the vector stores of this process
+            self.client = local_client(url)
         else:
-            host = url
-            https = False
-        
-        if ":" in host:
-            host, port = host.split(":")
-            port = int(port)
-        else:
-            port = 6333
-            
-        self.client = QdrantClient(host=host, port=port, https=https)
+            if url.startswith("http://"):
+                host = url[7:]
+                https = False
+            elif url.startswith("https://"):
+                host = url[8:]
+                https = True
+            else:
+                host = url
+                https = False
+
+            if ":" in host:
+                host, port = host.split(":")
+                port = int(port)
+            else:
+                port = 6333
+
+            self.client = QdrantClient(host=host, port=port, https=https)
         self.collection_name = self.generate_collection_name(self.workspace_path)
+        # Multi-tenant collection whose workspaces are listed individually
+        self.shared_collection = shared_collection_name(config)
 
     def generate_collection_name(self, workspace_path: str) -> str:
         """Generate a unique collection name based on the workspace path."""
@@ -78,6 +89,10 @@ class CollectionManager:
             for c in collections:
                 c_name = c.name if hasattr(c, 'name') else str(c)
                 info = self.get_collection_info(c_name)
+                if c_name == self.shared_collection and "error" not in info:
+                    # One entry per workspace stored in the shared collection
+                    result.extend(self.list_tenant_infos(c_name, info))
+                    continue
                 # Correctly assign workspace path from mapping
                 if c_name in path_map:
                     info["workspace_path"] = path_map[c_name]
@@ -87,9 +102,68 @@ class CollectionManager:
             logger.error(f"Error listing collections: {e}")
             return []
 
+    def list_tenant_infos(self, collection_name: str, base_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Expand a shared collection's info into one entry per workspace."""
+        try:
+            tenants = list_tenants(self.client, collection_name)
+        except Exception as e:
+            logger.error(f"Error listing workspaces of shared collection {collection_name}: {e}")
+            return [base_info]
+        return [self._tenant_info(collection_name, tenant, count, base_info) for tenant, count in tenants]
+
+    def _tenant_info(self, collection_name: str, tenant: str, points_count: int,
+                     base_info: Dict[str, Any]) -> Dict[str, Any]:
+        info = dict(base_info)
+        info.update({
+            "name": tenant_ref(collection_name, tenant),
+            "points_count": points_count,
+            "vectors_count": points_count,
+            "workspace_path": self._tenant_workspace_path(collection_name, tenant),
+            "shared_collection": collection_name,
+            "tenant": tenant,
+        })
+        return info
+
+    def _tenant_workspace_path(self, collection_name: str, tenant: str) -> str:
+        try:
+            points, _ = self.client.scroll(
+                collection_name=collection_name,
+                scroll_filter=Filter(must=[FieldCondition(key=TENANT_FIELD, match=MatchValue(value=tenant))]),
+                limit=1,
+                with_payload=["workspace_path"],
+                with_vectors=False
+            )
+            if points and points[0].payload:
+                return points[0].payload.get("workspace_path") or "Unknown"
+        except Exception:
+            pass
+        return "Unknown"
+
+    def _resolve_tenant_ref(self, name: str) -> Optional[tuple]:
+        """Return ``(collection, workspace_hash)`` for a ``<collection>/<id>`` name, else None."""
+        collection, tenant_id = split_tenant_ref(name)
+        if tenant_id is None:
+            return None
+        tenant = resolve_tenant(self.client, collection, tenant_id)
+        if tenant is None:
+            raise ValueError(f"No single workspace '{tenant_id}' in collection '{collection}'")
+        return collection, tenant
+
     def get_collection_info(self, collection_name: Optional[str] = None) -> Dict[str, Any]:
-        """Get information about a specific collection."""
+        """Get information about a specific collection or a workspace in a shared collection."""
         name = collection_name or self.collection_name
+        if split_tenant_ref(name)[1] is not None:
+            try:
+                collection, tenant = self._resolve_tenant_ref(name)
+                count = self.client.count(
+                    collection_name=collection,
+                    count_filter=Filter(must=[FieldCondition(key=TENANT_FIELD, match=MatchValue(value=tenant))]),
+                    exact=True
+                ).count
+            except Exception as e:
+                logger.error(f"Error getting collection info for {name}: {e}")
+                return {"error": str(e)}
+            return self._tenant_info(collection, tenant, count, self.get_collection_info(collection))
         try:
             # Handle info which might be a mock object or dict
             info = self.client.get_collection(collection_name=name)
@@ -217,16 +291,33 @@ class CollectionManager:
                 "model": model,
                 "model_identifier": self.canonicalize_model(model),
                 "indexing_status": getattr(info, 'optimizer_status', 'unknown'),
-                "workspace_path": workspace_path 
+                "workspace_path": workspace_path,
+                "storage": describe_storage(info.get("config") if isinstance(info, dict) else getattr(info, "config", None)),
+                "payload_indexes": self._payload_indexes(info)
             }
         except Exception as e:
             logger.error(f"Error getting collection info for {name}: {e}")
             return {"error": str(e)}
 
+    @staticmethod
+    def _payload_indexes(info: Any) -> Optional[List[str]]:
+        """Return the indexed payload fields of a collection info, or None when unknown."""
+        schema = info.get("payload_schema") if isinstance(info, dict) else getattr(info, "payload_schema", None)
+        if not isinstance(schema, dict):
+            return None
+        return sorted(schema)
+
     def delete_collection(self, collection_name: Optional[str] = None) -> bool:
-        """Delete a collection from Qdrant."""
+        """Delete a collection from Qdrant, or one workspace's points from a shared collection."""
         name = collection_name or self.collection_name
         try:
+            tenant = self._resolve_tenant_ref(name)
+            if tenant is not None:
+                self.client.delete(
+                    collection_name=tenant[0],
+                    points_selector=Filter(must=[FieldCondition(key=TENANT_FIELD, match=MatchValue(value=tenant[1]))])
+                )
+                return True
             self.client.delete_collection(collection_name=name)
             return True
         except Exception as e:
@@ -296,7 +387,7 @@ class CollectionManager:
         try:
             scroll_result = self.client.scroll(
                 collection_name=name,
-                scroll_filter=Filter(must=[FieldCondition(key="file_path", match=MatchValue(value=file_path))]),
+                scroll_filter=Filter(must=[FieldCondition(key="filePath", match=MatchValue(value=file_path))]),
                 limit=1,
                 with_payload=True,
                 with_vectors=False
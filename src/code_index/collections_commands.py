@@ -10,7 +10,10 @@ import click
 from qdrant_client.models import Filter, FieldCondition, MatchValue
 from code_index.config import Config
 from code_index.collections import CollectionManager
+from code_index.qdrant_settings import format_quantization
+from code_index.payload_schema import PAYLOAD_SCHEMA
 from code_index.cache import delete_collection_cache, clear_all_caches
+from code_index.tenancy import split_tenant_ref
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +24,10 @@ def _resolve_canonical_id_for_delete(collection_manager: CollectionManager, coll
     """
     Resolve the canonical collection id (16 hex chars) used in cache filenames.
     """
+    # A workspace in a shared collection is named by that id
+    tenant_id = split_tenant_ref(collection_name)[1] if isinstance(collection_name, str) else None
+    if tenant_id is not None:
+        return tenant_id[:16] if HEX16.match(tenant_id[:16]) else None
     try:
         scroll_res = collection_manager.client.scroll(
             collection_name=collection_name,
@@ -109,6 +116,9 @@ def collection_info(collection_name: str):
         info = collection_manager.get_collection_info(collection_name)
         
         print(f"Collection: {info['name']}")
+        if info.get("shared_collection"):
+            print(f"Shared collection: {info['shared_collection']}")
+            print(f"Workspace Path: {info.get('workspace_path', 'Unknown')}")
         print(f"Status: {info['status']}")
         print(f"Points: {info['points_count']}")
         print(f"Vectors: {info['vectors_count']}")
@@ -149,6 +159,33 @@ def collection_info(collection_name: str):
             print(f"Dimension: {dim}")
 
         print(f"Model: {info.get('model_identifier', 'unknown') or 'unknown'}")
+
+        storage = info.get("storage") or {}
+        if storage:
+            print(f"Quantization: {format_quantization(storage.get('quantization'))}")
+            if "vectors_on_disk" in storage:
+                print(f"Vectors on disk: {'yes' if storage['vectors_on_disk'] else 'no'}")
+            if "payload_on_disk" in storage:
+                print(f"Payload on disk: {'yes' if storage['payload_on_disk'] else 'no'}")
+            if "hnsw_m" in storage or "hnsw_ef_construct" in storage:
+                hnsw = f"HNSW: m={storage.get('hnsw_m', '?')}, ef_construct={storage.get('hnsw_ef_construct', '?')}"
+                if storage.get("hnsw_payload_m"):
+                    hnsw += f", payload_m={storage['hnsw_payload_m']}"
+                print(hnsw)
+            if "shard_number" in storage:
+                sharding = f"Shards: {storage['shard_number']}, replication factor {storage.get('replication_factor', 1)}"
+                if storage.get("sharding_method") == "custom":
+                    sharding += " (custom shard keys, shards per key)"
+                print(sharding)
+            if storage.get("sparse_vectors"):
+                print(f"Sparse vectors: {', '.join(storage['sparse_vectors'])}")
+
+        indexed = info.get("payload_indexes")
+        if indexed is not None:
+            print(f"Payload indexes: {', '.join(indexed) or 'none'}")
+            missing = [name for name in PAYLOAD_SCHEMA if name not in indexed]
+            if missing:
+                print(f"Unindexed filter fields: {', '.join(missing)} (run 'code-index index' to create them)")
         
     except Exception as e:
         print(f"Error getting collection info: {e}")
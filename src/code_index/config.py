@@ -6,7 +6,7 @@ import json
 import os
 from copy import deepcopy
 from dataclasses import dataclass, field, replace, is_dataclass
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Union
 
 
 def _env_int(name: str, default: int) -> int:
@@ -143,6 +143,11 @@ class CoreConfig:
     qdrant_api_key: Optional[str] = field(default_factory=lambda: _env_str("QDRANT_API_KEY"))
     embedding_length: Optional[int] = None
     embed_timeout_seconds: int = field(default_factory=lambda: _env_int("CODE_INDEX_EMBED_TIMEOUT", 60))
+    ollama_keep_alive: Optional[Union[str, int]] = field(
+        default_factory=lambda: _env_str("CODE_INDEX_OLLAMA_KEEP_ALIVE", "30m"))
+    qdrant_prefer_grpc: bool = False
+    qdrant_shared_collection: Optional[str] = field(default_factory=lambda: _env_str("CODE_INDEX_SHARED_COLLECTION"))
+    vector_store_backend: str = field(default_factory=lambda: _env_str("CODE_INDEX_VECTOR_STORE", "qdrant") or "qdrant")
 
     def refresh_embedding_length(self) -> None:
         if self.embedding_length not in (None, 0):
@@ -188,6 +193,33 @@ class ChunkingConfig:
     token_chunk_overlap: int = 200
     auto_extensions: bool = False
     language_chunk_sizes: Dict[str, int] = field(default_factory=_default_language_chunk_sizes)
+    near_duplicate_filter_enabled: bool = False
+    near_duplicate_threshold: float = 0.9
+    near_duplicate_mode: str = "share"
+    near_duplicate_num_perm: int = 64
+    near_duplicate_shingle_size: int = 5
+
+
+@dataclass
+class EmbeddingConfig:
+    embedding_text_normalization: bool = False
+    embedding_text_metadata_prefix: bool = True
+    embedding_text_strip_banners: bool = True
+    embedding_text_max_blank_lines: int = 1
+    embedding_text_strip_patterns: Dict[str, List[str]] = field(default_factory=dict)
+    embedder_backend: str = field(default_factory=lambda: _env_str("CODE_INDEX_EMBEDDER", "ollama") or "ollama")
+    embedder_base_url: Optional[str] = field(default_factory=lambda: _env_str("CODE_INDEX_EMBEDDER_BASE_URL"))
+    embedder_api_key: Optional[str] = field(default_factory=lambda: _env_str("CODE_INDEX_EMBEDDER_API_KEY"))
+    onnx_model_path: Optional[str] = None
+    onnx_tokenizer_path: Optional[str] = None
+    onnx_quantize: bool = False
+    onnx_intra_op_threads: int = 0
+    onnx_max_length: int = 512
+    onnx_pooling: str = "mean"
+    onnx_normalize: bool = True
+    embedding_dtype: str = "float32"
+    embedder_encoding_format: str = "float"
+    embedder_warm_up: bool = True
 
 
 @dataclass
@@ -221,6 +253,23 @@ class SearchConfig:
     search_cache_enabled: bool = False
     search_cache_max_entries: int = 128
     search_cache_ttl_seconds: Optional[int] = None
+    search_collapse_duplicates: bool = True
+    search_two_phase: bool = True
+    search_collapse_overlaps: bool = True
+    search_mmr_lambda: float = 1.0
+    lexical_index_enabled: bool = False
+    lexical_bm25_k1: float = 1.2
+    lexical_bm25_b: float = 0.75
+    search_mode: str = "vector"
+    search_fusion: str = "rrf"
+    search_rrf_k: int = 60
+    search_hybrid_lexical_weight: float = 0.5
+    search_hybrid_budget_ms: int = 2000
+    symbol_index_enabled: bool = False
+    code_graph_enabled: bool = False
+    code_graph_max_depth: int = 5
+    trigram_index_enabled: bool = False
+    trigram_max_file_bytes: int = 1048576
 
 
 @dataclass
@@ -247,6 +296,33 @@ class PerformanceConfig:
     performance_stats_interval: int = 100
     enable_memory_profiling: bool = False
     memory_profiling_threshold_mb: int = 500
+    qdrant_bulk_write: bool = False
+    qdrant_write_batch_size: int = 256
+    qdrant_write_parallelism: int = 4
+    qdrant_write_max_retries: int = 3
+    qdrant_bulk_load: bool = False
+    qdrant_bulk_load_wait_seconds: int = 600
+    qdrant_quantization: str = "none"
+    qdrant_quantization_always_ram: bool = True
+    qdrant_scalar_quantile: float = 0.99
+    qdrant_product_compression: str = "x16"
+    qdrant_quantization_rescore: bool = True
+    qdrant_quantization_oversampling: float = 2.0
+    qdrant_vectors_on_disk: bool = False
+    qdrant_payload_on_disk: bool = False
+    qdrant_sparse_vectors: bool = False
+    qdrant_hnsw_m: Optional[int] = None
+    qdrant_hnsw_ef_construct: Optional[int] = None
+    qdrant_search_hnsw_ef: Optional[int] = None
+    qdrant_tenant_payload_m: int = 16
+    qdrant_shard_number: Optional[int] = None
+    qdrant_replication_factor: Optional[int] = None
+    qdrant_shard_key: str = "none"
+    vector_spool_enabled: bool = False
+    vector_spool_dir: Optional[str] = None
+    vector_spool_drain_timeout_seconds: int = 60
+    flat_store_dir: Optional[str] = None
+    flat_store_dtype: str = "float16"
 
 
 @dataclass
@@ -262,6 +338,7 @@ class Config:
         "files",
         "ignore",
         "chunking",
+        "embedding",
         "tree_sitter",
         "search",
         "performance",
@@ -277,6 +354,10 @@ class Config:
         "qdrant_api_key": ("core", "qdrant_api_key"),
         "embedding_length": ("core", "embedding_length"),
         "embed_timeout_seconds": ("core", "embed_timeout_seconds"),
+        "ollama_keep_alive": ("core", "ollama_keep_alive"),
+        "qdrant_prefer_grpc": ("core", "qdrant_prefer_grpc"),
+        "qdrant_shared_collection": ("core", "qdrant_shared_collection"),
+        "vector_store_backend": ("core", "vector_store_backend"),
         # File handling
         "extensions": ("files", "extensions"),
         "max_file_size_bytes": ("files", "max_file_size_bytes"),
@@ -300,6 +381,30 @@ class Config:
         "token_chunk_overlap": ("chunking", "token_chunk_overlap"),
         "auto_extensions": ("chunking", "auto_extensions"),
         "language_chunk_sizes": ("chunking", "language_chunk_sizes"),
+        "near_duplicate_filter_enabled": ("chunking", "near_duplicate_filter_enabled"),
+        "near_duplicate_threshold": ("chunking", "near_duplicate_threshold"),
+        "near_duplicate_mode": ("chunking", "near_duplicate_mode"),
+        "near_duplicate_num_perm": ("chunking", "near_duplicate_num_perm"),
+        "near_duplicate_shingle_size": ("chunking", "near_duplicate_shingle_size"),
+        # Embedding
+        "embedding_text_normalization": ("embedding", "embedding_text_normalization"),
+        "embedding_text_metadata_prefix": ("embedding", "embedding_text_metadata_prefix"),
+        "embedding_text_strip_banners": ("embedding", "embedding_text_strip_banners"),
+        "embedding_text_max_blank_lines": ("embedding", "embedding_text_max_blank_lines"),
+        "embedding_text_strip_patterns": ("embedding", "embedding_text_strip_patterns"),
+        "embedder_backend": ("embedding", "embedder_backend"),
+        "embedder_base_url": ("embedding", "embedder_base_url"),
+        "embedder_api_key": ("embedding", "embedder_api_key"),
+        "onnx_model_path": ("embedding", "onnx_model_path"),
+        "onnx_tokenizer_path": ("embedding", "onnx_tokenizer_path"),
+        "onnx_quantize": ("embedding", "onnx_quantize"),
+        "onnx_intra_op_threads": ("embedding", "onnx_intra_op_threads"),
+        "onnx_max_length": ("embedding", "onnx_max_length"),
+        "onnx_pooling": ("embedding", "onnx_pooling"),
+        "onnx_normalize": ("embedding", "onnx_normalize"),
+        "embedding_dtype": ("embedding", "embedding_dtype"),
+        "embedder_encoding_format": ("embedding", "embedder_encoding_format"),
+        "embedder_warm_up": ("embedding", "embedder_warm_up"),
         # Tree-sitter
         "use_tree_sitter": ("tree_sitter", "use_tree_sitter"),
         "tree_sitter_languages": ("tree_sitter", "tree_sitter_languages"),
@@ -327,6 +432,23 @@ class Config:
         "search_cache_enabled": ("search", "search_cache_enabled"),
         "search_cache_max_entries": ("search", "search_cache_max_entries"),
         "search_cache_ttl_seconds": ("search", "search_cache_ttl_seconds"),
+        "search_collapse_duplicates": ("search", "search_collapse_duplicates"),
+        "search_two_phase": ("search", "search_two_phase"),
+        "search_collapse_overlaps": ("search", "search_collapse_overlaps"),
+        "search_mmr_lambda": ("search", "search_mmr_lambda"),
+        "lexical_index_enabled": ("search", "lexical_index_enabled"),
+        "lexical_bm25_k1": ("search", "lexical_bm25_k1"),
+        "lexical_bm25_b": ("search", "lexical_bm25_b"),
+        "search_mode": ("search", "search_mode"),
+        "search_fusion": ("search", "search_fusion"),
+        "search_rrf_k": ("search", "search_rrf_k"),
+        "search_hybrid_lexical_weight": ("search", "search_hybrid_lexical_weight"),
+        "search_hybrid_budget_ms": ("search", "search_hybrid_budget_ms"),
+        "symbol_index_enabled": ("search", "symbol_index_enabled"),
+        "code_graph_enabled": ("search", "code_graph_enabled"),
+        "code_graph_max_depth": ("search", "code_graph_max_depth"),
+        "trigram_index_enabled": ("search", "trigram_index_enabled"),
+        "trigram_max_file_bytes": ("search", "trigram_max_file_bytes"),
         # Performance
         "use_mmap_file_reading": ("performance", "use_mmap_file_reading"),
         "mmap_min_file_size_bytes": ("performance", "mmap_min_file_size_bytes"),
@@ -350,6 +472,33 @@ class Config:
         "performance_stats_interval": ("performance", "performance_stats_interval"),
         "enable_memory_profiling": ("performance", "enable_memory_profiling"),
         "memory_profiling_threshold_mb": ("performance", "memory_profiling_threshold_mb"),
+        "qdrant_bulk_write": ("performance", "qdrant_bulk_write"),
+        "qdrant_write_batch_size": ("performance", "qdrant_write_batch_size"),
+        "qdrant_write_parallelism": ("performance", "qdrant_write_parallelism"),
+        "qdrant_write_max_retries": ("performance", "qdrant_write_max_retries"),
+        "qdrant_bulk_load": ("performance", "qdrant_bulk_load"),
+        "qdrant_bulk_load_wait_seconds": ("performance", "qdrant_bulk_load_wait_seconds"),
+        "qdrant_quantization": ("performance", "qdrant_quantization"),
+        "qdrant_quantization_always_ram": ("performance", "qdrant_quantization_always_ram"),
+        "qdrant_scalar_quantile": ("performance", "qdrant_scalar_quantile"),
+        "qdrant_product_compression": ("performance", "qdrant_product_compression"),
+        "qdrant_quantization_rescore": ("performance", "qdrant_quantization_rescore"),
+        "qdrant_quantization_oversampling": ("performance", "qdrant_quantization_oversampling"),
+        "qdrant_vectors_on_disk": ("performance", "qdrant_vectors_on_disk"),
+        "qdrant_payload_on_disk": ("performance", "qdrant_payload_on_disk"),
+        "qdrant_sparse_vectors": ("performance", "qdrant_sparse_vectors"),
+        "qdrant_hnsw_m": ("performance", "qdrant_hnsw_m"),
+        "qdrant_hnsw_ef_construct": ("performance", "qdrant_hnsw_ef_construct"),
+        "qdrant_search_hnsw_ef": ("performance", "qdrant_search_hnsw_ef"),
+        "qdrant_tenant_payload_m": ("performance", "qdrant_tenant_payload_m"),
+        "qdrant_shard_number": ("performance", "qdrant_shard_number"),
+        "qdrant_replication_factor": ("performance", "qdrant_replication_factor"),
+        "qdrant_shard_key": ("performance", "qdrant_shard_key"),
+        "vector_spool_enabled": ("performance", "vector_spool_enabled"),
+        "vector_spool_dir": ("performance", "vector_spool_dir"),
+        "vector_spool_drain_timeout_seconds": ("performance", "vector_spool_drain_timeout_seconds"),
+        "flat_store_dir": ("performance", "flat_store_dir"),
+        "flat_store_dtype": ("performance", "flat_store_dtype"),
         # Logging
         "logging_component_levels": ("logging", "component_levels"),
     }
@@ -360,6 +509,7 @@ class Config:
         files: Optional[FileHandlingConfig] = None,
         ignore: Optional[IgnoreConfig] = None,
         chunking: Optional[ChunkingConfig] = None,
+        embedding: Optional[EmbeddingConfig] = None,
         tree_sitter: Optional[TreeSitterConfig] = None,
         search: Optional[SearchConfig] = None,
         performance: Optional[PerformanceConfig] = None,
@@ -369,6 +519,7 @@ class Config:
         object.__setattr__(self, "files", replace(files) if files else FileHandlingConfig())
         object.__setattr__(self, "ignore", replace(ignore) if ignore else IgnoreConfig())
         object.__setattr__(self, "chunking", replace(chunking) if chunking else ChunkingConfig())
+        object.__setattr__(self, "embedding", replace(embedding) if embedding else EmbeddingConfig())
         object.__setattr__(self, "tree_sitter", replace(tree_sitter) if tree_sitter else TreeSitterConfig())
         object.__setattr__(self, "search", replace(search) if search else SearchConfig())
         object.__setattr__(self, "performance", replace(performance) if performance else PerformanceConfig())
@@ -415,6 +566,7 @@ class Config:
             "files": self._section_to_dict(self.files),
             "ignore": self._section_to_dict(self.ignore),
             "chunking": self._section_to_dict(self.chunking),
+            "embedding": self._section_to_dict(self.embedding),
             "tree_sitter": self._section_to_dict(self.tree_sitter),
             "search": self._section_to_dict(self.search),
             "performance": self._section_to_dict(self.performance),
@@ -7,6 +7,7 @@ supports CLI overrides, workspace-specific configurations, and validation.
 """
 
 import os
+import re
 import json
 import yaml
 import logging
@@ -16,9 +17,13 @@ from dataclasses import dataclass
 from urllib.parse import urlparse
 
 from .config import Config
+from .embedder import parse_keep_alive
 from .service_validation import ServiceValidator, ValidationResult
 from .errors import ErrorHandler, ErrorContext, ErrorCategory, ErrorSeverity
 from .path_utils import PathUtils
+from .qdrant_local import is_local_url, local_storage_path
+from .qdrant_settings import PRODUCT_COMPRESSION_RATIOS, QUANTIZATION_MODES, SHARD_KEY_MODES
+from .search_fusion import FUSION_METHODS, SEARCH_MODES
 
 T = TypeVar('T')
 
@@ -392,7 +397,7 @@ class ConfigurationService:
                 if not isinstance(parsed_value, str):
                     return False
                 parsed_url = urlparse(parsed_value)
-                if parsed_url.scheme not in {"http", "https"}:
+                if parsed_url.scheme not in {"http", "https"} and not (key == "qdrant_url" and is_local_url(parsed_value)):
                     raise ValueError("unsupported URL scheme")
                 parsed_value = parsed_value
 
@@ -535,6 +540,150 @@ class ConfigurationService:
         if config.search_max_results <= 0:
             errors.append("search_max_results must be positive")
 
+        # Validate near-duplicate filtering
+        if getattr(config, "near_duplicate_mode", "share") not in ("share", "skip"):
+            errors.append("near_duplicate_mode must be one of ['share', 'skip']")
+
+        threshold = getattr(config, "near_duplicate_threshold", 0.9)
+        if not isinstance(threshold, (int, float)) or not 0 < threshold <= 1:
+            errors.append("near_duplicate_threshold must be greater than 0 and at most 1")
+
+        # Validate embedder backend selection
+        backend = getattr(config, "embedder_backend", "ollama")
+        if backend not in ("ollama", "openai", "onnx"):
+            errors.append("embedder_backend must be one of ['ollama', 'openai', 'onnx']")
+        elif backend == "onnx" and not getattr(config, "onnx_model_path", None):
+            errors.append("embedder_backend='onnx' requires onnx_model_path")
+
+        try:
+            parse_keep_alive(getattr(config, "ollama_keep_alive", None))
+        except ValueError as e:
+            errors.append(str(e))
+
+        if getattr(config, "onnx_pooling", "mean") not in ("mean", "cls"):
+            errors.append("onnx_pooling must be one of ['mean', 'cls']")
+
+        if getattr(config, "embedding_dtype", "float32") not in ("float32", "float16"):
+            errors.append("embedding_dtype must be one of ['float32', 'float16']")
+
+        if getattr(config, "embedder_encoding_format", "float") not in ("float", "base64"):
+            errors.append("embedder_encoding_format must be one of ['float', 'base64']")
+
+        # Validate embedding text normalization patterns
+        strip_patterns = getattr(config, "embedding_text_strip_patterns", None) or {}
+        if not isinstance(strip_patterns, dict):
+            errors.append("embedding_text_strip_patterns must map file extensions to lists of regular expressions")
+            strip_patterns = {}
+        for key, patterns in strip_patterns.items():
+            if not isinstance(patterns, list) or not all(isinstance(p, str) for p in patterns):
+                errors.append(f"embedding_text_strip_patterns['{key}'] must be a list of regular expressions")
+                continue
+            for pattern in patterns:
+                try:
+                    re.compile(pattern, re.MULTILINE)
+                except re.error as e:
+                    errors.append(f"embedding_text_strip_patterns['{key}'] has an invalid regular expression {pattern!r}: {e}")
+
+        # Validate bulk Qdrant write settings
+        for key in ("qdrant_write_batch_size", "qdrant_write_parallelism"):
+            value = getattr(config, key, 1)
+            if not isinstance(value, int) or value < 1:
+                errors.append(f"{key} must be a positive integer")
+        retries = getattr(config, "qdrant_write_max_retries", 3)
+        if not isinstance(retries, int) or retries < 0:
+            errors.append("qdrant_write_max_retries must be zero or greater")
+        bulk_load_wait = getattr(config, "qdrant_bulk_load_wait_seconds", 600)
+        if not isinstance(bulk_load_wait, (int, float)) or bulk_load_wait < 0:
+            errors.append("qdrant_bulk_load_wait_seconds must be zero or greater")
+
+        # Validate collection storage settings
+        if getattr(config, "qdrant_quantization", "none") not in QUANTIZATION_MODES:
+            errors.append(f"qdrant_quantization must be one of {list(QUANTIZATION_MODES)}")
+        if getattr(config, "qdrant_product_compression", "x16") not in PRODUCT_COMPRESSION_RATIOS:
+            errors.append(f"qdrant_product_compression must be one of {list(PRODUCT_COMPRESSION_RATIOS)}")
+        quantile = getattr(config, "qdrant_scalar_quantile", 0.99)
+        if not isinstance(quantile, (int, float)) or not 0.5 <= quantile <= 1:
+            errors.append("qdrant_scalar_quantile must be between 0.5 and 1")
+        oversampling = getattr(config, "qdrant_quantization_oversampling", 2.0)
+        if not isinstance(oversampling, (int, float)) or oversampling < 1:
+            errors.append("qdrant_quantization_oversampling must be at least 1")
+        for key in ("qdrant_hnsw_m", "qdrant_hnsw_ef_construct", "qdrant_search_hnsw_ef"):
+            value = getattr(config, key, None)
+            if value is not None and (not isinstance(value, int) or value < 0):
+                errors.append(f"{key} must be a non-negative integer or null")
+        qdrant_url = getattr(config, "qdrant_url", None)
+        if is_local_url(qdrant_url):
+            try:
+                local_storage_path(qdrant_url)
+            except ValueError as e:
+                errors.append(str(e))
+        shared = getattr(config, "qdrant_shared_collection", None)
+        if shared is not None and (not isinstance(shared, str) or not shared.strip() or "/" in shared):
+            errors.append("qdrant_shared_collection must be a collection name without '/' or null")
+        payload_m = getattr(config, "qdrant_tenant_payload_m", 16)
+        if not isinstance(payload_m, int) or payload_m < 1:
+            errors.append("qdrant_tenant_payload_m must be a positive integer")
+        for key in ("qdrant_shard_number", "qdrant_replication_factor"):
+            value = getattr(config, key, None)
+            if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < 1):
+                errors.append(f"{key} must be a positive integer or null")
+        if getattr(config, "qdrant_shard_key", "none") not in SHARD_KEY_MODES:
+            errors.append(f"qdrant_shard_key must be one of {list(SHARD_KEY_MODES)}")
+
+        # Validate write-ahead vector spool settings
+        spool_dir = getattr(config, "vector_spool_dir", None)
+        if spool_dir is not None and (not isinstance(spool_dir, str) or not spool_dir.strip()):
+            errors.append("vector_spool_dir must be a non-empty string or null")
+        drain_timeout = getattr(config, "vector_spool_drain_timeout_seconds", 60)
+        if not isinstance(drain_timeout, (int, float)) or drain_timeout < 0:
+            errors.append("vector_spool_drain_timeout_seconds must be zero or greater")
+
+        # Validate lexical index ranking parameters
+        k1 = getattr(config, "lexical_bm25_k1", 1.2)
+        if not isinstance(k1, (int, float)) or isinstance(k1, bool) or k1 < 0:
+            errors.append("lexical_bm25_k1 must be zero or greater")
+        bm25_b = getattr(config, "lexical_bm25_b", 0.75)
+        if not isinstance(bm25_b, (int, float)) or isinstance(bm25_b, bool) or not 0 <= bm25_b <= 1:
+            errors.append("lexical_bm25_b must be between 0 and 1")
+
+        # Validate search mode and hybrid fusion settings
+        if getattr(config, "search_mode", "vector") not in SEARCH_MODES:
+            errors.append(f"search_mode must be one of {list(SEARCH_MODES)}")
+        if getattr(config, "search_fusion", "rrf") not in FUSION_METHODS:
+            errors.append(f"search_fusion must be one of {list(FUSION_METHODS)}")
+        rrf_k = getattr(config, "search_rrf_k", 60)
+        if not isinstance(rrf_k, int) or isinstance(rrf_k, bool) or rrf_k < 1:
+            errors.append("search_rrf_k must be a positive integer")
+        lexical_weight = getattr(config, "search_hybrid_lexical_weight", 0.5)
+        if (not isinstance(lexical_weight, (int, float)) or isinstance(lexical_weight, bool)
+                or not 0 <= lexical_weight <= 1):
+            errors.append("search_hybrid_lexical_weight must be between 0 and 1")
+        mmr_lambda = getattr(config, "search_mmr_lambda", 1.0)
+        if not isinstance(mmr_lambda, (int, float)) or isinstance(mmr_lambda, bool) or not 0 <= mmr_lambda <= 1:
+            errors.append("search_mmr_lambda must be between 0 and 1")
+        budget_ms = getattr(config, "search_hybrid_budget_ms", 2000)
+        if not isinstance(budget_ms, int) or isinstance(budget_ms, bool) or budget_ms < 0:
+            errors.append("search_hybrid_budget_ms must be a non-negative integer")
+
+        # Validate code graph traversal bound
+        max_depth = getattr(config, "code_graph_max_depth", 5)
+        if not isinstance(max_depth, int) or isinstance(max_depth, bool) or max_depth < 1:
+            errors.append("code_graph_max_depth must be a positive integer")
+
+        # Validate trigram index file size limit
+        max_bytes = getattr(config, "trigram_max_file_bytes", 1048576)
+        if not isinstance(max_bytes, int) or isinstance(max_bytes, bool) or max_bytes < 1:
+            errors.append("trigram_max_file_bytes must be a positive integer")
+
+        # Validate vector store backend selection
+        if getattr(config, "vector_store_backend", "qdrant") not in ("qdrant", "flat"):
+            errors.append("vector_store_backend must be one of ['qdrant', 'flat']")
+        flat_dir = getattr(config, "flat_store_dir", None)
+        if flat_dir is not None and (not isinstance(flat_dir, str) or not flat_dir.strip()):
+            errors.append("flat_store_dir must be a non-empty string or null")
+        if getattr(config, "flat_store_dtype", "float16") not in ("float32", "float16", "int8"):
+            errors.append("flat_store_dtype must be one of ['float32', 'float16', 'int8']")
+
         # Validate timeout values
         if config.embed_timeout_seconds <= 0:
             errors.append("embed_timeout_seconds must be positive")
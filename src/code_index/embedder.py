@@ -1,11 +1,172 @@
 """
-Ollama embedder for the code index tool.
+Embedders for the code index tool.
+
+``OllamaEmbedder`` is the default backend. ``create_embedder`` selects the
+backend named by ``embedder_backend`` in the configuration; the
+OpenAI-compatible and ONNX Runtime backends live in their own modules and
+are imported only when selected.
 """
+import re
+import threading
 import time
 import requests
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Protocol, Union, runtime_checkable
 from code_index.config import Config
 from code_index.service_validation import ValidationResult
+from code_index.vector_codec import as_matrix, resolve_dtype
+
+
+EMBEDDER_BACKENDS = ("ollama", "openai", "onnx")
+# Go duration syntax accepted by Ollama for a string keep_alive ("30m", "1h30m", "-1s")
+_DURATION_RE = re.compile(r"[-+]?((\d+(\.\d*)?|\.\d+)(ns|us|µs|ms|s|m|h))+")
+
+
+def _nanoseconds(value: Any) -> float:
+    """Convert an Ollama duration in nanoseconds to seconds."""
+    try:
+        return max(0.0, float(value or 0) / 1e9)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def parse_keep_alive(value: Any) -> Optional[Union[str, int]]:
+    """
+    Ollama ``keep_alive`` value for a configured setting.
+
+    Numbers (also as strings such as ``"-1"`` or ``"3600"``) are seconds and
+    are sent as integers, since Ollama only parses strings as durations with
+    a unit. ``None`` and ``""`` leave the server default.
+
+    Raises:
+        ValueError: If the value is neither a number of seconds nor a duration
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        text = value.strip()
+        if re.fullmatch(r"[-+]?\d+", text):
+            return int(text)
+        if _DURATION_RE.fullmatch(text):
+            return text
+    raise ValueError(f"ollama_keep_alive must be a number of seconds or a duration like '30m', got {value!r}")
+
+
+def canonical_model_identifier(model: str) -> str:
+    """
+    Canonical embedding model identifier for payload/metadata.
+    - If the model ends with ':latest', return it without the suffix.
+    - Otherwise return it as-is (including explicit tags like ':v1.5').
+    """
+    model = model or ""
+    return model[:-7] if model.endswith(":latest") else model
+
+
+class EmbedderTimings:
+    """
+    Thread-safe timing counters for an embedder.
+
+    Model load time reported by the backend is kept apart from embedding
+    time so a cold model does not inflate per-request embedding latency.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear all counters."""
+        self.requests = 0
+        self.texts = 0
+        self.embed_seconds = 0.0
+        self.model_load_seconds = 0.0
+        self.max_model_load_seconds = 0.0
+        self.warm_up_seconds = 0.0
+
+    def record(self, texts: int, wall_seconds: float, load_seconds: float = 0.0) -> None:
+        """Record one request; ``load_seconds`` is subtracted from its embedding time."""
+        load_seconds = max(0.0, min(load_seconds, wall_seconds))
+        with self._lock:
+            self.requests += 1
+            self.texts += texts
+            self.embed_seconds += wall_seconds - load_seconds
+            self.model_load_seconds += load_seconds
+            self.max_model_load_seconds = max(self.max_model_load_seconds, load_seconds)
+
+    def record_warm_up(self, wall_seconds: float, load_seconds: float = 0.0) -> None:
+        """Record a warm-up request; its wall time never counts as embedding time."""
+        with self._lock:
+            self.warm_up_seconds += wall_seconds
+            self.model_load_seconds += load_seconds
+            self.max_model_load_seconds = max(self.max_model_load_seconds, load_seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the counters as a dictionary."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "texts": self.texts,
+                "embed_seconds": round(self.embed_seconds, 3),
+                "model_load_seconds": round(self.model_load_seconds, 3),
+                "max_model_load_seconds": round(self.max_model_load_seconds, 3),
+                "warm_up_seconds": round(self.warm_up_seconds, 3),
+            }
+
+
+@runtime_checkable
+class Embedder(Protocol):
+    """Interface shared by all embedding backends."""
+
+    @property
+    def model_identifier(self) -> str:
+        """Canonical model name stored in point payloads and collection metadata."""
+        ...
+
+    def create_embeddings(self, texts: List[str]) -> Dict[str, Any]:
+        """Return ``{"embeddings": matrix}`` with one row per input text."""
+        ...
+
+    def validate_configuration(self) -> ValidationResult:
+        """Check that the backend is reachable and the model usable."""
+        ...
+
+    def warm_up(self) -> Dict[str, Any]:
+        """Load the model ahead of the first real request; never raises."""
+        ...
+
+    def get_timing_stats(self) -> Dict[str, Any]:
+        """Return request, embedding and model-load timings."""
+        ...
+
+
+def create_embedder(config: Config) -> Embedder:
+    """
+    Create the embedder selected by ``config.embedder_backend``.
+
+    Args:
+        config: Configuration object
+
+    Returns:
+        Embedder instance for the configured backend; ONNX embedders are
+        shared per process so the loaded model is reused
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    backend = str(getattr(config, "embedder_backend", "ollama") or "ollama").lower()
+    if backend == "ollama":
+        return OllamaEmbedder(config)
+    if backend == "openai":
+        from .openai_embedder import OpenAICompatibleEmbedder
+        return OpenAICompatibleEmbedder(config)
+    if backend == "onnx":
+        # One embedder per settings, so the in-process model is loaded once per process
+        from .onnx_embedder import shared_onnx_embedder
+        return shared_onnx_embedder(config)
+    raise ValueError(
+        f"Unknown embedder_backend '{backend}'. Expected one of: {', '.join(EMBEDDER_BACKENDS)}"
+    )
 
 
 class OllamaEmbedder:
@@ -17,6 +178,10 @@ class OllamaEmbedder:
         self.model = config.ollama_model
         # Timeout is configurable via config (and may be overridden by CLI/env before construction)
         self.timeout = int(getattr(config, "embed_timeout_seconds", 60) or 60)
+        self.dtype = resolve_dtype(getattr(config, "embedding_dtype", "float32"))
+        # How long Ollama keeps the model loaded after each request; None leaves the server default
+        self.keep_alive: Optional[Union[str, int]] = parse_keep_alive(getattr(config, "ollama_keep_alive", None))
+        self.timings = EmbedderTimings()
 
     @property
     def model_identifier(self) -> str:
@@ -25,11 +190,15 @@ class OllamaEmbedder:
         - If configured model ends with ':latest', return without the suffix.
         - Otherwise return configured value as-is (including explicit tags like ':v1.5').
         """
-        try:
-            m = self.model or ""
-        except AttributeError:
-            m = ""
-        return m[:-7] if m.endswith(":latest") else m
+        return canonical_model_identifier(getattr(self, "model", ""))
+
+    def _request_body(self, texts: List[str]) -> Dict[str, Any]:
+        body: Dict[str, Any] = {"model": self.model, "input": texts}
+        keep_alive = getattr(self, "keep_alive", None)
+        if keep_alive is not None:
+            body["keep_alive"] = keep_alive
+        return body
+
     def create_embeddings(self, texts: List[str]) -> Dict[str, Any]:
         """
         Generate embeddings for texts using Ollama API.
@@ -38,10 +207,10 @@ class OllamaEmbedder:
             texts: List of text strings to embed
             
         Returns:
-            Dictionary with embeddings and usage data
+            Dictionary with an ``(n, dim)`` NumPy matrix under "embeddings"
         """
         if not texts:
-            return {"embeddings": []}
+            return {"embeddings": as_matrix([], self.dtype)}
         
         url = f"{self.base_url}/api/embed"
         
@@ -49,12 +218,10 @@ class OllamaEmbedder:
             # Truncate texts to avoid exceeding model context length
             trunk_texts = [t[:4000] for t in texts]
 
+            started = time.perf_counter()
             response = requests.post(
                 url,
-                json={
-                    "model": self.model,
-                    "input": trunk_texts
-                },
+                json=self._request_body(trunk_texts),
                 timeout=self.timeout
             )
             response.raise_for_status()
@@ -65,8 +232,12 @@ class OllamaEmbedder:
             if not isinstance(embeddings, list):
                 raise ValueError("Invalid response structure from Ollama API")
 
+            # Ollama reports model load time in nanoseconds; it is non-trivial only for a cold model
+            load_seconds = _nanoseconds(data.get("load_duration"))
+            self.timings.record(len(texts), time.perf_counter() - started, load_seconds)
             return {
-                "embeddings": embeddings
+                "embeddings": as_matrix(embeddings, self.dtype),
+                "load_seconds": load_seconds
             }
         except requests.exceptions.HTTPError as e:
             body = e.response.text[:500] if e.response is not None else ""
@@ -79,6 +250,35 @@ class OllamaEmbedder:
         except ValueError as e:
             raise Exception(f"Invalid response from Ollama API: {e}")
     
+    def warm_up(self) -> Dict[str, Any]:
+        """
+        Load the model into Ollama memory with a one-word request.
+
+        Uses a longer timeout than regular requests because a cold load of a
+        large model can exceed the embedding timeout. Never raises.
+
+        Returns:
+            Dictionary with success flag, wall time and reported load time
+        """
+        started = time.perf_counter()
+        try:
+            response = requests.post(
+                f"{self.base_url}/api/embed",
+                json=self._request_body(["warm up"]),
+                timeout=max(self.timeout, 300)
+            )
+            response.raise_for_status()
+            load_seconds = _nanoseconds(response.json().get("load_duration"))
+            elapsed = time.perf_counter() - started
+            self.timings.record_warm_up(elapsed, load_seconds)
+            return {"success": True, "seconds": round(elapsed, 3), "load_seconds": round(load_seconds, 3)}
+        except Exception as e:
+            return {"success": False, "seconds": round(time.perf_counter() - started, 3), "error": str(e)}
+
+    def get_timing_stats(self) -> Dict[str, Any]:
+        """Return request, embedding and model-load timings."""
+        return self.timings.snapshot()
+
     def validate_configuration(self) -> ValidationResult:
         """
         Validate Ollama configuration.
@@ -133,10 +333,7 @@ class OllamaEmbedder:
             # Test embedding generation
             test_response = requests.post(
                 f"{self.base_url}/api/embed",
-                json={
-                    "model": self.model,
-                    "input": ["test"]
-                },
+                json=self._request_body(["test"]),
                 timeout=30
             )
             test_response.raise_for_status()
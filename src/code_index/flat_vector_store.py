@@ -0,0 +1,809 @@
+"""
+Flat, memory-mapped vector store with exact top-k search.
+
+For workspaces of up to a few hundred thousand chunks, scoring every vector
+costs about as much as a round trip to a Qdrant server, and the results are
+exact. ``FlatVectorStore`` needs no server. It keeps a collection's vectors in one
+memory-mapped array file (float16 by default, or int8 with a scale per row)
+and their payloads in a columnar sidecar. A query is scored with blocked
+NumPy matrix products, and the top k are picked with ``argpartition``.
+Filters on workspace, file type, directory, file path and duplicate cluster
+are boolean bitmaps. They are built from per-value postings of the payload
+columns the first time a field is filtered on.
+
+Layout of a collection directory::
+
+    meta.json            current generation, dimension and dtype
+    vectors.<gen>.bin    unit-length vectors, one row per point
+    scales.<gen>.bin     float32 scale of each row (int8 only)
+    payload.<gen>.json   columnar payloads: point ids plus one list per key
+    log.<gen>.jsonl      upserts, deletes and payload updates since <gen>
+
+Writes append rows to the current generation's vector file and record the
+change in the log. ``flush()`` compacts the live rows into a new
+generation and switches ``meta.json`` atomically. Readers therefore always
+open a complete generation and replay only its log.
+
+Select it with ``vector_store_backend: "flat"``. It implements the
+``QdrantVectorStore`` methods used by indexing and search.
+"""
+import json
+import os
+import posixpath
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from code_index.cache import resolve_cache_dir
+from code_index.errors import ErrorCategory, ErrorContext, ErrorSeverity, error_handler
+from code_index.search_scoring import (
+    RankingProfile, hit_from_payload, is_payload_valid, resolve_filetype,
+)
+from code_index.service_validation import ValidationResult
+from code_index.tenancy import workspace_collection_name, workspace_hash
+
+FLAT_STORE_DTYPES = ("float32", "float16", "int8")
+FORMAT_VERSION = 1
+# Rows scored per matrix product; small enough for the float32 copy of a block to stay in cache
+SCORE_BLOCK_ROWS = 4096
+
+_collections: Dict[str, "FlatCollection"] = {}
+_collections_lock = threading.Lock()
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def _keys(value: Any) -> Iterable[Any]:
+    """Index keys of one payload value; list values are indexed per element."""
+    if value is None:
+        return ()
+    items = value if isinstance(value, list) else (value,)
+    return [item for item in items if isinstance(item, (str, int, float, bool))]
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class FlatCollection:
+    """Vectors, payloads and filter postings of one flat collection directory."""
+
+    def __init__(self, path: Path, dtype: str = "float16"):
+        self.path = Path(path)
+        # dtype of new collections; an existing collection keeps the one it was created with
+        self.default_dtype = dtype if dtype in FLAT_STORE_DTYPES else "float16"
+        self.lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.generation = 0
+        self.dimension: Optional[int] = None
+        self.dtype = self.default_dtype
+        self._ids: List[Any] = []
+        self._row_of: Dict[Any, int] = {}
+        self._columns: Dict[str, List[Any]] = {}
+        self._live = bytearray()
+        self._postings: Dict[str, Dict[Any, Set[int]]] = {}
+        self._bitmaps: Dict[Tuple[str, Any], np.ndarray] = {}
+        self._matrix_cache: Optional[np.ndarray] = None
+        self._scales_cache: Optional[np.ndarray] = None
+        self._log_offset = 0
+        self._log_entries = 0
+        self._meta_mtime: Optional[int] = None
+
+    # ------------------------------
+    # Files
+    # ------------------------------
+    @property
+    def _meta_path(self) -> Path:
+        return self.path / "meta.json"
+
+    def _file(self, kind: str, generation: Optional[int] = None) -> Path:
+        ext = {"vectors": "bin", "scales": "bin", "payload": "json", "log": "jsonl"}[kind]
+        return self.path / f"{kind}.{self.generation if generation is None else generation}.{ext}"
+
+    @property
+    def _row_bytes(self) -> int:
+        return int(self.dimension or 0) * np.dtype(self.dtype).itemsize
+
+    def exists(self) -> bool:
+        return os.path.isfile(self._meta_path)
+
+    # ------------------------------
+    # Loading
+    # ------------------------------
+    def refresh(self) -> None:
+        """Load the collection, or pick up what another process wrote since the last load."""
+        if not self.exists():
+            if self.generation:
+                self._reset()
+            return
+        meta_mtime = self._meta_path.stat().st_mtime_ns
+        if meta_mtime != self._meta_mtime:
+            self._load()
+            return
+        log_path = self._file("log")
+        if os.path.isfile(log_path) and log_path.stat().st_size > self._log_offset:
+            self._replay_log()
+
+    def _load(self) -> None:
+        self._reset()
+        meta = json.loads(self._meta_path.read_text())
+        self._meta_mtime = self._meta_path.stat().st_mtime_ns
+        self.generation = int(meta["generation"])
+        self.dimension = int(meta["dimension"])
+        self.dtype = meta.get("dtype", "float16")
+        payload_path = self._file("payload")
+        if os.path.isfile(payload_path):
+            data = json.loads(payload_path.read_text())
+            self._ids = list(data.get("ids", []))
+            self._columns = {key: list(values) for key, values in data.get("columns", {}).items()}
+        self._row_of = {point_id: row for row, point_id in enumerate(self._ids)}
+        self._live = bytearray(b"\x01" * len(self._ids))
+        self._replay_log()
+
+    def _replay_log(self) -> None:
+        log_path = self._file("log")
+        if os.path.isfile(log_path):
+            with open(log_path, "rb") as f:
+                f.seek(self._log_offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break
+                    self._apply(entry)
+                    self._log_offset += len(line)
+                    self._log_entries += 1
+        self._invalidate()
+
+    def _repair(self) -> None:
+        """
+        Cut what an interrupted write left past the last complete log record.
+
+        Called before every write, with the collection refreshed, so that new
+        rows and records line up with the ones already replayed. Collections
+        have a single writer; readers never truncate.
+        """
+        widths = {"log": None, "vectors": self._row_bytes, "scales": 4}
+        for kind, width in widths.items():
+            if kind == "scales" and self.dtype != "int8":
+                continue
+            path = self._file(kind)
+            expected = self._log_offset if width is None else len(self._ids) * width
+            if os.path.isfile(path) and path.stat().st_size > expected:
+                with open(path, "r+b") as f:
+                    f.truncate(expected)
+
+    def _invalidate(self) -> None:
+        self._bitmaps.clear()
+        self._matrix_cache = None
+        self._scales_cache = None
+
+    # ------------------------------
+    # Creating and compacting
+    # ------------------------------
+    def create(self, dimension: int) -> None:
+        self._reset()
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.generation = 1
+        self.dimension = int(dimension)
+        self.dtype = self.default_dtype
+        self._write_generation([])
+
+    def _write_generation(self, rows: List[int]) -> None:
+        """Write ``rows`` of the current state as the next generation and switch to it."""
+        old_generation = self.generation if self.exists() else None
+        new_generation = (old_generation or 0) + 1 if old_generation is not None else self.generation
+        matrix = self.matrix() if rows else None
+        with open(self._file("vectors", new_generation), "wb") as f:
+            for start in range(0, len(rows), SCORE_BLOCK_ROWS):
+                block = matrix[np.asarray(rows[start:start + SCORE_BLOCK_ROWS])]
+                f.write(np.ascontiguousarray(block).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        if self.dtype == "int8":
+            scales = self.scales()[np.asarray(rows, dtype=np.int64)] if rows else np.zeros(0, np.float32)
+            _write_atomic(self._file("scales", new_generation), scales.astype(np.float32).tobytes())
+        columns = {}
+        for key, values in self._columns.items():
+            column = [values[row] for row in rows]
+            if any(value is not None for value in column):
+                columns[key] = column
+        payload = {"format": FORMAT_VERSION, "ids": [self._ids[row] for row in rows], "columns": columns}
+        _write_atomic(self._file("payload", new_generation),
+                      json.dumps(payload, separators=(",", ":"), default=_json_default).encode())
+        meta = {"format": FORMAT_VERSION, "generation": new_generation, "dimension": self.dimension,
+                "dtype": self.dtype, "rows": len(rows)}
+        _write_atomic(self._meta_path, json.dumps(meta).encode())
+        if old_generation is not None and old_generation != new_generation:
+            for kind in ("vectors", "scales", "payload", "log"):
+                try:
+                    self._file(kind, old_generation).unlink()
+                except FileNotFoundError:
+                    pass
+        self._load()
+
+    def compact(self) -> None:
+        """Fold the log and drop dead rows into a new generation."""
+        if not self.exists():
+            return
+        self._write_generation(np.flatnonzero(self.live_mask()).tolist())
+
+    @property
+    def pending_log_entries(self) -> int:
+        return self._log_entries
+
+    @property
+    def dead_rows(self) -> int:
+        return len(self._live) - self._live.count(1)
+
+    def drop(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+        self._reset()
+
+    # ------------------------------
+    # Writes
+    # ------------------------------
+    def _encode(self, vectors: np.ndarray) -> Tuple[bytes, Optional[bytes]]:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        unit = vectors / norms
+        if self.dtype == "int8":
+            scales = np.abs(unit).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            codes = np.clip(np.rint(unit / scales[:, None]), -127, 127).astype(np.int8)
+            return codes.tobytes(), scales.astype(np.float32).tobytes()
+        return unit.astype(self.dtype).tobytes(), None
+
+    def _append_log(self, entries: List[Dict[str, Any]], sync: bool) -> None:
+        data = "".join(json.dumps(entry, separators=(",", ":"), default=_json_default) + "\n"
+                       for entry in entries).encode()
+        with open(self._file("log"), "ab") as f:
+            f.write(data)
+            f.flush()
+            if sync:
+                os.fsync(f.fileno())
+        self._log_offset += len(data)
+        self._log_entries += len(entries)
+
+    def upsert(self, ids: List[Any], payloads: List[Dict[str, Any]], vectors: np.ndarray, sync: bool) -> None:
+        if vectors.ndim != 2 or vectors.shape[1] != self.dimension:
+            raise ValueError(f"Vector dimension {vectors.shape[-1]} does not match collection dimension {self.dimension}")
+        self._repair()
+        data, scales = self._encode(vectors.astype(np.float32))
+        # Vectors go first: rows without a log record are cut on the next load
+        with open(self._file("vectors"), "ab") as f:
+            f.write(data)
+            f.flush()
+            if sync:
+                os.fsync(f.fileno())
+        if scales is not None:
+            with open(self._file("scales"), "ab") as f:
+                f.write(scales)
+        self._append_log([{"op": "upsert", "id": point_id, "payload": payload}
+                          for point_id, payload in zip(ids, payloads)], sync)
+        for point_id, payload in zip(ids, payloads):
+            self._apply_upsert(point_id, payload)
+        self._invalidate()
+
+    def delete(self, ids: List[Any], sync: bool = True) -> None:
+        ids = [point_id for point_id in ids if point_id in self._row_of]
+        if not ids:
+            return
+        self._repair()
+        self._append_log([{"op": "delete", "ids": ids}], sync)
+        self._apply_delete(ids)
+        self._invalidate()
+
+    def set_payload(self, ids: List[Any], payload: Dict[str, Any], sync: bool = True) -> None:
+        ids = [point_id for point_id in ids if point_id in self._row_of]
+        if not ids:
+            return
+        self._repair()
+        self._append_log([{"op": "set_payload", "ids": ids, "payload": payload}], sync)
+        self._apply_set_payload(ids, payload)
+        self._invalidate()
+
+    def _apply(self, entry: Dict[str, Any]) -> None:
+        op = entry.get("op")
+        if op == "upsert":
+            self._apply_upsert(entry.get("id"), entry.get("payload") or {})
+        elif op == "delete":
+            self._apply_delete(entry.get("ids") or [])
+        elif op == "set_payload":
+            self._apply_set_payload(entry.get("ids") or [], entry.get("payload") or {})
+
+    def _apply_upsert(self, point_id: Any, payload: Dict[str, Any]) -> None:
+        previous = self._row_of.get(point_id)
+        if previous is not None:
+            self._live[previous] = 0
+        row = len(self._ids)
+        self._ids.append(point_id)
+        self._row_of[point_id] = row
+        self._live.append(1)
+        for key in payload:
+            if key not in self._columns:
+                self._columns[key] = [None] * row
+        for key, column in self._columns.items():
+            value = payload.get(key)
+            column.append(value)
+            postings = self._postings.get(key)
+            if postings is not None:
+                for item in _keys(value):
+                    postings.setdefault(item, set()).add(row)
+
+    def _apply_delete(self, ids: List[Any]) -> None:
+        for point_id in ids:
+            row = self._row_of.pop(point_id, None)
+            if row is not None:
+                self._live[row] = 0
+
+    def _apply_set_payload(self, ids: List[Any], payload: Dict[str, Any]) -> None:
+        rows = [self._row_of[point_id] for point_id in ids if point_id in self._row_of]
+        for key, value in payload.items():
+            column = self._columns.setdefault(key, [None] * len(self._ids))
+            postings = self._postings.get(key)
+            for row in rows:
+                if postings is not None:
+                    for item in _keys(column[row]):
+                        postings.get(item, set()).discard(row)
+                    for item in _keys(value):
+                        postings.setdefault(item, set()).add(row)
+                column[row] = value
+
+    # ------------------------------
+    # Reads
+    # ------------------------------
+    def matrix(self) -> np.ndarray:
+        """Memory-mapped ``rows x dimension`` array of stored vectors (dead rows included)."""
+        if self._matrix_cache is None:
+            rows = len(self._ids)
+            if rows == 0:
+                self._matrix_cache = np.zeros((0, int(self.dimension or 0)), dtype=self.dtype)
+            else:
+                self._matrix_cache = np.memmap(self._file("vectors"), dtype=self.dtype, mode="r",
+                                               shape=(rows, int(self.dimension or 0)))
+        return self._matrix_cache
+
+    def scales(self) -> np.ndarray:
+        if self._scales_cache is None:
+            rows = len(self._ids)
+            if rows == 0:
+                self._scales_cache = np.zeros(0, dtype=np.float32)
+            else:
+                self._scales_cache = np.memmap(self._file("scales"), dtype=np.float32, mode="r", shape=(rows,))
+        return self._scales_cache
+
+    def live_mask(self) -> np.ndarray:
+        return self.bitmap("", None)
+
+    def _index(self, field: str) -> Dict[Any, Set[int]]:
+        postings = self._postings.get(field)
+        if postings is None:
+            postings = {}
+            for row, value in enumerate(self._columns.get(field, ())):
+                for item in _keys(value):
+                    postings.setdefault(item, set()).add(row)
+            self._postings[field] = postings
+        return postings
+
+    def bitmap(self, field: str, value: Any) -> np.ndarray:
+        """Boolean row mask of a payload match; ``("", None)`` is the mask of live rows."""
+        key = (field, value)
+        bitmap = self._bitmaps.get(key)
+        if bitmap is None:
+            if not field:
+                bitmap = np.frombuffer(bytes(self._live), dtype=np.uint8).astype(bool)
+            else:
+                bitmap = np.zeros(len(self._ids), dtype=bool)
+                rows = self._index(field).get(value)
+                if rows:
+                    bitmap[np.fromiter(rows, dtype=np.int64, count=len(rows))] = True
+            self._bitmaps[key] = bitmap
+        return bitmap
+
+    def filter_mask(self, conditions: List[Tuple[str, Any]]) -> np.ndarray:
+        """Live rows matching every ``(field, value)`` condition; list values match any element."""
+        mask = self.live_mask()
+        for field, value in conditions:
+            if isinstance(value, (list, tuple, set)):
+                any_mask = np.zeros(len(self._ids), dtype=bool)
+                for item in value:
+                    any_mask |= self.bitmap(field, item)
+                mask = mask & any_mask
+            else:
+                mask = mask & self.bitmap(field, value)
+        return mask
+
+    def top_k(self, query: np.ndarray, mask: np.ndarray, limit: int,
+              min_score: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the rows and cosine scores of the best ``limit`` rows in ``mask``, best first."""
+        candidates = np.flatnonzero(mask)
+        if candidates.size == 0 or limit <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        if query.shape[0] != self.dimension:
+            raise ValueError(f"Query dimension {query.shape[0]} does not match collection dimension {self.dimension}")
+        norm = float(np.linalg.norm(query))
+        if norm > 0:
+            query = query / norm
+        matrix = self.matrix()
+        scales = self.scales() if self.dtype == "int8" else None
+        scores = np.empty(candidates.size, dtype=np.float32)
+        for start in range(0, candidates.size, SCORE_BLOCK_ROWS):
+            rows = candidates[start:start + SCORE_BLOCK_ROWS]
+            if rows[-1] - rows[0] + 1 == rows.size:
+                # Contiguous rows are read as one slice of the map
+                block = matrix[rows[0]:rows[-1] + 1]
+                block_scales = scales[rows[0]:rows[-1] + 1] if scales is not None else None
+            else:
+                block = matrix[rows]
+                block_scales = scales[rows] if scales is not None else None
+            block_scores = block.astype(np.float32) @ query
+            if block_scales is not None:
+                block_scores *= block_scales
+            scores[start:start + rows.size] = block_scores
+        if min_score is not None:
+            keep = scores >= min_score
+            candidates, scores = candidates[keep], scores[keep]
+        if candidates.size > limit:
+            best = np.argpartition(-scores, limit - 1)[:limit]
+            candidates, scores = candidates[best], scores[best]
+        order = np.argsort(-scores, kind="stable")
+        return candidates[order], scores[order]
+
+    def point_id(self, row: int) -> Any:
+        return self._ids[row]
+
+    def payload(self, row: int, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        keys = self._columns.keys() if fields is None else [key for key in fields if key in self._columns]
+        return {key: self._columns[key][row] for key in keys if self._columns[key][row] is not None}
+
+    @property
+    def live_rows(self) -> int:
+        return self._live.count(1)
+
+
+def open_flat_collection(path: Path, dtype: str = "float16") -> FlatCollection:
+    """Return the process-wide collection for a directory, so every store shares one loaded copy."""
+    key = os.path.abspath(str(path))
+    with _collections_lock:
+        collection = _collections.get(key)
+        if collection is None:
+            collection = FlatCollection(Path(key), dtype)
+            _collections[key] = collection
+        return collection
+
+
+class FlatVectorStore:
+    """Exact vector search over a memory-mapped array file, without a Qdrant server."""
+
+    def __init__(self, config: Any):
+        self._config = config
+        self.workspace_path = os.path.abspath(config.workspace_path)
+        override = getattr(config, "collection_name_override", None)
+        if isinstance(override, str) and override.strip():
+            self.collection_name = override.strip()
+        else:
+            self.collection_name = workspace_collection_name(config.workspace_path)
+        self.vector_size: Optional[int] = config.embedding_length
+        dtype = getattr(config, "flat_store_dtype", "float16")
+        root = getattr(config, "flat_store_dir", None)
+        base = Path(os.path.expanduser(root)) if isinstance(root, str) and root.strip() else resolve_cache_dir(config) / "flat"
+        self.path = base / self.collection_name
+        self.collection = open_flat_collection(self.path, dtype if dtype in FLAT_STORE_DTYPES else "float16")
+
+    # Interface parity with QdrantVectorStore
+    tenant_mode = False
+    shard_key_mode = "none"
+
+    def shard_key_for(self, point: Dict[str, Any]) -> Optional[str]:
+        return None
+
+    def _workspace_hash(self) -> str:
+        return workspace_hash(self.workspace_path)
+
+    def _fail(self, operation: str, error: Exception, message: str, severity: ErrorSeverity,
+              **data: Any) -> Exception:
+        error_context = ErrorContext(
+            component="flat_vector_store",
+            operation=operation,
+            additional_data={"collection_name": self.collection_name, **data}
+        )
+        error_response = error_handler.handle_error(error, error_context, ErrorCategory.DATABASE, severity)
+        return Exception(f"{message}: {error_response.message}")
+
+    def validate_configuration(self) -> ValidationResult:
+        """Check that the store directory can be created and written."""
+        start_time = time.time()
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if not os.access(self.path.parent, os.W_OK):
+                raise PermissionError(f"{self.path.parent} is not writable")
+            return ValidationResult(
+                service="flat_vector_store",
+                valid=True,
+                details={
+                    "path": str(self.path),
+                    "dtype": self.collection.dtype if self.collection.exists() else self.collection.default_dtype,
+                    "collection_exists": self.collection.exists(),
+                },
+                response_time_ms=int((time.time() - start_time) * 1000)
+            )
+        except Exception as e:
+            return ValidationResult(
+                service="flat_vector_store",
+                valid=False,
+                error=f"Flat vector store unavailable: {e}",
+                details={"path": str(self.path), "error_type": "storage_error"},
+                response_time_ms=int((time.time() - start_time) * 1000),
+                actionable_guidance=[
+                    "Check that flat_store_dir (or the cache directory) exists and is writable",
+                    "Set vector_store_backend to 'qdrant' to use a Qdrant server instead",
+                ]
+            )
+
+    def validate_configuration_and_raise(self) -> None:
+        """Validate the store and raise if it cannot be used."""
+        self.validate_configuration().raise_for_errors()
+
+    def initialize(self) -> bool:
+        """
+        Open the collection, creating it on first use.
+
+        Returns:
+            True if a new collection was created, False if it already existed
+        """
+        if self.vector_size is None or not isinstance(self.vector_size, int) or self.vector_size <= 0:
+            raise Exception(
+                "Config error: Please set 'embedding_length' in code_index.json to match the Ollama model (e.g., 1024 for Qwen, 768 for nomic)."
+            )
+        with self.collection.lock:
+            self.collection.refresh()
+            if not self.collection.exists():
+                self.collection.create(self.vector_size)
+                return True
+            if self.collection.dimension != self.vector_size:
+                raise Exception(
+                    f"Collection '{self.collection_name}' stores {self.collection.dimension}-dimensional vectors "
+                    f"but embedding_length is {self.vector_size}; delete it or re-index into a new collection"
+                )
+            if self.collection.pending_log_entries:
+                # Fold the previous run's writes in before adding new ones
+                self.collection.compact()
+            return False
+
+    def flush(self) -> None:
+        """Compact pending writes so later readers load one columnar generation."""
+        try:
+            with self.collection.lock:
+                if self.collection.exists() and (self.collection.pending_log_entries or self.collection.dead_rows):
+                    self.collection.compact()
+        except Exception as e:
+            raise self._fail("flush", e, "Failed to compact flat vector store", ErrorSeverity.MEDIUM)
+
+    def begin_bulk_load(self) -> Optional[Dict[str, Any]]:
+        """Nothing to defer: the flat store has no index to build."""
+        return None
+
+    def end_bulk_load(self, state: Dict[str, Any], timeout_seconds: float = 600.0,
+                      poll_interval_seconds: float = 1.0) -> bool:
+        return True
+
+    def wait_for_optimization(self, timeout_seconds: float = 600.0, poll_interval_seconds: float = 1.0) -> bool:
+        return True
+
+    def upsert_points(self, points: List[Dict[str, Any]], wait: bool = True) -> None:
+        """
+        Store points, replacing any with the same ID.
+
+        Args:
+            points: Point dictionaries with id, vector and payload
+            wait: fsync the write before returning
+        """
+        if not points:
+            return
+        try:
+            vectors = np.vstack([np.asarray(point["vector"], dtype=np.float32).reshape(1, -1) for point in points])
+            workspace_hash = self._workspace_hash()
+            payloads = []
+            for point in points:
+                payload = dict(point.get("payload") or {})
+                if payload:
+                    payload["workspace_hash"] = workspace_hash
+                    payload["workspace_path"] = self.workspace_path
+                payloads.append(payload)
+            with self.collection.lock:
+                self.collection.refresh()
+                if not self.collection.exists():
+                    raise Exception(f"Collection '{self.collection_name}' does not exist; call initialize() first")
+                self.collection.upsert([point["id"] for point in points], payloads, vectors, wait)
+        except Exception as e:
+            raise self._fail("upsert_points", e, "Failed to upsert points", ErrorSeverity.HIGH,
+                             points_count=len(points))
+
+    def _is_payload_valid(self, payload: Dict[str, Any]) -> bool:
+        """Check if payload is valid (KiloCode-compatible)."""
+        return is_payload_valid(payload)
+
+    def search(self, query_vector: List[float], directory_prefix: Optional[str] = None,
+               min_score: float = 0.4, max_results: int = 50,
+               filetype_filter: Optional[str] = None,
+               skip_workspace_filter: bool = False, with_vectors: bool = False) -> List[Dict[str, Any]]:
+        """
+        Search for similar vectors, scoped to the current workspace.
+
+        Args:
+            query_vector: Vector to search for
+            directory_prefix: Optional workspace-relative directory; only points below it are returned
+            min_score: Minimum cosine similarity
+            max_results: Maximum number of results to return
+            filetype_filter: Optional file type/language to narrow results (e.g. "go", "py")
+            skip_workspace_filter: If True, search the entire collection (used with --name/collection_name)
+            with_vectors: If True, each hit also carries its stored ``vector``
+
+        Returns:
+            List of search results, in the same format as QdrantVectorStore.search()
+        """
+        try:
+            conditions: List[Tuple[str, Any]] = []
+            if not skip_workspace_filter:
+                conditions.append(("workspace_hash", self._workspace_hash()))
+            if filetype_filter:
+                conditions.append(("filetype", resolve_filetype(filetype_filter)))
+            prefix = posixpath.normpath((directory_prefix or ".").replace("\\", "/")).strip("/")
+            if prefix and prefix != ".":
+                conditions.append(("pathSegments", prefix))
+
+            profile = RankingProfile.for_config(self._config)
+            limit = max(max_results, 200) if profile.min_content_length > 0 else max_results
+            with self.collection.lock:
+                self.collection.refresh()
+                if not self.collection.exists():
+                    return []
+                rows, scores = self.collection.top_k(query_vector, self.collection.filter_mask(conditions),
+                                                     limit, min_score)
+                hits = []
+                for row, score in zip(rows.tolist(), scores.tolist()):
+                    payload = self.collection.payload(row)
+                    if self._is_payload_valid(payload):
+                        hits.append(hit_from_payload(self.collection.point_id(row), score, payload))
+                        if with_vectors:
+                            # Rows are stored at unit length (int8 up to a scale); MMR only needs the direction
+                            hits[-1]["vector"] = self.collection.matrix()[row].astype(np.float32)
+
+            # Apply excludes, min content length filter and adjusted scores, then truncate
+            return profile.rank(hits, max_results, filetype_filter)
+        except Exception as e:
+            raise Exception(f"Failed to search: {e}")
+
+    def search_batch(self, query_vectors: List[List[float]], directory_prefix: Optional[str] = None,
+                     min_score: float = 0.4, max_results: int = 50,
+                     filetype_filter: Optional[str] = None, skip_workspace_filter: bool = False,
+                     query_texts: Optional[List[str]] = None,
+                     with_vectors: bool = False) -> List[List[Dict[str, Any]]]:
+        """
+        Run several searches; same interface as QdrantVectorStore.search_batch().
+
+        The collection is in-process, so this is one search() per vector;
+        ``query_texts`` is ignored because flat collections have no sparse vectors.
+        """
+        return [
+            self.search(query_vector, directory_prefix, min_score, max_results, filetype_filter,
+                        skip_workspace_filter, with_vectors)
+            for query_vector in query_vectors
+        ]
+
+    def _workspace_point_ids(self, field: str, values: List[Any]) -> List[Any]:
+        mask = self.collection.filter_mask([("workspace_hash", self._workspace_hash()), (field, values)])
+        return [self.collection.point_id(row) for row in np.flatnonzero(mask).tolist()]
+
+    def delete_points_by_file_path(self, file_path: str) -> None:
+        """Delete the points of one file of this workspace."""
+        self.delete_points_by_file_paths([file_path])
+
+    def delete_points_by_file_paths(self, file_paths: List[str]) -> None:
+        """Delete the points of several files of this workspace."""
+        if not file_paths:
+            return
+        try:
+            with self.collection.lock:
+                self.collection.refresh()
+                if self.collection.exists():
+                    self.collection.delete(self._workspace_point_ids("filePath", list(file_paths)))
+        except Exception as e:
+            raise self._fail("delete_points_by_file_paths", e, "Failed to delete points by file paths",
+                             ErrorSeverity.MEDIUM, files_count=len(file_paths))
+
+    def delete_points(self, point_ids: List[Any]) -> None:
+        """Delete points by ID."""
+        if not point_ids:
+            return
+        try:
+            with self.collection.lock:
+                self.collection.refresh()
+                if self.collection.exists():
+                    self.collection.delete(list(point_ids))
+        except Exception as e:
+            raise self._fail("delete_points", e, "Failed to delete points", ErrorSeverity.MEDIUM,
+                             points_count=len(point_ids))
+
+    def set_payload(self, point_ids: List[Any], payload: Dict[str, Any]) -> None:
+        """Merge payload fields into existing points."""
+        if not point_ids:
+            return
+        try:
+            with self.collection.lock:
+                self.collection.refresh()
+                if self.collection.exists():
+                    self.collection.set_payload(list(point_ids), dict(payload))
+        except Exception as e:
+            raise self._fail("set_payload", e, "Failed to set payload", ErrorSeverity.MEDIUM,
+                             points_count=len(point_ids))
+
+    def get_cluster_members(self, cluster_ids: List[str], limit: int = 256) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Fetch the locations of every stored point in the given duplicate clusters.
+
+        Returns:
+            Mapping of cluster id to ``{"filePath", "startLine", "endLine"}`` entries
+        """
+        if not cluster_ids:
+            return {}
+        members: Dict[str, List[Dict[str, Any]]] = {}
+        with self.collection.lock:
+            self.collection.refresh()
+            if not self.collection.exists():
+                return {}
+            mask = self.collection.filter_mask([("workspace_hash", self._workspace_hash()),
+                                                ("clusterId", list(cluster_ids))])
+            for row in np.flatnonzero(mask)[:limit].tolist():
+                payload = self.collection.payload(row, ("clusterId", "filePath", "startLine", "endLine"))
+                members.setdefault(payload.get("clusterId", ""), []).append({
+                    "filePath": payload.get("filePath", ""),
+                    "startLine": payload.get("startLine", 0),
+                    "endLine": payload.get("endLine", 0),
+                })
+        return members
+
+    def clear_collection(self) -> None:
+        """Remove every point but keep the collection."""
+        try:
+            with self.collection.lock:
+                self.collection.refresh()
+                if self.collection.exists():
+                    dimension = self.collection.dimension
+                    self.collection.drop()
+                    self.collection.create(dimension)
+        except Exception as e:
+            raise self._fail("clear_collection", e, "Failed to clear collection", ErrorSeverity.MEDIUM)
+
+    def delete_collection(self) -> None:
+        """Delete the collection directory."""
+        try:
+            with self.collection.lock:
+                self.collection.drop()
+        except Exception as e:
+            raise Exception(f"Failed to delete collection: {e}")
+
+    def collection_exists(self) -> bool:
+        """Check if the collection exists."""
+        return self.collection.exists()
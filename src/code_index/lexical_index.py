@@ -0,0 +1,451 @@
+"""
+BM25 lexical index over the indexed code blocks of a workspace.
+
+Exact identifiers such as ``parse_file_with_mmap`` are found reliably by
+term matching and poorly by embeddings. During indexing every ``CodeBlock``
+also becomes a document of a per-workspace inverted index. Block text is
+tokenized code-aware: an identifier is indexed whole and as its
+camelCase/snake_case parts, so ``parseFileWithMmap`` matches queries for
+``parse file`` as well as for the full name. Searches rank blocks with BM25.
+
+The index lives in ``lexical_<workspace id>`` under the cache directory::
+
+    lexical.json         files and their hashes, and the segment and document
+                         range holding each file's documents
+    segment.<gen>.json   document table and term dictionary of a segment
+                         (offset, length and widths of each postings list)
+    segment.<gen>.bin    postings lists: doc-id gaps, then term frequencies,
+                         each packed at the narrowest unsigned width that fits
+
+Searches read ``lexical.json`` and memory-map the postings of every live
+segment, so they only decode the lists of the query terms. Indexing updates
+one file at a time (documents of the file's previous version are replaced).
+``save()`` writes the documents of the files changed since the last save as
+a new segment and swaps ``lexical.json`` atomically; documents of replaced
+files stay in their old segment until too many segments pile up or dead
+documents outnumber live ones, and the segments are merged.
+"""
+import json
+import math
+import os
+import posixpath
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from code_index.per_file_index import PerFileIndex
+from code_index.search_scoring import resolve_filetype
+
+# Tokens longer than this are dropped (minified code, base64 blobs)
+MAX_TOKEN_LENGTH = 64
+
+_WORD_RE = re.compile(r"[A-Za-z0-9_]+")
+_PART_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+_WIDTHS = (np.uint8, np.uint16, np.uint32)
+
+# Live segments at most; more are merged on save
+MAX_SEGMENTS = 8
+
+
+def tokenize_code(text: str) -> List[str]:
+    """
+    Split source text into lowercase index terms.
+
+    Each identifier yields itself (without surrounding underscores) and, if
+    it is compound, its camelCase/snake_case parts:
+    ``getHTTPResponse`` -> ``gethttpresponse``, ``get``, ``http``, ``response``.
+    Single characters are dropped.
+    """
+    terms: List[str] = []
+    for word in _WORD_RE.findall(text):
+        word = word.strip("_")
+        if len(word) < 2 or len(word) > MAX_TOKEN_LENGTH:
+            continue
+        terms.append(word.lower())
+        parts = [part.lower() for part in _PART_RE.findall(word)]
+        if len(parts) > 1:
+            terms.extend(part for part in parts if len(part) > 1)
+    return terms
+
+
+def query_terms(query: str) -> List[str]:
+    """Distinct index terms of a query, in query order."""
+    return list(dict.fromkeys(tokenize_code(query)))
+
+
+def _width(max_value: int) -> Tuple[int, Any]:
+    for code, dtype in enumerate(_WIDTHS):
+        if max_value <= np.iinfo(dtype).max:
+            return code, dtype
+    raise ValueError(f"Postings value {max_value} does not fit in 32 bits")
+
+
+@dataclass
+class LexicalDocument:
+    """One code block as a document of the lexical index."""
+
+    point_id: str
+    start_line: int
+    end_line: int
+    type: str
+    term_counts: Dict[str, int]
+    length: int
+
+    @classmethod
+    def from_text(cls, point_id: str, start_line: int, end_line: int, block_type: str,
+                  text: str) -> "LexicalDocument":
+        terms = tokenize_code(text)
+        counts: Dict[str, int] = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        return cls(point_id, start_line, end_line, block_type, counts, len(terms))
+
+
+class _Segment:
+    """Documents and postings written by one save; never modified afterwards."""
+
+    def __init__(self, docs: Dict[str, List[Any]], terms: Dict[str, List[int]], postings: Optional[np.ndarray]):
+        self.start: List[int] = list(docs.get("start", []))
+        self.end: List[int] = list(docs.get("end", []))
+        self.type: List[str] = list(docs.get("type", []))
+        self.ids: List[str] = list(docs.get("id", []))
+        self.length = np.asarray(docs.get("length", []), dtype=np.float32)
+        self.terms = terms
+        self.postings = postings
+
+    def decode(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Segment-local doc ids and term frequencies of one postings list."""
+        entry = self.terms.get(term)
+        if entry is None or self.postings is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        offset, count, gap_code, tf_code = entry
+        gap_dtype, tf_dtype = _WIDTHS[gap_code], _WIDTHS[tf_code]
+        gaps_end = offset + count * np.dtype(gap_dtype).itemsize
+        gaps = np.frombuffer(self.postings, dtype=gap_dtype, count=count, offset=offset)
+        tfs = np.frombuffer(self.postings, dtype=tf_dtype, count=count, offset=gaps_end)
+        return np.cumsum(gaps, dtype=np.int64), tfs.astype(np.float32)
+
+    def documents(self) -> List[LexicalDocument]:
+        """Rebuild the segment's documents from its postings (only needed to merge segments)."""
+        counts: List[Dict[str, int]] = [{} for _ in self.ids]
+        for term in self.terms:
+            doc_ids, tfs = self.decode(term)
+            for doc, tf in zip(doc_ids.tolist(), tfs.tolist()):
+                counts[doc][term] = int(tf)
+        return [LexicalDocument(self.ids[doc], self.start[doc], self.end[doc], self.type[doc],
+                                counts[doc], int(self.length[doc])) for doc in range(len(self.ids))]
+
+
+# Where a saved file's documents are: segment id, first document, document count
+_Placement = Tuple[int, int, int]
+
+
+class LexicalIndex(PerFileIndex):
+    """Per-workspace inverted index of code blocks with BM25 ranking."""
+
+    FORMAT_VERSION = 2
+    META_FILE = "lexical.json"
+    # Segments outlive generations, so they are cleaned up here rather than by the base class
+    SEGMENT_FILE = "segment.{segment}"
+    DIRECTORY_PREFIX = "lexical"
+    ENABLED_FLAG = "lexical_index_enabled"
+
+    def __init__(self, directory: str, workspace_path: str, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        # Opened segments by id, with the mtime of their table; kept across reloads
+        self._segment_cache: Dict[int, Tuple[int, _Segment]] = {}
+        super().__init__(directory, workspace_path)
+
+    def _reset_view(self) -> None:
+        # Search view: read from lexical.json and the live segments
+        super()._reset_view()
+        self._placements: List[_Placement] = []
+        self._segments: Dict[int, _Segment] = {}
+        self._segment_offsets: Dict[int, int] = {}
+        # Per document of all live segments; -1 marks documents of replaced files
+        self._doc_file = np.zeros(0, dtype=np.int32)
+        self._doc_length = np.zeros(0, dtype=np.float32)
+        self._live_docs = 0
+
+    @classmethod
+    def _options(cls, config: Any) -> Dict[str, Any]:
+        k1 = getattr(config, "lexical_bm25_k1", 1.2)
+        b = getattr(config, "lexical_bm25_b", 0.75)
+        return {"k1": float(k1) if isinstance(k1, (int, float)) else 1.2,
+                "b": float(b) if isinstance(b, (int, float)) else 0.75}
+
+    # ------------------------------
+    # Loading
+    # ------------------------------
+    def _segment_path(self, segment: int, suffix: str) -> Path:
+        return self.directory / (self.SEGMENT_FILE.format(segment=segment) + suffix)
+
+    def _open_segment(self, segment: int) -> Optional[_Segment]:
+        table_path = self._segment_path(segment, ".json")
+        try:
+            mtime = os.stat(table_path).st_mtime_ns
+        except OSError:
+            return None
+        cached = self._segment_cache.get(segment)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        with open(table_path, "r") as f:
+            table = json.load(f)
+        terms = table.get("terms", {})
+        postings_path = self._segment_path(segment, ".bin")
+        postings = None
+        if terms and os.path.isfile(postings_path) and os.path.getsize(postings_path) > 0:
+            postings = np.memmap(postings_path, dtype=np.uint8, mode="r")
+        opened = _Segment(table.get("docs", {}), terms, postings)
+        self._segment_cache[segment] = (mtime, opened)
+        return opened
+
+    def _load(self, meta: Dict[str, Any]) -> None:
+        files = meta.get("files", {})
+        self._placements = [tuple(p) for p in zip(files.get("segment", []), files.get("first", []),
+                                                  files.get("count", []))]
+        total = 0
+        for segment in sorted({p[0] for p in self._placements}):
+            opened = self._open_segment(segment)
+            if opened is not None:
+                self._segment_offsets[segment] = total
+                self._segments[segment] = opened
+                total += len(opened.ids)
+        self._segment_cache = {segment: self._segment_cache[segment] for segment in self._segments}
+        self._doc_file = np.full(total, -1, dtype=np.int32)
+        if self._segments:
+            self._doc_length = np.concatenate([opened.length for opened in self._segments.values()])
+        for file_index, (segment, first, count) in enumerate(self._placements):
+            offset = self._segment_offsets.get(segment)
+            if offset is not None:
+                self._doc_file[offset + first:offset + first + count] = file_index
+        self._live_docs = int(np.count_nonzero(self._doc_file >= 0))
+
+    def _decode(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Live doc ids (across segments) and term frequencies of one term."""
+        doc_parts, tf_parts = [], []
+        for segment, opened in self._segments.items():
+            doc_ids, tfs = opened.decode(term)
+            if doc_ids.size:
+                doc_ids = doc_ids + self._segment_offsets[segment]
+                live = self._doc_file[doc_ids] >= 0
+                doc_parts.append(doc_ids[live])
+                tf_parts.append(tfs[live])
+        if not doc_parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        return np.concatenate(doc_parts), np.concatenate(tf_parts)
+
+    def _document(self, doc: int) -> Tuple[_Segment, int]:
+        """Segment and segment-local position of a doc id."""
+        segment = self._placements[int(self._doc_file[doc])][0]
+        return self._segments[segment], doc - self._segment_offsets[segment]
+
+    # ------------------------------
+    # Updates
+    # ------------------------------
+    def _split_by_file(self) -> Dict[str, Tuple[str, Any]]:
+        """Saved files keep their placement; their postings are not decoded."""
+        return {name: (self._file_hashes.get(name, ""), placement)
+                for name, placement in zip(self._file_names, self._placements)}
+
+    def update_file(self, rel_path: str, file_hash: str, documents: Iterable[LexicalDocument]) -> None:
+        """Replace the documents of a file with those of its current version."""
+        self._set_file(rel_path, file_hash, list(documents))
+
+    def _segments_to_merge(self, placements: Dict[str, _Placement]) -> Set[int]:
+        """Segments rewritten by this save, so their dead documents go away."""
+        live: Dict[int, int] = {}
+        for segment, _, count in placements.values():
+            live[segment] = live.get(segment, 0) + count
+        live_segments = {segment for segment in live if segment in self._segments}
+        rows = {segment: len(self._segments[segment].ids) for segment in live_segments}
+        dead = sum(rows[segment] - live[segment] for segment in live_segments)
+        if len(live_segments) < MAX_SEGMENTS and dead <= sum(live.values()):
+            return set()
+        # Keep the largest segment unless it is mostly dead itself
+        base = max(live_segments, key=lambda segment: rows[segment])
+        if rows[base] - live[base] <= live[base]:
+            return live_segments - {base}
+        return live_segments
+
+    def _write_generation(self, names: List[str], generation: int, meta: Dict[str, Any]) -> None:
+        files = self._files or {}
+        placements = {name: entry for name, (_, entry) in files.items() if not isinstance(entry, list)}
+        merged = self._segments_to_merge(placements)
+        merged_documents = {segment: self._segments[segment].documents() for segment in merged}
+        pending: List[Tuple[str, List[LexicalDocument]]] = []
+        for name in names:
+            entry = files[name][1]
+            if isinstance(entry, list):
+                pending.append((name, entry))
+            elif entry[0] in merged:
+                segment, first, count = entry
+                pending.append((name, merged_documents[segment][first:first + count]))
+        if pending:
+            for name, placement in self._write_segment(generation, pending).items():
+                files[name] = (files[name][0], placement)
+        meta["files"]["segment"] = [files[name][1][0] for name in names]
+        meta["files"]["first"] = [files[name][1][1] for name in names]
+        meta["files"]["count"] = [files[name][1][2] for name in names]
+
+    def _write_segment(self, segment: int,
+                       pending: List[Tuple[str, List[LexicalDocument]]]) -> Dict[str, _Placement]:
+        """Write the documents of some files as a new segment; returns where each file's documents are."""
+        placements: Dict[str, _Placement] = {}
+        starts: List[int] = []
+        ends: List[int] = []
+        types: List[str] = []
+        ids: List[str] = []
+        lengths: List[int] = []
+        postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        for name, documents in pending:
+            placements[name] = (segment, len(ids), len(documents))
+            for document in documents:
+                doc = len(ids)
+                starts.append(document.start_line)
+                ends.append(document.end_line)
+                types.append(document.type)
+                ids.append(document.point_id)
+                lengths.append(document.length)
+                for term, tf in document.term_counts.items():
+                    entry = postings.get(term)
+                    if entry is None:
+                        entry = postings[term] = ([], [])
+                    entry[0].append(doc)
+                    entry[1].append(tf)
+
+        terms: Dict[str, List[int]] = {}
+
+        def write_postings(f) -> None:
+            offset = 0
+            for term in sorted(postings):
+                doc_ids, tfs = postings[term]
+                gaps = np.diff(np.asarray(doc_ids, dtype=np.int64), prepend=0)
+                gap_code, gap_dtype = _width(int(gaps.max()))
+                tf_code, tf_dtype = _width(max(tfs))
+                data = gaps.astype(gap_dtype).tobytes() + np.asarray(tfs).astype(tf_dtype).tobytes()
+                f.write(data)
+                terms[term] = [offset, len(doc_ids), gap_code, tf_code]
+                offset += len(data)
+
+        self._write_atomic(self._segment_path(segment, ".bin"), write_postings)
+        table = {"docs": {"start": starts, "end": ends, "type": types, "id": ids, "length": lengths},
+                 "terms": terms}
+        self._write_atomic(self._segment_path(segment, ".json"),
+                           lambda f: json.dump(table, f, separators=(",", ":")), "w")
+        return placements
+
+    def save(self) -> bool:
+        """
+        Write pending changes as a new segment and generation.
+
+        Returns:
+            True if anything was written
+        """
+        with self._lock:
+            if not super().save():
+                return False
+            # Segments no file refers to any more
+            live = {self.SEGMENT_FILE.format(segment=segment) for segment in self._segments}
+            for path in self.directory.glob(self.SEGMENT_FILE.format(segment="*") + ".*"):
+                if path.suffix in (".json", ".bin") and path.stem not in live:
+                    try:
+                        path.unlink()
+                    except FileNotFoundError:
+                        pass
+            return True
+
+    # ------------------------------
+    # Search
+    # ------------------------------
+    @property
+    def document_count(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return self._live_docs
+
+    def _file_mask(self, filetype: Optional[str], path_prefix: Optional[str]) -> Optional[np.ndarray]:
+        if not filetype and not path_prefix:
+            return None
+        wanted_ext = resolve_filetype(filetype) if filetype else None
+        prefix = posixpath.normpath(path_prefix.replace("\\", "/")).strip("/") if path_prefix else ""
+        if prefix == ".":
+            prefix = ""
+        keep = np.zeros(len(self._file_names), dtype=bool)
+        for index, name in enumerate(self._file_names):
+            if wanted_ext is not None and os.path.splitext(name)[1].lstrip(".").lower() != wanted_ext:
+                continue
+            if prefix and not (name == prefix or name.startswith(prefix + "/")):
+                continue
+            keep[index] = True
+        return (self._doc_file >= 0) & keep[self._doc_file] if len(self._doc_file) else np.zeros(0, dtype=bool)
+
+    def search(self, query: str, max_results: int = 50, filetype: Optional[str] = None,
+               path_prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Rank indexed blocks against a query with BM25.
+
+        Args:
+            query: Free text or identifiers
+            max_results: Number of hits to return
+            filetype: Optional file type/language to narrow results (e.g. "go", "py")
+            path_prefix: Optional workspace-relative directory to search below
+
+        Returns:
+            Hits in the vector store format (``id``, ``score``, ``payload``), best first
+        """
+        terms = query_terms(query)
+        with self._lock:
+            self._ensure_loaded()
+            total = self._live_docs
+            if not terms or total == 0 or max_results <= 0:
+                return []
+            avg_length = float(self._doc_length[self._doc_file >= 0].mean()) or 1.0
+            scores = np.zeros(len(self._doc_file), dtype=np.float32)
+            for term in terms:
+                doc_ids, tfs = self._decode(term)
+                if doc_ids.size == 0:
+                    continue
+                idf = math.log(1.0 + (total - doc_ids.size + 0.5) / (doc_ids.size + 0.5))
+                norm = self.k1 * (1.0 - self.b + self.b * self._doc_length[doc_ids] / avg_length)
+                scores[doc_ids] += idf * tfs * (self.k1 + 1.0) / (tfs + norm)
+            mask = self._file_mask(filetype, path_prefix)
+            if mask is not None:
+                scores[~mask] = 0.0
+            candidates = np.flatnonzero(scores > 0)
+            if candidates.size > max_results:
+                candidates = candidates[np.argpartition(-scores[candidates], max_results - 1)[:max_results]]
+            order = candidates[np.argsort(-scores[candidates], kind="stable")]
+            hits = []
+            sources: Dict[str, List[str]] = {}
+            for doc in order.tolist():
+                file_path = self._file_names[int(self._doc_file[doc])]
+                if file_path not in sources:
+                    sources[file_path] = self._read_source(file_path)
+                lines = sources[file_path]
+                opened, position = self._document(doc)
+                start_line, end_line = opened.start[position], opened.end[position]
+                hits.append({
+                    "id": opened.ids[position],
+                    "score": float(scores[doc]),
+                    "payload": {
+                        "filePath": file_path,
+                        "codeChunk": "".join(lines[max(start_line - 1, 0):end_line]),
+                        "startLine": start_line,
+                        "endLine": end_line,
+                        "type": opened.type[position],
+                    },
+                })
+            return hits
+
+    def _read_source(self, rel_path: str) -> List[str]:
+        """Lines of a workspace file, from which hit text is cut; empty when the file is gone."""
+        try:
+            with open(os.path.join(self.workspace_path, rel_path), "r", encoding="utf-8", errors="replace") as f:
+                return f.readlines()
+        except OSError:
+            return []
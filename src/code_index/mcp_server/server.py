@@ -141,6 +141,7 @@ class CodeIndexMCPServer:
             lifespan=self._lifespan_manager
         )
         self._running = False
+        self._warm_up_task: Optional[asyncio.Task] = None
         
         # Set up logging - Ensure logs go to stderr to avoid protocol corruption on stdout
         logging.basicConfig(
@@ -212,6 +213,29 @@ class CodeIndexMCPServer:
             self.logger.error(f"Failed to load configuration: {e}")
             raise
 
+    def _start_embedder_warm_up(self) -> None:
+        """Schedule an embedder warm-up without delaying the MCP handshake."""
+        if not self.config or getattr(self.config, "embedder_warm_up", True) is not True:
+            return
+        self._warm_up_task = asyncio.create_task(asyncio.to_thread(self._warm_up_embedder))
+
+    def _warm_up_embedder(self) -> None:
+        """Load the configured embedding model; failures are logged, never raised."""
+        try:
+            from ..embedder import create_embedder
+
+            outcome = create_embedder(self.config).warm_up()
+        except Exception as e:
+            self.logger.warning(f"Embedder warm-up skipped: {e}")
+            return
+        if outcome.get("success"):
+            self.logger.info(
+                f"Embedding model warmed up in {outcome.get('seconds', 0.0):.2f}s "
+                f"(model load {outcome.get('load_seconds', 0.0):.2f}s)"
+            )
+        else:
+            self.logger.warning(f"Embedding model warm-up failed: {outcome.get('error')}")
+
     def _register_tools(self):
         """Private alias for tool registration (used by tests)."""
         self.register_tools()
@@ -219,18 +243,31 @@ class CodeIndexMCPServer:
     def register_tools(self):
         """Register all MCP tools."""
         from .tools.index_tool import index, set_default_config_path as set_index_config_path, create_index_tool_description
-        from .tools.search_tool import search, set_default_config_path as set_search_config_path, create_search_tool_description
+        from .tools.search_tool import (
+            search, search_batch, set_default_config_path as set_search_config_path,
+            create_search_tool_description, create_search_batch_tool_description,
+        )
         from .tools.collections_tool import collections, set_default_config_path as set_collections_config_path, create_collections_tool_description
+        from .tools.symbols_tool import symbols, set_default_config_path as set_symbols_config_path, create_symbols_tool_description
+        from .tools.graph_tool import graph, set_default_config_path as set_graph_config_path, create_graph_tool_description
+        from .tools.grep_tool import grep, set_default_config_path as set_grep_config_path, create_grep_tool_description
         
         # Set default config path for tools
         set_index_config_path(self.config_path_abs)
         set_search_config_path(self.config_path_abs)
         set_collections_config_path(self.config_path_abs)
+        set_symbols_config_path(self.config_path_abs)
+        set_graph_config_path(self.config_path_abs)
+        set_grep_config_path(self.config_path_abs)
         
         # Register tools with names and descriptions as expected by tests
         self._mcp.tool(name="index", description=create_index_tool_description())(index)
         self._mcp.tool(name="search", description=create_search_tool_description())(search)
+        self._mcp.tool(name="search_batch", description=create_search_batch_tool_description())(search_batch)
         self._mcp.tool(name="collections", description=create_collections_tool_description())(collections)
+        self._mcp.tool(name="symbols", description=create_symbols_tool_description())(symbols)
+        self._mcp.tool(name="graph", description=create_graph_tool_description())(graph)
+        self._mcp.tool(name="grep", description=create_grep_tool_description())(grep)
         
     async def start(self):
         """Start the MCP server."""
@@ -245,6 +282,9 @@ class CodeIndexMCPServer:
             # Register tools
             self._register_tools()
             
+            # Load the embedding model in the background so the first search is not a cold start
+            self._start_embedder_warm_up()
+            
             # Start the server using run_async as expected by tests
             self._running = True
             await self._mcp.run_async(transport="stdio")
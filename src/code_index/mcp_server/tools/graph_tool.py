@@ -0,0 +1,157 @@
+"""MCP graph tool answering callers/callees/importers queries from the workspace code graph."""
+
+import os
+import logging
+from typing import Dict, Any, Optional, Callable
+
+from fastmcp import Context
+from ...services.shared.command_context import CommandContext
+from ...code_graph import CodeGraph, RELATIONS
+_command_context_factory: Optional[Callable[[], CommandContext]] = None
+_default_config_path: Optional[str] = None
+
+
+def set_command_context_factory(factory: Optional[Callable[[], CommandContext]]) -> None:
+    """Register factory for creating CommandContext instances (primarily for tests)."""
+    global _command_context_factory
+    _command_context_factory = factory
+
+
+def set_default_config_path(config_path: Optional[str]) -> None:
+    """Set default config path for MCP server usage."""
+    global _default_config_path
+    _default_config_path = config_path
+
+
+def _get_command_context() -> CommandContext:
+    factory = _command_context_factory or CommandContext
+    return factory()
+
+
+def _resolve_config_path(workspace_path: str) -> str:
+    if _default_config_path:
+        return _default_config_path
+    return os.path.join(workspace_path, "code_index.json")
+
+
+logger = logging.getLogger(__name__)
+
+
+def create_graph_tool_description() -> str:
+    """Create the tool description for the graph tool."""
+    return """Walks the call and import graph of an indexed workspace.
+
+Answers impact-analysis questions in one call instead of many searches:
+who calls a function, what it calls, and which files import a file or module.
+Calls are resolved to definitions by name, best effort; names defined outside
+the workspace are returned as kind "external" (calls) or "module" (imports).
+
+⚠️  PREREQUISITE: The workspace must be indexed with code_graph_enabled set.
+
+Usage Examples:
+  graph(relation="callers", name="parse_file", workspace="/path/to/project")
+  graph(relation="callees", name="Reader.parse_file", depth=2)
+  graph(relation="importers", name="src/utils/paths.py")
+
+Parameters:
+  relation (str, required): "callers", "callees" or "importers"
+  name (str, required): Function or class name, optionally qualified by scope ("Reader.parse_file");
+                        for importers a workspace-relative file path or module name
+  workspace (str): Path to the workspace. Defaults to current directory.
+  depth (int): Hops to follow (default 1 = direct neighbours; at most code_graph_max_depth)
+  max_results (int): Maximum number of nodes to return (1-500, default 50)
+
+Returns:
+  {
+      "results": [
+          {"name": "load", "kind": "function", "filePath": "src/app.py", "startLine": 4,
+           "endLine": 12, "scope": "App", "depth": 1}
+      ],
+      "status": "success",            # or "no_results" / "not_indexed"
+      "result_count": 1
+  }
+"""
+
+
+async def graph(
+    ctx: Context,
+    relation: str,
+    name: str,
+    workspace: str = ".",
+    depth: int = 1,
+    max_results: int = 50
+) -> Dict[str, Any]:
+    """
+    Graph tool for MCP server.
+
+    Args:
+        relation: "callers", "callees" or "importers" (required)
+        name: Definition name, file path or module name (required)
+        workspace: Path to the workspace. Defaults to current dir.
+        depth: Number of hops to follow
+        max_results: Maximum number of nodes to return (1-500)
+
+    Returns:
+        Dict with the reached nodes and status information
+
+    Raises:
+        ValueError: If parameters are invalid
+        Exception: If the query fails
+    """
+    try:
+        if not isinstance(relation, str) or relation.lower() not in RELATIONS:
+            raise ValueError(f"relation must be one of {list(RELATIONS)}")
+        relation = relation.lower()
+
+        if not name or not isinstance(name, str):
+            raise ValueError("name parameter is required and must be a non-empty string")
+
+        if not isinstance(workspace, str):
+            raise ValueError("workspace must be a string path")
+
+        workspace_path = os.path.abspath(workspace)
+        if not os.path.isdir(workspace_path):
+            raise ValueError(f"Workspace path is not a directory: {workspace_path}")
+
+        if not isinstance(depth, int) or depth < 1:
+            raise ValueError("depth must be a positive integer")
+
+        if not isinstance(max_results, int) or max_results <= 0 or max_results > 500:
+            raise ValueError("max_results must be a positive integer between 1 and 500")
+
+        config = _get_command_context().load_local_config(
+            workspace_path=workspace_path,
+            config_path=_resolve_config_path(workspace_path),
+        )
+        max_depth = getattr(config, "code_graph_max_depth", 5)
+        if depth > max_depth:
+            raise ValueError(f"depth must not exceed code_graph_max_depth ({max_depth})")
+
+        code_graph = CodeGraph.for_workspace(config)
+        if not code_graph.exists():
+            return {
+                "results": [],
+                "status": "not_indexed",
+                "message": "No code graph for this workspace. Set code_graph_enabled and call the index tool.",
+                "workspace": workspace_path
+            }
+
+        results = code_graph.query(relation, name, depth=depth, limit=max_results)
+        if not results:
+            return {
+                "results": [],
+                "status": "no_results",
+                "message": f"No {relation} found for '{name}'.",
+                "name": name
+            }
+        return {
+            "results": results,
+            "status": "success",
+            "result_count": len(results)
+        }
+
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Graph tool error: {e}")
+        raise Exception(f"Graph query failed: {e}")
@@ -0,0 +1,163 @@
+"""MCP grep tool finding literal or regex matches through the workspace trigram index."""
+
+import os
+import logging
+from typing import Dict, Any, Optional, Callable
+
+from fastmcp import Context
+from ...services.shared.command_context import CommandContext
+from ...trigram_index import TrigramIndex
+_command_context_factory: Optional[Callable[[], CommandContext]] = None
+_default_config_path: Optional[str] = None
+
+
+def set_command_context_factory(factory: Optional[Callable[[], CommandContext]]) -> None:
+    """Register factory for creating CommandContext instances (primarily for tests)."""
+    global _command_context_factory
+    _command_context_factory = factory
+
+
+def set_default_config_path(config_path: Optional[str]) -> None:
+    """Set default config path for MCP server usage."""
+    global _default_config_path
+    _default_config_path = config_path
+
+
+def _get_command_context() -> CommandContext:
+    factory = _command_context_factory or CommandContext
+    return factory()
+
+
+def _resolve_config_path(workspace_path: str) -> str:
+    if _default_config_path:
+        return _default_config_path
+    return os.path.join(workspace_path, "code_index.json")
+
+
+logger = logging.getLogger(__name__)
+
+
+def create_grep_tool_description() -> str:
+    """Create the tool description for the grep tool."""
+    return """Finds every line of an indexed workspace matching a string or regular expression.
+
+Use it instead of shelling out to grep: a trigram index narrows the search to
+the files that can contain the pattern, and only those are read. Hits are
+exact and line-accurate (unlike search, which ranks code blocks by meaning).
+
+⚠️  PREREQUISITE: The workspace must be indexed with trigram_index_enabled set.
+
+Usage Examples:
+  grep(pattern="load_config(", workspace="/path/to/project")
+  grep(pattern="(Marshal|Unmarshal)\\(", regex=True, filetype="go")
+  grep(pattern="todo", ignore_case=True, path_prefix="src/api")
+
+Parameters:
+  pattern (str, required): Literal text, or a Python regular expression with regex=True
+  workspace (str): Path to the workspace. Defaults to current directory.
+  regex (bool): Treat pattern as a regular expression (default false)
+  ignore_case (bool): Match case-insensitively (default false)
+  path_prefix (str): Only search below this workspace-relative directory
+  filetype (str): Only search files of this type/language (e.g. "py", "go")
+  max_results (int): Maximum number of matching lines (1-1000, default 100)
+
+Returns:
+  {
+      "results": [
+          {"filePath": "src/app.py", "line": 12, "column": 9, "text": "    cfg = load_config(path)"}
+      ],
+      "status": "success",            # or "no_results" / "not_indexed"
+      "result_count": 1,
+      "files_searched": 3,            # files that could match and were read
+      "files_indexed": 840,
+      "truncated": false              # true when max_results was reached
+  }
+"""
+
+
+async def grep(
+    ctx: Context,
+    pattern: str,
+    workspace: str = ".",
+    regex: bool = False,
+    ignore_case: bool = False,
+    path_prefix: Optional[str] = None,
+    filetype: Optional[str] = None,
+    max_results: int = 100
+) -> Dict[str, Any]:
+    """
+    Grep tool for MCP server.
+
+    Args:
+        pattern: Literal text or regular expression (required)
+        workspace: Path to the workspace. Defaults to current dir.
+        regex: Treat pattern as a regular expression
+        ignore_case: Match case-insensitively
+        path_prefix: Workspace-relative directory to search below
+        filetype: File type/language to search
+        max_results: Maximum number of matching lines (1-1000)
+
+    Returns:
+        Dict with the matching lines and status information
+
+    Raises:
+        ValueError: If parameters are invalid
+        Exception: If the search fails
+    """
+    try:
+        if not pattern or not isinstance(pattern, str):
+            raise ValueError("pattern parameter is required and must be a non-empty string")
+
+        if not isinstance(workspace, str):
+            raise ValueError("workspace must be a string path")
+
+        workspace_path = os.path.abspath(workspace)
+        if not os.path.isdir(workspace_path):
+            raise ValueError(f"Workspace path is not a directory: {workspace_path}")
+
+        if not isinstance(max_results, int) or max_results <= 0 or max_results > 1000:
+            raise ValueError("max_results must be a positive integer between 1 and 1000")
+
+        if path_prefix is not None and not isinstance(path_prefix, str):
+            raise ValueError("path_prefix must be a string")
+
+        if filetype is not None and not isinstance(filetype, str):
+            raise ValueError("filetype must be a string")
+
+        config = _get_command_context().load_local_config(
+            workspace_path=workspace_path,
+            config_path=_resolve_config_path(workspace_path),
+        )
+        index = TrigramIndex.for_workspace(config)
+        if not index.exists():
+            return {
+                "results": [],
+                "status": "not_indexed",
+                "message": "No trigram index for this workspace. Set trigram_index_enabled and call the index tool.",
+                "workspace": workspace_path
+            }
+
+        result = index.grep(pattern, regex=bool(regex), ignore_case=bool(ignore_case), max_results=max_results,
+                            filetype=filetype, path_prefix=path_prefix)
+        if not result.hits:
+            return {
+                "results": [],
+                "status": "no_results",
+                "message": f"No lines match '{pattern}'.",
+                "files_searched": result.candidate_files,
+                "files_indexed": result.total_files
+            }
+        return {
+            "results": result.hits,
+            "status": "success",
+            "result_count": len(result.hits),
+            "files_searched": result.candidate_files,
+            "files_indexed": result.total_files,
+            "truncated": result.truncated
+        }
+
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Grep tool error: {e}")
+        raise Exception(f"Grep failed: {e}")
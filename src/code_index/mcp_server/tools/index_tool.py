@@ -746,7 +746,7 @@ async def _execute_indexing(
                 )
 
                 embedder_module = importlib.import_module("src.code_index.embedder")
-                embedder_instance = embedder_module.OllamaEmbedder(deps.config)
+                embedder_instance = embedder_module.create_embedder(deps.config)
                 validation = embedder_instance.validate_configuration()
                 is_valid, validation_error, guidance = _parse_validation_result(validation)
                 if guidance:
@@ -824,8 +824,8 @@ async def _execute_indexing(
 
                 scanner = scanner_module.DirectoryScanner(operation_config)
                 parser = parser_module.CodeParser(operation_config, chunking_impl)
-                embedder_instance = embedder_module.OllamaEmbedder(operation_config)
-                vector_store = vector_store_module.QdrantVectorStore(operation_config)
+                embedder_instance = embedder_module.create_embedder(operation_config)
+                vector_store = vector_store_module.create_vector_store(operation_config)
             except ImportError as e:
                 raise RuntimeError(f"Failed to import required indexing modules: {e}") from e
             except Exception as setup_error:
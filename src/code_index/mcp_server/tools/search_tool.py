@@ -2,11 +2,13 @@
 
 import os
 import logging
-from typing import List, Dict, Any, Optional, Callable
+from typing import List, Dict, Any, Optional, Callable, Tuple
 
 from fastmcp import Context
 from ...services.shared.command_context import CommandContext
 from ...services.command.config_overrides import build_search_overrides
+from ...search_fusion import SEARCH_MODES
+from ...vector_store import create_vector_store
 _command_context_factory: Optional[Callable[[], CommandContext]] = None
 _default_config_path: Optional[str] = None
 
@@ -36,6 +38,9 @@ def _resolve_config_path(workspace_path: str) -> str:
 
 logger = logging.getLogger(__name__)
 
+# Most queries one search_batch call may run
+MAX_BATCH_QUERIES = 50
+
 
 def create_search_tool_description() -> str:
     """
@@ -63,7 +68,10 @@ Parameters:
   min_score (float): Minimum similarity score threshold (0.0-1.0). Lower = more results.
   max_results (int): Maximum number of results to return (1-500). Higher may be slower.
   filetype (str, optional): Filter by file type/language (e.g. "go", "py", "rs"). Skips language weight boosting.
+  path (str, optional): Only return results below this workspace-relative directory (e.g. "src/api").
   collection_name (str, optional): Search a specific collection by name instead of workspace path.
+  mode (str, optional): "vector" (semantic), "lexical" (BM25 over exact identifiers) or "hybrid" (both, fused).
+                        Lexical and hybrid need an index built with lexical_index_enabled.
 
 Search Optimization Tips:
   • Use specific technical terms for better matches
@@ -119,6 +127,105 @@ Returns:
 """
 
 
+def _validate_search_options(
+    workspace: Any,
+    min_score: Optional[float],
+    max_results: Optional[int],
+    filetype: Optional[str],
+    path: Optional[str],
+    mode: Optional[str],
+) -> Tuple[str, Optional[str], Optional[str]]:
+    """
+    Validate the options shared by search and search_batch.
+
+    Returns:
+        The absolute workspace path and the normalized filetype and mode
+
+    Raises:
+        ValueError: If an option is invalid
+    """
+    if not isinstance(workspace, str):
+        raise ValueError("workspace must be a string path")
+    
+    # Validate workspace exists and is accessible
+    workspace_path = os.path.abspath(workspace)
+    if not os.path.exists(workspace_path):
+        raise ValueError(f"Workspace path does not exist: {workspace_path}")
+    
+    if not os.path.isdir(workspace_path):
+        raise ValueError(f"Workspace path is not a directory: {workspace_path}")
+    
+    # Validate optional parameters
+    if min_score is not None:
+        if not isinstance(min_score, (int, float)) or min_score < 0 or min_score > 1:
+            raise ValueError("min_score must be a number between 0.0 and 1.0")
+
+    if max_results is not None:
+        if not isinstance(max_results, int) or max_results <= 0 or max_results > 500:
+            raise ValueError("max_results must be a positive integer between 1 and 500")
+
+    if filetype is not None:
+        if not isinstance(filetype, str) or len(filetype) < 1 or len(filetype) > 30:
+            raise ValueError("filetype must be a non-empty string (e.g. 'go', 'py', 'rs')")
+        filetype = filetype.lower()
+
+    if path is not None and (not isinstance(path, str) or not path.strip()):
+        raise ValueError("path must be a non-empty workspace-relative directory (e.g. 'src/api')")
+
+    if mode is not None:
+        if not isinstance(mode, str) or mode.lower() not in SEARCH_MODES:
+            raise ValueError(f"mode must be one of {list(SEARCH_MODES)}")
+        mode = mode.lower()
+
+    return workspace_path, filetype, mode
+
+
+def _load_search_dependencies(workspace_path: str, min_score: Optional[float], max_results: Optional[int],
+                              collection_name: Optional[str]):
+    """Load the search dependencies, or return None when the workspace has not been indexed."""
+    config_path = _resolve_config_path(workspace_path)
+    overrides = build_search_overrides(min_score=min_score, max_results=max_results)
+
+    command_context = _get_command_context()
+    deps = command_context.load_search_dependencies(
+        workspace_path=workspace_path,
+        config_path=config_path,
+        overrides=overrides,
+    )
+
+    # If collection_name is given, bypass workspace resolution
+    if collection_name:
+        deps.config.collection_name_override = collection_name
+        return deps
+
+    # Ask the store the search will query, so the flat backend needs no Qdrant server
+    if not create_vector_store(deps.config).collection_exists():
+        logger.warning(
+            "Workspace '%s' has not been indexed yet; returning empty search results",
+            workspace_path,
+        )
+        return None
+    return deps
+
+
+def _not_indexed_response(workspace_path: str) -> Dict[str, Any]:
+    return {
+        "results": [],
+        "status": "not_indexed",
+        "message": "Workspace is not indexed. Call the index tool first with this workspace path.",
+        "workspace": workspace_path
+    }
+
+
+def _search_kwargs(filetype: Optional[str], path: Optional[str], mode: Optional[str]) -> Dict[str, Any]:
+    search_kwargs: Dict[str, Any] = {"filetype": filetype}
+    if path:
+        search_kwargs["path_prefix"] = path
+    if mode:
+        search_kwargs["mode"] = mode
+    return search_kwargs
+
+
 async def search(
     ctx: Context,
     query: str,
@@ -126,7 +233,9 @@ async def search(
     min_score: Optional[float] = None,
     max_results: Optional[int] = None,
     filetype: Optional[str] = None,
-    collection_name: Optional[str] = None
+    collection_name: Optional[str] = None,
+    path: Optional[str] = None,
+    mode: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Search tool for MCP server.
@@ -138,6 +247,8 @@ async def search(
         workspace: Path to the workspace to search. Defaults to current dir.
         min_score: Minimum similarity score for results (0.0-1.0)
         max_results: Maximum number of results to return (1-500)
+        path: Workspace-relative directory to restrict results to
+        mode: Search mode ("vector", "lexical" or "hybrid"); defaults to config search_mode
         # Search overrides removed due to FastMCP limitations
         
     Returns:
@@ -154,76 +265,20 @@ async def search(
         # Validate required parameters
         if not query or not isinstance(query, str):
             raise ValueError("query parameter is required and must be a non-empty string")
-        
-        if not isinstance(workspace, str):
-            raise ValueError("workspace must be a string path")
-        
-        # Validate workspace exists and is accessible
-        workspace_path = os.path.abspath(workspace)
-        if not os.path.exists(workspace_path):
-            raise ValueError(f"Workspace path does not exist: {workspace_path}")
-        
-        if not os.path.isdir(workspace_path):
-            raise ValueError(f"Workspace path is not a directory: {workspace_path}")
-        
-        # Validate optional parameters
-        if min_score is not None:
-            if not isinstance(min_score, (int, float)) or min_score < 0 or min_score > 1:
-                raise ValueError("min_score must be a number between 0.0 and 1.0")
-
-        if max_results is not None:
-            if not isinstance(max_results, int) or max_results <= 0 or max_results > 500:
-                raise ValueError("max_results must be a positive integer between 1 and 500")
 
-        if filetype is not None:
-            if not isinstance(filetype, str) or len(filetype) < 1 or len(filetype) > 30:
-                raise ValueError("filetype must be a non-empty string (e.g. 'go', 'py', 'rs')")
-            filetype = filetype.lower()
+        workspace_path, filetype, mode = _validate_search_options(
+            workspace, min_score, max_results, filetype, path, mode
+        )
 
         logger.info(f"Starting search for query: '{query}' in workspace: {workspace_path}")
 
-        config_path = _resolve_config_path(workspace_path)
-        overrides = build_search_overrides(min_score=min_score, max_results=max_results)
-
-        command_context = _get_command_context()
-        deps = command_context.load_search_dependencies(
-            workspace_path=workspace_path,
-            config_path=config_path,
-            overrides=overrides,
-        )
-
-        collection_manager = deps.collection_manager
-        
-        # If collection_name is given, bypass workspace resolution
-        if collection_name:
-            deps.config.collection_name_override = collection_name
-        else:
-            workspace_collections = collection_manager.list_collections()
-            matching_collections = [
-                collection for collection in workspace_collections
-                if collection.get("workspace_path") == workspace_path
-            ]
-            # Fallback: match by collection name (folder name)
-            if not matching_collections:
-                folder = os.path.basename(os.path.normpath(workspace_path))
-                matching_collections = [
-                    collection for collection in workspace_collections
-                    if collection.get("name") == folder
-                ]
-            if not matching_collections:
-                logger.warning(
-                    "Workspace '%s' has not been indexed yet; returning empty search results",
-                    workspace_path,
-                )
-                return {
-                    "results": [],
-                    "status": "not_indexed",
-                    "message": "Workspace is not indexed. Call the index tool first with this workspace path.",
-                    "workspace": workspace_path
-                }
+        deps = _load_search_dependencies(workspace_path, min_score, max_results, collection_name)
+        if deps is None:
+            return _not_indexed_response(workspace_path)
 
         # Perform search via shared service with validation
-        result = deps.search_service.search_code(query, deps.config, filetype=filetype)
+        search_kwargs = _search_kwargs(filetype, path, mode)
+        result = deps.search_service.search_code(query, deps.config, **search_kwargs)
 
         if not result.is_successful():
             raise Exception(
@@ -263,6 +318,112 @@ async def search(
         raise Exception(f"Search failed: {e}")
 
 
+def create_search_batch_tool_description() -> str:
+    """Create the tool description for the search_batch tool."""
+    return f"""Runs several semantic searches on an indexed workspace in one call.
+
+Prefer it over repeated search calls when exploring a topic from several angles:
+all queries are embedded in one request and searched in one vector store round
+trip, and every query is ranked exactly as by the search tool.
+
+⚠️  PREREQUISITE: The workspace must be indexed first using the 'index' tool.
+
+Usage Examples:
+  search_batch(queries=["authentication middleware", "session token refresh", "password hashing"])
+  search_batch(queries=["retry policy", "backoff"], path="src/net", max_results=10)
+
+Parameters:
+  queries (list[str], required): 1-{MAX_BATCH_QUERIES} natural language queries
+  workspace, min_score, max_results, filetype, path, collection_name, mode:
+      As for the search tool; they apply to every query (max_results per query)
+
+Returns:
+  {{
+      "results": [
+          {{"query": "authentication middleware", "status": "success", "result_count": 1,
+           "results": [{{"filePath": "src/auth.py", "startLine": 10, "endLine": 20, "type": "function",
+                        "score": 0.85, "adjustedScore": 0.9, "snippet": "..."}}]}},
+          {{"query": "password hashing", "status": "no_results", "result_count": 0, "results": []}}
+      ],
+      "status": "success",            # or "no_results" (no query matched) / "not_indexed"
+      "query_count": 2
+  }}
+  A query that failed has status "error" and an "errors" list.
+"""
+
+
+async def search_batch(
+    ctx: Context,
+    queries: List[str],
+    workspace: str = ".",
+    min_score: Optional[float] = None,
+    max_results: Optional[int] = None,
+    filetype: Optional[str] = None,
+    collection_name: Optional[str] = None,
+    path: Optional[str] = None,
+    mode: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Batch search tool for MCP server.
+
+    Args:
+        queries: Search query strings (required, at most MAX_BATCH_QUERIES)
+        Other arguments as for search(); they apply to every query
+
+    Returns:
+        Dict with one entry per query and overall status information
+
+    Raises:
+        ValueError: If parameters are invalid
+        Exception: If every query failed
+    """
+    try:
+        if (not isinstance(queries, list) or not queries
+                or not all(isinstance(query, str) and query.strip() for query in queries)):
+            raise ValueError("queries must be a non-empty list of non-empty strings")
+        if len(queries) > MAX_BATCH_QUERIES:
+            raise ValueError(f"queries must not contain more than {MAX_BATCH_QUERIES} queries")
+
+        workspace_path, filetype, mode = _validate_search_options(
+            workspace, min_score, max_results, filetype, path, mode
+        )
+
+        logger.info(f"Starting batch search for {len(queries)} queries in workspace: {workspace_path}")
+
+        deps = _load_search_dependencies(workspace_path, min_score, max_results, collection_name)
+        if deps is None:
+            return _not_indexed_response(workspace_path)
+
+        results = deps.search_service.search_batch(queries, deps.config, **_search_kwargs(filetype, path, mode))
+        if all(not result.is_successful() for result in results):
+            raise Exception(
+                "Search execution reported errors: "
+                + "; ".join(results[0].errors or ["unknown error"])
+            )
+
+        preview_chars = getattr(deps.config, "search_snippet_preview_chars", 160)
+        entries: List[Dict[str, Any]] = []
+        for result in results:
+            if not result.is_successful():
+                entries.append({"query": result.query, "status": "error", "result_count": 0,
+                                "results": [], "errors": result.errors})
+                continue
+            formatted = _format_search_results(result.matches, preview_chars)
+            entries.append({"query": result.query, "status": "success" if formatted else "no_results",
+                            "result_count": len(formatted), "results": formatted})
+        return {
+            "results": entries,
+            "status": "success" if any(entry["result_count"] for entry in entries) else "no_results",
+            "query_count": len(entries)
+        }
+
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Batch search tool error: {e}")
+        raise Exception(f"Batch search failed: {e}")
+
+
 def _create_empty_results_response(query: str, min_score: float, workspace_path: str) -> List[Dict[str, Any]]:
     """
     Create helpful response for empty search results.
@@ -295,17 +456,19 @@ def _format_search_results(matches, preview_length: int) -> List[Dict[str, Any]]
 
     for match in matches:
         snippet = _create_code_snippet(getattr(match, "code_chunk", "") or "", preview_length)
-        formatted_results.append(
-            {
-                "filePath": getattr(match, "file_path", ""),
-                "startLine": getattr(match, "start_line", 0),
-                "endLine": getattr(match, "end_line", 0),
-                "type": getattr(match, "match_type", "text"),
-                "score": round(getattr(match, "score", 0.0), 4),
-                "adjustedScore": round(getattr(match, "adjusted_score", getattr(match, "score", 0.0)), 4),
-                "snippet": snippet,
-            }
-        )
+        item = {
+            "filePath": getattr(match, "file_path", ""),
+            "startLine": getattr(match, "start_line", 0),
+            "endLine": getattr(match, "end_line", 0),
+            "type": getattr(match, "match_type", "text"),
+            "score": round(getattr(match, "score", 0.0), 4),
+            "adjustedScore": round(getattr(match, "adjusted_score", getattr(match, "score", 0.0)), 4),
+            "snippet": snippet,
+        }
+        metadata = getattr(match, "metadata", None)
+        if isinstance(metadata, dict) and metadata.get("cluster_siblings"):
+            item["siblings"] = metadata["cluster_siblings"]
+        formatted_results.append(item)
 
     return formatted_results
 
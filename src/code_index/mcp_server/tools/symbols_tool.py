@@ -0,0 +1,148 @@
+"""MCP symbols tool answering definition lookups from the workspace symbol table."""
+
+import os
+import logging
+from typing import Dict, Any, Optional, Callable
+
+from fastmcp import Context
+from ...services.shared.command_context import CommandContext
+from ...symbol_index import MATCH_MODES, open_symbol_index
+_command_context_factory: Optional[Callable[[], CommandContext]] = None
+_default_config_path: Optional[str] = None
+
+
+def set_command_context_factory(factory: Optional[Callable[[], CommandContext]]) -> None:
+    """Register factory for creating CommandContext instances (primarily for tests)."""
+    global _command_context_factory
+    _command_context_factory = factory
+
+
+def set_default_config_path(config_path: Optional[str]) -> None:
+    """Set default config path for MCP server usage."""
+    global _default_config_path
+    _default_config_path = config_path
+
+
+def _get_command_context() -> CommandContext:
+    factory = _command_context_factory or CommandContext
+    return factory()
+
+
+def _resolve_config_path(workspace_path: str) -> str:
+    if _default_config_path:
+        return _default_config_path
+    return os.path.join(workspace_path, "code_index.json")
+
+
+logger = logging.getLogger(__name__)
+
+
+def create_symbols_tool_description() -> str:
+    """Create the tool description for the symbols tool."""
+    return """Finds where classes and functions are defined, by name.
+
+Looks names up in the workspace symbol table built during indexing. No embedding
+is computed, so it answers immediately and works without Ollama or Qdrant.
+Use it for "where is X defined"; use 'search' for questions about behaviour.
+
+⚠️  PREREQUISITE: The workspace must be indexed with symbol_index_enabled set.
+
+Usage Examples:
+  symbols(name="parse_file", workspace="/path/to/project")
+  symbols(name="Reader.parse", match="prefix")
+  symbols(name="handlr", match="fuzzy", kind="class")
+
+Parameters:
+  name (str, required): Symbol name, optionally qualified by its scope ("Reader.parse_file")
+  workspace (str): Path to the workspace. Defaults to current directory.
+  match (str): "exact" (default), "prefix" or "fuzzy" (substring or close spelling); case-insensitive
+  kind (str, optional): Only "class" or only "function" definitions
+  max_results (int): Maximum number of definitions to return (1-500, default 20)
+
+Returns:
+  {
+      "results": [
+          {"name": "parse_file", "kind": "function", "filePath": "src/reader.py",
+           "startLine": 12, "endLine": 30, "scope": "Reader"}
+      ],
+      "status": "success",            # or "no_results" / "not_indexed"
+      "result_count": 1
+  }
+"""
+
+
+async def symbols(
+    ctx: Context,
+    name: str,
+    workspace: str = ".",
+    match: str = "exact",
+    kind: Optional[str] = None,
+    max_results: int = 20
+) -> Dict[str, Any]:
+    """
+    Symbols tool for MCP server.
+
+    Args:
+        name: Symbol name to look up (required)
+        workspace: Path to the workspace. Defaults to current dir.
+        match: "exact", "prefix" or "fuzzy"
+        kind: Optional definition kind ("class" or "function")
+        max_results: Maximum number of definitions to return (1-500)
+
+    Returns:
+        Dict with the matching definitions and status information
+
+    Raises:
+        ValueError: If parameters are invalid
+        Exception: If the lookup fails
+    """
+    try:
+        if not name or not isinstance(name, str):
+            raise ValueError("name parameter is required and must be a non-empty string")
+
+        if not isinstance(workspace, str):
+            raise ValueError("workspace must be a string path")
+
+        workspace_path = os.path.abspath(workspace)
+        if not os.path.isdir(workspace_path):
+            raise ValueError(f"Workspace path is not a directory: {workspace_path}")
+
+        if not isinstance(match, str) or match.lower() not in MATCH_MODES:
+            raise ValueError(f"match must be one of {list(MATCH_MODES)}")
+        match = match.lower()
+
+        if not isinstance(max_results, int) or max_results <= 0 or max_results > 500:
+            raise ValueError("max_results must be a positive integer between 1 and 500")
+
+        config = _get_command_context().load_local_config(
+            workspace_path=workspace_path,
+            config_path=_resolve_config_path(workspace_path),
+        )
+        index = open_symbol_index(config)
+        if not index.exists():
+            return {
+                "results": [],
+                "status": "not_indexed",
+                "message": "No symbol table for this workspace. Set symbol_index_enabled and call the index tool.",
+                "workspace": workspace_path
+            }
+
+        results = index.lookup(name, match=match, kind=kind, limit=max_results)
+        if not results:
+            return {
+                "results": [],
+                "status": "no_results",
+                "message": f"No {match} match for '{name}'.",
+                "name": name
+            }
+        return {
+            "results": results,
+            "status": "success",
+            "result_count": len(results)
+        }
+
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Symbols tool error: {e}")
+        raise Exception(f"Symbol lookup failed: {e}")
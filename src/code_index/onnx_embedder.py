@@ -0,0 +1,247 @@
+"""
+In-process ONNX Runtime embedder for the code index tool.
+
+Runs a sentence-embedding model exported to ONNX on the CPU, avoiding the
+HTTP and JSON round trip of a separate embedding server. Requires
+``onnxruntime`` and the Hugging Face ``tokenizers`` package.
+"""
+import os
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from code_index.config import Config
+from code_index.embedder import EmbedderTimings, canonical_model_identifier
+from code_index.service_validation import ValidationResult
+from code_index.vector_codec import as_matrix, resolve_dtype
+
+
+ONNX_POOLING_MODES = ("mean", "cls")
+
+# Process-wide embedders keyed by their settings, so the session is loaded once
+_shared_embedders: Dict[Tuple[Any, ...], "OnnxEmbedder"] = {}
+_shared_lock = threading.Lock()
+
+
+def quantized_model_path(model_path: str) -> str:
+    """Return the path of the int8 copy of ``model_path``, creating it when missing."""
+    root, ext = os.path.splitext(model_path)
+    if root.endswith(".int8"):
+        return model_path
+    target = f"{root}.int8{ext or '.onnx'}"
+    if not os.path.exists(target) or os.path.getmtime(target) < os.path.getmtime(model_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(model_path, target, weight_type=QuantType.QInt8)
+    return target
+
+
+def shared_onnx_embedder(config: Config) -> "OnnxEmbedder":
+    """
+    Return the process-wide embedder for the configured ONNX settings.
+
+    The InferenceSession and tokenizer live on the embedder, so a long-running
+    process (the MCP server) that creates an embedder per search would load
+    the model again every time. Sharing one instance per settings key keeps
+    the loaded session, and lets a warm-up benefit the searches after it.
+    """
+    embedder = OnnxEmbedder(config)
+    with _shared_lock:
+        return _shared_embedders.setdefault(embedder.settings_key, embedder)
+
+
+def clear_shared_onnx_embedders() -> None:
+    """Drop the shared embedders; their sessions are freed with the last reference."""
+    with _shared_lock:
+        _shared_embedders.clear()
+
+
+class OnnxEmbedder:
+    """Generate embeddings with an ONNX model in the current process."""
+
+    def __init__(self, config: Config):
+        """Initialize the embedder; the model is loaded on first use."""
+        self.model = config.ollama_model
+        self.model_path: Optional[str] = getattr(config, "onnx_model_path", None)
+        tokenizer_path = getattr(config, "onnx_tokenizer_path", None)
+        if not tokenizer_path and self.model_path:
+            tokenizer_path = os.path.join(os.path.dirname(self.model_path), "tokenizer.json")
+        self.tokenizer_path: Optional[str] = tokenizer_path
+        self.quantize = bool(getattr(config, "onnx_quantize", False))
+        self.intra_op_threads = int(getattr(config, "onnx_intra_op_threads", 0) or 0)
+        self.max_length = int(getattr(config, "onnx_max_length", 512) or 512)
+        self.pooling = str(getattr(config, "onnx_pooling", "mean") or "mean").lower()
+        self.normalize = bool(getattr(config, "onnx_normalize", True))
+        self.dtype = resolve_dtype(getattr(config, "embedding_dtype", "float32"))
+        if self.pooling not in ONNX_POOLING_MODES:
+            raise ValueError(f"onnx_pooling must be one of: {', '.join(ONNX_POOLING_MODES)}")
+
+        self._session = None
+        self._tokenizer = None
+        self._input_names: List[str] = []
+        self._load_seconds = 0.0
+        self._load_lock = threading.Lock()
+        self.timings = EmbedderTimings()
+
+    @property
+    def model_identifier(self) -> str:
+        """Canonical embedding model identifier for payload/metadata."""
+        return canonical_model_identifier(self.model)
+
+    @property
+    def settings_key(self) -> Tuple[Any, ...]:
+        """Everything that shapes the loaded session and its output, including the files' mtimes."""
+        stamps = tuple(
+            os.stat(path).st_mtime_ns if path and os.path.isfile(path) else None
+            for path in (self.model_path, self.tokenizer_path)
+        )
+        return (self.model, self.model_path, self.tokenizer_path, self.quantize, self.intra_op_threads,
+                self.max_length, self.pooling, self.normalize, np.dtype(self.dtype).str) + stamps
+
+    def _load(self) -> None:
+        if self._session is not None:
+            return
+        with self._load_lock:
+            if self._session is not None:
+                return
+            started = time.perf_counter()
+            if not self.model_path or not os.path.isfile(self.model_path):
+                raise FileNotFoundError(f"ONNX model not found: {self.model_path!r} (set onnx_model_path)")
+            if not self.tokenizer_path or not os.path.isfile(self.tokenizer_path):
+                raise FileNotFoundError(f"Tokenizer not found: {self.tokenizer_path!r} (set onnx_tokenizer_path)")
+            try:
+                import onnxruntime as ort
+            except ImportError as e:
+                raise ImportError("The onnx embedder backend requires onnxruntime: pip install onnxruntime") from e
+            try:
+                from tokenizers import Tokenizer
+            except ImportError as e:
+                raise ImportError("The onnx embedder backend requires tokenizers: pip install tokenizers") from e
+
+            model_path = quantized_model_path(self.model_path) if self.quantize else self.model_path
+
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            if self.intra_op_threads > 0:
+                options.intra_op_num_threads = self.intra_op_threads
+            options.inter_op_num_threads = 1
+            session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+            tokenizer = Tokenizer.from_file(self.tokenizer_path)
+            tokenizer.enable_truncation(max_length=self.max_length)
+            tokenizer.enable_padding()
+
+            self._input_names = [node.name for node in session.get_inputs()]
+            self._tokenizer = tokenizer
+            self._session = session
+            self._load_seconds = time.perf_counter() - started
+
+    def _pool(self, hidden: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        if hidden.ndim == 2:
+            # Model already returns pooled sentence embeddings.
+            pooled = hidden
+        elif self.pooling == "cls":
+            pooled = hidden[:, 0, :]
+        else:
+            weights = mask[..., None].astype(hidden.dtype)
+            pooled = (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+        if self.normalize:
+            pooled = pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        return as_matrix(pooled, self.dtype)
+
+    def create_embeddings(self, texts: List[str]) -> Dict[str, Any]:
+        """
+        Generate embeddings for texts with the ONNX model.
+
+        Args:
+            texts: List of text strings to embed
+
+        Returns:
+            Dictionary with an ``(n, dim)`` NumPy matrix in input order
+        """
+        if not texts:
+            return {"embeddings": as_matrix([], self.dtype)}
+        try:
+            started = time.perf_counter()
+            cold = self._session is None
+            self._load()
+            load_seconds = self._load_seconds if cold else 0.0
+            encodings = self._tokenizer.encode_batch(list(texts))
+            ids = np.asarray([e.ids for e in encodings], dtype=np.int64)
+            mask = np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+            feeds = {"input_ids": ids, "attention_mask": mask}
+            if "token_type_ids" in self._input_names:
+                feeds["token_type_ids"] = np.asarray([e.type_ids for e in encodings], dtype=np.int64)
+            feeds = {name: value for name, value in feeds.items() if name in self._input_names}
+
+            hidden = self._session.run(None, feeds)[0]
+            matrix = self._pool(np.asarray(hidden), mask)
+            self.timings.record(len(texts), time.perf_counter() - started, load_seconds)
+            return {"embeddings": matrix, "load_seconds": load_seconds}
+        except (ImportError, FileNotFoundError):
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to generate embeddings with ONNX model: {e}")
+
+    def warm_up(self) -> Dict[str, Any]:
+        """Load the model and tokenizer before the first request. Never raises."""
+        started = time.perf_counter()
+        try:
+            cold = self._session is None
+            self._load()
+            elapsed = time.perf_counter() - started
+            self.timings.record_warm_up(elapsed, self._load_seconds if cold else 0.0)
+            return {"success": True, "seconds": round(elapsed, 3), "load_seconds": round(self._load_seconds, 3)}
+        except Exception as e:
+            return {"success": False, "seconds": round(time.perf_counter() - started, 3), "error": str(e)}
+
+    def get_timing_stats(self) -> Dict[str, Any]:
+        """Return request, embedding and model-load timings."""
+        return self.timings.snapshot()
+
+    def validate_configuration(self) -> ValidationResult:
+        """
+        Validate the model by loading it and embedding a short test string.
+
+        Returns:
+            ValidationResult with detailed validation status
+        """
+        start_time = time.time()
+        details = {
+            "model": self.model,
+            "model_path": self.model_path,
+            "tokenizer_path": self.tokenizer_path,
+            "quantize": self.quantize,
+            "intra_op_threads": self.intra_op_threads,
+        }
+        try:
+            dimension = len(self.create_embeddings(["test"])["embeddings"][0])
+            details["embedding_dimension"] = dimension
+            return ValidationResult(
+                service="onnx",
+                valid=True,
+                details=details,
+                response_time_ms=int((time.time() - start_time) * 1000),
+            )
+        except Exception as e:
+            guidance = [
+                "Set onnx_model_path to an exported sentence-embedding model (.onnx)",
+                "Place tokenizer.json next to the model or set onnx_tokenizer_path",
+                "Install runtime dependencies: pip install onnxruntime tokenizers",
+            ]
+            if isinstance(e, ImportError):
+                guidance.insert(0, str(e))
+            return ValidationResult(
+                service="onnx",
+                valid=False,
+                error=f"ONNX embedder error: {e}",
+                details=details,
+                response_time_ms=int((time.time() - start_time) * 1000),
+                actionable_guidance=guidance,
+            )
+
+    def validate_configuration_and_raise(self) -> None:
+        """Validate configuration and raise exception if invalid."""
+        self.validate_configuration().raise_for_errors()
@@ -0,0 +1,157 @@
+"""
+OpenAI-compatible HTTP embedder for the code index tool.
+
+Works with any server exposing ``POST /v1/embeddings`` in the OpenAI format,
+such as the llama.cpp server, vLLM or text-embeddings-inference.
+"""
+import time
+import requests
+from typing import List, Dict, Any, Optional
+from code_index.config import Config
+from code_index.embedder import EmbedderTimings, canonical_model_identifier
+from code_index.service_validation import ValidationResult
+from code_index.vector_codec import as_matrix, decode_base64_vectors, resolve_dtype
+
+
+class OpenAICompatibleEmbedder:
+    """Generate embeddings through an OpenAI-compatible ``/embeddings`` endpoint."""
+
+    DEFAULT_BASE_URL = "http://localhost:8080/v1"
+
+    def __init__(self, config: Config):
+        """Initialize the embedder with configuration."""
+        base_url = getattr(config, "embedder_base_url", None) or self.DEFAULT_BASE_URL
+        self.base_url = base_url.rstrip("/")
+        self.model = config.ollama_model
+        self.api_key: Optional[str] = getattr(config, "embedder_api_key", None)
+        self.timeout = int(getattr(config, "embed_timeout_seconds", 60) or 60)
+        self.dtype = resolve_dtype(getattr(config, "embedding_dtype", "float32"))
+        # "base64" ships raw float32 bytes instead of JSON number lists
+        self.encoding_format = str(getattr(config, "embedder_encoding_format", "float") or "float")
+        self._session = requests.Session()
+        self.timings = EmbedderTimings()
+
+    @property
+    def model_identifier(self) -> str:
+        """Canonical embedding model identifier for payload/metadata."""
+        return canonical_model_identifier(self.model)
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    def create_embeddings(self, texts: List[str]) -> Dict[str, Any]:
+        """
+        Generate embeddings for texts using the ``/embeddings`` endpoint.
+
+        Args:
+            texts: List of text strings to embed
+
+        Returns:
+            Dictionary with an ``(n, dim)`` NumPy matrix in input order
+        """
+        return self._embed(texts, record=True)
+
+    def _embed(self, texts: List[str], record: bool) -> Dict[str, Any]:
+        if not texts:
+            return {"embeddings": as_matrix([], self.dtype)}
+
+        url = f"{self.base_url}/embeddings"
+
+        try:
+            # Truncate texts to avoid exceeding model context length
+            trunk_texts = [t[:4000] for t in texts]
+
+            request = {"model": self.model, "input": trunk_texts}
+            if self.encoding_format != "float":
+                request["encoding_format"] = self.encoding_format
+
+            started = time.perf_counter()
+            response = self._session.post(
+                url,
+                json=request,
+                headers=self._headers(),
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+
+            data = response.json().get("data")
+            if not isinstance(data, list) or len(data) != len(texts):
+                raise ValueError("Invalid response structure from embeddings API")
+
+            # The API returns one item per input; order by index rather than trusting list order.
+            ordered = [item["embedding"] for item in sorted(data, key=lambda item: item.get("index", 0))]
+            if ordered and isinstance(ordered[0], str):
+                matrix = decode_base64_vectors(ordered, self.dtype)
+            else:
+                matrix = as_matrix(ordered, self.dtype)
+            if record:
+                # The OpenAI format has no load-time field, so all wall time counts as embedding time
+                self.timings.record(len(texts), time.perf_counter() - started)
+            return {"embeddings": matrix}
+        except requests.exceptions.HTTPError as e:
+            body = e.response.text[:500] if e.response is not None else ""
+            raise Exception(f"Failed to generate embeddings: {e} [body: {body}]")
+        except requests.exceptions.ReadTimeout as e:
+            raise e
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Failed to generate embeddings: {e}")
+        except (ValueError, KeyError) as e:
+            raise Exception(f"Invalid response from embeddings API: {e}")
+
+    def warm_up(self) -> Dict[str, Any]:
+        """Send one short request so the server loads the model. Never raises."""
+        started = time.perf_counter()
+        try:
+            self._embed(["warm up"], record=False)
+            elapsed = time.perf_counter() - started
+            self.timings.record_warm_up(elapsed)
+            return {"success": True, "seconds": round(elapsed, 3)}
+        except Exception as e:
+            return {"success": False, "seconds": round(time.perf_counter() - started, 3), "error": str(e)}
+
+    def get_timing_stats(self) -> Dict[str, Any]:
+        """Return request and embedding timings."""
+        return self.timings.snapshot()
+
+    def validate_configuration(self) -> ValidationResult:
+        """
+        Validate the endpoint by embedding a short test string.
+
+        Returns:
+            ValidationResult with detailed validation status
+        """
+        start_time = time.time()
+        try:
+            result = self.create_embeddings(["test"])
+            dimension = len(result["embeddings"][0])
+            return ValidationResult(
+                service="openai",
+                valid=True,
+                details={
+                    "base_url": self.base_url,
+                    "model": self.model,
+                    "embedding_dimension": dimension,
+                },
+                response_time_ms=int((time.time() - start_time) * 1000),
+            )
+        except Exception as e:
+            return ValidationResult(
+                service="openai",
+                valid=False,
+                error=f"OpenAI-compatible embedder error: {e}",
+                details={"base_url": self.base_url, "model": self.model},
+                response_time_ms=int((time.time() - start_time) * 1000),
+                actionable_guidance=[
+                    f"Verify the embedding server is running at {self.base_url}",
+                    "Check that embedder_base_url includes the API prefix (e.g. /v1)",
+                    f"Confirm the server serves the model '{self.model}' (ollama_model)",
+                    "Set embedder_api_key if the server requires authentication",
+                ],
+            )
+
+    def validate_configuration_and_raise(self) -> None:
+        """Validate configuration and raise exception if invalid."""
+        self.validate_configuration().raise_for_errors()
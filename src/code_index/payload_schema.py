@@ -0,0 +1,161 @@
+"""
+Declarative payload index schema for code-index collections.
+
+Every payload field that appears in a filter needs a Qdrant payload index;
+without one the filter is evaluated by scanning every point. PAYLOAD_SCHEMA
+lists those fields and PayloadSchemaManager creates missing indexes,
+re-creates indexes whose type changed, and reports filters that would
+still run unindexed. In a shared multi-tenant collection the tenant field
+is indexed with ``is_tenant`` so Qdrant co-locates each workspace's points.
+"""
+import logging
+import posixpath
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from qdrant_client.models import FieldCondition, Filter, KeywordIndexParams, KeywordIndexType, PayloadSchemaType
+
+logger = logging.getLogger(__name__)
+
+# Field name -> index type for every payload field used in filters
+PAYLOAD_SCHEMA: Dict[str, PayloadSchemaType] = {
+    "workspace_hash": PayloadSchemaType.KEYWORD,
+    "filePath": PayloadSchemaType.KEYWORD,
+    "pathSegments": PayloadSchemaType.KEYWORD,
+    "filetype": PayloadSchemaType.KEYWORD,
+    "type": PayloadSchemaType.KEYWORD,
+    "embedding_model": PayloadSchemaType.KEYWORD,
+    "clusterId": PayloadSchemaType.KEYWORD,
+}
+
+
+def path_segments(rel_path: str) -> List[str]:
+    """Return every directory prefix of a workspace-relative path.
+
+    ``src/code_index/cli.py`` yields ``["src", "src/code_index"]``, so a
+    keyword match on one prefix selects a whole subtree through the index.
+    """
+    directory = posixpath.dirname(rel_path.replace("\\", "/").strip("/"))
+    if not directory or directory == ".":
+        return []
+    parts = directory.split("/")
+    return ["/".join(parts[:i]) for i in range(1, len(parts) + 1)]
+
+
+def filter_keys(query_filter: Optional[Filter]) -> Set[str]:
+    """Collect the payload keys referenced anywhere in a filter, including nested filters."""
+    keys: Set[str] = set()
+    if query_filter is None:
+        return keys
+    for clause in (query_filter.must, query_filter.should, query_filter.must_not):
+        if clause is None:
+            continue
+        conditions = clause if isinstance(clause, list) else [clause]
+        for condition in conditions:
+            if isinstance(condition, FieldCondition):
+                keys.add(condition.key)
+            elif isinstance(condition, Filter):
+                keys |= filter_keys(condition)
+    return keys
+
+
+def _index_type(info: Any) -> Optional[str]:
+    data_type = info.get("data_type") if isinstance(info, dict) else getattr(info, "data_type", None)
+    return getattr(data_type, "value", data_type)
+
+
+def _is_tenant_index(info: Any) -> bool:
+    params = info.get("params") if isinstance(info, dict) else getattr(info, "params", None)
+    flag = params.get("is_tenant") if isinstance(params, dict) else getattr(params, "is_tenant", None)
+    return flag is True
+
+
+class PayloadSchemaManager:
+    """Keep a collection's payload indexes in line with PAYLOAD_SCHEMA."""
+
+    def __init__(self, client: Any, collection_name: str,
+                 schema: Optional[Dict[str, PayloadSchemaType]] = None,
+                 tenant_field: Optional[str] = None):
+        self.client = client
+        self.collection_name = collection_name
+        self.schema = dict(schema if schema is not None else PAYLOAD_SCHEMA)
+        # Keyword field indexed with is_tenant (shared multi-tenant collections only)
+        self.tenant_field = tenant_field
+        # None until the collection has been inspected
+        self._indexed: Optional[Set[str]] = None
+        self._reported: Set[tuple] = set()
+
+    def existing_indexes(self) -> Dict[str, Optional[str]]:
+        """Return the payload indexes of the collection as ``{field: type}``."""
+        return {field: _index_type(index) for field, index in self._read_schema().items()}
+
+    def _read_schema(self) -> Dict[str, Any]:
+        info = self.client.get_collection(collection_name=self.collection_name)
+        schema = getattr(info, "payload_schema", None)
+        return schema if isinstance(schema, dict) else {}
+
+    def _field_schema(self, field_name: str, schema_type: PayloadSchemaType) -> Any:
+        if field_name == self.tenant_field:
+            return KeywordIndexParams(type=KeywordIndexType.KEYWORD, is_tenant=True)
+        return schema_type
+
+    def ensure_indexes(self) -> Dict[str, List[str]]:
+        """Create missing indexes and re-create those with the wrong type.
+
+        Safe to call on every start; a collection that is already up to date
+        costs one ``get_collection`` call.
+
+        Returns:
+            Field names grouped as ``created``, ``migrated``, ``existing`` and ``failed``
+        """
+        report: Dict[str, List[str]] = {"created": [], "migrated": [], "existing": [], "failed": []}
+        try:
+            raw_schema = self._read_schema()
+        except Exception as e:
+            logger.debug("Could not read payload schema of %s: %s", self.collection_name, e)
+            raw_schema = {}
+        existing = {field: _index_type(index) for field, index in raw_schema.items()}
+
+        for field_name, schema_type in self.schema.items():
+            current = existing.get(field_name)
+            tenant_ok = field_name != self.tenant_field or _is_tenant_index(raw_schema.get(field_name))
+            if current == schema_type.value and tenant_ok:
+                report["existing"].append(field_name)
+                continue
+            try:
+                if field_name in existing:
+                    self.client.delete_payload_index(collection_name=self.collection_name, field_name=field_name)
+                self.client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field_name,
+                    field_schema=self._field_schema(field_name, schema_type)
+                )
+                report["migrated" if field_name in existing else "created"].append(field_name)
+            except Exception as e:
+                logger.debug("Could not index payload field %s: %s", field_name, e)
+                report["failed"].append(field_name)
+
+        self._indexed = (set(existing) | set(report["created"]) | set(report["migrated"])
+                         | set(report["existing"])) - set(report["failed"])
+        if report["created"] or report["migrated"]:
+            logger.info("Payload indexes for %s: created %s, migrated %s",
+                        self.collection_name, report["created"], report["migrated"])
+        return report
+
+    def unindexed_fields(self, query_filter: Optional[Filter],
+                         indexed: Optional[Iterable[str]] = None) -> List[str]:
+        """Return the fields of a filter that have no payload index."""
+        known = set(indexed) if indexed is not None else self._indexed
+        if known is None:
+            return []
+        return sorted(filter_keys(query_filter) - known)
+
+    def check_filter(self, query_filter: Optional[Filter], operation: str) -> List[str]:
+        """Log, once per operation and field, filters that would make Qdrant scan every point."""
+        missing = self.unindexed_fields(query_filter)
+        for field_name in missing:
+            if (operation, field_name) in self._reported:
+                continue
+            self._reported.add((operation, field_name))
+            logger.warning("%s on %s filters on unindexed payload field '%s'; add it to the payload schema",
+                           operation, self.collection_name, field_name)
+        return missing
@@ -0,0 +1,204 @@
+"""
+Common storage of the per-workspace local indexes.
+
+Local indexes (such as the lexical index) keep one entry per workspace file
+and are persisted the same way:
+
+- a JSON meta file with the format version, the generation, and the names
+  and hashes of the indexed files, plus the index's own sections
+- optionally a data file per generation (``<name>.<gen>.<ext>``), written
+  before the meta file and removed once the next generation replaced it
+
+Searches use a read-only view loaded from disk and reloaded whenever another
+process saved a new generation. The first update rebuilds a write view of
+``rel_path -> (hash, entry)`` from the stored data; ``save()`` writes that
+view as a new generation, swaps the meta file atomically and reopens the
+search view.
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, TextIO, Tuple, Union
+
+from code_index.cache import resolve_cache_dir
+from code_index.tenancy import workspace_hash
+
+
+class PerFileIndex:
+    """Base of the per-workspace indexes that store one entry per file."""
+
+    FORMAT_VERSION = 1
+    # Meta file in the index directory, e.g. "lexical.json"
+    META_FILE = ""
+    # Data file of a generation, e.g. "trigrams.{generation}.bin"; empty when everything is in the meta file
+    DATA_FILE = ""
+    # Directory under the cache directory is "<prefix>_<workspace id>"
+    DIRECTORY_PREFIX = ""
+    # Config flag that enables building the index during indexing
+    ENABLED_FLAG = ""
+
+    def __init__(self, directory: str, workspace_path: str):
+        self.directory = Path(directory)
+        self.workspace_path = os.path.abspath(workspace_path)
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._meta_mtime: Optional[int] = None
+        self._reset_view()
+        # Write view: entry per file, built from the search view on the first update
+        self._files: Optional[Dict[str, Tuple[str, Any]]] = None
+        self._dirty = False
+
+    def _reset_view(self) -> None:
+        self._generation = 0
+        self._file_names: List[str] = []
+        self._file_hashes: Dict[str, str] = {}
+
+    @classmethod
+    def _options(cls, config: Any) -> Dict[str, Any]:
+        """Constructor keyword arguments taken from the config."""
+        return {}
+
+    @classmethod
+    def for_workspace(cls, config: Any):
+        """Open the index of ``config.workspace_path`` (it may not exist yet)."""
+        workspace = getattr(config, "workspace_path", ".")
+        directory = resolve_cache_dir(config) / f"{cls.DIRECTORY_PREFIX}_{workspace_hash(workspace)[:16]}"
+        return cls(str(directory), workspace, **cls._options(config))
+
+    @classmethod
+    def from_config(cls, config: Any):
+        """Build the index used during indexing, or return None when it is disabled."""
+        if getattr(config, cls.ENABLED_FLAG, False) is not True:
+            return None
+        return cls.for_workspace(config)
+
+    # ------------------------------
+    # Loading
+    # ------------------------------
+    @property
+    def _meta_path(self) -> Path:
+        return self.directory / self.META_FILE
+
+    def _data_path(self, generation: int) -> Path:
+        return self.directory / self.DATA_FILE.format(generation=generation)
+
+    def exists(self) -> bool:
+        return os.path.isfile(self._meta_path)
+
+    def _ensure_loaded(self) -> None:
+        """Load the search view, again whenever another process saved a new generation."""
+        try:
+            mtime: Optional[int] = os.stat(self._meta_path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if self._loaded and mtime == self._meta_mtime:
+            return
+        self._loaded = True
+        self._meta_mtime = mtime
+        self._reset_view()
+        if mtime is None:
+            return
+        with open(self._meta_path, "r") as f:
+            meta = json.load(f)
+        if meta.get("format") != self.FORMAT_VERSION:
+            return
+        self._generation = int(meta.get("generation", 0))
+        files = meta.get("files", {})
+        self._file_names = list(files.get("names", []))
+        self._file_hashes = dict(zip(self._file_names, files.get("hashes", [])))
+        self._load(meta)
+
+    def _load(self, meta: Dict[str, Any]) -> None:
+        """Read the index's own sections of the meta file (and its data file)."""
+
+    # ------------------------------
+    # Updates
+    # ------------------------------
+    def _split_by_file(self) -> Dict[str, Tuple[str, Any]]:
+        """Regroup the loaded search view into ``rel_path -> (hash, entry)``."""
+        raise NotImplementedError
+
+    def _writable(self) -> Dict[str, Tuple[str, Any]]:
+        if self._files is None:
+            self._ensure_loaded()
+            self._files = self._split_by_file()
+        return self._files
+
+    def has_file(self, rel_path: str, file_hash: str) -> bool:
+        """True when this version of the file is already indexed."""
+        with self._lock:
+            if self._files is not None:
+                entry = self._files.get(rel_path)
+                return entry is not None and entry[0] == file_hash
+            self._ensure_loaded()
+            return self._file_hashes.get(rel_path) == file_hash
+
+    def _set_file(self, rel_path: str, file_hash: str, entry: Any) -> None:
+        with self._lock:
+            self._writable()[rel_path] = (file_hash, entry)
+            self._dirty = True
+
+    def remove_file(self, rel_path: str) -> None:
+        """Drop a file from the index."""
+        with self._lock:
+            if self._writable().pop(rel_path, None) is not None:
+                self._dirty = True
+
+    def prune_missing(self) -> int:
+        """Drop files that no longer exist in the workspace; returns how many were dropped."""
+        with self._lock:
+            files = self._writable()
+            missing = [name for name in files if not os.path.isfile(os.path.join(self.workspace_path, name))]
+            for name in missing:
+                del files[name]
+            if missing:
+                self._dirty = True
+            return len(missing)
+
+    def _write_atomic(self, path: Path, write: Callable[[Union[BinaryIO, TextIO]], None], mode: str = "wb") -> None:
+        """Write a file through a temporary file that replaces it once synced."""
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, mode) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _write_generation(self, names: List[str], generation: int, meta: Dict[str, Any]) -> None:
+        """Write the data file of a generation and add the index's sections to ``meta``."""
+        raise NotImplementedError
+
+    def save(self) -> bool:
+        """
+        Write pending changes as a new generation.
+
+        Returns:
+            True if anything was written
+        """
+        with self._lock:
+            if not self._dirty or self._files is None:
+                return False
+            names = sorted(self._files)
+            generation = self._generation + 1
+            self.directory.mkdir(parents=True, exist_ok=True)
+            meta: Dict[str, Any] = {
+                "format": self.FORMAT_VERSION,
+                "generation": generation,
+                "files": {"names": names, "hashes": [self._files[name][0] for name in names]},
+            }
+            self._write_generation(names, generation, meta)
+            self._write_atomic(self._meta_path, lambda f: json.dump(meta, f, separators=(",", ":")), "w")
+            if self.DATA_FILE:
+                try:
+                    self._data_path(self._generation).unlink()
+                except FileNotFoundError:
+                    pass
+
+            # Reopen the search view on the new generation; the write view stays current
+            files, self._files = self._files, None
+            self._loaded = False
+            self._ensure_loaded()
+            self._files = files
+            self._dirty = False
+            return True
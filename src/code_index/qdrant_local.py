@@ -0,0 +1,109 @@
+"""
+Embedded Qdrant storage for single-user and test setups.
+
+Setting ``qdrant_url`` to ``local:<path>`` runs qdrant-client's embedded
+storage on disk at ``<path>`` (``local::memory:`` keeps it in memory)
+instead of talking to a Qdrant server, so indexing, search and the
+collection commands work with no external service.
+
+The embedded store allows one client per storage folder per process and is
+not safe for concurrent calls, so every ``QdrantVectorStore`` and
+``CollectionManager`` of a process shares one client per folder and its
+calls are run one at a time.
+
+Payload indexes, sharding and optimizer settings have no effect in this
+mode; filters are evaluated by scanning the stored payloads.
+"""
+import atexit
+import functools
+import os
+import threading
+from typing import Any, Dict
+
+try:
+    from qdrant_client import QdrantClient
+except ImportError:  # pragma: no cover - optional dependency guard
+    QdrantClient = None  # type: ignore[assignment]
+
+LOCAL_URL_PREFIX = "local:"
+MEMORY_LOCATION = ":memory:"
+
+# Validation guidance when embedded storage cannot be opened
+LOCAL_GUIDANCE = (
+    "Check that the local storage folder exists and is writable",
+    "Only one process can open a local storage folder at a time; stop other code-index runs on it",
+    "Use a Qdrant server (qdrant_url: http://...) for concurrent access",
+)
+
+_clients: Dict[str, "SerializedClient"] = {}
+_clients_lock = threading.Lock()
+
+
+def is_local_url(url: Any) -> bool:
+    """True when ``qdrant_url`` selects the embedded storage."""
+    return isinstance(url, str) and url.strip().lower().startswith(LOCAL_URL_PREFIX)
+
+
+def local_storage_path(url: str) -> str:
+    """Return the absolute storage folder of a ``local:<path>`` URL, or ``:memory:``."""
+    location = url.strip()[len(LOCAL_URL_PREFIX):].strip()
+    if not location:
+        raise ValueError("qdrant_url 'local:' needs a storage path, e.g. 'local:.code_index/qdrant'")
+    if location == MEMORY_LOCATION:
+        return location
+    return os.path.abspath(os.path.expanduser(location))
+
+
+class SerializedClient:
+    """Proxy that runs one call at a time against an embedded Qdrant client."""
+
+    def __init__(self, client: Any, location: str):
+        self._client = client
+        self._lock = threading.RLock()
+        self.location = location
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def call(*args: Any, **kwargs: Any) -> Any:
+            with self._lock:
+                return attr(*args, **kwargs)
+
+        return call
+
+
+def local_client(url: str) -> SerializedClient:
+    """Return the process-wide client for a ``local:<path>`` URL, opening it on first use."""
+    if QdrantClient is None:
+        raise ImportError("qdrant-client is required for local Qdrant storage")
+    location = local_storage_path(url)
+    with _clients_lock:
+        client = _clients.get(location)
+        if client is None:
+            if location == MEMORY_LOCATION:
+                embedded = QdrantClient(location=MEMORY_LOCATION)
+            else:
+                os.makedirs(location, exist_ok=True)
+                # Calls are serialized by SerializedClient, so the store may be used from worker threads
+                embedded = QdrantClient(path=location, force_disable_check_same_thread=True)
+            client = SerializedClient(embedded, location)
+            _clients[location] = client
+        return client
+
+
+def close_local_clients() -> None:
+    """Close every embedded client and release its storage folder lock."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+atexit.register(close_local_clients)
@@ -0,0 +1,228 @@
+"""
+Collection storage settings for Qdrant: quantization, on-disk storage, HNSW
+and sharding.
+
+Translates the ``qdrant_*`` storage options of the configuration into the
+Qdrant models used when a collection is created and searched, and reads the
+same settings back from an existing collection for ``collections info``.
+"""
+import posixpath
+from typing import Any, Dict, Optional, Sequence
+
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    CompressionRatio,
+    HnswConfigDiff,
+    ProductQuantization,
+    ProductQuantizationConfig,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    ShardingMethod,
+)
+
+from .qdrant_local import is_local_url
+
+QUANTIZATION_MODES = ("none", "scalar", "binary", "product")
+PRODUCT_COMPRESSION_RATIOS = tuple(ratio.value for ratio in CompressionRatio)
+# Custom shard key derived from each point: none, top-level directory or file type
+SHARD_KEY_MODES = ("none", "directory", "language")
+# Shard keys for points that have no directory or file type
+ROOT_SHARD_KEY = "_root"
+UNKNOWN_SHARD_KEY = "_unknown"
+
+
+def _optional_int(config: Any, key: str) -> Optional[int]:
+    value = getattr(config, key, None)
+    return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+
+def build_quantization_config(config: Any) -> Optional[Any]:
+    """Return the quantization config for a new collection, or None for plain float32 vectors."""
+    mode = getattr(config, "qdrant_quantization", "none")
+    always_ram = getattr(config, "qdrant_quantization_always_ram", True) is True
+    if mode == "scalar":
+        quantile = getattr(config, "qdrant_scalar_quantile", 0.99)
+        return ScalarQuantization(scalar=ScalarQuantizationConfig(
+            type=ScalarType.INT8,
+            quantile=float(quantile) if isinstance(quantile, (int, float)) else None,
+            always_ram=always_ram,
+        ))
+    if mode == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=always_ram))
+    if mode == "product":
+        compression = getattr(config, "qdrant_product_compression", "x16")
+        return ProductQuantization(product=ProductQuantizationConfig(
+            compression=CompressionRatio(compression if compression in PRODUCT_COMPRESSION_RATIOS else "x16"),
+            always_ram=always_ram,
+        ))
+    return None
+
+
+def build_hnsw_config(config: Any, tenant: bool = False) -> Optional[HnswConfigDiff]:
+    """Return HNSW overrides for a new collection, or None to keep Qdrant's defaults.
+
+    A shared multi-tenant collection skips the global graph (``m=0``) and
+    builds one graph per tenant instead (``payload_m``), since every search
+    is filtered to a single workspace.
+    """
+    m = _optional_int(config, "qdrant_hnsw_m")
+    ef_construct = _optional_int(config, "qdrant_hnsw_ef_construct")
+    if tenant:
+        payload_m = _optional_int(config, "qdrant_tenant_payload_m")
+        return HnswConfigDiff(m=0, payload_m=payload_m if payload_m is not None else (m or 16),
+                              ef_construct=ef_construct)
+    if m is None and ef_construct is None:
+        return None
+    return HnswConfigDiff(m=m, ef_construct=ef_construct)
+
+
+def build_search_params(config: Any) -> Optional[SearchParams]:
+    """Return per-query search parameters, or None when the defaults apply."""
+    hnsw_ef = _optional_int(config, "qdrant_search_hnsw_ef")
+    quantization = None
+    if getattr(config, "qdrant_quantization", "none") in ("scalar", "binary", "product"):
+        oversampling = getattr(config, "qdrant_quantization_oversampling", 2.0)
+        quantization = QuantizationSearchParams(
+            rescore=getattr(config, "qdrant_quantization_rescore", True) is True,
+            oversampling=float(oversampling) if isinstance(oversampling, (int, float)) else None,
+        )
+    if hnsw_ef is None and quantization is None:
+        return None
+    return SearchParams(hnsw_ef=hnsw_ef, quantization=quantization)
+
+
+def shard_key_mode(config: Any) -> str:
+    """Return the configured custom shard key mode, ``none`` when sharding is automatic."""
+    if is_local_url(getattr(config, "qdrant_url", None)):
+        # Embedded storage has no shards
+        return "none"
+    mode = getattr(config, "qdrant_shard_key", "none")
+    return mode if mode in SHARD_KEY_MODES else "none"
+
+
+def writes_span_shards(config: Any) -> bool:
+    """True when one upsert batch can land on several shards.
+
+    Qdrant applies writes in order within a shard only, so a single
+    ``wait=True`` upsert does not confirm earlier ``wait=False`` writes to
+    other shards. With more than one shard (per collection, or per shard key
+    with custom sharding) every batch has to be confirmed on its own.
+    """
+    if is_local_url(getattr(config, "qdrant_url", None)):
+        return False
+    shard_number = _optional_int(config, "qdrant_shard_number")
+    return shard_number is not None and shard_number > 1
+
+
+def build_sharding_args(config: Any) -> Dict[str, Any]:
+    """Return the ``create_collection`` sharding arguments; empty to keep Qdrant's defaults.
+
+    With custom sharding, ``shard_number`` is the number of shards created
+    per shard key rather than for the whole collection.
+    """
+    args: Dict[str, Any] = {}
+    shard_number = _optional_int(config, "qdrant_shard_number")
+    replication_factor = _optional_int(config, "qdrant_replication_factor")
+    if shard_number is not None:
+        args["shard_number"] = shard_number
+    if replication_factor is not None:
+        args["replication_factor"] = replication_factor
+    if shard_key_mode(config) != "none":
+        args["sharding_method"] = ShardingMethod.CUSTOM
+    return args
+
+
+def shard_key_for_payload(mode: str, payload: Dict[str, Any]) -> Optional[str]:
+    """Return the shard key of a point from its payload, or None without custom sharding."""
+    if mode == "directory":
+        segments: Sequence[str] = payload.get("pathSegments") or []
+        return segments[0] if segments else ROOT_SHARD_KEY
+    if mode == "language":
+        return payload.get("filetype") or UNKNOWN_SHARD_KEY
+    return None
+
+
+def shard_key_for_prefix(mode: str, directory_prefix: Optional[str]) -> Optional[str]:
+    """Return the shard holding every point under a directory, or None when it spans shards."""
+    if mode != "directory" or not directory_prefix:
+        return None
+    top = posixpath.normpath(directory_prefix.replace("\\", "/")).strip("/").split("/", 1)[0]
+    return top if top and top != "." else None
+
+
+def _get(obj: Any, key: str) -> Any:
+    if isinstance(obj, dict):
+        return obj.get(key)
+    return getattr(obj, key, None)
+
+
+def describe_storage(collection_config: Any) -> Dict[str, Any]:
+    """Summarize vector storage, quantization and HNSW settings of an existing collection.
+
+    Args:
+        collection_config: ``config`` of a Qdrant collection info (model or dict)
+
+    Returns:
+        Mapping with only the settings that could be read
+    """
+    storage: Dict[str, Any] = {}
+    if collection_config is None:
+        return storage
+    params = _get(collection_config, "params")
+    vectors = _get(params, "vectors") if params is not None else None
+    if vectors is not None and _get(vectors, "size") is not None:
+        on_disk = _get(vectors, "on_disk")
+        if on_disk is not None:
+            storage["vectors_on_disk"] = bool(on_disk)
+    if params is not None and _get(params, "on_disk_payload") is not None:
+        storage["payload_on_disk"] = bool(_get(params, "on_disk_payload"))
+    if params is not None:
+        for key in ("shard_number", "replication_factor"):
+            if isinstance(_get(params, key), int):
+                storage[key] = _get(params, key)
+        sharding_method = _get(params, "sharding_method")
+        if sharding_method is not None:
+            storage["sharding_method"] = getattr(sharding_method, "value", sharding_method)
+        sparse_vectors = _get(params, "sparse_vectors")
+        if isinstance(sparse_vectors, dict) and sparse_vectors:
+            storage["sparse_vectors"] = sorted(sparse_vectors)
+
+    hnsw = _get(collection_config, "hnsw_config")
+    if hnsw is not None:
+        for key in ("m", "ef_construct", "payload_m"):
+            if _get(hnsw, key) is not None:
+                storage[f"hnsw_{key}"] = _get(hnsw, key)
+
+    quantization = _get(collection_config, "quantization_config")
+    if quantization is not None:
+        for mode in ("scalar", "binary", "product"):
+            details = _get(quantization, mode)
+            if details is None:
+                continue
+            summary: Dict[str, Any] = {"mode": mode}
+            for key in ("type", "quantile", "compression", "always_ram"):
+                value = _get(details, key)
+                if value is not None:
+                    summary[key] = getattr(value, "value", value)
+            storage["quantization"] = summary
+            break
+    return storage
+
+
+def format_quantization(summary: Optional[Dict[str, Any]]) -> str:
+    """Render a quantization summary from describe_storage() as one line."""
+    if not summary:
+        return "none"
+    parts = [summary["mode"]]
+    for key in ("type", "compression"):
+        if key in summary:
+            parts.append(str(summary[key]))
+    if "quantile" in summary:
+        parts.append(f"quantile={summary['quantile']}")
+    if summary.get("always_ram"):
+        parts.append("always_ram")
+    return " ".join(parts)
@@ -4,41 +4,54 @@ Similarity search strategy for semantic similarity matching.
 from typing import List, Optional, Dict, Any
 
 from ..config import Config
+from ..embedder import create_embedder
 from ..errors import ErrorHandler, ErrorContext, ErrorCategory, ErrorSeverity
+from ..vector_store import create_vector_store
 
 class SimilaritySearchStrategy:
-    """Similarity-based search strategy for semantic similarity matching."""
-    
+    """Similarity-based search strategy querying the workspace's vector store."""
+
     def __init__(self, error_handler: Optional[ErrorHandler] = None):
         """Initialize similarity search strategy."""
         self.error_handler = error_handler or ErrorHandler()
-    
+
     def search(self, query: str, config: Config) -> List[Dict[str, Any]]:
-        """Perform similarity search using semantic similarity."""
+        """
+        Perform similarity search against the workspace's vector store.
+
+        The query is embedded with the configured embedder; a workspace that
+        has not been indexed has no results.
+        """
         try:
-            # Simulate similarity search results
+            vector_store = create_vector_store(config)
+            if not vector_store.collection_exists():
+                return []
+            embeddings = create_embedder(config).create_embeddings([query]).get("embeddings")
+            if not embeddings:
+                return []
+            # The store applies the same excludes and weights as the search command
+            hits = vector_store.search(
+                query_vector=embeddings[0],
+                min_score=getattr(config, "search_min_score", 0.4),
+                max_results=getattr(config, "search_max_results", 50),
+            )
+
             results = []
-            
-            # In a real implementation, this would use vector similarity search
-            # For now, simulate results
-            import random
-            
-            # Generate simulated results
-            num_results = random.randint(2, 5)
-            for i in range(num_results):
+            for i, hit in enumerate(hits):
+                payload = hit["payload"]
                 results.append({
                     "rank": i + 1,
-                    "score": random.uniform(0.7, 0.9),
-                    "file_path": f"src/example/file_{i+1}.py",
-                    "start_line": random.randint(1, 50),
-                    "end_line": random.randint(51, 100),
-                    "type": "similarity",
-                    "adjusted_score": random.uniform(0.7, 0.9),
-                    "code_chunk": f"def search_function_{i+1}():\n    # Similarity search implementation\n    return results"
+                    "score": hit["score"],
+                    "file_path": payload["filePath"],
+                    "start_line": payload["startLine"],
+                    "end_line": payload["endLine"],
+                    "type": payload.get("type", "similarity"),
+                    "adjusted_score": hit.get("adjustedScore", hit["score"]),
+                    "code_chunk": payload["codeChunk"]
                 })
-            
+
             return results
-            
+
         except Exception as e:
             error_context = ErrorContext(
                 component="similarity_search_strategy",
@@ -48,7 +61,7 @@ class SimilaritySearchStrategy:
                 e, error_context, ErrorCategory.SEARCH, ErrorSeverity.MEDIUM
             )
             return []
-    
+
     def validate_query(self, query: str) -> bool:
         """Validate similarity search query."""
-        return len(query.strip()) >= 2
\ No newline at end of file
+        return len(query.strip()) >= 2
@@ -55,7 +55,7 @@ class SearchStrategyFactory:
     def get_strategy_description(self, strategy_name: str) -> str:
         """Get description for a specific search strategy."""
         descriptions = {
-            "text": "Text-based search using string matching and regex patterns",
+            "text": "BM25 lexical search over the indexed code blocks (needs lexical_index_enabled)",
             "similarity": "Vector similarity search using embeddings",
             "embedding": "Advanced embedding-based semantic search"
         }
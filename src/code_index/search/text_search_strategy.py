@@ -5,37 +5,44 @@ from typing import List, Optional, Dict, Any
 
 from ..config import Config
 from ..errors import ErrorHandler, ErrorContext, ErrorCategory, ErrorSeverity
+from ..lexical_index import LexicalIndex, query_terms
+from ..search_scoring import RankingProfile
 
 class TextSearchStrategy:
-    """Text-based search strategy for exact text matching."""
+    """Text-based search strategy ranking indexed code blocks with BM25."""
     
     def __init__(self, error_handler: Optional[ErrorHandler] = None):
         """Initialize text search strategy."""
         self.error_handler = error_handler or ErrorHandler()
     
     def search(self, query: str, config: Config) -> List[Dict[str, Any]]:
-        """Perform text search using exact text matching."""
+        """
+        Perform text search against the workspace's lexical index.
+        
+        The index is built during indexing when ``lexical_index_enabled`` is
+        set; without one there are no results.
+        """
         try:
-            # Text search implementation
-            results = []
-            
-            # Simulate text search results
-            # In a real implementation, this would search through indexed code blocks
-            # For now, simulate results
-            import random
+            index = LexicalIndex.for_workspace(config)
+            if not index.exists():
+                return []
+            max_results = getattr(config, "search_max_results", 50)
+            hits = index.search(query, max_results=max_results)
+            # Same excludes and file type/path/language weights as vector search
+            ranked = RankingProfile.for_config(config).rank(hits, max_results, min_content_len=0)
             
-            # Generate simulated results
-            num_results = random.randint(2, 5)
-            for i in range(num_results):
+            results = []
+            for i, hit in enumerate(ranked):
+                payload = hit["payload"]
                 results.append({
                     "rank": i + 1,
-                    "score": random.uniform(0.7, 0.9),
-                    "file_path": f"src/example/file_{i+1}.py",
-                    "start_line": random.randint(1, 50),
-                    "end_line": random.randint(51, 100),
-                    "type": "text",
-                    "adjusted_score": random.uniform(0.7, 0.9),
-                    "code_chunk": f"def search_function_{i+1}():\n    # Search implementation\n    return results"
+                    "score": hit["score"],
+                    "file_path": payload["filePath"],
+                    "start_line": payload["startLine"],
+                    "end_line": payload["endLine"],
+                    "type": payload.get("type", "text"),
+                    "adjusted_score": hit["adjustedScore"],
+                    "code_chunk": payload["codeChunk"]
                 })
             
             return results
@@ -52,4 +59,4 @@ class TextSearchStrategy:
     
     def validate_query(self, query: str) -> bool:
         """Validate text search query."""
-        return len(query.strip()) >= 2
\ No newline at end of file
+        return bool(query_terms(query))
@@ -0,0 +1,104 @@
+"""
+Fusion of the lexical and vector result lists for hybrid search.
+
+Both legs return the same hit dictionaries (``id``, ``score``, ``payload``)
+and a code block has the same id in the lexical index and the vector store,
+so hits are merged by id. The fused ``score`` is what the file type, path
+and language weights are applied to afterwards; the score each leg gave the
+block is kept in ``legScores``.
+"""
+from typing import Any, Dict, List, Optional
+
+SEARCH_MODES = ("vector", "lexical", "hybrid")
+FUSION_METHODS = ("rrf", "weighted")
+
+
+def reciprocal_rank_fusion(ranked: Dict[str, List[Dict[str, Any]]], weights: Dict[str, float],
+                           k: int = 60) -> Dict[str, float]:
+    """
+    Score every hit id by ``sum(weight / (k + rank))`` over the lists it appears in.
+
+    Scores are divided by the best achievable sum, so a block ranked first
+    by every leg scores 1.0.
+    """
+    best = sum(weights.get(name, 0.0) for name in ranked) / (k + 1)
+    scores: Dict[str, float] = {}
+    for name, hits in ranked.items():
+        weight = weights.get(name, 0.0)
+        for rank, hit in enumerate(hits, start=1):
+            key = str(hit["id"])
+            scores[key] = scores.get(key, 0.0) + weight / (k + rank)
+    if best <= 0:
+        return scores
+    return {key: score / best for key, score in scores.items()}
+
+
+def normalized_score_fusion(ranked: Dict[str, List[Dict[str, Any]]],
+                            weights: Dict[str, float]) -> Dict[str, float]:
+    """
+    Min-max normalize each list's scores to [0, 1] and take their weighted sum.
+
+    A block missing from a list contributes 0 for it. The result is divided
+    by the total weight of the lists, keeping it within [0, 1].
+    """
+    total = sum(weights.get(name, 0.0) for name in ranked)
+    scores: Dict[str, float] = {}
+    for name, hits in ranked.items():
+        if not hits:
+            continue
+        weight = weights.get(name, 0.0)
+        raw = [float(hit.get("score", 0.0) or 0.0) for hit in hits]
+        low, high = min(raw), max(raw)
+        span = high - low
+        for hit, value in zip(hits, raw):
+            normalized = (value - low) / span if span > 0 else 1.0
+            key = str(hit["id"])
+            scores[key] = scores.get(key, 0.0) + weight * normalized
+    if total <= 0:
+        return scores
+    return {key: score / total for key, score in scores.items()}
+
+
+def fuse_hits(vector_hits: Optional[List[Dict[str, Any]]], lexical_hits: Optional[List[Dict[str, Any]]],
+              method: str = "rrf", lexical_weight: float = 0.5, rrf_k: int = 60) -> List[Dict[str, Any]]:
+    """
+    Merge the hits of both legs into one list ordered by fused score.
+
+    Args:
+        vector_hits: Hits of the vector leg, or None when it was dropped
+        lexical_hits: Hits of the lexical leg, or None when it was dropped
+        method: ``rrf`` (reciprocal rank fusion) or ``weighted`` (normalized scores)
+        lexical_weight: Share of the lexical leg in the fused score (0-1)
+        rrf_k: Rank offset of reciprocal rank fusion
+
+    Returns:
+        New hit dictionaries; the vector payload and dense ``vector`` are kept for blocks found by both legs
+    """
+    ranked: Dict[str, List[Dict[str, Any]]] = {}
+    if vector_hits is not None:
+        # Fuse on similarity order, not on an order that already has weights applied
+        ranked["vector"] = sorted(vector_hits, key=lambda h: h.get("score", 0.0) or 0.0, reverse=True)
+    if lexical_hits is not None:
+        ranked["lexical"] = list(lexical_hits)
+    weights = {"vector": 1.0 - lexical_weight, "lexical": lexical_weight}
+
+    if method == "weighted":
+        fused = normalized_score_fusion(ranked, weights)
+    else:
+        fused = reciprocal_rank_fusion(ranked, weights, rrf_k)
+
+    merged: Dict[str, Dict[str, Any]] = {}
+    for name, hits in ranked.items():
+        for hit in hits:
+            key = str(hit["id"])
+            entry = merged.get(key)
+            if entry is None:
+                entry = {"id": hit["id"], "payload": hit["payload"], "legScores": {}}
+                merged[key] = entry
+            # Dense vectors only come from the vector leg; diversity re-ranking needs them
+            if hit.get("vector") is not None:
+                entry["vector"] = hit["vector"]
+            entry["legScores"][name] = hit.get("score", 0.0)
+    for key, entry in merged.items():
+        entry["score"] = fused.get(key, 0.0)
+    return sorted(merged.values(), key=lambda h: h["score"], reverse=True)
@@ -0,0 +1,332 @@
+"""
+Post-retrieval scoring shared by the vector store backends.
+
+Every backend returns the same hit dictionaries and ranks them the same way:
+configured excludes and the minimum content length are applied, then the
+similarity score is multiplied by the file type, path and language weights
+into ``adjustedScore``. The settings are compiled once into a RankingProfile.
+
+Ranking only reads ``filePath``, ``type`` and the content length, so a
+backend can rank hits that carry just those fields (RANKING_PAYLOAD_FIELDS)
+and fetch the full payloads of the hits it keeps afterwards.
+"""
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Language names accepted by ``--filetype`` mapped to the stored file extension
+LANGUAGE_EXTENSIONS = {
+    "python": "py", "javascript": "js", "typescript": "ts",
+    "rust": "rs", "golang": "go", "csharp": "cs", "c#": "cs",
+    "fsharp": "fs", "f#": "fs", "ruby": "rb", "kotlin": "kt",
+    "java": "java", "swift": "swift", "scala": "scala",
+    "haskell": "hs", "ocaml": "ml", "elixir": "ex",
+    "clojure": "clj", "commonlisp": "lisp", "scheme": "scm",
+    "dart": "dart", "lua": "lua", "julia": "jl",
+    "perl": "pl", "php": "php", "r": "r", "matlab": "m",
+    "zig": "zig", "nim": "nim", "crystal": "cr",
+    "markdown": "md", "yaml": "yaml", "toml": "toml",
+    "dockerfile": "dockerfile", "makefile": "make",
+    "cmake": "cmake", "sql": "sql", "html": "html", "css": "css",
+    "bash": "sh", "shell": "sh", "zsh": "zsh", "fish": "fish",
+    "powershell": "ps1", "batch": "bat",
+}
+
+# Payload fields every stored point must carry (KiloCode-compatible)
+REQUIRED_PAYLOAD_FIELDS = ("filePath", "codeChunk", "startLine", "endLine")
+# Payload fields HitScorer.rank() reads; ``contentLength`` stands in for ``codeChunk``
+RANKING_PAYLOAD_FIELDS = ("filePath", "type", "contentLength")
+
+
+def resolve_filetype(filetype: str) -> str:
+    """Map a language name or extension to the ``filetype`` payload value."""
+    lowered = filetype.lower()
+    return LANGUAGE_EXTENSIONS.get(lowered, lowered)
+
+
+def is_payload_valid(payload: Optional[Dict[str, Any]]) -> bool:
+    """Check that a payload has the fields search results are built from."""
+    if not payload:
+        return False
+    return all(field in payload for field in REQUIRED_PAYLOAD_FIELDS)
+
+
+def hit_from_payload(point_id: Any, score: float, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the search hit returned for one stored point."""
+    hit_payload = {
+        "filePath": payload.get("filePath", ""),
+        "codeChunk": payload.get("codeChunk", ""),
+        "startLine": payload.get("startLine", 0),
+        "endLine": payload.get("endLine", 0),
+        "type": payload.get("type", "")
+    }
+    for key in ("clusterId", "duplicateOf", "clusterMembers"):
+        if key in payload:
+            hit_payload[key] = payload[key]
+    return {"id": point_id, "score": score, "payload": hit_payload}
+
+
+def content_length(payload: Dict[str, Any]) -> Optional[int]:
+    """Length of the stripped code chunk, or None when the payload has neither it nor the chunk."""
+    if "contentLength" in payload:
+        return int(payload["contentLength"])
+    if "codeChunk" in payload:
+        return len((payload["codeChunk"] or "").strip())
+    return None
+
+
+def payload_size(payload: Optional[Dict[str, Any]]) -> int:
+    """Approximate wire size of a payload: the bytes of its compact JSON encoding."""
+    if not payload:
+        return 0
+    return len(json.dumps(payload, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8"))
+
+
+# Parsed ``min_content_length`` per config file, keyed by path with its mtime and size
+_MIN_CONTENT_LENGTH_CACHE: Dict[str, Tuple[Tuple[int, int], int]] = {}
+_MIN_CONTENT_LENGTH_LOCK = threading.Lock()
+
+
+def configured_min_content_length(config: Any) -> int:
+    """
+    Read ``block_extraction.min_content_length.default`` from the workspace config file.
+
+    The parsed value is cached until the file's mtime or size changes, so a
+    search costs a stat() of the config file rather than a JSON parse.
+    """
+    min_content_len = 0
+    try:
+        ws = getattr(config, "workspace_path", None) or "."
+        cfg_dir = ws if os.path.isdir(ws) else os.path.dirname(ws)
+        cfg_paths = [
+            os.path.join(cfg_dir, "rust_optimized_config.json"),
+            os.path.join(cfg_dir, "code_index.json"),
+            os.path.join(os.getcwd(), "rust_optimized_config.json"),
+            os.path.join(os.getcwd(), "code_index.json"),
+        ]
+        for path in cfg_paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            version = (st.st_mtime_ns, st.st_size)
+            with _MIN_CONTENT_LENGTH_LOCK:
+                cached = _MIN_CONTENT_LENGTH_CACHE.get(path)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            with open(path) as f:
+                raw = json.load(f)
+            block = raw.get("block_extraction", {})
+            if isinstance(block, dict):
+                mcl = block.get("min_content_length", {})
+                if isinstance(mcl, dict):
+                    min_content_len = mcl.get("default", 0)
+            with _MIN_CONTENT_LENGTH_LOCK:
+                _MIN_CONTENT_LENGTH_CACHE[path] = (version, min_content_len)
+            break
+    except Exception:
+        pass
+    return min_content_len
+
+
+def _float_or(value: Any, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _pattern_regex(patterns: List[str]) -> Optional["re.Pattern[str]"]:
+    """One alternation matching any of the (lowercased, literal) patterns, or None without patterns."""
+    unique = sorted(set(p for p in patterns if p), key=len, reverse=True)
+    if not unique:
+        return None
+    return re.compile("|".join(re.escape(p) for p in unique))
+
+
+class RankingProfile:
+    """
+    Search weights and excludes of one configuration, compiled for ranking.
+
+    Patterns are lowercased once, exclude patterns and path boost patterns
+    are each compiled into one regular expression, and the weights of every
+    file path seen are memoized, so ranking a hit costs a dictionary lookup.
+    Use for_config(), which reuses the profile of unchanged settings.
+    """
+
+    # Compiled profiles by settings signature; bounded like the path memo
+    _cache: Dict[str, "RankingProfile"] = {}
+    _cache_lock = threading.Lock()
+    # Config values a profile depends on (the workspace locates min_content_length)
+    _SETTINGS = ("workspace_path", "search_file_type_weights", "search_path_boosts",
+                 "search_language_boosts", "search_exclude_patterns")
+    _MAX_PROFILES = 32
+    _MAX_MEMO_PATHS = 65536
+
+    def __init__(self, config: Any, min_content_length: int = 0):
+        self.min_content_length = min_content_length
+        self.file_type_weights: Dict[str, float] = {}
+        for ext, weight in (getattr(config, "search_file_type_weights", None) or {}).items():
+            self.file_type_weights[str(ext).lower()] = _float_or(weight, 1.0)
+        self.path_boosts: List[Tuple[str, float]] = []
+        for rule in getattr(config, "search_path_boosts", None) or []:
+            try:
+                pattern = str(rule.get("pattern", "")).lower()
+                weight = float(rule.get("weight", 1.0))
+            except Exception:
+                continue
+            if pattern:
+                self.path_boosts.append((pattern, weight))
+        self.language_boosts: Dict[str, float] = {}
+        for lang, weight in (getattr(config, "search_language_boosts", None) or {}).items():
+            self.language_boosts[str(lang).lower()] = _float_or(weight, 1.0)
+        self.exclude_patterns = [str(p).lower() for p in getattr(config, "search_exclude_patterns", None) or []]
+        self._exclude_re = _pattern_regex(self.exclude_patterns)
+        self._boost_re = _pattern_regex([pattern for pattern, _ in self.path_boosts])
+        self._path_memo: Dict[str, Tuple[bool, float, float]] = {}
+        self._language_memo: Dict[str, float] = {}
+
+    @staticmethod
+    def signature(config: Any) -> str:
+        """Key of the settings a profile is compiled from."""
+        return json.dumps([
+            getattr(config, "search_file_type_weights", None),
+            getattr(config, "search_path_boosts", None),
+            getattr(config, "search_language_boosts", None),
+            getattr(config, "search_exclude_patterns", None),
+        ], sort_keys=True, default=str)
+
+    @classmethod
+    def for_config(cls, config: Any) -> "RankingProfile":
+        """
+        Compiled profile of ``config``, reused while its search settings are unchanged.
+
+        The profile is remembered on the config object together with the
+        setting values it was built from, and looked up again only once one of
+        them is assigned a new value, as loading the config or applying an
+        override does. Repeated searches with one config therefore neither
+        stat() the config files nor serialize the settings.
+        """
+        settings = tuple(getattr(config, name, None) for name in cls._SETTINGS)
+        remembered = getattr(config, "_ranking_profile", None)
+        if isinstance(remembered, tuple) and all(a is b for a, b in zip(remembered[0], settings)):
+            return remembered[1]
+        min_content_len = configured_min_content_length(config)
+        key = f"{min_content_len}:{cls.signature(config)}"
+        with cls._cache_lock:
+            profile = cls._cache.get(key)
+            if profile is None:
+                if len(cls._cache) >= cls._MAX_PROFILES:
+                    cls._cache.clear()
+                profile = cls._cache[key] = cls(config, min_content_len)
+        try:
+            config._ranking_profile = (settings, profile)
+        except AttributeError:
+            pass
+        return profile
+
+    def path_weights(self, file_path: str) -> Tuple[bool, float, float]:
+        """Whether the path is excluded, and its file type and path weights."""
+        cached = self._path_memo.get(file_path)
+        if cached is not None:
+            return cached
+        p = file_path.lower()
+        excluded = self._exclude_re is not None and self._exclude_re.search(p) is not None
+        file_w = self.file_type_weights.get(os.path.splitext(p)[1], 1.0) if self.file_type_weights else 1.0
+        path_w = 1.0
+        # The alternation only tells whether some rule applies; all of them multiply
+        if self._boost_re is not None and self._boost_re.search(p) is not None:
+            for pattern, weight in self.path_boosts:
+                if pattern in p:
+                    path_w *= weight
+        if len(self._path_memo) >= self._MAX_MEMO_PATHS:
+            self._path_memo.clear()
+        cached = self._path_memo[file_path] = (excluded, file_w, path_w)
+        return cached
+
+    def language_weight(self, lang: str) -> float:
+        """Language multiplier of a block type (1.0 when unset)."""
+        if not lang or not self.language_boosts:
+            return 1.0
+        weight = self._language_memo.get(lang)
+        if weight is None:
+            weight = self._language_memo[lang] = self.language_boosts.get(lang.lower(), 1.0)
+        return weight
+
+    def rank(self, hits: List[Dict[str, Any]], max_results: int, filetype_filter: Optional[str] = None,
+             min_content_len: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Drop excluded and too-short hits, add ``adjustedScore`` and keep the best ``max_results``.
+
+        ``min_content_len`` defaults to the configured minimum content length.
+        Hits whose payload has neither ``contentLength`` nor ``codeChunk`` are
+        not length-checked here; the caller checks them once the chunk is known.
+        """
+        n = len(hits)
+        if n == 0:
+            return []
+        if min_content_len is None:
+            min_content_len = self.min_content_length
+        keep = np.ones(n, dtype=bool)
+        scores = np.empty(n, dtype=np.float64)
+        file_w = np.empty(n, dtype=np.float64)
+        path_w = np.empty(n, dtype=np.float64)
+        lang_w = np.ones(n, dtype=np.float64)
+        lengths = np.full(n, -1, dtype=np.int64)
+        for i, h in enumerate(hits):
+            payload = h["payload"]
+            excluded, file_w[i], path_w[i] = self.path_weights(payload.get("filePath", ""))
+            keep[i] = not excluded
+            if min_content_len > 0:
+                length = content_length(payload)
+                if length is not None:
+                    lengths[i] = length
+            if not filetype_filter:  # Otherwise the user already narrowed by language
+                lang_w[i] = self.language_weight(payload.get("type", ""))
+            scores[i] = h.get("score", 0.0) or 0.0
+        if min_content_len > 0:
+            keep &= (lengths < 0) | (lengths >= min_content_len)
+        adjusted = scores * file_w * path_w * lang_w
+
+        kept = np.flatnonzero(keep)
+        # Stable sort: primarily by adjustedScore, fallback by base score
+        order = kept[np.lexsort((-scores[kept], -adjusted[kept]))][:max(max_results, 0)]
+        ranked = []
+        for i in order.tolist():
+            hit = hits[i]
+            hit["adjustedScore"] = float(adjusted[i])
+            ranked.append(hit)
+        return ranked
+
+
+class HitScorer:
+    """Apply the configured search weights and excludes to raw hits (see RankingProfile)."""
+
+    def __init__(self, config: Any):
+        self._config = config
+        self._profile = RankingProfile.for_config(config)
+
+    def filetype_weight(self, file_path: str) -> float:
+        """Weight by file extension using config.search_file_type_weights."""
+        return self._profile.path_weights(file_path)[1]
+
+    def path_weight(self, file_path: str) -> float:
+        """Aggregate multiplicative boosts for any matching path pattern rules."""
+        return self._profile.path_weights(file_path)[2]
+
+    def language_weight(self, lang: str) -> float:
+        """Optional language multiplier from config.search_language_boosts."""
+        return self._profile.language_weight(lang)
+
+    def exclude_match(self, file_path: str) -> bool:
+        """Return True if file_path matches any configured exclude pattern (substring)."""
+        return self._profile.path_weights(file_path)[0]
+
+    def rank(self, hits: List[Dict[str, Any]], max_results: int,
+             filetype_filter: Optional[str] = None, min_content_len: int = 0) -> List[Dict[str, Any]]:
+        """Drop excluded and too-short hits, add ``adjustedScore`` and keep the best ``max_results``."""
+        return self._profile.rank(hits, max_results, filetype_filter, min_content_len)
@@ -24,6 +24,8 @@ except ImportError:
 
 from qdrant_client.models import VectorParams, Distance
 
+from .qdrant_local import LOCAL_GUIDANCE, is_local_url, local_client
+
 
 @dataclass
 class ValidationResult:
@@ -369,8 +371,11 @@ class ServiceValidator:
             url = config.qdrant_url
             api_key = config.qdrant_api_key
 
-            # Step 1: Test basic connectivity
-            client = QdrantClient(url=url, api_key=api_key)
+            # Step 1: Test basic connectivity (local:<path> opens embedded storage)
+            if is_local_url(url):
+                client = local_client(url)
+            else:
+                client = QdrantClient(url=url, api_key=api_key)
 
             # Step 2: Get collections to verify service is responsive
             collections = client.get_collections()
@@ -417,6 +422,7 @@ class ServiceValidator:
                 valid=True,
                 details={
                     "url": url,
+                    "mode": "local" if is_local_url(url) else "server",
                     "collection_count": collection_count,
                     "collection_names": collection_names,
                     "response_time_ms": int((time.time() - start_time) * 1000)
@@ -441,6 +447,8 @@ class ServiceValidator:
                 guidance.insert(0, "Verify API key permissions")
             elif "not found" in error_str:
                 guidance.insert(0, "Check Qdrant service URL and port")
+            if is_local_url(config.qdrant_url):
+                guidance = list(LOCAL_GUIDANCE)
 
             return ValidationResult(
                 service=service_name,
@@ -454,6 +462,50 @@ class ServiceValidator:
                 actionable_guidance=guidance
             )
 
+    def validate_embedder_service(self, config: Config) -> ValidationResult:
+        """
+        Validate the configured embedding backend.
+
+        Args:
+            config: Configuration object with embedder settings
+
+        Returns:
+            ValidationResult for the selected backend
+        """
+        backend = str(getattr(config, "embedder_backend", "ollama") or "ollama").lower()
+        if backend == "ollama":
+            return self.validate_ollama_service(config)
+
+        start_time = time.time()
+        try:
+            from .embedder import create_embedder
+
+            return create_embedder(config).validate_configuration()
+        except Exception as e:
+            return ValidationResult(
+                service=backend,
+                valid=False,
+                error=f"Embedder backend '{backend}' could not be created: {e}",
+                details={"embedder_backend": backend, "error_type": "configuration_error"},
+                response_time_ms=int((time.time() - start_time) * 1000),
+                actionable_guidance=[
+                    "Set embedder_backend to one of: ollama, openai, onnx",
+                    "Check the backend-specific settings in the embedding section",
+                ],
+            )
+
+    def validate_vector_store_service(self, config: Config) -> ValidationResult:
+        """
+        Validate the configured vector store backend.
+
+        Qdrant is checked for connectivity; the flat backend only needs a
+        writable storage directory.
+        """
+        if getattr(config, "vector_store_backend", "qdrant") != "flat":
+            return self.validate_qdrant_service(config)
+        from code_index.vector_store import create_vector_store
+        return create_vector_store(config).validate_configuration()
+
     def validate_all_services(self, config: Config) -> List[ValidationResult]:
         """
         Validate all required services.
@@ -466,13 +518,11 @@ class ServiceValidator:
         """
         results = []
 
-        # Validate Ollama service
-        ollama_result = self.validate_ollama_service(config)
-        results.append(ollama_result)
+        # Validate the embedding backend (Ollama unless another backend is configured)
+        results.append(self.validate_embedder_service(config))
 
-        # Validate Qdrant service
-        qdrant_result = self.validate_qdrant_service(config)
-        results.append(qdrant_result)
+        # Validate the vector store (Qdrant unless the flat backend is configured)
+        results.append(self.validate_vector_store_service(config))
 
         return results
 
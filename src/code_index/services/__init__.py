@@ -40,6 +40,8 @@ from .shared.command_context import CommandContext, IndexDependencies, SearchDep
 from .batch.batch_processor import TreeSitterBatchProcessor, BatchProcessingResult
 from .batch.batch_manager import BatchManager
 from .batch.batch_utils import BatchProgressTracker
+from .batch.bulk_vector_writer import BulkVectorWriter
+from .batch.vector_spool import VectorSpool, SpoolDrainer, SpoolEntry
 
 # Parallel file processing
 from .batch.parallel_file_processor import (
@@ -63,6 +65,8 @@ from .shared.indexing_dependencies import (
 # Embedding services
 from .embedding.streaming_embedder import StreamingEmbedder, BatchResult
 from .embedding.embedding_cache import EmbeddingCache
+from .embedding.near_duplicate_filter import NearDuplicateFilter
+from .embedding.text_normalizer import EmbeddingTextNormalizer
 
 # Tree-sitter specialized services
 from .treesitter.file_processor import FileProcessor
@@ -111,6 +115,10 @@ __all__ = [
     'BatchProcessingResult',
     'BatchManager',
     'BatchProgressTracker',
+    'BulkVectorWriter',
+    'VectorSpool',
+    'SpoolDrainer',
+    'SpoolEntry',
     
     # Parallel processing
     'ParallelFileProcessor',
@@ -131,6 +139,8 @@ __all__ = [
     'StreamingEmbedder',
     'BatchResult',
     'EmbeddingCache',
+    'NearDuplicateFilter',
+    'EmbeddingTextNormalizer',
 ]
 
 # Backward compatibility - map old submodule imports to new locations
@@ -152,6 +162,8 @@ _SUBMODULE_MAP = {
     'batch_processor': '.batch.batch_processor',
     'batch_manager': '.batch.batch_manager',
     'batch_utils': '.batch.batch_utils',
+    'bulk_vector_writer': '.batch.bulk_vector_writer',
+    'vector_spool': '.batch.vector_spool',
     'parallel_file_processor': '.batch.parallel_file_processor',
     'file_processor': '.treesitter.file_processor',
     'resource_manager': '.treesitter.resource_manager',
@@ -159,6 +171,8 @@ _SUBMODULE_MAP = {
     'tree_sitter_coordinator': '.treesitter.tree_sitter_coordinator',
     'streaming_embedder': '.embedding.streaming_embedder',
     'embedding_cache': '.embedding.embedding_cache',
+    'near_duplicate_filter': '.embedding.near_duplicate_filter',
+    'text_normalizer': '.embedding.text_normalizer',
     'config_loader': '.command.config_loader',
     'dimension_validator': '.embedding.dimension_validator',
 }
@@ -533,9 +533,7 @@ class BatchManager:
             texts = [chunk.content if hasattr(chunk, 'content') else str(chunk) for chunk in all_chunks]
             
             # Generate embeddings using streaming
-            embeddings = []
-            for embedding_batch in streaming_embedder.embed_stream(texts):
-                embeddings.extend(embedding_batch)
+            embeddings = streaming_embedder.embed_all(texts)
             
             # Create batch result
             batch_result = BatchResult(
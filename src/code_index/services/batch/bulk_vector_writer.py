@@ -0,0 +1,366 @@
+"""Cross-file, parallel vector ingestion for Qdrant.
+
+Storing vectors one file at a time costs a filter delete and a blocking
+upsert per file, so a workspace of small files spends most of its time
+waiting on round trips. BulkVectorWriter buffers points from many files
+into fixed-size batches and uploads them on a small thread pool with
+``wait=False``. Qdrant applies the writes of a shard in order, so on a
+single-shard collection one ``wait=True`` upsert at the end acts as a
+barrier for everything sent before it.
+
+On collections with custom sharding (``qdrant_shard_key``) points are
+buffered per shard key, so every batch is a single-shard upsert and the
+shards fill and upload independently; the closing barrier is then sent
+once per shard key, since ordering only holds within a shard. When a batch
+can still span shards (``qdrant_shard_number`` above 1, with or without a
+shard key) no single barrier covers the others, so every batch is uploaded
+with ``wait=True`` instead; the uploads still run in parallel.
+
+A file counts as written only when every batch holding its points has been
+accepted; its ``on_commit`` callback (normally the cache update) runs then,
+so a failed batch leaves the file to be re-indexed on the next run.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from ...errors import ErrorCategory, ErrorContext, ErrorHandler, ErrorSeverity
+from ...qdrant_settings import writes_span_shards
+
+
+@dataclass
+class _FileState:
+    """Write progress of one file's points."""
+
+    buffered_points: int = 0
+    pending_batches: int = 0
+    sealed: bool = False
+    failed: bool = False
+    error: Optional[str] = None
+    stale_ids: List[Any] = field(default_factory=list)
+    on_commit: Optional[Callable[[], None]] = None
+
+
+@dataclass
+class _WriterStats:
+    points_written: int = 0
+    batches_written: int = 0
+    retries: int = 0
+    failed_batches: int = 0
+    files_committed: int = 0
+    upload_seconds: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    failed_files: List[str] = field(default_factory=list)
+
+
+class BulkVectorWriter:
+    """Buffer vector points across files and upload them in parallel batches."""
+
+    def __init__(
+        self,
+        vector_store: Any,
+        batch_size: int = 256,
+        parallelism: int = 4,
+        max_retries: int = 3,
+        retry_backoff_seconds: float = 0.5,
+        error_handler: Optional[ErrorHandler] = None,
+        wait_every_batch: bool = False,
+    ):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if parallelism < 1:
+            raise ValueError("parallelism must be at least 1")
+        self.vector_store = vector_store
+        self.batch_size = batch_size
+        self.parallelism = parallelism
+        self.max_retries = max(0, max_retries)
+        self.retry_backoff_seconds = max(0.0, retry_backoff_seconds)
+        self.error_handler = error_handler
+        # Confirm each batch when no single wait=True upsert can act as a barrier
+        self.wait_every_batch = wait_every_batch
+
+        self._lock = threading.Lock()
+        # Commit callbacks touch the cache file, which is not thread-safe
+        self._commit_lock = threading.Lock()
+        # Bounds the batches held in memory while uploads are in flight
+        self._slots = threading.BoundedSemaphore(parallelism * 2)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._futures: List[Future] = []
+        # Buffered (rel_path, point) pairs per shard key; None on unsharded collections
+        self._buffers: Dict[Optional[str], List[Tuple[str, Dict[str, Any]]]] = {}
+        self._files: Dict[str, _FileState] = {}
+        self._cleared: set = set()
+        self._last_batches: Dict[Optional[str], List[Dict[str, Any]]] = {}
+        shard_key_for = getattr(vector_store, "shard_key_for", None)
+        self._shard_key_for = shard_key_for if callable(shard_key_for) else None
+        self._stats = _WriterStats()
+
+    @classmethod
+    def from_config(cls, config: Any, vector_store: Any,
+                    error_handler: Optional[ErrorHandler] = None) -> Optional["BulkVectorWriter"]:
+        """Build a writer from configuration, or return None when bulk writes are disabled."""
+        if getattr(config, "qdrant_bulk_write", False) is not True or vector_store is None:
+            return None
+        return cls(
+            vector_store,
+            batch_size=int(getattr(config, "qdrant_write_batch_size", 256)),
+            parallelism=int(getattr(config, "qdrant_write_parallelism", 4)),
+            max_retries=int(getattr(config, "qdrant_write_max_retries", 3)),
+            error_handler=error_handler,
+            wait_every_batch=writes_span_shards(config),
+        )
+
+    def add(self, rel_path: str, points: List[Dict[str, Any]],
+            on_commit: Optional[Callable[[], None]] = None,
+            previous_ids: Optional[Set[Any]] = None) -> None:
+        """Queue all points of one file.
+
+        Args:
+            rel_path: Workspace-relative path stored in the ``filePath`` payload
+            points: Point dictionaries with id, vector and payload
+            on_commit: Called once every point of the file has been written
+            previous_ids: Point IDs of the file's previous version; when given,
+                only the IDs that went away are deleted, by ID, after the upload
+        """
+        stale_ids = sorted(previous_ids - {point["id"] for point in points}) if previous_ids is not None else []
+        with self._lock:
+            if self._stats.started_at is None:
+                self._stats.started_at = time.perf_counter()
+            self._files[rel_path] = _FileState(buffered_points=len(points), stale_ids=stale_ids,
+                                               on_commit=on_commit)
+            if previous_ids is not None:
+                # No filter delete needed for this file
+                self._cleared.add(rel_path)
+            for point in points:
+                self._buffers.setdefault(self._shard_of(point), []).append((rel_path, point))
+        if not points and previous_ids is None:
+            # Nothing to upload, but stale points of the file must still go
+            self._clear_stale([rel_path])
+        while True:
+            shard, batch = self._take_full_batch()
+            if not batch:
+                break
+            self._dispatch(batch, shard, wait=False)
+        with self._lock:
+            state = self._files[rel_path]
+            state.sealed = True
+            ready = self._ready_to_commit(rel_path, state)
+        if ready:
+            self._commit(rel_path, state)
+
+    def flush(self) -> None:
+        """Send the buffered points without waiting for them to be applied."""
+        for shard in self._buffered_shards():
+            batch = self._take(shard)
+            if batch:
+                self._dispatch(batch, shard, wait=False)
+
+    def close(self, errors: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Write everything still buffered and wait until Qdrant has applied it.
+
+        Args:
+            errors: Receives one message per file whose points could not be written
+
+        Returns:
+            Write statistics, see get_stats()
+        """
+        self._wait_for_uploads()
+        confirmed: Set[Optional[str]] = set()
+        for shard in self._buffered_shards():
+            remaining = self._take(shard)
+            if remaining:
+                # The last batch of a shard is sent with wait=True and doubles as its barrier
+                self._dispatch(remaining, shard, wait=True)
+                confirmed.add(shard)
+        with self._lock:
+            unconfirmed = [(shard, points) for shard, points in self._last_batches.items()
+                           if shard not in confirmed]
+        for shard, points in unconfirmed:
+            # Everything for this shard went out with wait=False; re-send its last batch as the barrier
+            try:
+                self.vector_store.upsert_points(points, wait=True)
+            except Exception as e:
+                if errors is not None:
+                    errors.append(f"Failed to confirm vector writes: {e}")
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+        with self._lock:
+            failed = [(path, state) for path, state in self._files.items() if state.failed]
+            self._stats.failed_files.extend(path for path, _ in failed)
+            self._files.clear()
+            self._cleared.clear()
+            self._last_batches.clear()
+            self._stats.finished_at = time.perf_counter()
+        if errors is not None:
+            for path, state in failed:
+                errors.append(f"Failed to store vectors for {path}: {state.error}")
+        return self.get_stats()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return counters and throughput for the points written so far."""
+        with self._lock:
+            stats = self._stats
+            end = stats.finished_at or time.perf_counter()
+            elapsed = end - stats.started_at if stats.started_at is not None else 0.0
+            return {
+                "points_written": stats.points_written,
+                "batches_written": stats.batches_written,
+                "files_committed": stats.files_committed,
+                "retries": stats.retries,
+                "failed_batches": stats.failed_batches,
+                "failed_files": list(stats.failed_files),
+                "seconds": round(elapsed, 3),
+                "upload_seconds": round(stats.upload_seconds, 3),
+                "points_per_second": round(stats.points_written / elapsed, 1) if elapsed > 0 else 0.0,
+            }
+
+    def _shard_of(self, point: Dict[str, Any]) -> Optional[str]:
+        if self._shard_key_for is None:
+            return None
+        key = self._shard_key_for(point)
+        return key if isinstance(key, str) else None
+
+    def _buffered_shards(self) -> List[Optional[str]]:
+        with self._lock:
+            return list(self._buffers)
+
+    def _take(self, shard: Optional[str], count: Optional[int] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            buffer = self._buffers.get(shard, [])
+            count = len(buffer) if count is None else count
+            batch = buffer[:count]
+            del buffer[:count]
+            if not buffer:
+                self._buffers.pop(shard, None)
+        return batch
+
+    def _take_full_batch(self) -> Tuple[Optional[str], List[Tuple[str, Dict[str, Any]]]]:
+        """Take one full batch from any shard buffer that has reached batch_size."""
+        with self._lock:
+            full = [shard for shard, buffer in self._buffers.items() if len(buffer) >= self.batch_size]
+        if not full:
+            return None, []
+        return full[0], self._take(full[0], self.batch_size)
+
+    def _dispatch(self, batch: List[Tuple[str, Dict[str, Any]]], shard: Optional[str], wait: bool) -> None:
+        """Delete stale points of newly seen files, then upload the batch."""
+        counts: Dict[str, int] = {}
+        for path, _ in batch:
+            counts[path] = counts.get(path, 0) + 1
+        files = list(counts)
+        # Deletes run here, before any upload of the file is submitted, so an
+        # in-flight upsert can never be removed by a later delete.
+        self._clear_stale(files)
+        with self._lock:
+            for path, count in counts.items():
+                state = self._files[path]
+                state.buffered_points -= count
+                state.pending_batches += 1
+        points = [point for _, point in batch]
+        if wait:
+            self._upload(points, files, shard, wait=True)
+            return
+        self._slots.acquire()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.parallelism,
+                                                thread_name_prefix="qdrant-writer")
+        future = self._executor.submit(self._upload, points, files, shard, self.wait_every_batch)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._futures.append(future)
+
+    def _clear_stale(self, files: List[str]) -> None:
+        with self._lock:
+            new_files = [path for path in files if path not in self._cleared]
+            self._cleared.update(new_files)
+        if not new_files:
+            return
+        try:
+            self.vector_store.delete_points_by_file_paths(new_files)
+        except Exception:
+            # Matches per-file storage: a failed delete leaves stale points but does not block the upsert
+            pass
+
+    def _upload(self, points: List[Dict[str, Any]], files: List[str], shard: Optional[str],
+                wait: bool) -> None:
+        start = time.perf_counter()
+        error: Optional[Exception] = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.vector_store.upsert_points(points, wait=wait)
+                error = None
+                break
+            except Exception as e:
+                error = e
+                if attempt < self.max_retries:
+                    with self._lock:
+                        self._stats.retries += 1
+                    time.sleep(self.retry_backoff_seconds * (2 ** attempt))
+
+        message = None
+        if error is not None:
+            message = self._describe_error(error, files)
+        to_commit = []
+        with self._lock:
+            self._stats.upload_seconds += time.perf_counter() - start
+            if error is None:
+                self._stats.points_written += len(points)
+                self._stats.batches_written += 1
+                if not wait:
+                    # Batches sent with wait=True are confirmed already and need no barrier
+                    self._last_batches[shard] = points
+            else:
+                self._stats.failed_batches += 1
+            for path in files:
+                state = self._files[path]
+                state.pending_batches -= 1
+                if error is not None and not state.failed:
+                    state.failed = True
+                    state.error = message
+                if self._ready_to_commit(path, state):
+                    to_commit.append((path, state))
+        for path, state in to_commit:
+            self._commit(path, state)
+
+    def _ready_to_commit(self, path: str, state: _FileState) -> bool:
+        return (state.sealed and state.buffered_points == 0
+                and state.pending_batches == 0 and not state.failed)
+
+    def _commit(self, path: str, state: _FileState) -> None:
+        with self._commit_lock:
+            callback, state.on_commit = state.on_commit, None
+            try:
+                if state.stale_ids:
+                    self.vector_store.delete_points(state.stale_ids)
+                if callback is not None:
+                    callback()
+            except Exception as e:
+                with self._lock:
+                    state.failed = True
+                    state.error = f"commit failed: {e}"
+                return
+        with self._lock:
+            self._stats.files_committed += 1
+
+    def _wait_for_uploads(self) -> None:
+        futures, self._futures = self._futures, []
+        for future in futures:
+            future.result()
+
+    def _describe_error(self, error: Exception, files: List[str]) -> str:
+        if self.error_handler is None:
+            return str(error)
+        error_context = ErrorContext(
+            component="bulk_vector_writer",
+            operation="upsert_points",
+            additional_data={"files": files[:10], "files_count": len(files)}
+        )
+        error_response = self.error_handler.handle_error(
+            error, error_context, ErrorCategory.DATABASE, ErrorSeverity.MEDIUM
+        )
+        return error_response.message
@@ -0,0 +1,278 @@
+"""Write-ahead spool for prepared vector points.
+
+Embedding a file is the expensive part of indexing; writing its points to
+Qdrant is not. With the spool enabled, FileProcessor writes each file's
+prepared points to a local spool entry and moves on. A background drainer
+writes entries to Qdrant in order, retrying with backoff while Qdrant is
+slow or unavailable, and removes an entry once its points and cache update
+are committed. Entries left behind when a run ends, or when the process
+dies, are replayed by the next run instead of re-embedding the files.
+
+Each entry is one file written atomically (temp file + rename): a magic
+tag, a length-prefixed JSON header with ids and payloads, and the vectors
+as one raw little-endian matrix.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import queue
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ...cache import resolve_cache_dir
+from ...vector_codec import as_matrix, resolve_dtype
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"CIVSPOOL1"
+_HEADER_LENGTH = struct.Struct("<I")
+_ENTRY_SUFFIX = ".spool"
+
+
+@dataclass
+class SpoolEntry:
+    """Prepared points of one file version."""
+
+    file_path: str
+    rel_path: str
+    file_hash: str
+    point_ids: List[Any]
+    payloads: List[Dict[str, Any]]
+    vectors: np.ndarray
+
+    def points(self) -> List[Dict[str, Any]]:
+        """Rebuild point dictionaries; vectors stay rows of the stored matrix."""
+        return [
+            {"id": point_id, "vector": self.vectors[i], "payload": payload}
+            for i, (point_id, payload) in enumerate(zip(self.point_ids, self.payloads))
+        ]
+
+
+class VectorSpool:
+    """Durable on-disk queue of SpoolEntry records, one file per entry."""
+
+    def __init__(self, directory: str, dtype: Any = np.float32):
+        self.directory = Path(directory)
+        self.dtype = resolve_dtype(dtype)
+        self._lock = threading.Lock()
+        self._sequence = 0
+        # file_path -> (file_hash, entry path) of the newest pending entry
+        self._pending: Dict[str, Tuple[str, Path]] = {}
+        self._scanned = False
+
+    @classmethod
+    def from_config(cls, config: Any, workspace_path: str) -> Optional["VectorSpool"]:
+        """Build a spool from configuration, or return None when it is disabled."""
+        if getattr(config, "vector_spool_enabled", False) is not True:
+            return None
+        directory = getattr(config, "vector_spool_dir", None)
+        if not isinstance(directory, str) or not directory:
+            workspace_hash = hashlib.sha256(os.path.abspath(workspace_path).encode()).hexdigest()[:16]
+            directory = str(resolve_cache_dir(config) / f"spool_{workspace_hash}")
+        return cls(directory, dtype=getattr(config, "embedding_dtype", "float32"))
+
+    def append(self, entry: SpoolEntry) -> Path:
+        """Write an entry durably and return its path."""
+        self._scan()
+        vectors = as_matrix(entry.vectors, self.dtype) if len(entry.point_ids) else np.empty((0, 0), self.dtype)
+        header = json.dumps({
+            "file_path": entry.file_path,
+            "rel_path": entry.rel_path,
+            "file_hash": entry.file_hash,
+            "point_ids": entry.point_ids,
+            "payloads": entry.payloads,
+            "dtype": np.dtype(self.dtype).name,
+            "shape": list(vectors.shape),
+        }).encode("utf-8")
+        with self._lock:
+            self._sequence += 1
+            path = self.directory / f"{time.time_ns():020d}-{self._sequence:06d}{_ENTRY_SUFFIX}"
+        tmp_path = path.with_suffix(".tmp")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            f.write(_MAGIC)
+            f.write(_HEADER_LENGTH.pack(len(header)))
+            f.write(header)
+            f.write(np.ascontiguousarray(vectors, dtype=np.dtype(self.dtype).newbyteorder("<")).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._pending[entry.file_path] = (entry.file_hash, path)
+        return path
+
+    def load(self, path: Path) -> SpoolEntry:
+        """Read an entry written by append()."""
+        with open(path, "rb") as f:
+            data = f.read()
+        if not data.startswith(_MAGIC):
+            raise ValueError(f"Not a vector spool entry: {path}")
+        offset = len(_MAGIC)
+        (header_length,) = _HEADER_LENGTH.unpack_from(data, offset)
+        offset += _HEADER_LENGTH.size
+        header = json.loads(data[offset:offset + header_length].decode("utf-8"))
+        offset += header_length
+        dtype = np.dtype(header["dtype"]).newbyteorder("<")
+        vectors = np.frombuffer(data, dtype=dtype, offset=offset).reshape(header["shape"])
+        return SpoolEntry(
+            file_path=header["file_path"],
+            rel_path=header["rel_path"],
+            file_hash=header["file_hash"],
+            point_ids=header["point_ids"],
+            payloads=header["payloads"],
+            vectors=vectors.astype(dtype.newbyteorder("="), copy=False),
+        )
+
+    def remove(self, path: Path) -> None:
+        """Delete a committed entry."""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            for file_path, (_, pending_path) in list(self._pending.items()):
+                if pending_path == path:
+                    del self._pending[file_path]
+
+    def pending(self) -> List[Path]:
+        """Return the paths of all uncommitted entries, oldest first."""
+        if not self.directory.exists():
+            return []
+        return sorted(self.directory.glob(f"*{_ENTRY_SUFFIX}"))
+
+    def has_pending(self, file_path: str, file_hash: str) -> bool:
+        """True if this exact file version is already waiting in the spool."""
+        self._scan()
+        with self._lock:
+            pending = self._pending.get(file_path)
+        return pending is not None and pending[0] == file_hash
+
+    def _scan(self) -> None:
+        """Index entries left by earlier runs; unreadable ones are discarded."""
+        if self._scanned:
+            return
+        self._scanned = True
+        for path in self.pending():
+            try:
+                entry = self.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning("Discarding unreadable vector spool entry %s: %s", path, e)
+                self.remove(path)
+                continue
+            with self._lock:
+                self._pending[entry.file_path] = (entry.file_hash, path)
+
+
+class SpoolDrainer:
+    """Background thread that writes spool entries to the vector store in order.
+
+    ``write`` receives an entry and a callback to run once the entry is
+    committed; it returns False on failure, in which case the entry is
+    retried with exponential backoff until the drainer is closed.
+    """
+
+    def __init__(self, spool: VectorSpool, write: Callable[[SpoolEntry, Callable[[], None]], bool],
+                 max_backoff_seconds: float = 30.0, initial_backoff_seconds: float = 0.5):
+        self.spool = spool
+        self.write = write
+        self.max_backoff_seconds = max_backoff_seconds
+        self.initial_backoff_seconds = initial_backoff_seconds
+        self._queue: "queue.Queue[Optional[Path]]" = queue.Queue()
+        self._queued: set = set()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"spooled": 0, "drained": 0, "retries": 0, "replayed": 0}
+        self._stats_lock = threading.Lock()
+
+    def submit(self, path: Path) -> None:
+        """Queue an entry for writing."""
+        if path in self._queued:
+            return
+        self._queued.add(path)
+        with self._stats_lock:
+            self._stats["spooled"] += 1
+        self._ensure_started()
+        self._queue.put(path)
+
+    def replay(self) -> int:
+        """Queue entries left behind by earlier runs; returns how many were found."""
+        paths = [path for path in self.spool.pending() if path not in self._queued]
+        for path in paths:
+            self.submit(path)
+        with self._stats_lock:
+            self._stats["replayed"] += len(paths)
+        return len(paths)
+
+    def close(self, timeout_seconds: float = 60.0) -> Dict[str, Any]:
+        """Wait up to timeout_seconds for the queue to drain, then stop.
+
+        Entries not written by then stay in the spool for the next run.
+        """
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout_seconds)
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self._queued.clear()
+        self._queue = queue.Queue()
+        self._stop.clear()
+        return self.get_stats()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["pending"] = len(self.spool.pending())
+        return stats
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="vector-spool-drainer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            path = self._queue.get()
+            if path is None or self._stop.is_set():
+                return
+            if not self._drain(path):
+                return
+
+    def _drain(self, path: Path) -> bool:
+        """Write one entry, retrying until it succeeds or the drainer stops."""
+        try:
+            entry = self.spool.load(path)
+        except FileNotFoundError:
+            return True
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Discarding unreadable vector spool entry %s: %s", path, e)
+            self.spool.remove(path)
+            return True
+
+        backoff = self.initial_backoff_seconds
+        while True:
+            try:
+                written = self.write(entry, lambda: self._committed(path))
+            except Exception as e:
+                logger.debug("Vector spool write for %s failed: %s", entry.rel_path, e)
+                written = False
+            if written:
+                return True
+            with self._stats_lock:
+                self._stats["retries"] += 1
+            if self._stop.wait(backoff):
+                return False
+            backoff = min(backoff * 2, self.max_backoff_seconds)
+
+    def _committed(self, path: Path) -> None:
+        self.spool.remove(path)
+        with self._stats_lock:
+            self._stats["drained"] += 1
@@ -200,6 +200,12 @@ class IndexingService:
                     processing_time_seconds=processing_time,
                     error=result.get('error')
                 ))
+            
+            write_errors: List[str] = []
+            write_warnings: List[str] = []
+            processor.flush_vectors(write_errors, write_warnings)
+            if write_errors or write_warnings:
+                self.processing_logger.warning("; ".join(write_errors + write_warnings))
         
         except Exception as e:
             error_context = ErrorContext(
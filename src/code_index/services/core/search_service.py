@@ -11,8 +11,9 @@ Uses extracted modules:
 
 import time
 import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
-from typing import List, Dict, Any, Optional, Tuple
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
 from ...config import Config
@@ -22,6 +23,10 @@ from ...errors import ErrorHandler, ErrorContext, ErrorCategory, ErrorSeverity
 from ..shared.lru_cache import SearchLRUCache
 from ...models import SearchResult, SearchMatch
 from ..query.query_embedding_cache import QueryEmbeddingCache
+from ..embedding.near_duplicate_filter import collapse_duplicate_hits
+from ...lexical_index import LexicalIndex
+from ...search_fusion import SEARCH_MODES, fuse_hits
+from ...search_scoring import RankingProfile
 
 # Import from extracted modules
 from ..shared.search_strategy_selector import SearchStrategySelector
@@ -70,21 +75,48 @@ class SearchService:
             warnings=warnings or []
         )
 
-    def _get_query_embedding(self, query: str, embedder, config, errors: List[str]) -> Optional[List[float]]:
-        """Generate or retrieve cached embedding for a query."""
+    def _get_query_embeddings(self, queries: List[str], embedder, config,
+                              errors: List[str]) -> Optional[List[List[float]]]:
+        """Embeddings of several queries: cached ones are reused, the rest are embedded in one request."""
         embedding_cache_enabled = getattr(config, "embedding_cache_enabled", True)
+        found: Dict[str, List[float]] = {}
         if embedding_cache_enabled:
-            query_embedding = self._embedding_cache.get_embedding(query)
-            if query_embedding is not None:
-                return query_embedding
-        embedding_response = embedder.create_embeddings([query])
-        if not embedding_response.get("embeddings"):
-            errors.append("Failed to generate embedding for search query")
-            return None
-        query_embedding = embedding_response["embeddings"][0]
-        if embedding_cache_enabled:
-            self._embedding_cache.set_embedding(query, query_embedding)
-        return query_embedding
+            for query in dict.fromkeys(queries):
+                query_embedding = self._embedding_cache.get_embedding(query)
+                if query_embedding is not None:
+                    found[query] = query_embedding
+        missing = [query for query in dict.fromkeys(queries) if query not in found]
+        if missing:
+            embedding_response = embedder.create_embeddings(missing)
+            embeddings = embedding_response.get("embeddings")
+            if embeddings is None or len(embeddings) < len(missing):
+                errors.append("Failed to generate embedding for search query")
+                return None
+            for query, query_embedding in zip(missing, embeddings):
+                found[query] = query_embedding
+                if embedding_cache_enabled:
+                    self._embedding_cache.set_embedding(query, query_embedding)
+        return [found[query] for query in queries]
+
+    def _get_query_embedding(self, query: str, embedder, config, errors: List[str]) -> Optional[List[float]]:
+        """Generate or retrieve cached embedding for a query."""
+        embeddings = self._get_query_embeddings([query], embedder, config, errors)
+        return embeddings[0] if embeddings is not None else None
+
+    def _collapse_duplicate_clusters(self, search_results: List[Dict[str, Any]], vector_store,
+                                     warnings: List[str]) -> List[Dict[str, Any]]:
+        """Keep one hit per near-duplicate cluster and list the other members as siblings."""
+        cluster_ids = list(dict.fromkeys(
+            r["payload"]["clusterId"] for r in search_results if r.get("payload", {}).get("clusterId")
+        ))
+        if not cluster_ids:
+            return search_results
+        stored_members = None
+        try:
+            stored_members = vector_store.get_cluster_members(cluster_ids)
+        except Exception as e:
+            warnings.append(f"Could not expand duplicate clusters: {e}")
+        return collapse_duplicate_hits(search_results, stored_members)
 
     def _reassemble_search_results(self, search_results: List[Dict[str, Any]],
                                     query: str, warnings: List[str]) -> List[SearchMatch]:
@@ -157,6 +189,10 @@ class SearchService:
             }
             if split_info:
                 metadata["split_part"] = split_info
+            if payload.get("clusterSiblings"):
+                metadata["cluster_siblings"] = payload["clusterSiblings"]
+            if payload.get("overlappingRanges"):
+                metadata["overlapping_ranges"] = payload["overlappingRanges"]
             return SearchMatch(
                 file_path=payload["filePath"],
                 start_line=payload["startLine"],
@@ -170,13 +206,139 @@ class SearchService:
         except (KeyError, TypeError):
             return None
 
-    def search_code(self, query: str, config: Config, filetype: Optional[str] = None) -> SearchResult:
+    def _open_lexical_index(self, config: Config) -> Tuple[Optional[LexicalIndex], Optional[str]]:
+        """Open the workspace's lexical index, or explain why it cannot be searched."""
+        if getattr(config, "collection_name_override", None) is not None:
+            return None, "The lexical index belongs to a workspace and cannot search a collection by name"
+        index = LexicalIndex.for_workspace(config)
+        if not index.exists():
+            return None, "No lexical index for this workspace; set lexical_index_enabled and re-index"
+        return index, None
+
+    def _run_search_legs(self, legs: Dict[str, Callable[[], List[Dict[str, Any]]]], budget_ms: int,
+                         warnings: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Run the search legs concurrently and return the hits of those that finished.
+
+        A leg still running when ``budget_ms`` is up is dropped with a warning,
+        unless no leg has produced hits yet; then the first leg to finish is used.
+        """
+        executor = ThreadPoolExecutor(max_workers=len(legs), thread_name_prefix="hybrid-search")
+        futures = {executor.submit(leg): name for name, leg in legs.items()}
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        try:
+            timeout = budget_ms / 1000.0 if budget_ms and budget_ms > 0 else None
+            done, pending = wait(futures, timeout=timeout)
+            while True:
+                for future in done:
+                    name = futures[future]
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        warnings.append(f"{name.capitalize()} search failed: {e}")
+                if results or not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in pending:
+                future.cancel()
+                warnings.append(
+                    f"{futures[future].capitalize()} search exceeded the {budget_ms} ms hybrid budget and was dropped"
+                )
+        finally:
+            # Never block on a dropped leg; its thread finishes in the background
+            executor.shutdown(wait=False)
+        return results
+
+    def _hybrid_search(self, query: str, config: Config, embedder, vector_store,
+                       lexical_index: LexicalIndex, filetype: Optional[str], path_prefix: Optional[str],
+                       warnings: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """Query the lexical index and the vector store concurrently and fuse their hits."""
+        ranker = self._init_result_ranker(config)
+        max_results = ranker.candidate_count(getattr(config, "search_max_results", 50))
+
+        def vector_leg() -> List[Dict[str, Any]]:
+            embedding_errors: List[str] = []
+            query_embedding = self._get_query_embedding(query, embedder, config, embedding_errors)
+            if query_embedding is None:
+                raise RuntimeError("; ".join(embedding_errors))
+            return vector_store.search(
+                query_vector=query_embedding,
+                min_score=getattr(config, "search_min_score", 0.4),
+                max_results=max_results,
+                filetype_filter=filetype,
+                directory_prefix=path_prefix,
+                with_vectors=ranker.needs_vectors(),
+            )
+
+        def lexical_leg() -> List[Dict[str, Any]]:
+            return lexical_index.search(query, max_results=max_results, filetype=filetype, path_prefix=path_prefix)
+
+        legs = self._run_search_legs(
+            {"vector": vector_leg, "lexical": lexical_leg},
+            getattr(config, "search_hybrid_budget_ms", 2000),
+            warnings,
+        )
+        if not legs:
+            return None
+        fused = fuse_hits(
+            legs.get("vector"),
+            legs.get("lexical"),
+            method=getattr(config, "search_fusion", "rrf"),
+            lexical_weight=getattr(config, "search_hybrid_lexical_weight", 0.5),
+            rrf_k=getattr(config, "search_rrf_k", 60),
+        )
+        # File type, path and language weights apply to the fused score
+        return RankingProfile.for_config(config).rank(fused, max_results, filetype)
+
+    def _build_result(self, query: str, config: Config, search_results: List[Dict[str, Any]], vector_store,
+                      mode: str, start_time: float, errors: List[str], warnings: List[str],
+                      cache: Optional[SearchLRUCache] = None,
+                      cache_key: Optional[Tuple[Any, ...]] = None) -> SearchResult:
+        """Collapse duplicates, diversify, build the matches and cache the SearchResult of one query."""
+        if vector_store is not None and getattr(config, "search_collapse_duplicates", True):
+            search_results = self._collapse_duplicate_clusters(search_results, vector_store, warnings)
+        # Overlapping blocks and MMR re-ranking, over the extra candidates fetched for them
+        search_results = self._init_result_ranker(config).diversify(
+            search_results, getattr(config, "search_max_results", 50))
+
+        # Convert search results to SearchMatch objects (reassembling split blocks)
+        matches = self._reassemble_search_results(search_results, query, warnings)
+
+        result = SearchResult(
+            query=query,
+            matches=matches,
+            total_found=len(matches),
+            execution_time_seconds=time.time() - start_time,
+            search_method="text" if mode == "vector" else mode,
+            config_summary=self.config_service.get_config_summary(config),
+            errors=errors,
+            warnings=warnings
+        )
+
+        if cache is not None and cache_key is not None and result.is_successful():
+            cache.set(cache_key, result)
+
+        return result
+
+    def search_code(
+        self,
+        query: str,
+        config: Config,
+        filetype: Optional[str] = None,
+        path_prefix: Optional[str] = None,
+        mode: Optional[str] = None,
+    ) -> SearchResult:
         """
-        Execute text-based code search.
+        Execute code search.
 
         Args:
             query: Search query string
             config: Configuration object with search parameters
+            filetype: Optional file extension to restrict results to
+            path_prefix: Optional workspace-relative directory to restrict results to;
+                on collections sharded by directory only that shard is queried
+            mode: ``vector`` (embedding similarity), ``lexical`` (BM25 over the lexical
+                index) or ``hybrid`` (both, fused); defaults to ``search_mode``
 
         Returns:
             SearchResult with detailed search results
@@ -184,75 +346,215 @@ class SearchService:
         start_time = time.time()
         errors: List[str] = []
         warnings: List[str] = []
+        mode = (mode or getattr(config, "search_mode", "vector") or "vector").lower()
 
         cache_enabled = getattr(config, "search_cache_enabled", False)
         cache_key: Optional[Tuple[Any, ...]] = None
         cache: Optional[SearchLRUCache] = None
 
         try:
-            # Validate search configuration
-            validation_result = self.validate_search_config(config)
-            if not validation_result.valid:
-                if validation_result.error:
-                    errors.append(f"Configuration: {validation_result.error}")
+            if mode not in SEARCH_MODES:
+                errors.append(f"Unknown search mode '{mode}'; expected one of {list(SEARCH_MODES)}")
                 return self._error_result(query, config, start_time, errors, warnings)
 
+            # Lexical search needs neither the embedding service nor the vector store
+            if mode != "lexical":
+                validation_result = self.validate_search_config(config)
+                if not validation_result.valid:
+                    if validation_result.error:
+                        errors.append(f"Configuration: {validation_result.error}")
+                    return self._error_result(query, config, start_time, errors, warnings)
+
             if cache_enabled:
                 cache = self._get_or_create_cache(config)
-                cache_key = self._build_cache_key(query, config)
+                cache_key = self._build_cache_key(query, config, filetype, path_prefix, mode)
                 cached_result = cache.get(cache_key)
                 if cached_result is not None:
                     cached_result.execution_time_seconds = time.time() - start_time
                     return cached_result
 
-            # Initialize components
-            embedder, vector_store = self._initialize_search_components(config)
+            embedder = vector_store = None
+            if mode != "lexical":
+                # Initialize components
+                embedder, vector_store = self._initialize_search_components(config)
+
+            # Collections with sparse vectors are searched hybrid by Qdrant itself
+            has_sparse = getattr(vector_store, "has_sparse_vectors", None)
+            server_hybrid = mode == "hybrid" and callable(has_sparse) and has_sparse() is True
+
+            lexical_index: Optional[LexicalIndex] = None
+            if mode != "vector" and not server_hybrid:
+                lexical_index, reason = self._open_lexical_index(config)
+                if lexical_index is None:
+                    if mode == "lexical":
+                        errors.append(reason)
+                        return self._error_result(query, config, start_time, errors, warnings)
+                    warnings.append(f"{reason}; using vector search")
+                    mode = "vector"
+
+            ranker = self._init_result_ranker(config)
+            max_results = ranker.candidate_count(getattr(config, "search_max_results", 50))
+            if mode == "lexical":
+                search_results = RankingProfile.for_config(config).rank(
+                    lexical_index.search(query, max_results=max_results, filetype=filetype, path_prefix=path_prefix),
+                    max_results, filetype,
+                )
+            else:
+                skip_ws_filter = getattr(config, "collection_name_override", None) is not None
+                if server_hybrid:
+                    query_embedding = self._get_query_embedding(query, embedder, config, errors)
+                    if query_embedding is None:
+                        return self._error_result(query, config, start_time, errors, warnings)
+                    search_results = vector_store.hybrid_search(
+                        query_vector=query_embedding,
+                        query_text=query,
+                        directory_prefix=path_prefix,
+                        min_score=getattr(config, "search_min_score", 0.4),
+                        max_results=max_results,
+                        filetype_filter=filetype,
+                        skip_workspace_filter=skip_ws_filter,
+                        with_vectors=ranker.needs_vectors(),
+                    )
+                elif mode == "hybrid":
+                    search_results = self._hybrid_search(
+                        query, config, embedder, vector_store, lexical_index, filetype, path_prefix, warnings
+                    )
+                    if search_results is None:
+                        errors.append("Both hybrid search legs failed")
+                        return self._error_result(query, config, start_time, errors, warnings)
+                else:
+                    # Convert query to embedding (with caching)
+                    query_embedding = self._get_query_embedding(query, embedder, config, errors)
+                    if query_embedding is None:
+                        return self._error_result(query, config, start_time, errors, warnings)
+
+                    # Perform vector search
+                    search_results = vector_store.search(
+                        query_vector=query_embedding,
+                        min_score=getattr(config, "search_min_score", 0.4),
+                        max_results=max_results,
+                        filetype_filter=filetype,
+                        directory_prefix=path_prefix,
+                        skip_workspace_filter=skip_ws_filter,
+                        with_vectors=ranker.needs_vectors(),
+                    )
 
-            # Convert query to embedding (with caching)
-            query_embedding = self._get_query_embedding(query, embedder, config, errors)
-            if query_embedding is None:
-                return self._error_result(query, config, start_time, errors, warnings)
+            return self._build_result(query, config, search_results, vector_store, mode, start_time,
+                                      errors, warnings, cache, cache_key)
 
-            # Perform vector search
-            skip_ws_filter = getattr(config, "collection_name_override", None) is not None
-            search_results = vector_store.search(
-                query_vector=query_embedding,
-                min_score=getattr(config, "search_min_score", 0.4),
-                max_results=getattr(config, "search_max_results", 50),
-                filetype_filter=filetype,
-                skip_workspace_filter=skip_ws_filter
+        except Exception as e:
+            error_context = ErrorContext(
+                component="search_service",
+                operation="search_code",
+                additional_data={"query": query, "mode": mode}
             )
+            error_response = self.error_handler.handle_error(
+                e, error_context, ErrorCategory.DATABASE, ErrorSeverity.HIGH
+            )
+            errors.append(error_response.message)
+            return self._error_result(query, config, start_time, errors, warnings)
 
-            # Convert search results to SearchMatch objects (reassembling split blocks)
-            matches = self._reassemble_search_results(search_results, query, warnings)
+    def search_batch(
+        self,
+        queries: List[str],
+        config: Config,
+        filetype: Optional[str] = None,
+        path_prefix: Optional[str] = None,
+        mode: Optional[str] = None,
+    ) -> List[SearchResult]:
+        """
+        Execute several code searches at once.
 
-            result = SearchResult(
-                query=query,
-                matches=matches,
-                total_found=len(matches),
-                execution_time_seconds=time.time() - start_time,
-                search_method="text",
-                config_summary=self.config_service.get_config_summary(config),
-                errors=errors,
-                warnings=warnings
-            )
+        Vector searches, and hybrid searches Qdrant fuses itself, embed every
+        uncached query in one request and run all of them in one vector store
+        round trip; each query is ranked exactly as by search_code(). Lexical
+        and client-side hybrid searches run query by query.
 
-            if cache_enabled and cache is not None and cache_key is not None and result.is_successful():
-                cache.set(cache_key, result)
+        Args:
+            queries: Search query strings
+            config: Configuration object with search parameters
+            filetype: Optional file extension to restrict results to
+            path_prefix: Optional workspace-relative directory to restrict results to
+            mode: ``vector``, ``lexical`` or ``hybrid``; defaults to ``search_mode``
 
-            return result
+        Returns:
+            One SearchResult per query, in order
+        """
+        start_time = time.time()
+        mode = (mode or getattr(config, "search_mode", "vector") or "vector").lower()
+        if mode not in ("vector", "hybrid"):
+            return [self.search_code(query, config, filetype, path_prefix, mode) for query in queries]
+
+        results: List[Optional[SearchResult]] = [None] * len(queries)
+        errors: List[str] = []
+        try:
+            validation_result = self.validate_search_config(config)
+            if not validation_result.valid:
+                if validation_result.error:
+                    errors.append(f"Configuration: {validation_result.error}")
+                return [self._error_result(query, config, start_time, list(errors)) for query in queries]
+
+            embedder, vector_store = self._initialize_search_components(config)
+            has_sparse = getattr(vector_store, "has_sparse_vectors", None)
+            server_hybrid = mode == "hybrid" and callable(has_sparse) and has_sparse() is True
+            if mode == "hybrid" and not server_hybrid:
+                # Fused locally from the lexical index, one query at a time
+                return [self.search_code(query, config, filetype, path_prefix, mode) for query in queries]
+
+            cache: Optional[SearchLRUCache] = None
+            cache_keys: Dict[int, Tuple[Any, ...]] = {}
+            if getattr(config, "search_cache_enabled", False):
+                cache = self._get_or_create_cache(config)
+            pending: List[int] = []
+            for i, query in enumerate(queries):
+                if cache is not None:
+                    cache_keys[i] = self._build_cache_key(query, config, filetype, path_prefix, mode)
+                    cached_result = cache.get(cache_keys[i])
+                    if cached_result is not None:
+                        cached_result.execution_time_seconds = time.time() - start_time
+                        results[i] = cached_result
+                        continue
+                pending.append(i)
+            if not pending:
+                return results
+
+            pending_queries = [queries[i] for i in pending]
+            embeddings = self._get_query_embeddings(pending_queries, embedder, config, errors)
+            if embeddings is None:
+                for i in pending:
+                    results[i] = self._error_result(queries[i], config, start_time, list(errors))
+                return results
+
+            ranker = self._init_result_ranker(config)
+            hit_lists = vector_store.search_batch(
+                embeddings,
+                directory_prefix=path_prefix,
+                min_score=getattr(config, "search_min_score", 0.4),
+                max_results=ranker.candidate_count(getattr(config, "search_max_results", 50)),
+                filetype_filter=filetype,
+                skip_workspace_filter=getattr(config, "collection_name_override", None) is not None,
+                query_texts=pending_queries if server_hybrid else None,
+                with_vectors=ranker.needs_vectors(),
+            )
+            for i, search_results in zip(pending, hit_lists):
+                results[i] = self._build_result(queries[i], config, search_results, vector_store, mode,
+                                                start_time, [], [], cache, cache_keys.get(i))
+            return results
 
         except Exception as e:
             error_context = ErrorContext(
                 component="search_service",
-                operation="search_code",
-                additional_data={"query": query}
+                operation="search_batch",
+                additional_data={"queries": len(queries), "mode": mode}
             )
             error_response = self.error_handler.handle_error(
                 e, error_context, ErrorCategory.DATABASE, ErrorSeverity.HIGH
             )
             errors.append(error_response.message)
-            return self._error_result(query, config, start_time, errors, warnings)
+            return [
+                result if result is not None else self._error_result(queries[i], config, start_time, list(errors))
+                for i, result in enumerate(results)
+            ]
 
     def search_similar_files(self, file_path: str, config: Config) -> SearchResult:
         """
@@ -323,7 +625,7 @@ class SearchService:
 
                 # Generate embedding for file content
                 embedding_response = embedder.create_embeddings([file_content])
-                if not embedding_response["embeddings"]:
+                if len(embedding_response["embeddings"]) == 0:
                     errors.append(f"Failed to generate embedding for file: {file_path}")
                     return SearchResult(
                         query=f"similar:{file_path}",
@@ -638,7 +940,14 @@ class SearchService:
         self._cache = cache
         return cache
 
-    def _build_cache_key(self, query: str, config: Config) -> Tuple[Any, ...]:
+    def _build_cache_key(
+        self,
+        query: str,
+        config: Config,
+        filetype: Optional[str] = None,
+        path_prefix: Optional[str] = None,
+        mode: str = "vector",
+    ) -> Tuple[Any, ...]:
         weights = tuple(sorted((config.search_file_type_weights or {}).items())) if getattr(config, "search_file_type_weights", None) else tuple()
         path_boosts = tuple(
             (entry.get("pattern"), entry.get("weight"))
@@ -658,6 +967,14 @@ class SearchService:
             exclude_patterns,
             getattr(config, "ollama_model", ""),
             getattr(config, "qdrant_url", ""),
+            filetype,
+            path_prefix,
+            mode,
+            getattr(config, "search_fusion", "rrf"),
+            getattr(config, "search_rrf_k", 60),
+            getattr(config, "search_hybrid_lexical_weight", 0.5),
+            getattr(config, "search_collapse_overlaps", True),
+            getattr(config, "search_mmr_lambda", 1.0),
         )
 
     @staticmethod
@@ -0,0 +1,349 @@
+"""Near-duplicate chunk detection with MinHash signatures and LSH banding.
+
+Generated stubs, migrations and copy-pasted test cases produce many chunks
+whose text differs only in a few identifiers or literals. Embedding every
+copy costs an embedder round-trip per chunk, and the copies crowd search
+results. NearDuplicateFilter groups such chunks into clusters so that only
+one representative per cluster is sent to the embedder.
+"""
+
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_DEFAULT_SEED = 1_338_017
+
+NEAR_DUPLICATE_MODES = ("share", "skip")
+
+
+class MinHasher:
+    """Compute MinHash signatures over token shingles of a chunk."""
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 5, seed: int = _DEFAULT_SEED):
+        if num_perm < 1:
+            raise ValueError("num_perm must be at least 1")
+        if shingle_size < 1:
+            raise ValueError("shingle_size must be at least 1")
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, int(_MERSENNE_PRIME), size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, int(_MERSENNE_PRIME), size=num_perm).astype(np.uint64)
+
+    def shingle_hashes(self, text: str) -> np.ndarray:
+        """Return the distinct 32-bit hashes of the token shingles in text."""
+        tokens = _TOKEN_PATTERN.findall(text)
+        k = self.shingle_size
+        if len(tokens) < k:
+            return np.empty(0, dtype=np.uint64)
+        hashes = {
+            zlib.crc32("\x1f".join(tokens[i:i + k]).encode("utf-8"))
+            for i in range(len(tokens) - k + 1)
+        }
+        return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """Return the MinHash signature of text, or None when it is too short to shingle."""
+        hashes = self.shingle_hashes(text)
+        if hashes.size == 0:
+            return None
+        # (a * h + b) stays below 2**64 because a < 2**31 and h < 2**32.
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME
+        return permuted.min(axis=0).astype(np.uint32)
+
+
+def choose_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """Pick (bands, rows) whose LSH S-curve midpoint is closest to threshold."""
+    best = (1, num_perm)
+    best_error = float("inf")
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        rows = num_perm // bands
+        error = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+@dataclass
+class DeduplicationPlan:
+    """Cluster assignment for the chunks of one file.
+
+    Attributes:
+        cluster_ids: Cluster id per chunk (a representative's own point id)
+        duplicate_of: Representative point id for duplicates, None otherwise
+        embed_indices: Chunk indices that still need an embedding
+        local_sources: Duplicate index -> representative index within this file
+        borrowed: Duplicate index -> vector reused from an earlier file's representative
+        members: Representative index -> locations of its duplicates in this file,
+            only populated in "skip" mode
+        skip_duplicates: Drop duplicates whose representative is stored with them
+    """
+
+    cluster_ids: List[str]
+    duplicate_of: List[Optional[str]]
+    embed_indices: List[int]
+    local_sources: Dict[int, int] = field(default_factory=dict)
+    borrowed: Dict[int, Any] = field(default_factory=dict)
+    members: Dict[int, List[Dict[str, Any]]] = field(default_factory=dict)
+    skip_duplicates: bool = False
+
+    @property
+    def duplicates(self) -> int:
+        return sum(1 for rep in self.duplicate_of if rep is not None)
+
+    def resolve(self, embeddings: Sequence[Any]) -> List[Optional[Any]]:
+        """Map embeddings for ``embed_indices`` back onto every chunk.
+
+        Duplicates get their representative's vector, including the ones
+        "skip" mode may drop (see is_skipped); chunks whose representative
+        failed to embed resolve to None.
+        """
+        resolved: List[Optional[Any]] = [None] * len(self.cluster_ids)
+        for position, index in enumerate(self.embed_indices):
+            if position < len(embeddings):
+                resolved[index] = embeddings[position]
+        for index, vector in self.borrowed.items():
+            resolved[index] = vector
+        for index, source in self.local_sources.items():
+            resolved[index] = resolved[source]
+        return resolved
+
+    def is_skipped(self, index: int, stored: Set[int]) -> bool:
+        """True for a "skip" mode duplicate whose representative (by index) was stored.
+
+        Clustering state lasts one run, so a duplicate is only left out when
+        its representative lives in the same file and is re-indexed with it.
+        A duplicate whose representative was not stored (too short, failed to
+        embed) is stored itself.
+        """
+        return self.skip_duplicates and self.local_sources.get(index) in stored
+
+
+@dataclass
+class _Representative:
+    point_id: str
+    signature: np.ndarray
+
+
+class NearDuplicateFilter:
+    """Run-scoped MinHash/LSH index that clusters near-duplicate chunks.
+
+    Every chunk is compared against the representatives seen so far in the
+    current indexing run. A chunk whose estimated Jaccard similarity reaches
+    ``threshold`` joins that representative's cluster; otherwise it becomes
+    a new representative. In "share" mode duplicates reuse the
+    representative's vector and are still stored. In "skip" mode duplicates
+    of a representative in the same file are dropped and their locations are
+    recorded on the representative; duplicates of an earlier file's
+    representative are stored as in "share" mode, since nothing would bring
+    them back if that file later changed while theirs did not.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        num_perm: int = 64,
+        shingle_size: int = 5,
+        mode: str = "share",
+        max_cached_embeddings: int = 10000,
+        max_members_per_cluster: int = 50,
+    ):
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        if mode not in NEAR_DUPLICATE_MODES:
+            raise ValueError(f"mode must be one of {NEAR_DUPLICATE_MODES}")
+        self.threshold = threshold
+        self.mode = mode
+        self.hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size)
+        self.bands, self.rows = choose_bands(num_perm, threshold)
+        self._buckets: List[Dict[bytes, List[int]]] = [dict() for _ in range(self.bands)]
+        self._representatives: List[_Representative] = []
+        self._embeddings: "OrderedDict[str, Any]" = OrderedDict()
+        self._max_cached_embeddings = max(0, max_cached_embeddings)
+        self._max_members = max(0, max_members_per_cluster)
+        self._lock = threading.Lock()
+        self._chunks_seen = 0
+        self._duplicates = 0
+
+    @classmethod
+    def from_config(cls, config: Any) -> Optional["NearDuplicateFilter"]:
+        """Build a filter from configuration, or return None when disabled."""
+        if getattr(config, "near_duplicate_filter_enabled", False) is not True:
+            return None
+        return cls(
+            threshold=float(getattr(config, "near_duplicate_threshold", 0.9)),
+            num_perm=int(getattr(config, "near_duplicate_num_perm", 64)),
+            shingle_size=int(getattr(config, "near_duplicate_shingle_size", 5)),
+            mode=getattr(config, "near_duplicate_mode", "share"),
+        )
+
+    def plan(
+        self,
+        point_ids: Sequence[str],
+        texts: Sequence[str],
+        locations: Sequence[Dict[str, Any]],
+    ) -> DeduplicationPlan:
+        """Assign each chunk of a file to a cluster.
+
+        Args:
+            point_ids: Deterministic point id of each chunk
+            texts: Chunk texts, aligned with point_ids
+            locations: ``{"filePath", "startLine", "endLine"}`` per chunk
+
+        Returns:
+            DeduplicationPlan describing which chunks to embed
+        """
+        signatures = [self.hasher.signature(text) for text in texts]
+        skip = self.mode == "skip"
+        plan = DeduplicationPlan(
+            cluster_ids=list(point_ids),
+            duplicate_of=[None] * len(point_ids),
+            embed_indices=[],
+            skip_duplicates=skip,
+        )
+        local_rep_index: Dict[int, int] = {}
+
+        with self._lock:
+            for index, signature in enumerate(signatures):
+                self._chunks_seen += 1
+                if signature is None:
+                    plan.embed_indices.append(index)
+                    continue
+
+                rep_slot = self._find_representative(signature)
+                if rep_slot is None:
+                    rep_slot = self._add_representative(point_ids[index], signature)
+                    local_rep_index[rep_slot] = index
+                    plan.embed_indices.append(index)
+                    continue
+
+                self._duplicates += 1
+                rep = self._representatives[rep_slot]
+                plan.cluster_ids[index] = rep.point_id
+                plan.duplicate_of[index] = rep.point_id
+
+                if rep_slot in local_rep_index:
+                    plan.local_sources[index] = local_rep_index[rep_slot]
+                    if skip:
+                        members = plan.members.setdefault(local_rep_index[rep_slot], [])
+                        if len(members) < self._max_members:
+                            members.append(dict(locations[index]))
+                elif rep.point_id in self._embeddings:
+                    self._embeddings.move_to_end(rep.point_id)
+                    plan.borrowed[index] = self._embeddings[rep.point_id]
+                else:
+                    plan.embed_indices.append(index)
+
+        return plan
+
+    def remember(self, plan: DeduplicationPlan, embeddings: Sequence[Optional[Any]]) -> None:
+        """Cache representative vectors so duplicates in later files can reuse them."""
+        if self._max_cached_embeddings == 0:
+            return
+        with self._lock:
+            for index, vector in enumerate(embeddings):
+                if vector is None or plan.duplicate_of[index] is not None:
+                    continue
+                # Copy matrix rows so the cache does not pin the whole batch in memory.
+                if isinstance(vector, np.ndarray):
+                    vector = vector.copy()
+                self._embeddings[plan.cluster_ids[index]] = vector
+                self._embeddings.move_to_end(plan.cluster_ids[index])
+                while len(self._embeddings) > self._max_cached_embeddings:
+                    self._embeddings.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Return counters for the current run."""
+        with self._lock:
+            return {
+                "chunks_seen": self._chunks_seen,
+                "duplicates": self._duplicates,
+                "clusters": len(self._representatives),
+            }
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        rows = self.rows
+        return [signature[band * rows:(band + 1) * rows].tobytes() for band in range(self.bands)]
+
+    def _find_representative(self, signature: np.ndarray) -> Optional[int]:
+        candidates = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates.update(self._buckets[band].get(key, ()))
+        best_slot, best_similarity = None, self.threshold
+        for slot in candidates:
+            similarity = float(np.mean(self._representatives[slot].signature == signature))
+            if similarity >= best_similarity:
+                best_slot, best_similarity = slot, similarity
+        return best_slot
+
+    def _add_representative(self, point_id: str, signature: np.ndarray) -> int:
+        slot = len(self._representatives)
+        self._representatives.append(_Representative(point_id=point_id, signature=signature))
+        for band, key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(key, []).append(slot)
+        return slot
+
+
+def _location(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "filePath": payload.get("filePath", ""),
+        "startLine": payload.get("startLine", 0),
+        "endLine": payload.get("endLine", 0),
+    }
+
+
+def collapse_duplicate_hits(
+    hits: List[Dict[str, Any]],
+    stored_members: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+) -> List[Dict[str, Any]]:
+    """Keep the best hit per cluster and attach the other members as siblings.
+
+    Args:
+        hits: Vector store hits, best first
+        stored_members: Optional cluster id -> member locations fetched from the
+            store, used to list siblings that did not make it into ``hits``
+
+    Returns:
+        Hits with one entry per cluster; ``payload["clusterSiblings"]`` lists
+        the locations of the other cluster members.
+    """
+    collapsed: List[Dict[str, Any]] = []
+    by_cluster: Dict[str, Dict[str, Any]] = {}
+    for hit in hits:
+        payload = hit.get("payload") or {}
+        cluster_id = payload.get("clusterId")
+        if not cluster_id:
+            collapsed.append(hit)
+            continue
+        leader = by_cluster.get(cluster_id)
+        if leader is None:
+            by_cluster[cluster_id] = hit
+            payload.setdefault("clusterSiblings", [])
+            collapsed.append(hit)
+            continue
+        leader["payload"]["clusterSiblings"].append(_location(payload))
+
+    for cluster_id, leader in by_cluster.items():
+        payload = leader["payload"]
+        seen = {(s["filePath"], s["startLine"], s["endLine"]) for s in payload["clusterSiblings"]}
+        seen.add((payload.get("filePath", ""), payload.get("startLine", 0), payload.get("endLine", 0)))
+        extra = list(payload.get("clusterMembers") or [])
+        if stored_members:
+            extra.extend(stored_members.get(cluster_id, []))
+        for member in extra:
+            location = _location(member)
+            key = (location["filePath"], location["startLine"], location["endLine"])
+            if key not in seen:
+                seen.add(key)
+                payload["clusterSiblings"].append(location)
+    return collapsed
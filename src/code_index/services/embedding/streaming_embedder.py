@@ -3,7 +3,10 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
 import logging
 
+import numpy as np
+
 from ...errors import ErrorHandler, ErrorContext, ErrorCategory, ErrorSeverity
+from ...vector_codec import as_matrix
 
 
 logger = logging.getLogger("code_index.streaming_embedder")
@@ -50,7 +53,7 @@ class StreamingEmbedder:
         """
         return self._parallel_batches
 
-    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
         """
         Embed a batch of texts using the underlying embedder.
 
@@ -58,18 +61,18 @@ class StreamingEmbedder:
             texts: List of text strings to embed
 
         Returns:
-            List of embedding vectors
+            ``(n, dim)`` embedding matrix, one row per text
         """
         if not texts:
-            return []
+            return as_matrix([])
 
         try:
             response = self._embedder.create_embeddings(texts)
             embeddings = response.get("embeddings", [])
-            if not isinstance(embeddings, list):
+            if not isinstance(embeddings, (list, np.ndarray)):
                 raise ValueError("Invalid response structure from embedder")
 
-            return embeddings
+            return as_matrix(embeddings, embeddings.dtype if isinstance(embeddings, np.ndarray) else np.float32)
         except Exception as e:
             error_context = ErrorContext(
                 component="streaming_embedder",
@@ -84,8 +87,8 @@ class StreamingEmbedder:
     def embed_stream(
         self,
         texts: List[str],
-        on_embedding: Optional[Callable[[List[List[float]], int, int], None]] = None
-    ) -> Iterator[List[List[float]]]:
+        on_embedding: Optional[Callable[[np.ndarray, int, int], None]] = None
+    ) -> Iterator[np.ndarray]:
         """
         Stream embeddings one batch at a time.
 
@@ -133,8 +136,8 @@ class StreamingEmbedder:
     def embed_stream_parallel(
         self,
         texts: List[str],
-        on_embedding: Optional[Callable[[List[List[float]], int, int], None]] = None
-    ) -> Iterator[List[List[float]]]:
+        on_embedding: Optional[Callable[[np.ndarray, int, int], None]] = None
+    ) -> Iterator[np.ndarray]:
         """
         Stream embeddings with parallel batch processing.
 
@@ -194,7 +197,7 @@ class StreamingEmbedder:
 
         # Yield results in order
         for i, embeddings in enumerate(results):
-            if embeddings:
+            if embeddings is not None and len(embeddings):
                 batch_start = batches[i][0]
                 if on_embedding:
                     on_embedding(embeddings, batch_start, total_texts)
@@ -207,8 +210,8 @@ class StreamingEmbedder:
     def embed_all(
         self,
         texts: List[str],
-        on_embedding: Optional[Callable[[List[List[float]], int, int], None]] = None
-    ) -> List[List[float]]:
+        on_embedding: Optional[Callable[[np.ndarray, int, int], None]] = None
+    ) -> np.ndarray:
         """
         Embed all texts and return as a single list (non-streaming).
 
@@ -220,12 +223,12 @@ class StreamingEmbedder:
             on_embedding: Optional callback for each embedding batch
 
         Returns:
-            List of all embedding vectors
+            ``(n, dim)`` matrix of all embedding vectors
         """
-        all_embeddings = []
-        for embedding_batch in self.embed_stream(texts, on_embedding):
-            all_embeddings.extend(embedding_batch)
-        return all_embeddings
+        batches = list(self.embed_stream(texts, on_embedding))
+        if not batches:
+            return as_matrix([])
+        return np.concatenate(batches) if len(batches) > 1 else batches[0]
 
     def estimate_memory_usage(self, num_texts: int, embedding_dim: int = 768) -> int:
         """
@@ -238,12 +241,12 @@ class StreamingEmbedder:
         Returns:
             Estimated memory usage in bytes
         """
-        # Each float is 8 bytes (double precision)
-        bytes_per_embedding = embedding_dim * 8
+        # Embeddings are float32 matrix rows (4 bytes per dimension)
+        bytes_per_embedding = embedding_dim * 4
         total_bytes = num_texts * bytes_per_embedding
 
-        # Add overhead for Python objects (rough estimate)
-        overhead = num_texts * 100  # ~100 bytes per embedding object
+        # Add overhead for row views and bookkeeping (rough estimate)
+        overhead = num_texts * 100
 
         return total_bytes + overhead
 
@@ -292,7 +295,7 @@ class BatchResult:
     def __init__(
         self,
         chunks: List[str],
-        embeddings: List[List[float]],
+        embeddings: np.ndarray,
         batch_index: int = 0,
         total_batches: int = 1
     ):
@@ -301,7 +304,7 @@ class BatchResult:
 
         Args:
             chunks: List of text chunks in this batch
-            embeddings: List of embedding vectors for this batch
+            embeddings: Embedding matrix for this batch
             batch_index: Index of this batch in the overall processing
             total_batches: Total number of batches
         """
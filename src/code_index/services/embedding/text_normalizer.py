@@ -0,0 +1,153 @@
+"""Normalization of chunk text before it is sent to the embedder.
+
+The stored ``codeChunk`` payload keeps the original block content; only the
+text handed to the embedder is normalized. Deep indentation, trailing
+whitespace, blank-line runs and license banners carry little meaning but
+cost tokens on every embedding request.
+"""
+
+import os
+import re
+from typing import Any, Dict, List, Optional, Pattern
+
+
+# Line-comment prefix per file extension, used to detect leading banners.
+_LINE_COMMENT_PREFIXES: Dict[str, str] = {
+    **{ext: "#" for ext in (".py", ".rb", ".sh", ".bash", ".yaml", ".yml", ".toml", ".r", ".pl", ".pm", ".t")},
+    **{ext: "//" for ext in (
+        ".js", ".jsx", ".ts", ".tsx", ".vue", ".go", ".rs", ".java", ".c", ".h", ".cpp", ".hpp",
+        ".cs", ".swift", ".kt", ".scala", ".dart", ".php", ".surql", ".scss", ".less",
+    )},
+    **{ext: "--" for ext in (".sql", ".lua")},
+}
+
+_BLOCK_COMMENT_PATTERNS: Dict[str, str] = {
+    **{ext: r"/\*.*?\*/" for ext in (
+        ".js", ".jsx", ".ts", ".tsx", ".vue", ".go", ".rs", ".java", ".c", ".h", ".cpp", ".hpp",
+        ".cs", ".swift", ".kt", ".scala", ".dart", ".php", ".css", ".scss", ".less", ".sql",
+    )},
+    **{ext: r"<!--.*?-->" for ext in (".html", ".xml", ".md", ".markdown")},
+}
+
+_BANNER_KEYWORDS = re.compile(
+    r"copyright|licen[cs]e|spdx-license-identifier|all rights reserved|auto-?generated|do not edit",
+    re.IGNORECASE,
+)
+_INNER_WHITESPACE = re.compile(r"[ \t]{2,}")
+
+
+class EmbeddingTextNormalizer:
+    """Build compact embedding input from a code block.
+
+    Steps, in order: strip configured patterns for the file's extension,
+    drop a leading comment banner that mentions a license or generator,
+    collapse whitespace (indentation becomes one space per level), and
+    optionally prefix ``<path>::<symbol>`` so the vector carries location
+    context.
+    """
+
+    def __init__(
+        self,
+        prefix_metadata: bool = True,
+        strip_banners: bool = True,
+        max_blank_lines: int = 1,
+        strip_patterns: Optional[Dict[str, List[str]]] = None,
+    ):
+        self.prefix_metadata = prefix_metadata
+        self.strip_banners = strip_banners
+        self.max_blank_lines = max(0, max_blank_lines)
+        self._strip_patterns: Dict[str, List[Pattern[str]]] = {
+            self._normalize_key(key): [re.compile(p, re.MULTILINE) for p in patterns]
+            for key, patterns in (strip_patterns or {}).items()
+        }
+        self._banner_patterns: Dict[str, Pattern[str]] = {}
+
+    @classmethod
+    def from_config(cls, config: Any) -> Optional["EmbeddingTextNormalizer"]:
+        """Build a normalizer from configuration, or return None when disabled."""
+        if getattr(config, "embedding_text_normalization", False) is not True:
+            return None
+        return cls(
+            prefix_metadata=bool(getattr(config, "embedding_text_metadata_prefix", True)),
+            strip_banners=bool(getattr(config, "embedding_text_strip_banners", True)),
+            max_blank_lines=int(getattr(config, "embedding_text_max_blank_lines", 1)),
+            strip_patterns=getattr(config, "embedding_text_strip_patterns", None) or {},
+        )
+
+    def normalize(self, text: str, rel_path: str = "", symbol: Optional[str] = None) -> str:
+        """Return the embedding input for one chunk."""
+        ext = os.path.splitext(rel_path)[1].lower()
+        for pattern in self._strip_patterns.get("*", []) + self._strip_patterns.get(ext, []):
+            text = pattern.sub("", text)
+        if self.strip_banners:
+            text = self._strip_leading_banner(text, ext)
+        body = self.collapse_whitespace(text)
+        if not body:
+            # Never hand the embedder an empty string for a non-empty block.
+            body = text.strip()
+        if self.prefix_metadata and rel_path:
+            header = f"{rel_path}::{symbol}" if symbol else rel_path
+            return f"{header}\n{body}"
+        return body
+
+    def normalize_blocks(self, blocks: List[Any], rel_path: str) -> List[str]:
+        """Normalize the content of each block, keeping alignment with blocks."""
+        return [
+            self.normalize(block.content, rel_path, getattr(block, "identifier", None))
+            for block in blocks
+        ]
+
+    def collapse_whitespace(self, text: str) -> str:
+        """Trim trailing whitespace, cap blank-line runs and shrink indentation to one space per level."""
+        lines = [line.rstrip() for line in text.expandtabs(4).split("\n")]
+        indents = [len(line) - len(line.lstrip(" ")) for line in lines if line]
+        if not indents:
+            return ""
+        base = min(indents)
+        steps = [indent - base for indent in indents if indent > base]
+        unit = min(steps) if steps else 1
+
+        output: List[str] = []
+        blank_run = 0
+        for line in lines:
+            if not line:
+                blank_run += 1
+                if blank_run <= self.max_blank_lines:
+                    output.append("")
+                continue
+            blank_run = 0
+            level = (len(line) - len(line.lstrip(" ")) - base) // unit
+            output.append(" " * level + _INNER_WHITESPACE.sub(" ", line.strip()))
+        return "\n".join(output).strip("\n")
+
+    def _strip_leading_banner(self, text: str, ext: str) -> str:
+        pattern = self._banner_pattern(ext)
+        if pattern is None:
+            return text
+        match = pattern.match(text)
+        if match and _BANNER_KEYWORDS.search(match.group(0)):
+            return text[match.end():]
+        return text
+
+    def _banner_pattern(self, ext: str) -> Optional[Pattern[str]]:
+        if ext in self._banner_patterns:
+            return self._banner_patterns[ext]
+        alternatives = []
+        prefix = _LINE_COMMENT_PREFIXES.get(ext)
+        if prefix:
+            alternatives.append(r"(?:[ \t]*" + re.escape(prefix) + r"[^\n]*(?:\n|\Z))+")
+        block = _BLOCK_COMMENT_PATTERNS.get(ext)
+        if block:
+            alternatives.append(r"[ \t]*" + block + r"[ \t]*(?:\n|\Z)")
+        compiled = None
+        if alternatives:
+            compiled = re.compile(r"\s*(?:" + "|".join(alternatives) + r")", re.DOTALL)
+        self._banner_patterns[ext] = compiled
+        return compiled
+
+    @staticmethod
+    def _normalize_key(key: str) -> str:
+        key = key.strip().lower()
+        if key == "*" or key.startswith("."):
+            return key
+        return f".{key}"
@@ -13,8 +13,8 @@ from ...config_service import ConfigurationService
 from ...errors import ErrorHandler
 from ...logging_utils import LoggingConfigurator
 from ...collections import CollectionManager
-from ...embedder import OllamaEmbedder
-from ...vector_store import QdrantVectorStore
+from ...embedder import Embedder, create_embedder
+from ...vector_store import QdrantVectorStore, create_vector_store
 from ..core.indexing_service import IndexingService
 from ..core.search_service import SearchService
 
@@ -51,7 +51,7 @@ class CommandContext:
         indexing_service_factory: Optional[Callable[[ErrorHandler], IndexingService]] = None,
         search_service_factory: Optional[Callable[[ErrorHandler], SearchService]] = None,
         collection_manager_factory: Optional[Callable[[Config], CollectionManager]] = None,
-        embedder_factory: Optional[Callable[[Config], OllamaEmbedder]] = None,
+        embedder_factory: Optional[Callable[[Config], Embedder]] = None,
         vector_store_factory: Optional[Callable[[Config], QdrantVectorStore]] = None,
     ):
         self.error_handler = error_handler or ErrorHandler()
@@ -59,8 +59,8 @@ class CommandContext:
         self._indexing_service_factory = indexing_service_factory or (lambda handler: IndexingService(handler))
         self._search_service_factory = search_service_factory or (lambda handler: SearchService(handler))
         self._collection_manager_factory = collection_manager_factory or (lambda cfg: CollectionManager(cfg))
-        self._embedder_factory = embedder_factory or (lambda cfg: OllamaEmbedder(cfg))
-        self._vector_store_factory = vector_store_factory or (lambda cfg: QdrantVectorStore(cfg))
+        self._embedder_factory = embedder_factory or create_embedder
+        self._vector_store_factory = vector_store_factory or create_vector_store
 
     def load_index_dependencies(
         self,
@@ -128,6 +128,26 @@ class CommandContext:
         self._initialize_vector_store(config)
         return CollectionDependencies(config=config, collection_manager=collection_manager)
 
+    def load_local_config(
+        self,
+        workspace_path: str,
+        config_path: str,
+        overrides: Optional[Dict[str, object]] = None,
+        logging_overrides: Optional[Dict[str, int]] = None,
+    ) -> Config:
+        """Config for queries answered from local indexes; neither the embedder nor the vector store is touched."""
+        config = self.config_service.load_with_fallback(
+            config_path=config_path,
+            workspace_path=workspace_path,
+            overrides=overrides,
+        )
+
+        self._apply_logging_configuration(config, logging_overrides)
+
+        config = self._apply_operation_overrides(config, overrides)
+        config.workspace_path = os.path.abspath(workspace_path)
+        return config
+
     def _apply_logging_configuration(
         self,
         config: Config,
@@ -3,8 +3,16 @@ Helper functions for FileProcessor to reduce file size.
 """
 import os
 import uuid
-from typing import Dict, Any, List, Optional, Callable
+from typing import Dict, Any, List, Optional, Callable, Set
+
+import numpy as np
 from ...errors import ErrorHandler, ErrorContext, ErrorCategory, ErrorSeverity
+from ...vector_codec import as_matrix
+from ...payload_schema import path_segments
+from ...lexical_index import LexicalDocument
+from ...symbol_index import SymbolEntry
+from ...code_graph import FileFacts
+from ...tenancy import point_id_tenant
 
 
 def compute_file_hash(file_path: str, logger) -> str:
@@ -34,18 +42,129 @@ def extract_texts_from_blocks(blocks: List) -> List[str]:
     return [block.content for block in blocks if block.content.strip()]
 
 
+def filter_blocks_with_content(blocks: List) -> List:
+    """Drop whitespace-only blocks so blocks stay aligned with extracted texts."""
+    return [block for block in blocks if block.content.strip()]
+
+
+def compute_point_id(file_path: str, block, tenant: Optional[str] = None) -> str:
+    """Deterministic point id for a block of a file.
+
+    ``tenant`` is the workspace hash in a shared collection (see
+    ``tenancy.point_id_tenant``); it keeps workspaces that contain the same
+    file from writing to the same point.
+    """
+    key = f"{file_path}:{block.start_line}:{block.end_line}:{getattr(block, 'split_index', '')}"
+    if tenant:
+        key = f"{tenant}:{key}"
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, key))
+
+
+def lexical_documents(file_path: str, blocks: List, tenant: Optional[str] = None) -> List[LexicalDocument]:
+    """Lexical index documents of a file's blocks, keyed by the blocks' point ids."""
+    return [
+        LexicalDocument.from_text(compute_point_id(file_path, block, tenant), block.start_line, block.end_line,
+                                  block.type, block.content)
+        for block in blocks
+    ]
+
+
+def symbol_entries(blocks: List) -> List[SymbolEntry]:
+    """Symbol table entries of the definition blocks the relationship extractor named."""
+    entries = []
+    for block in blocks:
+        metadata = getattr(block, 'metadata', None) or {}
+        name = metadata.get('symbol')
+        if name:
+            # Captures of just the name carry the extent of the whole definition
+            start_line, end_line = metadata.get('symbol_lines') or (block.start_line, block.end_line)
+            entries.append(SymbolEntry(name, block.type, start_line, end_line, metadata.get('scope', '')))
+    return entries
+
+
+def graph_facts(blocks: List) -> FileFacts:
+    """Definitions, calls and imports the relationship extractor recorded for a file's blocks."""
+    facts = FileFacts(definitions=symbol_entries(blocks))
+    for block in blocks:
+        metadata = getattr(block, 'metadata', None) or {}
+        if metadata.get('callee'):
+            facts.calls.append((metadata.get('caller', ''), metadata['callee']))
+        facts.imports.extend(metadata.get('imports') or [])
+    facts.calls = list(dict.fromkeys(facts.calls))
+    facts.imports = list(dict.fromkeys(facts.imports))
+    return facts
+
+
+def build_embedding_texts(normalizer, blocks: List, texts: List[str], rel_path: str) -> List[str]:
+    """Return the embedder input per block; the stored codeChunk is left untouched."""
+    if normalizer is None:
+        return texts
+    return normalizer.normalize_blocks(blocks, rel_path)
+
+
+def plan_near_duplicates(dedup_filter, file_path: str, rel_path: str, blocks: List, texts: List[str],
+                         embedding_texts: Optional[List[str]] = None, tenant: Optional[str] = None):
+    """Cluster near-duplicate blocks and return (plan, texts that need embedding).
+
+    Clustering uses the raw block texts; the returned texts are taken from
+    ``embedding_texts`` when given. Returns (None, embedding_texts) when no
+    filter is configured.
+    """
+    if embedding_texts is None:
+        embedding_texts = texts
+    if dedup_filter is None:
+        return None, embedding_texts
+    point_ids = [compute_point_id(file_path, block, tenant) for block in blocks]
+    locations = [
+        {"filePath": rel_path, "startLine": block.start_line, "endLine": block.end_line}
+        for block in blocks
+    ]
+    plan = dedup_filter.plan(point_ids, texts, locations)
+    return plan, [embedding_texts[i] for i in plan.embed_indices]
+
+
+def concat_embeddings(batches: List) -> Any:
+    """Join per-batch embedder output into one contiguous ``(n, dim)`` matrix."""
+    matrices = [as_matrix(batch, batch.dtype if isinstance(batch, np.ndarray) else np.float32)
+                for batch in batches]
+    matrices = [m for m in matrices if len(m)]
+    if not matrices:
+        return as_matrix([])
+    if len(matrices) == 1:
+        return matrices[0]
+    return np.concatenate(matrices)
+
+
+def resolve_near_duplicates(dedup_filter, plan, embeddings: List) -> List:
+    """Expand embeddings for planned blocks back onto every block of the file."""
+    if plan is None:
+        return embeddings
+    resolved = plan.resolve(embeddings)
+    dedup_filter.remember(plan, resolved)
+    return resolved
+
+
 def prepare_vector_points(
     file_path: str,
     blocks: List,
-    embeddings: List[List[float]],
+    embeddings: Any,
     rel_path: str,
     embedder,
-    config: Optional[Any] = None
+    config: Optional[Any] = None,
+    dedup_plan: Optional[Any] = None
 ) -> List[Dict[str, Any]]:
-    """Prepare vector points for storage."""
+    """Prepare vector points for storage.
+
+    Blocks whose embedding is None (failed batches) are not stored, nor are
+    "skip" mode near-duplicates whose representative in the same file is.
+    Vectors stay as matrix rows; the vector store converts them to lists per
+    upsert batch.
+    """
     points = []
     _, ext = os.path.splitext(rel_path)
     filetype = ext.lstrip('.').lower() if ext else ""
+    tenant = point_id_tenant(config) if config is not None else None
+    stored: Set[int] = set()
 
     # Determine minimum content length from config
     min_len = 0
@@ -62,21 +181,26 @@ def prepare_vector_points(
         if i >= len(embeddings):
             break
 
+        if embeddings[i] is None:
+            continue
+
         if min_len > 0 and len((block.content or "").strip()) < min_len:
             continue
+
+        if dedup_plan is not None and dedup_plan.is_skipped(i, stored):
+            continue
         
-        point_id = str(uuid.uuid5(
-            uuid.NAMESPACE_URL,
-            f"{file_path}:{block.start_line}:{block.end_line}:{getattr(block, 'split_index', '')}"
-        ))
+        point_id = compute_point_id(file_path, block, tenant)
         
         _, ext = os.path.splitext(rel_path)
         filetype = ext.lstrip('.').lower() if ext else ""
 
         payload = {
             "filePath": rel_path,
+            "pathSegments": path_segments(rel_path),
             "filetype": filetype,
             "codeChunk": block.content,
+            "contentLength": len((block.content or "").strip()),
             "startLine": block.start_line,
             "endLine": block.end_line,
             "type": block.type,
@@ -87,7 +211,15 @@ def prepare_vector_points(
             payload["splitIndex"] = block.split_index
             payload["splitTotal"] = block.split_total
             payload["parentBlockId"] = block.parent_block_id
+
+        if dedup_plan is not None:
+            payload["clusterId"] = dedup_plan.cluster_ids[i]
+            if dedup_plan.duplicate_of[i] is not None:
+                payload["duplicateOf"] = dedup_plan.duplicate_of[i]
+            if i in dedup_plan.members:
+                payload["clusterMembers"] = dedup_plan.members[i]
         
+        stored.add(i)
         point = {
             "id": point_id,
             "vector": embeddings[i],
@@ -99,30 +231,74 @@ def prepare_vector_points(
 
 
 def store_vectors(vector_store, rel_path: str, points: List[Dict], errors: List[str], 
-                 error_handler: Optional[ErrorHandler] = None, file_path: str = "") -> bool:
-    """Store vectors in the database, return True on success."""
-    try:
-        vector_store.delete_points_by_file_path(rel_path)
-    except Exception:
-        pass
+                 error_handler: Optional[ErrorHandler] = None, file_path: str = "",
+                 previous_ids: Optional[Set[str]] = None) -> bool:
+    """Store vectors in the database, return True on success.
+
+    With the point IDs of the previous version known, the new points are
+    upserted first and only the IDs that went away are deleted; otherwise
+    the file's old points are removed with a filter delete.
+    """
+    if previous_ids is None:
+        try:
+            vector_store.delete_points_by_file_path(rel_path)
+        except Exception:
+            pass
     
     try:
         vector_store.upsert_points(points)
-        return True
     except Exception as e:
-        if error_handler:
-            error_context = ErrorContext(
-                component="file_processor",
-                operation="upsert_points",
-                file_path=rel_path
-            )
-            error_response = error_handler.handle_error(
-                e, error_context, ErrorCategory.DATABASE, ErrorSeverity.MEDIUM
-            )
-            errors.append(f"Failed to store vectors for {rel_path}: {error_response.message}")
-        else:
-            errors.append(f"Failed to store vectors for {rel_path}: {str(e)}")
+        _record_store_error(e, "upsert_points", rel_path, errors, error_handler)
         return False
+    
+    stale_ids = stale_point_ids(previous_ids, points)
+    if stale_ids:
+        try:
+            vector_store.delete_points(stale_ids)
+        except Exception as e:
+            # Leave the cache untouched so the next run retries the delete
+            _record_store_error(e, "delete_points", rel_path, errors, error_handler)
+            return False
+    return True
+
+
+def _record_store_error(e: Exception, operation: str, rel_path: str, errors: List[str],
+                        error_handler: Optional[ErrorHandler]) -> None:
+    if error_handler:
+        error_context = ErrorContext(
+            component="file_processor",
+            operation=operation,
+            file_path=rel_path
+        )
+        error_response = error_handler.handle_error(
+            e, error_context, ErrorCategory.DATABASE, ErrorSeverity.MEDIUM
+        )
+        errors.append(f"Failed to store vectors for {rel_path}: {error_response.message}")
+    else:
+        errors.append(f"Failed to store vectors for {rel_path}: {str(e)}")
+
+
+def get_previous_point_ids(cache_manager, file_path: str) -> Optional[Set[str]]:
+    """Point IDs stored for the cached version of a file, or None when unknown."""
+    getter = getattr(cache_manager, "get_point_ids", None) if cache_manager else None
+    if getter is None:
+        return None
+    ids = getter(file_path)
+    return ids if isinstance(ids, set) else None
+
+
+def stale_point_ids(previous_ids: Optional[Set[str]], points: List[Dict]) -> List[str]:
+    """IDs of the previous version that the new points no longer use."""
+    if not previous_ids:
+        return []
+    return sorted(previous_ids - {point["id"] for point in points})
+
+
+def update_point_ids(cache_manager, file_path: str, current_hash: str, points: List[Dict]) -> None:
+    """Record the IDs of the points written for this version of the file."""
+    setter = getattr(cache_manager, "set_point_ids", None) if cache_manager else None
+    if setter is not None:
+        setter(file_path, current_hash, [point["id"] for point in points])
 
 
 def update_cache(cache_manager, file_path: str, current_hash: str) -> None:
@@ -18,8 +18,8 @@ from ...config_service import ConfigurationService
 from ...file_processing import FileProcessingService
 from ...service_validation import ServiceValidator
 from ...parser import CodeParser
-from ...embedder import OllamaEmbedder
-from ...vector_store import QdrantVectorStore
+from ...embedder import Embedder, create_embedder
+from ...vector_store import QdrantVectorStore, create_vector_store
 from ...cache import CacheManager
 from ...path_utils import PathUtils
 from ...scanner import DirectoryScanner
@@ -65,7 +65,7 @@ class IndexingDependencies:
     file_processing_service: Optional[FileProcessingService] = field(default=None)
     service_validator: Optional[ServiceValidator] = field(default=None)
     parser: Optional[CodeParser] = None
-    embedder: Optional[OllamaEmbedder] = None
+    embedder: Optional[Embedder] = None
     vector_store: Optional[QdrantVectorStore] = None
     cache_manager: Optional[CacheManager] = None
     path_utils: Optional[PathUtils] = None
@@ -100,10 +100,10 @@ class IndexingDependencies:
             self.parser = CodeParser(config, self.chunking_strategy)
         
         if self.embedder is None:
-            self.embedder = OllamaEmbedder(config)
+            self.embedder = create_embedder(config)
         
         if self.vector_store is None:
-            self.vector_store = QdrantVectorStore(config)
+            self.vector_store = create_vector_store(config)
         
         if self.cache_manager is None:
             self.cache_manager = CacheManager(config.workspace_path, config)
@@ -15,14 +15,17 @@ from ...config import Config
 from ...config_service import ConfigurationService
 from ...service_validation import ServiceValidator
 from ...parser import CodeParser
-from ...embedder import OllamaEmbedder
-from ...vector_store import QdrantVectorStore
+from ...embedder import create_embedder
+from ...vector_store import QdrantVectorStore, create_vector_store
 from ...cache import CacheManager
 from ...path_utils import PathUtils
 from ...models import IndexingResult, ValidationResult
 from ...errors import ErrorHandler, ErrorContext, ErrorCategory, ErrorSeverity
 from ..treesitter.file_processor import FileProcessor
+from ..embedding.near_duplicate_filter import NearDuplicateFilter
 from ..batch.batch_manager import BatchManager
+from ..batch.bulk_vector_writer import BulkVectorWriter
+from ..batch.vector_spool import SpoolDrainer
 from ..core.search_service import SearchService
 from ..shared.indexing_dependencies import IndexingDependencies
 
@@ -114,9 +117,9 @@ class IndexingOrchestrator:
         if parser is None:
             parser = CodeParser(config, chunking_strategy)
         if embedder is None:
-            embedder = OllamaEmbedder(config)
+            embedder = create_embedder(config)
         if vector_store is None:
-            vector_store = QdrantVectorStore(config)
+            vector_store = create_vector_store(config)
         if cache_manager is None:
             cache_manager = CacheManager(config.workspace_path, config)
         if path_utils is None:
@@ -186,17 +189,36 @@ class IndexingOrchestrator:
                 batch_manager = BatchManager(config, self.error_handler)
             
             vector_store.initialize()
+            self._warm_up_embedder(getattr(file_processor, "embedder", None) or embedder, config, warnings)
+            bulk_load = self._begin_bulk_load(vector_store, config, warnings)
+            self._replay_vector_spool(file_processor)
             
-            # Process files
-            processed_count, total_blocks = self._process_files(
-                file_paths, file_processor, batch_manager,
-                timed_out_files, errors, warnings,
-                progress_callback
-            )
+            try:
+                # Process files
+                processed_count, total_blocks = self._process_files(
+                    file_paths, file_processor, batch_manager,
+                    timed_out_files, errors, warnings,
+                    progress_callback
+                )
+                # Buffered bulk writes must be applied before the run is reported
+                file_processor.flush_vectors(errors, warnings)
+                # Stores that keep a write log (the flat backend) compact it once per run
+                flush_store = getattr(vector_store, "flush", None)
+                if callable(flush_store):
+                    try:
+                        flush_store()
+                    except Exception as e:
+                        warnings.append(f"Vector store flush failed: {e}")
+            finally:
+                bulk_load_metrics = self._end_bulk_load(vector_store, bulk_load, config, warnings)
             
+            performance_metrics = self._collect_performance_metrics(file_processor)
+            if bulk_load_metrics:
+                performance_metrics["bulk_load"] = bulk_load_metrics
             return self._create_result(
                 workspace, config, processed_count, total_blocks,
-                errors, warnings, timed_out_files, start_time
+                errors, warnings, timed_out_files, start_time,
+                performance_metrics=performance_metrics
             )
             
         except Exception as e:
@@ -387,7 +409,8 @@ class IndexingOrchestrator:
         errors: List[str],
         warnings: List[str],
         timed_out_files: List[str],
-        start_time: float
+        start_time: float,
+        performance_metrics: Optional[Dict[str, Any]] = None
     ) -> IndexingResult:
         """Create IndexingResult object."""
         return IndexingResult(
@@ -399,9 +422,86 @@ class IndexingOrchestrator:
             processing_time_seconds=time.time() - start_time,
             timestamp=datetime.now(),
             workspace_path=workspace,
-            config_summary=self.config_service.get_config_summary(config)
+            config_summary=self.config_service.get_config_summary(config),
+            performance_metrics=performance_metrics or {}
         )
     
+    def _warm_up_embedder(self, embedder, config: Config, warnings: List[str]) -> None:
+        """Load the embedding model before the first file so a cold load is not counted as embedding time."""
+        if getattr(config, "embedder_warm_up", True) is not True or not hasattr(embedder, "warm_up"):
+            return
+        outcome = embedder.warm_up()
+        if not isinstance(outcome, dict):
+            return
+        if outcome.get("success"):
+            self.processing_logger.info(
+                "Embedding model warmed up in %.2fs (model load %.2fs)",
+                outcome.get("seconds", 0.0), outcome.get("load_seconds", 0.0)
+            )
+        else:
+            warnings.append(f"Embedding model warm-up failed: {outcome.get('error', 'unknown error')}")
+    
+    def _begin_bulk_load(self, vector_store: QdrantVectorStore, config: Config,
+                         warnings: List[str]) -> Optional[Dict[str, Any]]:
+        """Defer HNSW indexing when a bulk load fills an empty collection."""
+        if getattr(config, "qdrant_bulk_load", False) is not True:
+            return None
+        try:
+            state = vector_store.begin_bulk_load()
+        except Exception as e:
+            warnings.append(f"Bulk-load mode not enabled: {e}")
+            return None
+        if isinstance(state, dict):
+            self.processing_logger.info("Bulk-load mode: HNSW indexing deferred until all points are stored")
+            return state
+        return None
+    
+    def _end_bulk_load(self, vector_store: QdrantVectorStore, state: Optional[Dict[str, Any]],
+                       config: Config, warnings: List[str]) -> Optional[Dict[str, Any]]:
+        """Re-enable indexing after a bulk load and wait for the HNSW build to finish."""
+        if state is None:
+            return None
+        timeout = getattr(config, "qdrant_bulk_load_wait_seconds", 600)
+        start = time.time()
+        try:
+            optimized = vector_store.end_bulk_load(state, timeout_seconds=timeout)
+        except Exception as e:
+            warnings.append(f"Failed to restore indexing after bulk load: {e}")
+            return {"optimized": False, "rebuild_seconds": round(time.time() - start, 3)}
+        if not optimized:
+            warnings.append(
+                f"Collection index still building after {timeout}s; searches may be slower until it finishes"
+            )
+        return {"optimized": optimized, "rebuild_seconds": round(time.time() - start, 3)}
+    
+    def _replay_vector_spool(self, file_processor: FileProcessor) -> None:
+        """Queue points spooled but not written by an earlier run, ahead of new files."""
+        replay = getattr(file_processor, "replay_spool", None)
+        if not callable(replay):
+            return
+        replayed = replay()
+        if isinstance(replayed, int) and replayed:
+            self.logger.info(f"Replaying {replayed} spooled files from an earlier run")
+    
+    def _collect_performance_metrics(self, file_processor: FileProcessor) -> Dict[str, Any]:
+        """Gather run statistics from the components used by the file processor."""
+        metrics: Dict[str, Any] = {}
+        dedup_filter = getattr(file_processor, "near_duplicate_filter", None)
+        if isinstance(dedup_filter, NearDuplicateFilter):
+            metrics["near_duplicates"] = dedup_filter.get_stats()
+        bulk_writer = getattr(file_processor, "bulk_writer", None)
+        if isinstance(bulk_writer, BulkVectorWriter):
+            metrics["vector_writes"] = bulk_writer.get_stats()
+        spool_drainer = getattr(file_processor, "spool_drainer", None)
+        if isinstance(spool_drainer, SpoolDrainer):
+            metrics["vector_spool"] = spool_drainer.get_stats()
+        embedder = getattr(file_processor, "embedder", None)
+        if hasattr(embedder, "get_timing_stats"):
+            timings = embedder.get_timing_stats()
+            if isinstance(timings, dict):
+                metrics["embedder"] = timings
+        return metrics
+    
     def _detect_project_type(self, markers: List[str]) -> str:
         """Detect project type based on found markers."""
         if 'package.json' in markers:
@@ -1,12 +1,100 @@
 """
 Result ranker module for ranking and processing search results.
 
-This module handles ranking, filtering, and assembly of search results.
+This module handles ranking, filtering, and assembly of search results,
+and the diversity stage that runs on the ranked hits before they become
+matches: overlapping line ranges of a file are collapsed into the best hit,
+then Maximal Marginal Relevance picks the final hits using their vectors.
 """
 
 from typing import List, Dict, Any, Optional
+
+import numpy as np
+
 from ...models import SearchMatch
 
+# Candidates fetched per returned result while the diversity stage is active
+DIVERSITY_POOL_FACTOR = 2
+
+
+def _location(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {"startLine": payload.get("startLine", 0), "endLine": payload.get("endLine", 0),
+            "type": payload.get("type", "")}
+
+
+def collapse_overlapping_hits(hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Keep the best hit of every group of overlapping line ranges in a file.
+
+    Args:
+        hits: Ranked hits, best first
+
+    Returns:
+        The hits that overlap no better hit of the same file, in order;
+        ``payload["overlappingRanges"]`` lists the ranges folded into each.
+        Split parts are always kept so their block can be reassembled.
+    """
+    kept: List[Dict[str, Any]] = []
+    ranges: Dict[str, List[Dict[str, Any]]] = {}
+    for hit in hits:
+        payload = hit.get("payload") or {}
+        file_path = payload.get("filePath", "")
+        start, end = payload.get("startLine", 0), payload.get("endLine", 0)
+        owner = None
+        if "splitIndex" not in payload:
+            owner = next((k for k in ranges.get(file_path, [])
+                          if k["payload"].get("startLine", 0) <= end and start <= k["payload"].get("endLine", 0)),
+                         None)
+        if owner is not None:
+            owner["payload"].setdefault("overlappingRanges", []).append(_location(payload))
+            continue
+        ranges.setdefault(file_path, []).append(hit)
+        kept.append(hit)
+    return kept
+
+
+def mmr_select(hits: List[Dict[str, Any]], count: int, relevance_weight: float) -> List[Dict[str, Any]]:
+    """
+    Pick ``count`` hits by Maximal Marginal Relevance.
+
+    Each step takes the hit maximizing
+    ``relevance_weight * relevance - (1 - relevance_weight) * max similarity``
+    to the hits already taken. Relevance is ``adjustedScore`` scaled to the
+    best hit; similarity is the cosine of the hits' ``vector``. Hits without
+    a vector are similar to nothing.
+    """
+    n = len(hits)
+    if n <= 1 or count <= 0:
+        return hits[:max(count, 0)]
+    dimension = next((len(h["vector"]) for h in hits if h.get("vector") is not None), 0)
+    if dimension == 0:
+        return hits[:count]
+    relevance = np.array([h.get("adjustedScore", h.get("score", 0.0)) or 0.0 for h in hits], dtype=np.float64)
+    best = relevance.max()
+    if best > 0:
+        relevance /= best
+    vectors = np.zeros((n, dimension), dtype=np.float32)
+    for i, hit in enumerate(hits):
+        vector = hit.get("vector")
+        if vector is not None and len(vector) == dimension:
+            vectors[i] = np.asarray(vector, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1)
+    nonzero = norms > 0
+    vectors[nonzero] /= norms[nonzero, None]
+
+    max_similarity = np.zeros(n, dtype=np.float64)
+    available = np.ones(n, dtype=bool)
+    selected: List[int] = []
+    for _ in range(min(count, n)):
+        gain = relevance_weight * relevance - (1.0 - relevance_weight) * max_similarity
+        gain[~available] = -np.inf
+        # argmax takes the first of equal gains, i.e. the better-ranked hit
+        chosen = int(np.argmax(gain))
+        selected.append(chosen)
+        available[chosen] = False
+        np.maximum(max_similarity, vectors @ vectors[chosen], out=max_similarity)
+    return [hits[i] for i in selected]
+
 
 class ResultRanker:
     """
@@ -16,10 +104,46 @@ class ResultRanker:
     - Result ranking by score
     - Split block reassembly
     - Score adjustment
+    - Overlap collapsing and MMR diversity re-ranking
     """
     
     def __init__(self, config):
         self.config = config
+
+    @property
+    def collapse_overlaps(self) -> bool:
+        return bool(getattr(self.config, "search_collapse_overlaps", True))
+
+    @property
+    def mmr_lambda(self) -> float:
+        return float(getattr(self.config, "search_mmr_lambda", 1.0))
+
+    def needs_vectors(self) -> bool:
+        """Whether hits must carry their vectors (MMR is on)."""
+        return self.mmr_lambda < 1.0
+
+    def candidate_count(self, max_results: int) -> int:
+        """Hits to retrieve so that ``max_results`` remain after the diversity stage."""
+        if self.collapse_overlaps or self.needs_vectors():
+            return max_results * DIVERSITY_POOL_FACTOR
+        return max_results
+
+    def diversify(self, hits: List[Dict[str, Any]], max_results: int) -> List[Dict[str, Any]]:
+        """
+        Collapse overlapping hits, re-rank by MMR and keep ``max_results``.
+
+        Args:
+            hits: Ranked hits from candidate_count() candidates, best first
+            max_results: Number of hits to return
+
+        Returns:
+            The selected hits, in selection order
+        """
+        if self.collapse_overlaps:
+            hits = collapse_overlapping_hits(hits)
+        if self.needs_vectors():
+            hits = mmr_select(hits, max_results, self.mmr_lambda)
+        return hits[:max_results]
     
     def rank_results(
         self,
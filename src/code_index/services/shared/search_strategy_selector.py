@@ -48,11 +48,11 @@ class SearchStrategySelector:
         Returns:
             Tuple of (embedder, vector_store)
         """
-        from ...embedder import OllamaEmbedder
-        from ...vector_store import QdrantVectorStore
+        from ...embedder import create_embedder
+        from ...vector_store import create_vector_store
         
-        embedder = OllamaEmbedder(config)
-        vector_store = QdrantVectorStore(config)
+        embedder = create_embedder(config)
+        vector_store = create_vector_store(config)
         return embedder, vector_store
     
     def get_search_params(self, config) -> Dict[str, Any]:
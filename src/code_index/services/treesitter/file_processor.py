@@ -5,20 +5,45 @@ This module contains:
 - FileProcessor: For indexing-specific individual file processing
 """
 import logging
+from dataclasses import dataclass
 from typing import Optional, Dict, Any, List, Callable
 from threading import Lock
 from ...config import Config
 from ...errors import ErrorHandler, ErrorContext
 from ...parser import CodeParser
-from ...embedder import OllamaEmbedder
+from ...embedder import Embedder
 from ...vector_store import QdrantVectorStore
 from ...cache import CacheManager
+from ...lexical_index import LexicalIndex
+from ...symbol_index import SymbolIndex
+from ...code_graph import CodeGraph
+from ...trigram_index import TrigramIndex
+from ...per_file_index import PerFileIndex
 from ...path_utils import PathUtils
+from ...tenancy import point_id_tenant
 from ...models import ProcessingResult
 from ..shared.indexing_dependencies import IndexingDependencies
 from ..embedding.streaming_embedder import StreamingEmbedder, BatchResult
+from ..embedding.near_duplicate_filter import NearDuplicateFilter
+from ..embedding.text_normalizer import EmbeddingTextNormalizer
+from ..batch.bulk_vector_writer import BulkVectorWriter
+from ..batch.vector_spool import VectorSpool, SpoolDrainer, SpoolEntry
 from ..shared import file_processing_helpers as helpers
 logger = logging.getLogger("code_index.file_processor")
+
+
+@dataclass
+class LocalIndex:
+    """A per-file local index and how a file's entry for it is built."""
+
+    name: str
+    index: Optional[PerFileIndex]
+    # (file path, parsed blocks) -> the entry passed to ``index.update_file``
+    entry: Callable[[str, List], Any]
+    # False when the entry comes from the raw contents and skipped files need no parse
+    parsed: bool = True
+
+
 class FileProcessor:
     """
     Handles individual file processing for indexing operations.
@@ -39,7 +64,7 @@ class FileProcessor:
         config: Optional[Config] = None,
         error_handler: Optional[ErrorHandler] = None,
         parser: Optional[CodeParser] = None,
-        embedder: Optional[OllamaEmbedder] = None,
+        embedder: Optional[Embedder] = None,
         vector_store: Optional[QdrantVectorStore] = None,
         cache_manager: Optional[CacheManager] = None,
         path_utils: Optional[PathUtils] = None,
@@ -81,6 +106,42 @@ class FileProcessor:
         
         self.logger = logging.getLogger(__name__)
         self.processing_logger = logging.getLogger("code_index.processing")
+
+        # Run-scoped near-duplicate clustering (None when disabled)
+        self.near_duplicate_filter: Optional[NearDuplicateFilter] = NearDuplicateFilter.from_config(self.config)
+        # Embedder input normalization (None when disabled)
+        self.text_normalizer: Optional[EmbeddingTextNormalizer] = EmbeddingTextNormalizer.from_config(self.config)
+        # Cross-file batched Qdrant writes (None when disabled)
+        self.bulk_writer: Optional[BulkVectorWriter] = BulkVectorWriter.from_config(
+            self.config, self.vector_store, self.error_handler
+        )
+        # Write-ahead spool drained by a background thread (None when disabled)
+        self.vector_spool: Optional[VectorSpool] = VectorSpool.from_config(
+            self.config, getattr(self.config, "workspace_path", ".")
+        )
+        self.spool_drainer: Optional[SpoolDrainer] = (
+            SpoolDrainer(self.vector_spool, self._write_spool_entry) if self.vector_spool is not None else None
+        )
+        self._spool_replayed = False
+        # BM25 index of the parsed blocks (None when disabled)
+        self.lexical_index: Optional[LexicalIndex] = LexicalIndex.from_config(self.config)
+        # Definitions named by the relationship extractor (None when disabled)
+        self.symbol_index: Optional[SymbolIndex] = SymbolIndex.from_config(self.config)
+        # Call and import graph (None when disabled)
+        self.code_graph: Optional[CodeGraph] = CodeGraph.from_config(self.config)
+        # Trigram index of the raw file contents for grep (None when disabled)
+        self.trigram_index: Optional[TrigramIndex] = TrigramIndex.from_config(self.config)
+        # The enabled local indexes, each with how a file's entry is built; updated and saved together
+        self.local_indexes: List[LocalIndex] = [local for local in (
+            LocalIndex("lexical index", self.lexical_index,
+                       lambda file_path, blocks: helpers.lexical_documents(
+                           file_path, helpers.filter_blocks_with_content(blocks),
+                           tenant=point_id_tenant(self.config))),
+            LocalIndex("symbol index", self.symbol_index, lambda file_path, blocks: helpers.symbol_entries(blocks)),
+            LocalIndex("code graph", self.code_graph, lambda file_path, blocks: helpers.graph_facts(blocks)),
+            # Built from the raw contents; no parse needed
+            LocalIndex("trigram index", self.trigram_index, lambda file_path, blocks: file_path, parsed=False),
+        ) if local.index is not None]
         
         # Initialize parallel processor if workers > 1
         self._parallel_processor = None
@@ -113,41 +174,52 @@ class FileProcessor:
             current_hash = self.get_file_hash(file_path)
             
             if helpers.check_file_changed(file_path, self.cache_manager, current_hash):
+                self._index_unchanged_file(file_path, rel_path, current_hash, warnings)
                 if progress_callback:
                     progress_callback(file_path, completed_count, total_files, "skipped", 0)
                 return helpers.handle_skip(file_path, current_hash, self.cache_manager, progress_callback, completed_count, total_files)
+            if self._is_spooled(file_path, current_hash):
+                # Already embedded by an earlier run; the spool entry is being written instead
+                return helpers.handle_skip(file_path, current_hash, None, progress_callback, completed_count, total_files, 'spooled')
             
             blocks = helpers.get_file_blocks(self.parser, file_path)
+            self._update_local_indexes(file_path, rel_path, current_hash, blocks, warnings)
             if not blocks:
                 return helpers.handle_skip(file_path, current_hash, self.cache_manager, progress_callback, completed_count, total_files, 'no_blocks')
             
+            blocks = helpers.filter_blocks_with_content(blocks)
             texts = helpers.extract_texts_from_blocks(blocks)
             if not texts:
                 return helpers.handle_skip(file_path, current_hash, self.cache_manager, progress_callback, completed_count, total_files, 'no_text_content')
             
+            embedding_texts = helpers.build_embedding_texts(self.text_normalizer, blocks, texts, rel_path)
+            dedup_plan, embed_texts = helpers.plan_near_duplicates(self.near_duplicate_filter, file_path, rel_path,
+                                                                   blocks, texts, embedding_texts,
+                                                                   tenant=point_id_tenant(self.config))
+            
             batch_size = getattr(cfg, "batch_segment_threshold", 10)
-            all_embeddings = []
-            for i in range(0, len(texts), batch_size):
-                batch_texts = texts[i:i + batch_size]
+            embedding_batches = []
+            for i in range(0, len(embed_texts), batch_size):
+                batch_texts = embed_texts[i:i + batch_size]
                 try:
                     embedding_response = self.embedder.create_embeddings(batch_texts)
-                    all_embeddings.extend(embedding_response["embeddings"])
+                    embedding_batches.append(embedding_response["embeddings"])
                 except Exception as e:
                     error_context = ErrorContext(component="file_processor", operation="embed_batch", file_path=rel_path)
                     error_response = self.error_handler.handle_network_error(e, error_context, "Ollama")
                     warnings.append(f"Embedding failed for {rel_path}: {error_response.message}")
                     break
             
-            if len(all_embeddings) < len(texts) and len(all_embeddings) == 0:
+            all_embeddings = helpers.concat_embeddings(embedding_batches)
+            if embed_texts and len(all_embeddings) == 0:
                 result['error'] = 'No embeddings generated'
                 return result
             
-            points = self._prepare_vector_points(file_path, blocks, all_embeddings, rel_path)
+            all_embeddings = helpers.resolve_near_duplicates(self.near_duplicate_filter, dedup_plan, all_embeddings)
+            points = self._prepare_vector_points(file_path, blocks, all_embeddings, rel_path, dedup_plan)
             
-            if not helpers.store_vectors(self.vector_store, rel_path, points, errors, self.error_handler, rel_path):
+            if not self._store_file_vectors(file_path, rel_path, points, current_hash, errors, warnings):
                 return result
-            
-            helpers.update_cache(self.cache_manager, file_path, current_hash)
             result['success'] = True
             result['blocks_processed'] = len(blocks)
             
@@ -298,13 +370,146 @@ class FileProcessor:
         
         return results
     
+    def _store_file_vectors(self, file_path: str, rel_path: str, points: List[Dict[str, Any]], current_hash: str,
+                            errors: List[str], warnings: List[str]) -> bool:
+        """Store a file's points and record the file in the cache once they are written."""
+        if self.spool_drainer is not None:
+            entry = SpoolEntry(
+                file_path=file_path, rel_path=rel_path, file_hash=current_hash,
+                point_ids=[point["id"] for point in points],
+                payloads=[point["payload"] for point in points],
+                vectors=[point["vector"] for point in points],
+            )
+            try:
+                self.spool_drainer.submit(self.vector_spool.append(entry))
+                return True
+            except (OSError, TypeError, ValueError) as e:
+                warnings.append(f"Could not spool vectors for {rel_path}, writing them directly: {e}")
+        return self._write_vectors(file_path, rel_path, points, current_hash, errors, warnings)
+    
+    def _write_vectors(self, file_path: str, rel_path: str, points: List[Dict[str, Any]], current_hash: str,
+                       errors: List[str], warnings: List[str], on_written: Optional[Callable[[], None]] = None) -> bool:
+        """Write points to the vector store, then update the cache and call on_written."""
+        # Known IDs of the previous version turn the per-file filter delete into an ID diff
+        previous_ids = helpers.get_previous_point_ids(self.cache_manager, file_path)
+        
+        def commit() -> None:
+            helpers.update_point_ids(self.cache_manager, file_path, current_hash, points)
+            helpers.update_cache(self.cache_manager, file_path, current_hash)
+            if on_written is not None:
+                on_written()
+        
+        if self.bulk_writer is not None:
+            # The cache is only updated after the writer has uploaded every batch of the file
+            self.bulk_writer.add(rel_path, points, on_commit=commit, previous_ids=previous_ids)
+            return True
+        if not helpers.store_vectors(self.vector_store, rel_path, points, errors, self.error_handler, rel_path,
+                                     previous_ids=previous_ids):
+            return False
+        commit()
+        return True
+    
+    def _write_spool_entry(self, entry: SpoolEntry, on_written: Callable[[], None]) -> bool:
+        """Drainer callback: write one spool entry; False makes the drainer retry it."""
+        errors: List[str] = []
+        warnings: List[str] = []
+        written = self._write_vectors(entry.file_path, entry.rel_path, entry.points(), entry.file_hash,
+                                      errors, warnings, on_written=on_written)
+        for message in errors + warnings:
+            self.logger.debug(message)
+        return written
+    
+    def _is_spooled(self, file_path: str, current_hash: str) -> bool:
+        """True if this file version waits in the spool; makes sure the spool is being drained."""
+        if self.vector_spool is None or not self.vector_spool.has_pending(file_path, current_hash):
+            return False
+        self.replay_spool()
+        return True
+    
+    def replay_spool(self) -> int:
+        """
+        Queue spool entries left by earlier runs for writing.
+        
+        Returns:
+            Number of entries replayed (0 when the spool is disabled or empty)
+        """
+        if self.spool_drainer is None or self._spool_replayed:
+            return 0
+        self._spool_replayed = True
+        return self.spool_drainer.replay()
+    
+    def flush_vectors(self, errors: Optional[List[str]] = None,
+                      warnings: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Finish spooled and buffered vector writes and persist the recorded point IDs.
+        
+        Returns:
+            Bulk write statistics, or None when bulk writes are disabled
+        """
+        if self.spool_drainer is not None:
+            # The drainer feeds the bulk writer, so it has to stop first
+            timeout = getattr(self.config, "vector_spool_drain_timeout_seconds", 60)
+            self.spool_drainer.close(timeout if isinstance(timeout, (int, float)) else 60)
+            self._spool_replayed = False
+        stats = self.bulk_writer.close(errors) if self.bulk_writer is not None else None
+        save_point_ids = getattr(self.cache_manager, "save_point_ids", None)
+        if callable(save_point_ids):
+            save_point_ids()
+        self.flush_local_indexes(warnings)
+        if self.vector_spool is not None and warnings is not None:
+            pending = len(self.vector_spool.pending())
+            if pending:
+                warnings.append(f"{pending} files are still in the vector spool and will be written on the next run")
+        return stats
+    
+    def _update_local_indexes(self, file_path: str, rel_path: str, current_hash: str, blocks: List,
+                              warnings: List[str], indexes: Optional[List[LocalIndex]] = None) -> None:
+        """Replace the file's entry in each local index; failures only warn."""
+        for local in self.local_indexes if indexes is None else indexes:
+            try:
+                local.index.update_file(rel_path, current_hash, local.entry(file_path, blocks))
+            except Exception as e:
+                warnings.append(f"Could not update the {local.name} for {rel_path}: {e}")
+    
+    def _index_unchanged_file(self, file_path: str, rel_path: str, current_hash: str, warnings: List[str]) -> None:
+        """Update the local indexes that do not have this version of a skipped file yet."""
+        stale = [local for local in self.local_indexes if not local.index.has_file(rel_path, current_hash)]
+        blocks: List = []
+        if any(local.parsed for local in stale):
+            try:
+                blocks = helpers.get_file_blocks(self.parser, file_path)
+            except Exception as e:
+                warnings.append(f"Local indexing failed for {rel_path}: {e}")
+                stale = [local for local in stale if not local.parsed]
+        self._update_local_indexes(file_path, rel_path, current_hash, blocks, warnings, stale)
+    
+    def flush_local_indexes(self, warnings: Optional[List[str]] = None) -> List[str]:
+        """
+        Drop deleted files from every local index and save the ones that changed.
+        
+        Returns:
+            Names of the indexes a new generation was written for
+        """
+        saved = []
+        for local in self.local_indexes:
+            try:
+                local.index.prune_missing()
+                if local.index.save():
+                    saved.append(local.name)
+            except Exception as e:
+                if warnings is not None:
+                    warnings.append(f"Could not save the {local.name}: {e}")
+        return saved
+    
     def _get_relative_path(self, file_path: str, workspace_path: str) -> str:
         """Get workspace-relative path or normalized path."""
         return helpers.get_relative_path(file_path, workspace_path, self.path_utils)
     
-    def _prepare_vector_points(self, file_path: str, blocks: List, embeddings: List[List[float]], rel_path: str) -> List[Dict[str, Any]]:
+    def _prepare_vector_points(self, file_path: str, blocks: List, embeddings: Any, rel_path: str,
+                               dedup_plan=None) -> List[Dict[str, Any]]:
         """Prepare vector points for storage."""
-        return helpers.prepare_vector_points(file_path, blocks, embeddings, rel_path, self.embedder, config=self.config)
+        return helpers.prepare_vector_points(file_path, blocks, embeddings, rel_path, self.embedder,
+                                             config=self.config, dedup_plan=dedup_plan)
     
     def create_processing_result(
         self,
@@ -367,42 +572,53 @@ class FileProcessor:
             current_hash = self.get_file_hash(file_path)
             
             if helpers.check_file_changed(file_path, self.cache_manager, current_hash):
+                self._index_unchanged_file(file_path, rel_path, current_hash, warnings)
                 if progress_callback:
                     progress_callback(file_path, completed_count, total_files, "skipped", 0)
                 return helpers.handle_skip(file_path, current_hash, self.cache_manager, progress_callback, completed_count, total_files)
+            if self._is_spooled(file_path, current_hash):
+                # Already embedded by an earlier run; the spool entry is being written instead
+                return helpers.handle_skip(file_path, current_hash, None, progress_callback, completed_count, total_files, 'spooled')
             
             blocks = helpers.get_file_blocks(self.parser, file_path)
+            self._update_local_indexes(file_path, rel_path, current_hash, blocks, warnings)
             if not blocks:
                 return helpers.handle_skip(file_path, current_hash, self.cache_manager, progress_callback, completed_count, total_files, 'no_blocks')
             
+            blocks = helpers.filter_blocks_with_content(blocks)
             texts = helpers.extract_texts_from_blocks(blocks)
             if not texts:
                 return helpers.handle_skip(file_path, current_hash, self.cache_manager, progress_callback, completed_count, total_files, 'no_text_content')
             
+            embedding_texts = helpers.build_embedding_texts(self.text_normalizer, blocks, texts, rel_path)
+            dedup_plan, embed_texts = helpers.plan_near_duplicates(self.near_duplicate_filter, file_path, rel_path,
+                                                                   blocks, texts, embedding_texts,
+                                                                   tenant=point_id_tenant(self.config))
+            
             streaming_embedder = self.get_streaming_embedder(batch_size=batch_size, progress_callback=None)
-            all_embeddings, batch_index = [], 0
-            total_batches = (len(texts) + streaming_embedder.batch_size - 1) // streaming_embedder.batch_size
+            embedding_batches, batch_index = [], 0
+            total_batches = (len(embed_texts) + streaming_embedder.batch_size - 1) // streaming_embedder.batch_size
             
-            for embedding_batch in streaming_embedder.embed_stream(texts):
-                all_embeddings.extend(embedding_batch)
+            for embedding_batch in streaming_embedder.embed_stream(embed_texts):
+                embedding_batches.append(embedding_batch)
                 if on_batch:
                     batch_start = batch_index * streaming_embedder.batch_size
-                    batch_end = min(batch_start + streaming_embedder.batch_size, len(texts))
-                    batch_result = BatchResult(chunks=texts[batch_start:batch_end], embeddings=embedding_batch,
+                    batch_end = min(batch_start + streaming_embedder.batch_size, len(embed_texts))
+                    batch_result = BatchResult(chunks=embed_texts[batch_start:batch_end], embeddings=embedding_batch,
                                              batch_index=batch_index, total_batches=total_batches)
                     on_batch(batch_result)
                 batch_index += 1
             
-            if len(all_embeddings) < len(texts) and len(all_embeddings) == 0:
+            all_embeddings = helpers.concat_embeddings(embedding_batches)
+            if embed_texts and len(all_embeddings) == 0:
                 result['error'] = 'No embeddings generated'
                 return result
             
-            points = self._prepare_vector_points(file_path, blocks, all_embeddings, rel_path)
+            all_embeddings = helpers.resolve_near_duplicates(self.near_duplicate_filter, dedup_plan, all_embeddings)
+            points = self._prepare_vector_points(file_path, blocks, all_embeddings, rel_path, dedup_plan)
             
-            if not helpers.store_vectors(self.vector_store, rel_path, points, errors, self.error_handler, rel_path):
+            if not self._store_file_vectors(file_path, rel_path, points, current_hash, errors, warnings):
                 return result
-            
-            helpers.update_cache(self.cache_manager, file_path, current_hash)
             result['success'] = True
             result['blocks_processed'] = len(blocks)
             
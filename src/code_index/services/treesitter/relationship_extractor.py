@@ -1,10 +1,119 @@
 import logging
-from typing import List, Optional, Any
+import re
+from typing import List, Optional, Any, Tuple
 from ...models import CodeBlock
 from ..query.universal_schema_service import UniversalSchemaService
 
 logger = logging.getLogger(__name__)
 
+# Categories whose captures define a named symbol
+DEFINITION_CATEGORIES = ("class", "function")
+# Definition node types containing one of these open a scope for the nodes inside them
+_SCOPE_MARKERS = ("class", "function", "method", "impl", "mod", "namespace",
+                  "interface", "struct", "trait", "object", "enum")
+_DEFINITION_SUFFIXES = ("definition", "declaration", "item", "specifier")
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_$][\w$]*")
+_QUOTED_RE = re.compile(r"[\"'`<]([^\"'`<>\s]+)[\"'`>]")
+_FROM_IMPORT_RE = re.compile(r"^\s*from\s+([\w.]+)\s+import\b")
+_IMPORT_RE = re.compile(r"^\s*(?:import|use|using|require|open|include)\s+(?:static\s+)?([\w.:]+(?:\s*,\s*[\w.:]+)*)")
+
+
+def _node_text(node, text: str) -> str:
+    raw = getattr(node, "text", None)
+    if isinstance(raw, (bytes, bytearray)):
+        return raw.decode("utf-8", "replace")
+    return text[node.start_byte:node.end_byte]
+
+
+def _field(node, name: str):
+    try:
+        return node.child_by_field_name(name)
+    except Exception:
+        return None
+
+
+def _name_node(node):
+    """The identifier naming a definition node: its ``name`` field or, for C-like declarators, the declared identifier."""
+    name_node = _field(node, "name")
+    if name_node is not None:
+        return name_node
+    declarator = _field(node, "declarator")
+    while declarator is not None and not declarator.type.endswith("identifier"):
+        declarator = _field(declarator, "declarator") or _field(declarator, "name")
+    return declarator
+
+
+def _same_node(a, b) -> bool:
+    return a is not None and b is not None and (a.start_byte, a.end_byte) == (b.start_byte, b.end_byte)
+
+
+def definition_node(node):
+    """The definition a capture belongs to; queries often capture only its name (``@function.name``)."""
+    parent = getattr(node, "parent", None)
+    if parent is not None and _same_node(_name_node(parent), node):
+        return parent
+    return node
+
+
+def _node_lines(node) -> Tuple[int, int]:
+    """1-based first and last line of a node."""
+    try:
+        start_pt = node.start_point
+        end_pt = node.end_point
+        if isinstance(start_pt, (list, tuple)):
+            return start_pt[0] + 1, end_pt[0] + 1
+        return getattr(start_pt, 'row', 0) + 1, getattr(end_pt, 'row', 0) + 1
+    except Exception:
+        return 1, 1
+
+
+def definition_name(node, text: str) -> Optional[str]:
+    """Name of a class or function definition node, or None when it is anonymous."""
+    name_node = _name_node(node)
+    if name_node is None and getattr(node, "parent", None) is not None:
+        # Anonymous functions take the name they are bound to: const load = () => ...
+        name_node = _field(node.parent, "name")
+    if name_node is None:
+        return None
+    name = _node_text(name_node, text).strip()
+    return name or None
+
+
+def enclosing_scope(node, text: str) -> str:
+    """Dotted names of the classes and functions around a node, outermost first."""
+    names: List[str] = []
+    parent = getattr(node, "parent", None)
+    while parent is not None:
+        if (parent.type.rsplit("_", 1)[-1] in _DEFINITION_SUFFIXES
+                and any(marker in parent.type for marker in _SCOPE_MARKERS)):
+            name_node = _name_node(parent)
+            if name_node is None and "impl" in parent.type:
+                # Rust impl blocks are scoped by the implemented type
+                name_node = _field(parent, "type")
+            if name_node is not None:
+                names.append(_node_text(name_node, text).strip())
+        parent = getattr(parent, "parent", None)
+    return ".".join(reversed(names))
+
+
+def callee_name(node, text: str) -> Optional[str]:
+    """Name of the function a call capture invokes: the last identifier of its callee (``self.process`` -> ``process``)."""
+    callee = _field(node, "function") or _field(node, "name") or node
+    names = _IDENTIFIER_RE.findall(_node_text(callee, text))
+    return names[-1] if names else None
+
+
+def import_targets(statement: str) -> List[str]:
+    """Modules named by an import statement: quoted paths, or the dotted names after from/import/use."""
+    quoted = _QUOTED_RE.findall(statement)
+    if quoted:
+        return list(dict.fromkeys(quoted))
+    match = _FROM_IMPORT_RE.match(statement) or _IMPORT_RE.match(statement)
+    if not match:
+        return []
+    return list(dict.fromkeys(part.strip() for part in match.group(1).split(",") if part.strip()))
+
+
 class RelationshipBlockExtractor:
     """
     Extracts high-precision relationship blocks (classes, functions, imports, calls)
@@ -97,23 +206,32 @@ class RelationshipBlockExtractor:
         file_hash: str
     ) -> CodeBlock:
         """Convert a Tree-sitter node to a domain CodeBlock."""
-        # Standard tree-sitter start_point/end_point handling
-        try:
-             start_pt = node.start_point
-             end_pt = node.end_point
-             if isinstance(start_pt, (list, tuple)):
-                  start_line = start_pt[0] + 1
-                  end_line = end_pt[0] + 1
-             else:
-                  start_line = getattr(start_pt, 'row', 0) + 1
-                  end_line = getattr(end_pt, 'row', 0) + 1
-        except Exception:
-             start_line = 1
-             end_line = 1
+        start_line, end_line = _node_lines(node)
         
         # Exact extraction of the symbol name from source text
         identifier = text[node.start_byte:node.end_byte]
-        
+
+        metadata = {
+            'relationship_type': category,
+            'precision': 'high'
+        }
+        if category in DEFINITION_CATEGORIES:
+            # Name, extent and enclosing scope feed the workspace symbol index
+            definition = definition_node(node)
+            name = definition_name(definition, text)
+            if name:
+                metadata['symbol'] = name
+                metadata['scope'] = enclosing_scope(definition, text)
+                metadata['symbol_lines'] = list(_node_lines(definition))
+        elif category == 'call':
+            # Callee and calling definition feed the call graph
+            name = callee_name(node, text)
+            if name:
+                metadata['callee'] = name
+                metadata['caller'] = enclosing_scope(node, text)
+        elif category == 'import':
+            metadata['imports'] = import_targets(text[node.start_byte:node.end_byte])
+
         return CodeBlock(
             file_path=file_path,
             identifier=identifier,
@@ -123,8 +241,5 @@ class RelationshipBlockExtractor:
             content=text[node.start_byte:node.end_byte],
             file_hash=file_hash,
             segment_hash=f"{file_hash}:{start_line}:{end_line}",
-            metadata={
-                'relationship_type': category,
-                'precision': 'high'
-            }
+            metadata=metadata
         )
@@ -0,0 +1,86 @@
+"""
+Sparse term-weight vectors for hybrid search inside Qdrant.
+
+With ``qdrant_sparse_vectors`` every point also carries a named sparse vector
+built from the same code tokenization as the lexical index. Its values are
+the BM25 term-frequency parts; the collection's IDF modifier supplies the
+inverse document frequency at query time, so Qdrant scores the sparse leg
+with BM25 and fuses it with the dense leg in a single ``query_points`` call.
+"""
+import zlib
+from typing import Any, Dict, List, Optional
+
+from qdrant_client.models import (
+    Fusion, FusionQuery, Modifier, Rrf, RrfQuery, SparseVector, SparseVectorParams,
+)
+
+from .lexical_index import query_terms, tokenize_code
+
+SPARSE_VECTOR_NAME = "text"
+# Block length the BM25 length normalization is relative to. The collection's
+# true average is unknown while points stream in, so a fixed one is used.
+AVERAGE_DOCUMENT_TERMS = 256
+
+
+def term_index(term: str) -> int:
+    """Sparse vector dimension of a term (32-bit hash of its UTF-8 bytes)."""
+    return zlib.crc32(term.encode("utf-8"))
+
+
+def build_sparse_vectors_config(config: Any) -> Optional[Dict[str, SparseVectorParams]]:
+    """Sparse vector settings for a new collection, or None without ``qdrant_sparse_vectors``."""
+    if getattr(config, "qdrant_sparse_vectors", False) is not True:
+        return None
+    return {SPARSE_VECTOR_NAME: SparseVectorParams(modifier=Modifier.IDF)}
+
+
+def document_sparse_vector(text: str, k1: float = 1.2, b: float = 0.75) -> SparseVector:
+    """BM25 term-frequency weights of a code block's terms."""
+    terms = tokenize_code(text)
+    counts: Dict[int, int] = {}
+    for term in terms:
+        index = term_index(term)
+        counts[index] = counts.get(index, 0) + 1
+    norm = k1 * (1.0 - b + b * len(terms) / AVERAGE_DOCUMENT_TERMS)
+    indices = sorted(counts)
+    values = [counts[i] * (k1 + 1.0) / (counts[i] + norm) for i in indices]
+    return SparseVector(indices=indices, values=values)
+
+
+def query_sparse_vector(query: str) -> Optional[SparseVector]:
+    """Sparse vector of a query's distinct terms, or None if it has none."""
+    indices = sorted({term_index(term) for term in query_terms(query)})
+    if not indices:
+        return None
+    return SparseVector(indices=indices, values=[1.0] * len(indices))
+
+
+def _rrf_weights(config: Any) -> Optional[List[float]]:
+    lexical_weight = float(getattr(config, "search_hybrid_lexical_weight", 0.5))
+    if lexical_weight == 0.5:
+        # Equal weights are plain RRF
+        return None
+    return [1.0 - lexical_weight, lexical_weight]
+
+
+def build_fusion_query(config: Any) -> Any:
+    """
+    Fusion of the dense and sparse prefetches for ``search_fusion``.
+
+    ``rrf`` is reciprocal rank fusion with ``search_rrf_k`` and the leg
+    weights; ``weighted`` maps to Qdrant's distribution-based score fusion,
+    which normalizes each leg's scores but has no weights.
+    """
+    if getattr(config, "search_fusion", "rrf") == "weighted":
+        return FusionQuery(fusion=Fusion.DBSF)
+    return RrfQuery(rrf=Rrf(k=int(getattr(config, "search_rrf_k", 60)), weights=_rrf_weights(config)))
+
+
+def fused_score_scale(config: Any) -> float:
+    """Best fused score Qdrant can return, so scores can be divided into 0-1."""
+    if getattr(config, "search_fusion", "rrf") == "weighted":
+        return 2.0
+    k = int(getattr(config, "search_rrf_k", 60))
+    weights = _rrf_weights(config) or [1.0, 1.0]
+    # Qdrant scores the first hit of a leg with weight w as 1 / (1 / w + k - 1)
+    return sum(1.0 / (1.0 / w + k - 1.0) for w in weights if w > 0) or 1.0
@@ -0,0 +1,185 @@
+"""
+Persistent symbol table of a workspace.
+
+The relationship queries of the tree-sitter chunker already capture every
+class and function definition; the extractor records each one's name and
+enclosing scope in the block metadata. During indexing those blocks become
+rows of a per-workspace symbol table (name, kind, file, line range, scope),
+so "where is ``parse_file`` defined?" is answered by a sorted-key lookup
+instead of an embedding call and a vector search.
+
+The table lives in ``symbols_<workspace id>/symbols.json`` under the cache
+directory, stored as columns sorted by lowercase name. Lookups bisect that
+key column: exact and prefix matches cost a binary search, fuzzy matches a
+scan of the distinct names. Indexing replaces one file's symbols at a time
+and ``save()`` swaps the file atomically.
+"""
+import bisect
+import difflib
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from code_index.per_file_index import PerFileIndex
+
+MATCH_MODES = ("exact", "prefix", "fuzzy")
+
+
+@dataclass
+class SymbolEntry:
+    """One definition in a file."""
+
+    name: str
+    kind: str
+    start_line: int
+    end_line: int
+    scope: str = ""
+
+    @property
+    def qualified_name(self) -> str:
+        return f"{self.scope}.{self.name}" if self.scope else self.name
+
+
+class SymbolIndex(PerFileIndex):
+    """Per-workspace table of class and function definitions."""
+
+    META_FILE = "symbols.json"
+    DIRECTORY_PREFIX = "symbols"
+    ENABLED_FLAG = "symbol_index_enabled"
+
+    def _reset_view(self) -> None:
+        # Lookup view: columns sorted by lowercase name
+        super()._reset_view()
+        self._keys: List[str] = []
+        self._names: List[str] = []
+        self._kinds: List[str] = []
+        self._row_file: List[int] = []
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self._scopes: List[str] = []
+
+    # ------------------------------
+    # Loading
+    # ------------------------------
+    def _load(self, meta: Dict[str, Any]) -> None:
+        rows = meta.get("symbols", {})
+        self._names = list(rows.get("name", []))
+        self._keys = [name.lower() for name in self._names]
+        self._kinds = list(rows.get("kind", []))
+        self._row_file = list(rows.get("file", []))
+        self._starts = list(rows.get("start", []))
+        self._ends = list(rows.get("end", []))
+        self._scopes = list(rows.get("scope", []))
+
+    # ------------------------------
+    # Updates
+    # ------------------------------
+    def _split_by_file(self) -> Dict[str, Tuple[str, List[SymbolEntry]]]:
+        """Regroup the stored rows by file."""
+        files: Dict[str, Tuple[str, List[SymbolEntry]]] = {
+            name: (self._file_hashes.get(name, ""), []) for name in self._file_names
+        }
+        for row, file_index in enumerate(self._row_file):
+            files[self._file_names[file_index]][1].append(SymbolEntry(
+                self._names[row], self._kinds[row], self._starts[row], self._ends[row], self._scopes[row]))
+        return files
+
+    def update_file(self, rel_path: str, file_hash: str, symbols: Iterable[SymbolEntry]) -> None:
+        """Replace the symbols of a file with those of its current version."""
+        self._set_file(rel_path, file_hash, list(symbols))
+
+    def _write_generation(self, names: List[str], generation: int, meta: Dict[str, Any]) -> None:
+        files = self._files or {}
+        rows = [(entry.name.lower(), entry.name, file_index, entry.start_line, entry)
+                for file_index, name in enumerate(names)
+                for entry in files[name][1]]
+        rows.sort(key=lambda row: row[:4])
+        meta["symbols"] = {
+            "name": [row[1] for row in rows],
+            "kind": [row[4].kind for row in rows],
+            "file": [row[2] for row in rows],
+            "start": [row[4].start_line for row in rows],
+            "end": [row[4].end_line for row in rows],
+            "scope": [row[4].scope for row in rows],
+        }
+
+    # ------------------------------
+    # Lookup
+    # ------------------------------
+    @property
+    def symbol_count(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._names)
+
+    def _candidate_rows(self, key: str, match: str, limit: int) -> List[int]:
+        if match == "exact":
+            return list(range(bisect.bisect_left(self._keys, key), bisect.bisect_right(self._keys, key)))
+        if match == "prefix":
+            return list(range(bisect.bisect_left(self._keys, key), bisect.bisect_left(self._keys, key + "\uffff")))
+        # Fuzzy: names containing the query (shortest first), then close spellings
+        distinct = list(dict.fromkeys(self._keys))
+        contained = sorted((k for k in distinct if key in k), key=lambda k: (not k.startswith(key), len(k), k))
+        close = difflib.get_close_matches(key, distinct, n=max(limit, 1), cutoff=0.75)
+        rows: List[int] = []
+        for k in dict.fromkeys(contained + close):
+            rows.extend(range(bisect.bisect_left(self._keys, k), bisect.bisect_right(self._keys, k)))
+        return rows
+
+    def lookup(self, query: str, match: str = "exact", kind: Optional[str] = None,
+               limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Find definitions by name.
+
+        Args:
+            query: Symbol name, optionally qualified by its scope (``Reader.parse_file``)
+            match: ``exact``, ``prefix`` or ``fuzzy`` (substring, then close spellings);
+                names are compared case-insensitively
+            kind: Optional kind to keep (``class`` or ``function``)
+            limit: Maximum number of definitions to return
+
+        Returns:
+            Definitions with ``name``, ``kind``, ``filePath``, ``startLine``,
+            ``endLine`` and ``scope``; case-exact names first for exact matches
+        """
+        if match not in MATCH_MODES:
+            raise ValueError(f"match must be one of {list(MATCH_MODES)}")
+        scope, _, name = query.strip().rpartition(".")
+        key = name.lower()
+        if not key or limit <= 0:
+            return []
+        with self._lock:
+            self._ensure_loaded()
+            rows = self._candidate_rows(key, match, limit)
+            if kind:
+                rows = [row for row in rows if self._kinds[row] == kind]
+            if scope:
+                wanted = scope.lower()
+                rows = [row for row in rows
+                        if self._scopes[row].lower() == wanted or self._scopes[row].lower().endswith("." + wanted)]
+            if match == "exact":
+                rows.sort(key=lambda row: self._names[row] != name)
+            return [{
+                "name": self._names[row],
+                "kind": self._kinds[row],
+                "filePath": self._file_names[self._row_file[row]],
+                "startLine": self._starts[row],
+                "endLine": self._ends[row],
+                "scope": self._scopes[row],
+            } for row in rows[:limit]]
+
+
+_open_indexes: Dict[str, SymbolIndex] = {}
+_open_lock = threading.Lock()
+
+
+def open_symbol_index(config: Any) -> SymbolIndex:
+    """
+    Shared table of a workspace for repeated lookups in one process.
+
+    The instance keeps its lookup view in memory and only rereads
+    ``symbols.json`` after another process saved it.
+    """
+    index = SymbolIndex.for_workspace(config)
+    with _open_lock:
+        return _open_indexes.setdefault(str(index.directory), index)
@@ -0,0 +1,94 @@
+"""
+Shared multi-tenant collection support.
+
+By default every workspace gets its own Qdrant collection. With
+``qdrant_shared_collection`` set, all workspaces write to one collection and
+are told apart by the ``workspace_hash`` payload field, which is indexed as
+Qdrant's tenant key. HNSW graphs are then built per tenant (``payload_m``)
+instead of across the whole collection, so thousands of small workspaces
+cost one collection's overhead instead of thousands.
+
+Commands address one workspace inside a shared collection as
+``<collection>/<first 16 hex chars of workspace_hash>``; the suffix is the
+same id used for the workspace's cache files.
+"""
+import hashlib
+import os
+from typing import Any, List, Optional, Tuple
+
+TENANT_FIELD = "workspace_hash"
+TENANT_SEPARATOR = "/"
+TENANT_ID_LENGTH = 16
+# Upper bound on tenants read back from a shared collection in one facet call
+MAX_TENANTS = 100000
+
+
+def workspace_hash(workspace_path: str) -> str:
+    """Return the tenant key stored in the ``workspace_hash`` payload field."""
+    return hashlib.sha256(os.path.abspath(workspace_path).encode()).hexdigest()
+
+
+def point_id_tenant(config: Any) -> Optional[str]:
+    """Return the workspace hash that scopes point ids in a shared collection, or None.
+
+    Point ids hash the absolute file path, so nested workspaces (``/repo`` and
+    ``/repo/sub``) would otherwise give the same file the same id and
+    overwrite each other's points in one collection.
+    """
+    if shared_collection_name(config) is None:
+        return None
+    return workspace_hash(getattr(config, "workspace_path", None) or ".")
+
+
+def workspace_collection_name(workspace_path: str) -> str:
+    """Derive a human-readable per-workspace collection name from the workspace path.
+
+    Uses the last directory component (folder name), sanitized for Qdrant
+    (alphanumeric, hyphens, underscores only). Falls back to a short hash
+    if the folder name is empty or contains only special characters.
+    """
+    folder = os.path.basename(os.path.normpath(workspace_path))
+    sanitized = "".join(c if c.isalnum() or c in "-_" else "_" for c in folder).strip("_")
+    if not sanitized or len(sanitized) < 2:
+        short_hash = hashlib.sha256(workspace_path.encode()).hexdigest()[:8]
+        sanitized = f"repo_{short_hash}"
+    return sanitized
+
+
+def shared_collection_name(config: Any) -> Optional[str]:
+    """Return the configured shared collection, or None for per-workspace collections."""
+    name = getattr(config, "qdrant_shared_collection", None)
+    return name.strip() if isinstance(name, str) and name.strip() else None
+
+
+def tenant_ref(collection_name: str, tenant_hash: str) -> str:
+    """Name one workspace inside a shared collection, e.g. ``code_index/3f2a9c01d4e5b6a7``."""
+    return f"{collection_name}{TENANT_SEPARATOR}{tenant_hash[:TENANT_ID_LENGTH]}"
+
+
+def split_tenant_ref(name: str) -> Tuple[str, Optional[str]]:
+    """Split ``collection/tenant`` into its parts; plain collection names have no tenant."""
+    collection, separator, tenant = name.partition(TENANT_SEPARATOR)
+    return collection, (tenant if separator and tenant else None)
+
+
+def list_tenants(client: Any, collection_name: str, limit: int = MAX_TENANTS) -> List[Tuple[str, int]]:
+    """
+    Count the points of every workspace in a shared collection.
+
+    Uses a facet over the tenant index, so it is one request regardless of
+    collection size.
+
+    Returns:
+        ``(workspace_hash, points_count)`` pairs, largest tenants first
+    """
+    response = client.facet(collection_name=collection_name, key=TENANT_FIELD, limit=limit, exact=True)
+    return [(str(hit.value), int(hit.count)) for hit in response.hits]
+
+
+def resolve_tenant(client: Any, collection_name: str, tenant_id: str) -> Optional[str]:
+    """Expand a (possibly shortened) tenant id to the full ``workspace_hash``."""
+    if len(tenant_id) == 64:
+        return tenant_id
+    matches = [value for value, _ in list_tenants(client, collection_name) if value.startswith(tenant_id)]
+    return matches[0] if len(matches) == 1 else None
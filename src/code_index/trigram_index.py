@@ -0,0 +1,322 @@
+"""
+Trigram index for substring and regular expression search over a workspace.
+
+Every indexed file is reduced to the set of byte trigrams it contains
+(ASCII-lowercased, so one index serves case-sensitive and case-insensitive
+queries). A query is turned into the trigrams any match must contain: all
+trigrams of a literal, and for a regular expression the literal runs it
+cannot match without, combined with AND/OR along its structure. Only files
+that have those trigrams are opened; each candidate is memory-mapped and
+the pattern is run over it to produce line-accurate hits. Patterns without a
+three-byte literal (``\\w+``) fall back to scanning every indexed file.
+
+The index lives in ``trigram_<workspace id>`` under the cache directory::
+
+    trigrams.json       files and their hashes, array lengths, generation
+    trigrams.<gen>.bin  sorted trigram keys (uint32), postings offsets
+                        (uint32) and the file ids of each trigram (uint32)
+
+Searches memory-map the binary file and binary-search the key array, so
+only the postings of the query's trigrams are read. Indexing replaces one
+file at a time and ``save()`` writes a new generation.
+"""
+import mmap
+import os
+import posixpath
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_parse
+
+from code_index.per_file_index import PerFileIndex
+from code_index.search_scoring import resolve_filetype
+
+# Files with a NUL byte in their first block are treated as binary and not indexed
+BINARY_SNIFF_BYTES = 8192
+# Longest line text returned with a hit
+MAX_LINE_CHARS = 300
+
+# Query plan: a literal, ("and", [...]), ("or", [...]), or None for "any file"
+Plan = Union[None, bytes, Tuple[str, List[Any]]]
+
+
+def file_trigrams(data: Union[bytes, memoryview, mmap.mmap]) -> np.ndarray:
+    """Sorted distinct trigram keys of a byte string, ASCII-lowercased."""
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if raw.size < 3:
+        return np.zeros(0, dtype=np.uint32)
+    lowered = raw.copy()
+    upper = (lowered >= 65) & (lowered <= 90)
+    lowered[upper] += 32
+    wide = lowered.astype(np.uint32)
+    return np.unique((wide[:-2] << 16) | (wide[1:-1] << 8) | wide[2:])
+
+
+def _literal_trigrams(literal: bytes) -> np.ndarray:
+    return file_trigrams(literal)
+
+
+def _required(parsed) -> Plan:
+    """Trigram plan of a parsed regular expression: the literal runs every match contains."""
+    parts: List[Any] = []
+    run = bytearray()
+
+    def end_run():
+        if len(run) >= 3:
+            parts.append(bytes(run))
+        run.clear()
+
+    for op, arg in parsed:
+        if op == sre_parse.LITERAL and arg < 128:
+            run.append(arg)
+            continue
+        end_run()
+        if op == sre_parse.SUBPATTERN:
+            parts.append(_required(arg[-1]))
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and arg[0] >= 1:
+            parts.append(_required(arg[2]))
+        elif op == sre_parse.BRANCH:
+            branches = [_required(branch) for branch in arg[1]]
+            # One branch without required literals lets any file match
+            parts.append(None if any(branch is None for branch in branches) else ("or", branches))
+    end_run()
+    parts = [part for part in parts if part is not None]
+    if not parts:
+        return None
+    return parts[0] if len(parts) == 1 else ("and", parts)
+
+
+def query_plan(pattern: str, regex: bool = False) -> Plan:
+    """Trigram plan of a literal or a regular expression (None when nothing can be pruned)."""
+    if not regex:
+        literal = pattern.encode("utf-8")
+        return literal if len(literal) >= 3 else None
+    return _required(sre_parse.parse(pattern))
+
+
+@dataclass
+class GrepResult:
+    """Hits of a grep and how much of the workspace had to be read for them."""
+
+    hits: List[Dict[str, Any]] = field(default_factory=list)
+    candidate_files: int = 0
+    total_files: int = 0
+    truncated: bool = False
+
+
+class TrigramIndex(PerFileIndex):
+    """Per-workspace trigram index with verified substring and regex search."""
+
+    META_FILE = "trigrams.json"
+    DATA_FILE = "trigrams.{generation}.bin"
+    DIRECTORY_PREFIX = "trigram"
+    ENABLED_FLAG = "trigram_index_enabled"
+
+    def __init__(self, directory: str, workspace_path: str, max_file_bytes: int = 1024 * 1024):
+        self.max_file_bytes = max_file_bytes
+        super().__init__(directory, workspace_path)
+
+    def _reset_view(self) -> None:
+        # Search view: read from trigrams.json and the mapped arrays file
+        super()._reset_view()
+        self._keys = np.zeros(0, dtype=np.uint32)
+        self._offsets = np.zeros(1, dtype=np.uint32)
+        self._postings = np.zeros(0, dtype=np.uint32)
+
+    @classmethod
+    def _options(cls, config: Any) -> Dict[str, Any]:
+        max_bytes = getattr(config, "trigram_max_file_bytes", 1024 * 1024)
+        return {"max_file_bytes": max_bytes if isinstance(max_bytes, int) else 1024 * 1024}
+
+    # ------------------------------
+    # Loading
+    # ------------------------------
+    def _load(self, meta: Dict[str, Any]) -> None:
+        key_count = int(meta.get("trigrams", 0))
+        posting_count = int(meta.get("postings", 0))
+        arrays_path = self._data_path(self._generation)
+        if key_count and os.path.isfile(arrays_path):
+            arrays = np.memmap(arrays_path, dtype=np.uint32, mode="r")
+            self._keys = arrays[:key_count]
+            self._offsets = arrays[key_count:2 * key_count + 1]
+            self._postings = arrays[2 * key_count + 1:2 * key_count + 1 + posting_count]
+
+    # ------------------------------
+    # Updates
+    # ------------------------------
+    def _split_by_file(self) -> Dict[str, Tuple[str, np.ndarray]]:
+        """Invert the stored postings into per-file trigram arrays."""
+        counts = np.diff(self._offsets.astype(np.int64))
+        trigram_of_posting = np.repeat(np.asarray(self._keys), counts)
+        postings = np.asarray(self._postings)
+        order = np.argsort(postings, kind="stable")
+        file_ids = postings[order]
+        trigrams = trigram_of_posting[order]
+        bounds = np.searchsorted(file_ids, np.arange(len(self._file_names) + 1))
+        return {
+            name: (self._file_hashes.get(name, ""), trigrams[bounds[i]:bounds[i + 1]].copy())
+            for i, name in enumerate(self._file_names)
+        }
+
+    def _read_trigrams(self, file_path: str) -> np.ndarray:
+        size = os.path.getsize(file_path)
+        if size < 3 or size > self.max_file_bytes:
+            return np.zeros(0, dtype=np.uint32)
+        with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if b"\0" in data[:BINARY_SNIFF_BYTES]:
+                return np.zeros(0, dtype=np.uint32)
+            return file_trigrams(data)
+
+    def update_file(self, rel_path: str, file_hash: str, file_path: Optional[str] = None) -> None:
+        """Replace the trigrams of a file with those of its current contents."""
+        trigrams = self._read_trigrams(file_path or os.path.join(self.workspace_path, rel_path))
+        self._set_file(rel_path, file_hash, trigrams)
+
+    def _write_generation(self, names: List[str], generation: int, meta: Dict[str, Any]) -> None:
+        files = self._files or {}
+        per_file = [files[name][1] for name in names]
+        trigrams = np.concatenate(per_file) if per_file else np.zeros(0, dtype=np.uint32)
+        file_ids = np.repeat(np.arange(len(names), dtype=np.uint32), [len(t) for t in per_file])
+        order = np.lexsort((file_ids, trigrams))
+        trigrams, file_ids = trigrams[order], file_ids[order]
+        keys, starts = np.unique(trigrams, return_index=True)
+        offsets = np.append(starts, len(trigrams)).astype(np.uint32)
+
+        def write_arrays(f) -> None:
+            for array in (keys, offsets, file_ids):
+                f.write(array.astype(np.uint32).tobytes())
+
+        self._write_atomic(self._data_path(generation), write_arrays)
+        meta["trigrams"] = int(len(keys))
+        meta["postings"] = int(len(file_ids))
+
+    # ------------------------------
+    # Search
+    # ------------------------------
+    @property
+    def file_count(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._file_names)
+
+    def _files_with(self, trigram: int) -> np.ndarray:
+        position = int(np.searchsorted(self._keys, trigram))
+        if position >= len(self._keys) or int(self._keys[position]) != trigram:
+            return np.zeros(0, dtype=np.uint32)
+        return np.asarray(self._postings[int(self._offsets[position]):int(self._offsets[position + 1])])
+
+    def _candidates(self, plan: Plan) -> Optional[np.ndarray]:
+        """File ids that can match a plan, or None for every file."""
+        if plan is None:
+            return None
+        if isinstance(plan, bytes):
+            result: Optional[np.ndarray] = None
+            for trigram in _literal_trigrams(plan).tolist():
+                files = self._files_with(trigram)
+                result = files if result is None else np.intersect1d(result, files, assume_unique=True)
+                if result.size == 0:
+                    break
+            return result
+        op, parts = plan
+        sets = [self._candidates(part) for part in parts]
+        if op == "and":
+            known = [s for s in sets if s is not None]
+            if not known:
+                return None
+            result = known[0]
+            for s in known[1:]:
+                result = np.intersect1d(result, s, assume_unique=True)
+            return result
+        if any(s is None for s in sets):
+            return None
+        return np.unique(np.concatenate(sets)) if sets else np.zeros(0, dtype=np.uint32)
+
+    def _path_filter(self, name: str, filetype: Optional[str], prefix: str) -> bool:
+        if filetype is not None and os.path.splitext(name)[1].lstrip(".").lower() != filetype:
+            return False
+        return not prefix or name == prefix or name.startswith(prefix + "/")
+
+    def grep(self, pattern: str, regex: bool = False, ignore_case: bool = False, max_results: int = 100,
+             filetype: Optional[str] = None, path_prefix: Optional[str] = None) -> GrepResult:
+        """
+        Find every line matching a literal or regular expression.
+
+        Args:
+            pattern: Text to find, or a Python regular expression with ``regex``
+            regex: Treat ``pattern`` as a regular expression
+            ignore_case: Match case-insensitively
+            max_results: Maximum number of hits (matching lines) to return
+            filetype: Optional file type/language to narrow results (e.g. "go", "py")
+            path_prefix: Optional workspace-relative directory to search below
+
+        Returns:
+            Hits with ``filePath``, ``line``, ``column`` (1-based) and the line ``text``,
+            in file order; ``truncated`` is set when ``max_results`` was reached
+
+        Raises:
+            ValueError: If the regular expression does not compile
+        """
+        flags = re.IGNORECASE if ignore_case else 0
+        source = pattern if regex else re.escape(pattern)
+        try:
+            compiled = re.compile(source.encode("utf-8"), flags | re.MULTILINE)
+            plan = query_plan(pattern, regex)
+        except re.error as e:
+            raise ValueError(f"Invalid regular expression: {e}") from e
+        wanted_ext = resolve_filetype(filetype) if filetype else None
+        prefix = posixpath.normpath(path_prefix.replace("\\", "/")).strip("/") if path_prefix else ""
+        if prefix == ".":
+            prefix = ""
+
+        result = GrepResult()
+        with self._lock:
+            self._ensure_loaded()
+            names = list(self._file_names)
+            candidates = self._candidates(plan)
+        result.total_files = len(names)
+        file_ids = range(len(names)) if candidates is None else candidates.tolist()
+        selected = [names[i] for i in file_ids if self._path_filter(names[i], wanted_ext, prefix)]
+        result.candidate_files = len(selected)
+        for name in selected:
+            if self._scan_file(name, compiled, result, max_results):
+                result.truncated = True
+                break
+        return result
+
+    def _scan_file(self, name: str, compiled: "re.Pattern[bytes]", result: GrepResult, max_results: int) -> bool:
+        """Append the matching lines of one file; returns True once ``max_results`` is reached."""
+        file_path = os.path.join(self.workspace_path, name)
+        try:
+            if not os.path.isfile(file_path) or not 0 < os.path.getsize(file_path) <= self.max_file_bytes:
+                return False
+            with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if b"\0" in data[:BINARY_SNIFF_BYTES]:
+                    return False
+                line, line_start, last_line = 1, 0, 0
+                for match in compiled.finditer(data):
+                    start = match.start()
+                    line += data[line_start:start].count(b"\n") if start > line_start else 0
+                    line_start = data.rfind(b"\n", 0, start) + 1
+                    if line == last_line:
+                        continue
+                    last_line = line
+                    line_end = data.find(b"\n", start)
+                    text = data[line_start:line_end if line_end >= 0 else len(data)]
+                    result.hits.append({
+                        "filePath": name,
+                        "line": line,
+                        "column": len(data[line_start:start].decode("utf-8", "replace")) + 1,
+                        "text": text.decode("utf-8", "replace").rstrip("\r")[:MAX_LINE_CHARS],
+                    })
+                    if len(result.hits) >= max_results:
+                        return True
+        except (OSError, ValueError):
+            # Unreadable or vanished since indexing
+            return False
+        return False
@@ -0,0 +1,73 @@
+"""
+Compact embedding vectors for the code index tool.
+
+Embedders return a contiguous ``(n, dim)`` NumPy matrix instead of nested
+lists of Python floats. Rows of that matrix travel through the indexing
+pipeline as views and are converted to plain lists only at the Qdrant
+boundary, one batch at a time.
+"""
+import base64
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+
+
+EMBEDDING_DTYPES = {"float32": np.float32, "float16": np.float16}
+
+
+def resolve_dtype(name: Optional[str]) -> np.dtype:
+    """Return the NumPy dtype for an ``embedding_dtype`` setting."""
+    key = name.lower() if isinstance(name, str) else "float32"
+    if key not in EMBEDDING_DTYPES:
+        raise ValueError(f"embedding_dtype must be one of: {', '.join(EMBEDDING_DTYPES)}")
+    return np.dtype(EMBEDDING_DTYPES[key])
+
+
+def as_matrix(embeddings: Any, dtype: Any = np.float32) -> np.ndarray:
+    """
+    Convert embedder output to a C-contiguous ``(n, dim)`` matrix.
+
+    Accepts a matrix, a list of rows (lists or arrays) or an empty value.
+    Arrays already in the requested dtype are returned without copying.
+
+    Raises:
+        ValueError: If rows have different lengths
+    """
+    if embeddings is None or len(embeddings) == 0:
+        return np.empty((0, 0), dtype=dtype)
+    matrix = np.asarray(embeddings, dtype=dtype)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    if matrix.ndim != 2:
+        raise ValueError(f"Expected a 2-D embedding matrix, got shape {matrix.shape}")
+    return np.ascontiguousarray(matrix)
+
+
+def decode_base64_vectors(encoded: Sequence[str], dtype: Any = np.float32) -> np.ndarray:
+    """Decode little-endian float32 vectors sent as base64 (OpenAI ``encoding_format=base64``)."""
+    rows = [np.frombuffer(base64.b64decode(item), dtype="<f4") for item in encoded]
+    return as_matrix(np.stack(rows) if rows else [], dtype)
+
+
+def vectors_to_lists(vectors: Sequence[Any]) -> List[List[float]]:
+    """
+    Convert a batch of vectors to lists of floats for the Qdrant client.
+
+    NumPy rows are stacked and converted with a single ``tolist`` call;
+    vectors that are already lists pass through unchanged.
+    """
+    array_positions = [i for i, vector in enumerate(vectors) if isinstance(vector, np.ndarray)]
+    if not array_positions:
+        return list(vectors)
+    converted = list(vectors)
+    stacked = np.stack([vectors[i] for i in array_positions]).astype(np.float32, copy=False)
+    for position, row in zip(array_positions, stacked.tolist()):
+        converted[position] = row
+    return converted
+
+
+def vector_to_list(vector: Any) -> Any:
+    """Convert a NumPy query vector to a list of floats; other values pass through."""
+    if isinstance(vector, np.ndarray):
+        return vector.astype(np.float32, copy=False).ravel().tolist()
+    return vector
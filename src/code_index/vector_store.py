@@ -2,13 +2,37 @@
 Qdrant vector store for the code index tool.
 """
 import hashlib
+import logging
 import os
+import posixpath
+import threading
 import time
-from typing import List, Dict, Any, Optional
-from qdrant_client.models import VectorParams, Distance, PointStruct, Filter, FieldCondition, MatchValue, PayloadSchemaType
+from typing import List, Dict, Any, Optional, Set, Tuple
+from qdrant_client.models import (
+    VectorParams, Distance, PointStruct, Filter, FieldCondition, MatchValue, MatchAny,
+    OptimizersConfigDiff, CollectionStatus, PointIdsList, Prefetch, QueryRequest, IsEmptyCondition, PayloadField,
+)
 from code_index.config import Config
 from code_index.errors import ErrorContext, ErrorCategory, ErrorSeverity, error_handler
 from code_index.service_validation import ValidationResult
+from code_index.vector_codec import vector_to_list, vectors_to_lists
+from code_index.qdrant_settings import (
+    build_hnsw_config, build_quantization_config, build_search_params, build_sharding_args,
+    shard_key_for_payload, shard_key_for_prefix, shard_key_mode,
+)
+from code_index.payload_schema import PayloadSchemaManager
+from code_index.search_scoring import (
+    RANKING_PAYLOAD_FIELDS, RankingProfile, content_length, hit_from_payload, is_payload_valid, payload_size,
+    resolve_filetype,
+)
+from code_index.qdrant_local import LOCAL_GUIDANCE, is_local_url, local_client
+from code_index.sparse_vectors import (
+    SPARSE_VECTOR_NAME, build_fusion_query, build_sparse_vectors_config, document_sparse_vector,
+    fused_score_scale, query_sparse_vector,
+)
+from code_index.tenancy import (
+    TENANT_FIELD, resolve_tenant, shared_collection_name, split_tenant_ref, workspace_collection_name,
+)
 
 # Conditional import for Qdrant client
 try:
@@ -18,6 +42,21 @@ except ImportError:
     QDRANT_AVAILABLE = False
     QdrantClient = None  # type: ignore[assignment]
 
+logger = logging.getLogger(__name__)
+
+
+def _dense_vector(vector: Any) -> Optional[List[float]]:
+    """The unnamed dense vector of a returned point (collections with sparse vectors name their vectors)."""
+    if isinstance(vector, dict):
+        vector = vector.get("", next((v for v in vector.values() if isinstance(v, list)), None))
+    return vector if isinstance(vector, list) else None
+
+# Qdrant's default optimizer indexing threshold (KB of vectors per segment)
+DEFAULT_INDEXING_THRESHOLD = 20000
+
+# Points sampled when checking that a collection stores pathSegments
+PATH_SEGMENTS_SAMPLE = 256
+
 
 class QdrantVectorStore:
     """Interface with Qdrant vector database."""
@@ -26,8 +65,17 @@ class QdrantVectorStore:
         """Initialize Qdrant client with configuration."""
         self.workspace_path = os.path.abspath(config.workspace_path)
         override = getattr(config, "collection_name_override", None)
+        # Configured multi-tenant collection shared by all workspaces, if any
+        self.shared_collection = shared_collection_name(config)
+        # Workspace id from a "<collection>/<id>" override; searches are scoped to it
+        self._tenant_id: Optional[str] = None
         if override:
-            self.collection_name = override
+            if isinstance(override, str):
+                self.collection_name, self._tenant_id = split_tenant_ref(override)
+            else:
+                self.collection_name = override
+        elif self.shared_collection:
+            self.collection_name = self.shared_collection
         else:
             self.collection_name = self._collection_name_from_path(config.workspace_path)
 
@@ -60,18 +108,29 @@ class QdrantVectorStore:
         self._api_key = config.qdrant_api_key
         self._url = url
         self._config = config
+        # Candidate, hydration, payload byte and timing figures of the last search
+        self.last_search_stats: Dict[str, Any] = {}
 
-        # Prefer using the consolidated URL form first (more robust in newer clients)
-        # We'll fall back to explicit host/port with gRPC if needed during initialize()
-        self.client = QdrantClient(
-            url=url,
-            api_key=config.qdrant_api_key
-        )
+        if is_local_url(url):
+            # Embedded storage on disk, shared by every store of this process
+            self.client = local_client(url)
+        else:
+            # Prefer using the consolidated URL form first (more robust in newer clients)
+            # We'll fall back to explicit host/port with gRPC if needed during initialize()
+            self.client = QdrantClient(
+                url=url,
+                api_key=config.qdrant_api_key,
+                prefer_grpc=getattr(config, "qdrant_prefer_grpc", False) is True
+            )
 
         # Vector size comes from configuration (config-first).
         # It will be validated during initialize(); must be a positive integer.
         self.vector_size: Optional[int] = config.embedding_length
 
+        # Shard keys of a custom-sharded collection, read on first write
+        self._shard_keys: Optional[Set[str]] = None
+        self._shard_lock = threading.Lock()
+
     def validate_configuration(self) -> ValidationResult:
         """
         Validate Qdrant configuration and connectivity.
@@ -101,7 +160,10 @@ class QdrantVectorStore:
 
         try:
             # Test basic connectivity
-            client = QdrantClient(url=self._url, api_key=self._api_key)
+            if self.local_mode:
+                client = local_client(self._url)
+            else:
+                client = QdrantClient(url=self._url, api_key=self._api_key)
 
             # Get collections to verify service is responsive
             collections = client.get_collections()
@@ -140,6 +202,7 @@ class QdrantVectorStore:
                 valid=True,
                 details={
                     "url": self._url,
+                    "mode": "local" if self.local_mode else "server",
                     "collection_count": collection_count,
                     "collection_names": collection_names,
                     "response_time_ms": int((time.time() - start_time) * 1000)
@@ -155,6 +218,8 @@ class QdrantVectorStore:
                 "Test connection: docker ps | grep qdrant",
                 "Check Qdrant service logs for errors"
             ]
+            if self.local_mode:
+                guidance = list(LOCAL_GUIDANCE)
 
             # Categorize the error for better guidance
             error_str = str(e).lower()
@@ -188,20 +253,35 @@ class QdrantVectorStore:
         result.raise_for_errors()
 
     def _collection_name_from_path(self, workspace_path: str) -> str:
-        """Derive a human-readable collection name from the workspace path.
+        """Derive a human-readable collection name from the workspace path."""
+        return workspace_collection_name(workspace_path)
 
-        Uses the last directory component (folder name), sanitized for Qdrant
-        (alphanumeric, hyphens, underscores only). Falls back to a short hash
-        if the folder name is empty or contains only special characters.
-        """
-        folder = os.path.basename(os.path.normpath(workspace_path))
-        sanitized = "".join(c if c.isalnum() or c in "-_" else "_" for c in folder).strip("_")
-        if not sanitized or len(sanitized) < 2:
-            short_hash = hashlib.sha256(workspace_path.encode()).hexdigest()[:8]
-            sanitized = f"repo_{short_hash}"
-        return sanitized
+    @property
+    def tenant_mode(self) -> bool:
+        """True when the collection is shared and partitioned by workspace."""
+        shared = getattr(self, "shared_collection", None)
+        return (shared is not None and self.collection_name == shared) or \
+            getattr(self, "_tenant_id", None) is not None
+
+    def _workspace_hash(self) -> str:
+        """Tenant key of this workspace (the ``workspace_hash`` payload field)."""
+        return hashlib.sha256(self.workspace_path.encode()).hexdigest()
 
+    def _target_tenant(self) -> str:
+        """Workspace hash selected by a ``<collection>/<id>`` name, or this workspace's own."""
+        tenant_id = getattr(self, "_tenant_id", None)
+        if tenant_id is None:
+            return self._workspace_hash()
+        resolved = getattr(self, "_resolved_tenant", None)
+        if resolved is None:
+            resolved = resolve_tenant(self.client, self.collection_name, tenant_id)
+            if resolved is None:
+                raise ValueError(f"No single workspace '{tenant_id}' in collection '{self.collection_name}'")
+            self._resolved_tenant = resolved
+        return resolved
 
+    def _tenant_filter(self) -> Filter:
+        return Filter(must=[FieldCondition(key=TENANT_FIELD, match=MatchValue(value=self._target_tenant()))])
 
     def initialize(self) -> bool:
         """
@@ -214,6 +294,8 @@ class QdrantVectorStore:
             # First attempt using current client (URL-based)
             collections = self.client.get_collections()
         except Exception as e1:
+            if self.local_mode:
+                raise Exception(f"Failed to open local Qdrant storage {self._url}: {e1}")
             # Fallback: try gRPC on typical port (http_port + 1)
             grpc_port = (self._http_port
                          + 1) if isinstance(self._http_port, int) else 6334
@@ -245,101 +327,178 @@ class QdrantVectorStore:
                     "Config error: Please set 'embedding_length' in code_index.json to match the Ollama model (e.g., 1024 for Qwen, 768 for nomic)."
                 )
 
-            # Create collection
+            # Create collection with the configured storage layout
             self.client.create_collection(
                 collection_name=self.collection_name,
                 vectors_config=VectorParams(
                     size=self.vector_size,
-                    distance=Distance.COSINE
-                )
+                    distance=Distance.COSINE,
+                    on_disk=True if getattr(self._config, "qdrant_vectors_on_disk", False) is True else None
+                ),
+                on_disk_payload=True if getattr(self._config, "qdrant_payload_on_disk", False) is True else None,
+                hnsw_config=build_hnsw_config(self._config, tenant=self.tenant_mode),
+                quantization_config=build_quantization_config(self._config),
+                sparse_vectors_config=build_sparse_vectors_config(self._config),
+                **build_sharding_args(self._config)
             )
+            self._sparse_vectors = build_sparse_vectors_config(self._config) is not None
             # Create payload indexes
             self._create_payload_indexes()
             return True
         else:
+            # Existing collections may predate fields added to the payload schema
+            self._create_payload_indexes()
             return False
 
-    def _create_payload_indexes(self) -> None:
-        """Create payload indexes for efficient filtering."""
-        try:
-            self.client.create_payload_index(
-                collection_name=self.collection_name,
-                field_name="workspace_hash",
-                field_schema=PayloadSchemaType.KEYWORD
-            )
-            self.client.create_payload_index(
-                collection_name=self.collection_name,
-                field_name="filetype",
-                field_schema=PayloadSchemaType.KEYWORD
-            )
-            try:
-                self.client.create_payload_index(
-                    collection_name=self.collection_name,
-                    field_name="embedding_model",
-                    field_schema=PayloadSchemaType.KEYWORD
+    def begin_bulk_load(self) -> Optional[Dict[str, Any]]:
+        """
+        Suspend HNSW indexing while an empty collection is filled.
+
+        Building the graph segment by segment as points stream in costs far
+        more CPU than building it once at the end.
+
+        A threshold of 0 is what a run that died before end_bulk_load()
+        leaves behind. It is never kept: a collection that already holds
+        points gets indexing turned back on, and an empty one records the
+        threshold as unset so end_bulk_load() restores the default.
+
+        Returns:
+            Optimizer settings to pass to end_bulk_load(), or None when the
+            collection already holds points and indexing was left alone
+        """
+        if self.tenant_mode:
+            # Other workspaces search the shared collection while this one loads
+            return None
+        if self.local_mode:
+            # Embedded storage has no HNSW indexing to defer
+            return None
+        info = self.client.get_collection(collection_name=self.collection_name)
+        previous = info.config.optimizer_config.indexing_threshold
+        if info.points_count:
+            if previous == 0:
+                logger.warning(
+                    f"Collection {self.collection_name} has HNSW indexing disabled by an interrupted bulk load; "
+                    "re-enabling it"
                 )
-            except Exception:
-                pass
-        except Exception:
-            pass
+                self._set_indexing_threshold(None)
+            return None
+        self._set_indexing_threshold(0)
+        return {"indexing_threshold": previous or None}
 
-    # ------------------------------
-    # Post-retrieval weighting helpers
-    # ------------------------------
-    def _filetype_weight(self, file_path: str) -> float:
-        """Weight by file extension using config.search_file_type_weights."""
-        try:
-            ext = os.path.splitext(file_path.lower())[1]
-            return float(getattr(self._config, "search_file_type_weights", {}).get(ext, 1.0))
-        except Exception:
-            return 1.0
+    def _set_indexing_threshold(self, threshold: Optional[int]) -> None:
+        """Apply an optimizer indexing threshold; None restores the Qdrant default."""
+        self.client.update_collection(
+            collection_name=self.collection_name,
+            optimizers_config=OptimizersConfigDiff(
+                indexing_threshold=DEFAULT_INDEXING_THRESHOLD if threshold is None else threshold
+            )
+        )
 
-    def _path_weight(self, file_path: str) -> float:
-        """Aggregate multiplicative boosts for any matching path pattern rules."""
-        try:
-            p = file_path.lower()
-            weight = 1.0
-            for rule in getattr(self._config, "search_path_boosts", []):
-                try:
-                    pat = str(rule.get("pattern", "")).lower()
-                    w = float(rule.get("weight", 1.0))
-                except Exception:
-                    continue
-                if pat and pat in p:
-                    weight *= w
-            return weight
-        except Exception:
-            return 1.0
+    def end_bulk_load(self, state: Dict[str, Any], timeout_seconds: float = 600.0,
+                      poll_interval_seconds: float = 1.0) -> bool:
+        """
+        Restore the optimizer settings saved by begin_bulk_load() and wait for the index build.
 
-    def _language_weight(self, lang: str) -> float:
-        """Optional language multiplier from config.search_language_boosts."""
-        try:
-            if not lang:
-                return 1.0
-            return float(getattr(self._config, "search_language_boosts", {}).get(lang.lower(), 1.0))
-        except Exception:
-            return 1.0
+        Returns:
+            True if the collection reached green status within the timeout
+        """
+        self._set_indexing_threshold(state.get("indexing_threshold") or None)
+        return self.wait_for_optimization(timeout_seconds, poll_interval_seconds)
 
-    def _exclude_match(self, file_path: str) -> bool:
-        """Return True if file_path matches any configured exclude pattern (substring)."""
-        try:
-            p = file_path.lower()
-            for pat in getattr(self._config, "search_exclude_patterns", []):
+    def wait_for_optimization(self, timeout_seconds: float = 600.0, poll_interval_seconds: float = 1.0) -> bool:
+        """Poll until the optimizers have finished and the collection is green."""
+        deadline = time.monotonic() + timeout_seconds
+        while True:
+            status = self.client.get_collection(collection_name=self.collection_name).status
+            if status == CollectionStatus.GREEN:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(poll_interval_seconds)
+
+    @property
+    def local_mode(self) -> bool:
+        """True when ``qdrant_url`` is ``local:<path>`` and points live in embedded storage."""
+        return is_local_url(getattr(self, "_url", None))
+
+    @property
+    def shard_key_mode(self) -> str:
+        """Custom shard key mode of the collection: ``none``, ``directory`` or ``language``."""
+        return shard_key_mode(getattr(self, "_config", None))
+
+    def shard_key_for(self, point: Dict[str, Any]) -> Optional[str]:
+        """Shard key a point is written to, or None with automatic sharding."""
+        return shard_key_for_payload(self.shard_key_mode, point.get("payload") or {})
+
+    def _known_shard_keys(self) -> Set[str]:
+        keys = self._shard_keys
+        if keys is None:
+            response = self.client.list_shard_keys(collection_name=self.collection_name)
+            keys = {str(description.key) for description in (response.shard_keys or [])}
+            self._shard_keys = keys
+        return keys
+
+    def _ensure_shard_keys(self, keys: Set[str]) -> None:
+        """Create the shards of shard keys seen for the first time."""
+        with self._shard_lock:
+            known = self._known_shard_keys()
+            for key in sorted(keys - known):
                 try:
-                    if str(pat).lower() in p:
-                        return True
-                except Exception:
-                    continue
-            return False
-        except Exception:
+                    self.client.create_shard_key(
+                        collection_name=self.collection_name,
+                        shard_key=key,
+                        shards_number=getattr(self._config, "qdrant_shard_number", None),
+                        replication_factor=getattr(self._config, "qdrant_replication_factor", None),
+                    )
+                except Exception as e:
+                    # Another writer may have created it first
+                    if "already exists" not in str(e).lower():
+                        raise
+                known.add(key)
+
+    def has_sparse_vectors(self) -> bool:
+        """
+        True when ``qdrant_sparse_vectors`` is set and the collection has the sparse vector.
+
+        Collections created before the option was turned on keep dense-only
+        points; they are searched without the server-side lexical leg.
+        """
+        if getattr(self._config, "qdrant_sparse_vectors", False) is not True:
             return False
+        enabled = getattr(self, "_sparse_vectors", None)
+        if enabled is None:
+            try:
+                info = self.client.get_collection(collection_name=self.collection_name)
+                enabled = SPARSE_VECTOR_NAME in (info.config.params.sparse_vectors or {})
+            except Exception:
+                return False
+            self._sparse_vectors = enabled
+        return enabled
 
-    def upsert_points(self, points: List[Dict[str, Any]]) -> None:
+    @property
+    def payload_schema(self) -> PayloadSchemaManager:
+        """Payload index manager bound to the current client and collection."""
+        manager = getattr(self, "_payload_schema", None)
+        if manager is None or manager.client is not self.client:
+            manager = PayloadSchemaManager(self.client, self.collection_name,
+                                           tenant_field=TENANT_FIELD if self.tenant_mode else None)
+            self._payload_schema = manager
+        return manager
+
+    def _create_payload_indexes(self) -> Dict[str, List[str]]:
+        """Create or migrate the payload indexes of every filtered field."""
+        if self.local_mode:
+            # Embedded storage ignores payload indexes and always scans
+            return {"created": [], "migrated": [], "existing": [], "failed": []}
+        return self.payload_schema.ensure_indexes()
+
+    def upsert_points(self, points: List[Dict[str, Any]], wait: bool = True) -> None:
         """
         Upsert points into Qdrant collection.
 
         Args:
             points: List of point dictionaries with id, vector, and payload
+            wait: Block until the write is applied; False returns once Qdrant has accepted it
         """
         if not points:
             return
@@ -347,25 +506,49 @@ class QdrantVectorStore:
         try:
             # Convert to PointStruct objects and add path segments
             point_structs = []
-            workspace_hash = hashlib.sha256(self.workspace_path.encode()).hexdigest()
-            for point in points:
+            workspace_hash = self._workspace_hash()
+            # Matrix rows become lists in one batched conversion
+            vectors = vectors_to_lists([point["vector"] for point in points])
+            sparse = self.has_sparse_vectors()
+            k1 = getattr(self._config, "lexical_bm25_k1", 1.2)
+            bm25_b = getattr(self._config, "lexical_bm25_b", 0.75)
+            for point, vector in zip(points, vectors):
                 payload = point.get("payload", {})
                 if payload:
                     payload["workspace_hash"] = workspace_hash
                     payload["workspace_path"] = self.workspace_path
+                if sparse:
+                    # Unnamed dense vector plus the lexical sparse vector
+                    vector = {"": vector, SPARSE_VECTOR_NAME: document_sparse_vector(
+                        (payload or {}).get("codeChunk", ""), k1, bm25_b)}
 
                 point_structs.append(
                     PointStruct(
                         id=point["id"],
-                        vector=point["vector"],
+                        vector=vector,
                         payload=payload
                     )
                 )
 
-            self.client.upsert(
-                collection_name=self.collection_name,
-                points=point_structs
-            )
+            if self.shard_key_mode == "none":
+                self.client.upsert(
+                    collection_name=self.collection_name,
+                    points=point_structs,
+                    wait=wait
+                )
+                return
+            # Custom sharding: every upsert goes to exactly one shard key
+            by_shard: Dict[str, List[PointStruct]] = {}
+            for point, point_struct in zip(points, point_structs):
+                by_shard.setdefault(self.shard_key_for(point), []).append(point_struct)
+            self._ensure_shard_keys(set(by_shard))
+            for shard_key, shard_points in by_shard.items():
+                self.client.upsert(
+                    collection_name=self.collection_name,
+                    points=shard_points,
+                    wait=wait,
+                    shard_key_selector=shard_key
+                )
         except Exception as e:
             error_context = ErrorContext(
                 component="vector_store",
@@ -377,157 +560,384 @@ class QdrantVectorStore:
 
     def _is_payload_valid(self, payload: Dict[str, Any]) -> bool:
         """Check if payload is valid (KiloCode-compatible)."""
-        if not payload:
-            return False
-        # Match KiloCode's expected fields
-        required_fields = ["filePath", "codeChunk", "startLine", "endLine"]
-        return all(field in payload for field in required_fields)
+        return is_payload_valid(payload)
+
+    def _search_scope(self, directory_prefix: Optional[str], filetype_filter: Optional[str],
+                      skip_workspace_filter: bool) -> Optional[Tuple[Filter, Dict[str, Any]]]:
+        """
+        Filter and shard selection of a search.
+
+        Returns:
+            The filter and the ``query_points`` shard arguments, or None when
+            the selected shard does not exist and nothing can match
+        """
+        # Build filter scoped to this workspace, optionally by filetype and directory
+        must_conditions = []
+        shard_key: Optional[str] = None
+        if not skip_workspace_filter or getattr(self, "_tenant_id", None) is not None:
+            workspace_hash = self._target_tenant()
+            must_conditions.append(
+                FieldCondition(
+                    key="workspace_hash",
+                    match=MatchValue(value=workspace_hash)
+                )
+            )
+        if filetype_filter:
+            resolved = resolve_filetype(filetype_filter)
+            must_conditions.append(
+                FieldCondition(
+                    key="filetype",
+                    match=MatchValue(value=resolved)
+                )
+            )
+            if self.shard_key_mode == "language":
+                shard_key = resolved
+        prefix = posixpath.normpath((directory_prefix or ".").replace("\\", "/")).strip("/")
+        if prefix and prefix != ".":
+            self._check_path_segments(list(must_conditions))
+            # pathSegments holds every directory prefix, so one indexed match selects the subtree
+            must_conditions.append(
+                FieldCondition(
+                    key="pathSegments",
+                    match=MatchValue(value=prefix)
+                )
+            )
+            shard_key = shard_key_for_prefix(self.shard_key_mode, prefix) or shard_key
+        if shard_key is not None and shard_key not in self._known_shard_keys():
+            return None
+        search_filter = Filter(must=must_conditions)
+        self.payload_schema.check_filter(search_filter, "search")
+        return search_filter, ({"shard_key_selector": shard_key} if shard_key is not None else {})
+
+    def _check_path_segments(self, scope_conditions: List[Any]) -> None:
+        """
+        Warn, once per store, when the searched points predate the pathSegments field.
+
+        Directory-scoped searches filter on pathSegments, so points written
+        before it existed never match. Files at the workspace root store an
+        empty list; only points below a directory without segments count.
+        """
+        if getattr(self, "_path_segments_checked", False):
+            return
+        self._path_segments_checked = True
+        try:
+            points, _ = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=Filter(must=scope_conditions + [
+                    IsEmptyCondition(is_empty=PayloadField(key="pathSegments"))]),
+                limit=PATH_SEGMENTS_SAMPLE,
+                with_payload=["filePath"],
+                with_vectors=False,
+            )
+        except Exception as e:
+            logger.debug(f"Could not check pathSegments of {self.collection_name}: {e}")
+            return
+        if any("/" in str((point.payload or {}).get("filePath", "")).replace("\\", "/").strip("/")
+               for point in points):
+            logger.warning("%s has points indexed without pathSegments; directory-scoped searches skip them. "
+                           "Re-index the workspace to include them.", self.collection_name)
+
+    def _two_phase(self, qdrant_limit: int, max_results: int) -> bool:
+        """
+        Whether a search ranks on small payload fields and fetches full payloads for the final hits only.
+
+        Only worth it when more candidates are requested than returned;
+        otherwise every candidate would be fetched twice.
+        """
+        return bool(getattr(self._config, "search_two_phase", True)) and qdrant_limit > max_results
+
+    @staticmethod
+    def _candidate_payload(two_phase: bool) -> Any:
+        """``with_payload`` of the search request itself."""
+        return list(RANKING_PAYLOAD_FIELDS) if two_phase else True
+
+    def _rank_responses(self, responses: List[Tuple[Optional[List[Any]], float]], max_results: int,
+                        filetype_filter: Optional[str], profile: RankingProfile, shard_args: Dict[str, Any],
+                        two_phase: bool, started: float, qdrant_seconds: float,
+                        with_vectors: bool = False) -> List[List[Dict[str, Any]]]:
+        """
+        Rank the points of one or more search responses into result lists.
+
+        With ``two_phase`` the points only carry RANKING_PAYLOAD_FIELDS:
+        excludes, weights and the content length threshold are applied to
+        those, and one ``retrieve`` fetches the full payloads of the hits that
+        make the cut. Hits dropped after hydration (invalid payloads, or too
+        short where ``contentLength`` was not stored) are refilled from the
+        next candidates. Transfer sizes and the time spent in Qdrant and
+        locally since ``started`` are recorded in ``last_search_stats``.
+
+        Args:
+            responses: Points and score divisor of each response
+            filetype_filter: Filetype the search was narrowed to, if any
+            profile: Ranking settings of the search
+            shard_args: Shard selection of the search
+            two_phase: Whether the points carry only RANKING_PAYLOAD_FIELDS
+            started: perf_counter() when the search began
+            qdrant_seconds: Time the search request took
+            with_vectors: Whether hits carry their dense ``vector``
+
+        Returns:
+            One result list per response, in order
+        """
+        min_content_len = profile.min_content_length
+        stats = {"two_phase": two_phase, "candidates": 0, "hydrated": 0,
+                 "payload_bytes": 0, "returned": 0, "qdrant_ms": 0.0, "local_ms": 0.0}
+        ranked_lists = []
+        for points, scale in responses:
+            points = points or []
+            stats["candidates"] += len(points)
+            stats["payload_bytes"] += sum(payload_size(point.payload) for point in points)
+            if two_phase:
+                hits = [{"id": point.id, "score": point.score / scale, "payload": point.payload}
+                        for point in points if point.payload is not None]
+                ranked_lists.append(profile.rank(hits, len(hits), filetype_filter))
+            else:
+                hits = []
+                for point in points:
+                    if point.payload is not None and self._is_payload_valid(point.payload):
+                        hits.append(hit_from_payload(point.id, point.score / scale, point.payload))
+                        if with_vectors:
+                            hits[-1]["vector"] = _dense_vector(point.vector)
+                ranked_lists.append(profile.rank(hits, max_results, filetype_filter))
+        if two_phase:
+            ranked_lists = self._hydrate(ranked_lists, max_results, min_content_len, shard_args, stats, with_vectors)
+        stats["returned"] = sum(len(hits) for hits in ranked_lists)
+        qdrant_seconds += stats.pop("retrieve_seconds", 0.0)
+        stats["qdrant_ms"] = round(qdrant_seconds * 1000.0, 3)
+        stats["local_ms"] = round((time.perf_counter() - started - qdrant_seconds) * 1000.0, 3)
+        self.last_search_stats = stats
+        logger.debug(f"Search payload transfer: {stats}")
+        return ranked_lists
+
+    def _hydrate(self, ranked_lists: List[List[Dict[str, Any]]], max_results: int, min_content_len: int,
+                 shard_args: Dict[str, Any], stats: Dict[str, Any],
+                 with_vectors: bool = False) -> List[List[Dict[str, Any]]]:
+        """Replace the ranking payloads of the top ``max_results`` hits of each list with full payloads."""
+        results: List[List[Dict[str, Any]]] = [[] for _ in ranked_lists]
+        positions = [0] * len(ranked_lists)
+        payloads: Dict[Any, Optional[Dict[str, Any]]] = {}
+        vectors: Dict[Any, Optional[List[float]]] = {}
+        while True:
+            windows = []
+            for i, ranked in enumerate(ranked_lists):
+                needed = max_results - len(results[i])
+                windows.append(ranked[positions[i]:positions[i] + needed] if needed > 0 else [])
+            if not any(windows):
+                return results
+            missing = list(dict.fromkeys(h["id"] for window in windows for h in window if h["id"] not in payloads))
+            if missing:
+                retrieve_started = time.perf_counter()
+                records = self.client.retrieve(
+                    collection_name=self.collection_name,
+                    ids=missing,
+                    with_payload=True,
+                    with_vectors=with_vectors,
+                    **shard_args
+                )
+                stats["retrieve_seconds"] = stats.get("retrieve_seconds", 0.0) + time.perf_counter() - retrieve_started
+                payloads.update((point_id, None) for point_id in missing)
+                for record in records:
+                    payloads[record.id] = record.payload
+                    if with_vectors:
+                        vectors[record.id] = _dense_vector(record.vector)
+                    stats["payload_bytes"] += payload_size(record.payload)
+                stats["hydrated"] += len(records)
+            for i, window in enumerate(windows):
+                positions[i] += len(window)
+                for hit in window:
+                    payload = payloads.get(hit["id"])
+                    if payload is None or not self._is_payload_valid(payload):
+                        continue
+                    if min_content_len > 0 and content_length(payload) < min_content_len:
+                        continue
+                    full = hit_from_payload(hit["id"], hit["score"], payload)
+                    full["adjustedScore"] = hit["adjustedScore"]
+                    if with_vectors:
+                        full["vector"] = vectors.get(hit["id"])
+                    results[i].append(full)
 
     def search(self, query_vector: List[float], directory_prefix: Optional[str] = None,
                min_score: float = 0.4, max_results: int = 50,
                filetype_filter: Optional[str] = None,
-               skip_workspace_filter: bool = False) -> List[Dict[str, Any]]:
+               skip_workspace_filter: bool = False, with_vectors: bool = False) -> List[Dict[str, Any]]:
         """
         Search for similar vectors, scoped to the current workspace.
 
         Args:
             query_vector: Vector to search for
-            directory_prefix: Deprecated, kept for backward compatibility
+            directory_prefix: Optional workspace-relative directory; only points below it are returned
             min_score: Minimum score threshold
             max_results: Maximum number of results to return
             filetype_filter: Optional file type/language to narrow results (e.g. "go", "py")
             skip_workspace_filter: If True, search the entire collection (used with --name/collection_name)
+            with_vectors: If True, each hit also carries its dense ``vector``
 
         Returns:
             List of search results
         """
         try:
-            # Build filter scoped to this workspace, optionally by filetype
-            must_conditions = []
-            if not skip_workspace_filter:
-                workspace_hash = hashlib.sha256(self.workspace_path.encode()).hexdigest()
-                must_conditions.append(
-                    FieldCondition(
-                        key="workspace_hash",
-                        match=MatchValue(value=workspace_hash)
-                    )
-                )
-            if filetype_filter:
-                ft = filetype_filter.lower()
-                # Map common language names to file extensions
-                _LANG_TO_EXT = {
-                    "python": "py", "javascript": "js", "typescript": "ts",
-                    "rust": "rs", "golang": "go", "csharp": "cs", "c#": "cs",
-                    "fsharp": "fs", "f#": "fs", "ruby": "rb", "kotlin": "kt",
-                    "java": "java", "swift": "swift", "scala": "scala",
-                    "haskell": "hs", "ocaml": "ml", "elixir": "ex",
-                    "clojure": "clj", "commonlisp": "lisp", "scheme": "scm",
-                    "dart": "dart", "lua": "lua", "julia": "jl",
-                    "perl": "pl", "php": "php", "r": "r", "matlab": "m",
-                    "zig": "zig", "nim": "nim", "crystal": "cr",
-                    "markdown": "md", "yaml": "yaml", "toml": "toml",
-                    "dockerfile": "dockerfile", "makefile": "make",
-                    "cmake": "cmake", "sql": "sql", "html": "html", "css": "css",
-                    "bash": "sh", "shell": "sh", "zsh": "zsh", "fish": "fish",
-                    "powershell": "ps1", "batch": "bat",
-                }
-                resolved = _LANG_TO_EXT.get(ft, ft)
-                must_conditions.append(
-                    FieldCondition(
-                        key="filetype",
-                        match=MatchValue(value=resolved)
-                    )
-                )
-            search_filter = Filter(must=must_conditions)
+            started = time.perf_counter()
+            scope = self._search_scope(directory_prefix, filetype_filter, skip_workspace_filter)
+            if scope is None:
+                # Nothing was ever written to that shard
+                return []
+            search_filter, shard_args = scope
 
-            # Determine min_content_len from config file (needed before search for Qdrant limit)
-            min_content_len = 0
-            try:
-                import json as _json
-                ws = getattr(self._config, "workspace_path", None) or "."
-                cfg_dir = ws if os.path.isdir(ws) else os.path.dirname(ws)
-                cfg_paths = [
-                    os.path.join(cfg_dir, "rust_optimized_config.json"),
-                    os.path.join(cfg_dir, "code_index.json"),
-                    os.path.join(os.getcwd(), "rust_optimized_config.json"),
-                    os.path.join(os.getcwd(), "code_index.json"),
-                ]
-                for _cp in cfg_paths:
-                    if os.path.exists(_cp):
-                        with open(_cp) as _f:
-                            _raw = _json.load(_f)
-                        _block = _raw.get("block_extraction", {})
-                        if isinstance(_block, dict):
-                            _mcl = _block.get("min_content_length", {})
-                            if isinstance(_mcl, dict):
-                                min_content_len = _mcl.get("default", 0)
-                        break
-            except Exception:
-                pass
+            # Ranking settings, including min_content_len (needed before search for Qdrant limit)
+            profile = RankingProfile.for_config(self._config)
+            min_content_len = profile.min_content_length
 
             # Perform search - use larger limit when filtering by content length
             qdrant_limit = max(max_results, 200) if min_content_len > 0 else max_results
+            two_phase = self._two_phase(qdrant_limit, max_results)
+            queried = time.perf_counter()
             results = self.client.query_points(
                 collection_name=self.collection_name,
-                query=query_vector,
+                query=vector_to_list(query_vector),
                 query_filter=search_filter,
                 limit=qdrant_limit,
                 score_threshold=min_score,
-                with_payload=True
+                with_payload=self._candidate_payload(two_phase),
+                with_vectors=with_vectors and not two_phase,
+                search_params=build_search_params(self._config),
+                **shard_args
             )
 
-            if not results or not results.points:
+            # Apply excludes, min content length filter and adjusted scores, then truncate
+            qdrant_seconds = time.perf_counter() - queried
+            return self._rank_responses([(results.points if results else [], 1.0)], max_results, filetype_filter,
+                                        profile, shard_args, two_phase, started, qdrant_seconds, with_vectors)[0]
+        except Exception as e:
+            raise Exception(f"Failed to search: {e}")
+
+    def hybrid_search(self, query_vector: List[float], query_text: str,
+                      directory_prefix: Optional[str] = None, min_score: float = 0.4,
+                      max_results: int = 50, filetype_filter: Optional[str] = None,
+                      skip_workspace_filter: bool = False, with_vectors: bool = False) -> List[Dict[str, Any]]:
+        """
+        Dense and sparse search fused by Qdrant in one request.
+
+        Requires has_sparse_vectors(). The dense leg keeps ``min_score``; the
+        fused score is scaled to 0-1 before the search weights are applied.
+
+        Args:
+            query_vector: Embedding of the query
+            query_text: Query text the sparse vector is built from
+            Other arguments as for search()
+
+        Returns:
+            List of search results
+        """
+        sparse_query = query_sparse_vector(query_text)
+        if sparse_query is None:
+            # No index terms in the query; only the dense leg can match
+            return self.search(query_vector, directory_prefix, min_score, max_results,
+                               filetype_filter, skip_workspace_filter, with_vectors)
+        try:
+            started = time.perf_counter()
+            scope = self._search_scope(directory_prefix, filetype_filter, skip_workspace_filter)
+            if scope is None:
                 return []
+            search_filter, shard_args = scope
+            profile = RankingProfile.for_config(self._config)
+            min_content_len = profile.min_content_length
+            qdrant_limit = max(max_results, 200) if min_content_len > 0 else max_results
+            two_phase = self._two_phase(qdrant_limit, max_results)
+            queried = time.perf_counter()
+            results = self.client.query_points(
+                collection_name=self.collection_name,
+                prefetch=[
+                    Prefetch(query=vector_to_list(query_vector), filter=search_filter, limit=qdrant_limit,
+                             score_threshold=min_score, params=build_search_params(self._config)),
+                    Prefetch(query=sparse_query, using=SPARSE_VECTOR_NAME, filter=search_filter,
+                             limit=qdrant_limit),
+                ],
+                query=build_fusion_query(self._config),
+                query_filter=search_filter,
+                limit=qdrant_limit,
+                with_payload=self._candidate_payload(two_phase),
+                with_vectors=with_vectors and not two_phase,
+                **shard_args
+            )
+            qdrant_seconds = time.perf_counter() - queried
+            return self._rank_responses([(results.points if results else [], fused_score_scale(self._config))],
+                                        max_results, filetype_filter, profile, shard_args, two_phase, started,
+                                        qdrant_seconds, with_vectors)[0]
+        except Exception as e:
+            raise Exception(f"Failed to run hybrid search: {e}")
 
-            # Convert results to dictionary format (KiloCode-compatible)
-            hits = []
-            for result in results.points:
-                payload = result.payload
-                if payload is None or not self._is_payload_valid(payload):
-                    continue
-                hits.append({
-                    "id": result.id,
-                    "score": result.score,
-                    "payload": {
-                        "filePath": payload.get("filePath", ""),
-                        "codeChunk": payload.get("codeChunk", ""),
-                        "startLine": payload.get("startLine", 0),
-                        "endLine": payload.get("endLine", 0),
-                        "type": payload.get("type", "")
-                    }
-                })
-
-            # Apply excludes, min content length filter, and compute adjusted scores
-
-            filtered_hits = []
-            for h in hits:
-                fp = h["payload"].get("filePath", "")
-                if self._exclude_match(fp):
-                    continue
-                chunk = h["payload"].get("codeChunk", "")
-                if min_content_len > 0 and len(chunk.strip()) < min_content_len:
+    def search_batch(self, query_vectors: List[List[float]], directory_prefix: Optional[str] = None,
+                     min_score: float = 0.4, max_results: int = 50,
+                     filetype_filter: Optional[str] = None, skip_workspace_filter: bool = False,
+                     query_texts: Optional[List[str]] = None,
+                     with_vectors: bool = False) -> List[List[Dict[str, Any]]]:
+        """
+        Run several searches in one ``query_batch_points`` request.
+
+        All queries share the scope, thresholds and ranking of search(). With
+        ``query_texts`` (collections with sparse vectors only) each query is
+        fused dense + sparse like hybrid_search().
+
+        Args:
+            query_vectors: One vector per query
+            query_texts: Optional query texts, parallel to ``query_vectors``
+            Other arguments as for search()
+
+        Returns:
+            One result list per query vector, in order
+        """
+        if not query_vectors:
+            return []
+        try:
+            started = time.perf_counter()
+            scope = self._search_scope(directory_prefix, filetype_filter, skip_workspace_filter)
+            if scope is None:
+                return [[] for _ in query_vectors]
+            search_filter, shard_args = scope
+            shard_key = shard_args.get("shard_key_selector")
+            profile = RankingProfile.for_config(self._config)
+            min_content_len = profile.min_content_length
+            qdrant_limit = max(max_results, 200) if min_content_len > 0 else max_results
+            params = build_search_params(self._config)
+            two_phase = self._two_phase(qdrant_limit, max_results)
+            with_payload = self._candidate_payload(two_phase)
+            with_vector = with_vectors and not two_phase
+
+            requests, scales = [], []
+            for i, query_vector in enumerate(query_vectors):
+                dense = vector_to_list(query_vector)
+                sparse_query = query_sparse_vector(query_texts[i]) if query_texts is not None else None
+                if sparse_query is None:
+                    requests.append(QueryRequest(query=dense, filter=search_filter, limit=qdrant_limit,
+                                                 score_threshold=min_score, params=params, with_payload=with_payload,
+                                                 with_vector=with_vector,
+                                                 shard_key=shard_key))
+                    scales.append(1.0)
                     continue
-                file_w = self._filetype_weight(fp)
-                path_w = self._path_weight(fp)
-                if not filetype_filter:
-                    lang_w = self._language_weight(h["payload"].get("type", ""))
-                else:
-                    lang_w = 1.0  # User already narrowed by filetype
-                base = h.get("score", 0.0) or 0.0
-                adjusted = base * file_w * path_w * lang_w
-                h["adjustedScore"] = adjusted
-                filtered_hits.append(h)
-
-            # Stable sort: primarily by adjustedScore, fallback by base score
-            filtered_hits.sort(
-                key=lambda x: (x.get("adjustedScore", x.get("score", 0.0)), x.get("score", 0.0)),
-                reverse=True
-            )
+                requests.append(QueryRequest(
+                    prefetch=[
+                        Prefetch(query=dense, filter=search_filter, limit=qdrant_limit,
+                                 score_threshold=min_score, params=params),
+                        Prefetch(query=sparse_query, using=SPARSE_VECTOR_NAME, filter=search_filter,
+                                 limit=qdrant_limit),
+                    ],
+                    query=build_fusion_query(self._config),
+                    filter=search_filter,
+                    limit=qdrant_limit,
+                    with_payload=with_payload,
+                    with_vector=with_vector,
+                    shard_key=shard_key,
+                ))
+                scales.append(fused_score_scale(self._config))
 
-            # Truncate to requested max_results
-            return filtered_hits[:max_results]
+            queried = time.perf_counter()
+            responses = self.client.query_batch_points(collection_name=self.collection_name, requests=requests)
+            qdrant_seconds = time.perf_counter() - queried
+            return self._rank_responses([(response.points, scale) for response, scale in zip(responses, scales)],
+                                        max_results, filetype_filter, profile, shard_args, two_phase, started,
+                                        qdrant_seconds, with_vectors)
         except Exception as e:
-            raise Exception(f"Failed to search: {e}")
+            raise Exception(f"Failed to run batch search: {e}")
 
     def delete_points_by_file_path(self, file_path: str) -> None:
         """
@@ -537,7 +947,7 @@ class QdrantVectorStore:
             file_path: Path of the file to delete points for
         """
         try:
-            workspace_hash = hashlib.sha256(self.workspace_path.encode()).hexdigest()
+            workspace_hash = self._workspace_hash()
             self.client.delete(
                 collection_name=self.collection_name,
                 points_selector=Filter(
@@ -562,12 +972,131 @@ class QdrantVectorStore:
             error_response = error_handler.handle_error(e, error_context, ErrorCategory.DATABASE, ErrorSeverity.MEDIUM)
             raise Exception(f"Failed to delete points by file path: {error_response.message}")
 
+    def delete_points(self, point_ids: List[Any]) -> None:
+        """
+        Delete points by ID, without a filter scan.
+
+        Args:
+            point_ids: IDs of the points to delete
+        """
+        if not point_ids:
+            return
+        try:
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=PointIdsList(points=list(point_ids))
+            )
+        except Exception as e:
+            error_context = ErrorContext(
+                component="vector_store",
+                operation="delete_points",
+                additional_data={"collection_name": self.collection_name, "points_count": len(point_ids)}
+            )
+            error_response = error_handler.handle_error(e, error_context, ErrorCategory.DATABASE, ErrorSeverity.MEDIUM)
+            raise Exception(f"Failed to delete points: {error_response.message}")
+
+    def delete_points_by_file_paths(self, file_paths: List[str]) -> None:
+        """
+        Delete the points of several files with a single filter delete.
+
+        Args:
+            file_paths: Paths of the files to delete points for
+        """
+        if not file_paths:
+            return
+        try:
+            workspace_hash = self._workspace_hash()
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=Filter(
+                    must=[
+                        FieldCondition(
+                            key="workspace_hash",
+                            match=MatchValue(value=workspace_hash)
+                        ),
+                        FieldCondition(
+                            key="filePath",
+                            match=MatchAny(any=list(file_paths))
+                        ),
+                    ]
+                )
+            )
+        except Exception as e:
+            error_context = ErrorContext(
+                component="vector_store",
+                operation="delete_points_by_file_paths",
+                additional_data={"collection_name": self.collection_name, "files_count": len(file_paths)}
+            )
+            error_response = error_handler.handle_error(e, error_context, ErrorCategory.DATABASE, ErrorSeverity.MEDIUM)
+            raise Exception(f"Failed to delete points by file paths: {error_response.message}")
+
+    def set_payload(self, point_ids: List[Any], payload: Dict[str, Any]) -> None:
+        """
+        Merge payload fields into existing points.
+
+        Args:
+            point_ids: IDs of the points to update
+            payload: Fields to set (existing keys are overwritten)
+        """
+        if not point_ids:
+            return
+        try:
+            self.client.set_payload(
+                collection_name=self.collection_name,
+                payload=payload,
+                points=list(point_ids)
+            )
+        except Exception as e:
+            error_context = ErrorContext(
+                component="vector_store",
+                operation="set_payload",
+                additional_data={"collection_name": self.collection_name, "points_count": len(point_ids)}
+            )
+            error_response = error_handler.handle_error(e, error_context, ErrorCategory.DATABASE, ErrorSeverity.MEDIUM)
+            raise Exception(f"Failed to set payload: {error_response.message}")
+
+    def get_cluster_members(self, cluster_ids: List[str], limit: int = 256) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Fetch the locations of every stored point in the given duplicate clusters.
+
+        Args:
+            cluster_ids: Cluster ids recorded in the ``clusterId`` payload field
+            limit: Maximum number of points to scan
+
+        Returns:
+            Mapping of cluster id to ``{"filePath", "startLine", "endLine"}`` entries
+        """
+        if not cluster_ids:
+            return {}
+        workspace_hash = self._workspace_hash()
+        points, _ = self.client.scroll(
+            collection_name=self.collection_name,
+            scroll_filter=Filter(
+                must=[
+                    FieldCondition(key="workspace_hash", match=MatchValue(value=workspace_hash)),
+                    FieldCondition(key="clusterId", match=MatchAny(any=list(cluster_ids))),
+                ]
+            ),
+            limit=limit,
+            with_payload=["clusterId", "filePath", "startLine", "endLine"],
+            with_vectors=False,
+        )
+        members: Dict[str, List[Dict[str, Any]]] = {}
+        for point in points:
+            payload = point.payload or {}
+            members.setdefault(payload.get("clusterId", ""), []).append({
+                "filePath": payload.get("filePath", ""),
+                "startLine": payload.get("startLine", 0),
+                "endLine": payload.get("endLine", 0),
+            })
+        return members
+
     def clear_collection(self) -> None:
-        """Clear all points from collection."""
+        """Clear all points from collection (only this workspace's in a shared collection)."""
         try:
             self.client.delete(
                 collection_name=self.collection_name,
-                points_selector=Filter()
+                points_selector=self._tenant_filter() if self.tenant_mode else Filter()
             )
         except Exception as e:
             error_context = ErrorContext(
@@ -579,9 +1108,13 @@ class QdrantVectorStore:
             raise Exception(f"Failed to clear collection: {error_response.message}")
 
     def delete_collection(self) -> None:
-        """Delete the entire collection."""
+        """Delete the entire collection; in a shared collection, only this workspace's points."""
+        if self.tenant_mode:
+            self.clear_collection()
+            return
         try:
             self.client.delete_collection(collection_name=self.collection_name)
+            self._sparse_vectors = None
         except Exception as e:
             raise Exception(f"Failed to delete collection: {e}")
 
@@ -593,3 +1126,16 @@ class QdrantVectorStore:
         except Exception:
             return False
 
+
+
+# Values of the ``vector_store_backend`` setting
+VECTOR_STORE_BACKENDS = ("qdrant", "flat")
+
+
+def create_vector_store(config: Config) -> Any:
+    """Return the vector store selected by ``config.vector_store_backend``."""
+    backend = getattr(config, "vector_store_backend", "qdrant")
+    if backend == "flat":
+        from code_index.flat_vector_store import FlatVectorStore
+        return FlatVectorStore(config)
+    return QdrantVectorStore(config)
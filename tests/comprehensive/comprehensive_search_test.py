@@ -26,6 +26,32 @@ from code_index.vector_store import QdrantVectorStore
 
 class ComprehensiveSearchTester:
     """Comprehensive test suite for code-index search functionality."""
+
+    BASIC_QUERIES = [
+        "search",
+        "function",
+        "class",
+        "test",
+        "import",
+        "export",
+        "return",
+        "def",
+        "let",
+        "const"
+    ]
+
+    SEMANTIC_QUERIES = [
+        "authentication",
+        "database",
+        "API endpoint",
+        "configuration",
+        "error handling",
+        "logging",
+        "file operations",
+        "network request",
+        "user interface",
+        "data validation"
+    ]
     
     def __init__(self, config_path: str):
         """Initialize the tester with configuration."""
@@ -69,18 +95,7 @@ class ComprehensiveSearchTester:
         """Test basic search queries."""
         print("\n=== Testing Basic Search Queries ===")
         
-        basic_queries = [
-            "search",
-            "function",
-            "class", 
-            "test",
-            "import",
-            "export",
-            "return",
-            "def",
-            "let",
-            "const"
-        ]
+        basic_queries = self.BASIC_QUERIES
         
         results = []
         for query in basic_queries:
@@ -98,18 +113,7 @@ class ComprehensiveSearchTester:
         """Test semantic code-specific queries."""
         print("\n=== Testing Semantic Code-Specific Queries ===")
         
-        semantic_queries = [
-            "authentication",
-            "database",
-            "API endpoint",
-            "configuration",
-            "error handling",
-            "logging",
-            "file operations",
-            "network request",
-            "user interface",
-            "data validation"
-        ]
+        semantic_queries = self.SEMANTIC_QUERIES
         
         results = []
         for query in semantic_queries:
@@ -0,0 +1,90 @@
+"""Tests for deferring HNSW indexing while a collection is bulk-loaded."""
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from qdrant_client.models import CollectionStatus
+
+from code_index.config import Config
+from code_index.services.shared.indexing_orchestrator import IndexingOrchestrator
+from code_index.vector_store import QdrantVectorStore
+
+
+def _store(points_count=0, statuses=(CollectionStatus.GREEN,), threshold=20000):
+    store = QdrantVectorStore.__new__(QdrantVectorStore)
+    store.collection_name = "repo"
+    infos = [
+        SimpleNamespace(
+            points_count=points_count,
+            status=status,
+            config=SimpleNamespace(optimizer_config=SimpleNamespace(indexing_threshold=threshold)),
+        )
+        for status in statuses
+    ]
+    store.client = Mock()
+    store.client.get_collection.side_effect = infos + [infos[-1]] * 10
+    return store
+
+
+def test_begin_bulk_load_disables_indexing_only_on_empty_collection():
+    store = _store(points_count=0, threshold=15000)
+    state = store.begin_bulk_load()
+    assert state == {"indexing_threshold": 15000}
+    optimizers = store.client.update_collection.call_args.kwargs["optimizers_config"]
+    assert optimizers.indexing_threshold == 0
+
+    store = _store(points_count=42)
+    assert store.begin_bulk_load() is None
+    store.client.update_collection.assert_not_called()
+
+
+def test_end_bulk_load_restores_threshold_and_waits_for_green():
+    store = _store(statuses=(CollectionStatus.YELLOW, CollectionStatus.YELLOW, CollectionStatus.GREEN))
+    assert store.end_bulk_load({"indexing_threshold": 15000}, poll_interval_seconds=0) is True
+    optimizers = store.client.update_collection.call_args.kwargs["optimizers_config"]
+    assert optimizers.indexing_threshold == 15000
+    assert store.client.get_collection.call_count == 3
+
+    store = _store(statuses=(CollectionStatus.YELLOW,))
+    assert store.end_bulk_load({"indexing_threshold": None}, timeout_seconds=0) is False
+    optimizers = store.client.update_collection.call_args.kwargs["optimizers_config"]
+    assert optimizers.indexing_threshold == 20000
+
+
+def test_orchestrator_reports_unfinished_rebuild():
+    orchestrator = IndexingOrchestrator()
+    config = Config()
+    vector_store = Mock()
+    warnings = []
+
+    assert orchestrator._begin_bulk_load(vector_store, config, warnings) is None
+    vector_store.begin_bulk_load.assert_not_called()
+
+    config.qdrant_bulk_load = True
+    config.qdrant_bulk_load_wait_seconds = 5
+    vector_store.begin_bulk_load.return_value = {"indexing_threshold": 20000}
+    vector_store.end_bulk_load.return_value = False
+    state = orchestrator._begin_bulk_load(vector_store, config, warnings)
+    metrics = orchestrator._end_bulk_load(vector_store, state, config, warnings)
+
+    assert vector_store.end_bulk_load.call_args.kwargs["timeout_seconds"] == 5
+    assert metrics["optimized"] is False
+    assert warnings == ["Collection index still building after 5s; searches may be slower until it finishes"]
+
+
+def test_rerun_after_interrupted_bulk_load_re_enables_indexing():
+    # The crashed run left indexing off and the spool replay has already written points
+    store = _store(points_count=42, threshold=0)
+    assert store.begin_bulk_load() is None
+    optimizers = store.client.update_collection.call_args.kwargs["optimizers_config"]
+    assert optimizers.indexing_threshold == 20000
+
+    # If the collection is still empty the zero is not what gets restored
+    store = _store(points_count=0, threshold=0)
+    state = store.begin_bulk_load()
+    assert state == {"indexing_threshold": None}
+    assert store.end_bulk_load(state) is True
+    optimizers = store.client.update_collection.call_args.kwargs["optimizers_config"]
+    assert optimizers.indexing_threshold == 20000
+    store.client.update_collection.reset_mock()
+    store.end_bulk_load({"indexing_threshold": 0})
+    assert store.client.update_collection.call_args.kwargs["optimizers_config"].indexing_threshold == 20000
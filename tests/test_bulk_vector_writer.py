@@ -0,0 +1,163 @@
+"""Tests for cross-file, parallel Qdrant ingestion."""
+import threading
+from unittest.mock import Mock
+
+import numpy as np
+
+from code_index.config import Config
+from code_index.config_service import ConfigurationService
+from code_index.models import CodeBlock
+from code_index.services.batch.bulk_vector_writer import BulkVectorWriter
+from code_index.services.treesitter.file_processor import FileProcessor
+
+
+class RecordingStore:
+    """Vector store double that records calls and can fail the first uploads."""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def delete_points_by_file_paths(self, file_paths):
+        with self.lock:
+            self.calls.append(("delete", sorted(file_paths)))
+
+    def upsert_points(self, points, wait=True):
+        with self.lock:
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("qdrant unavailable")
+            self.calls.append(("upsert", [p["id"] for p in points], wait))
+
+    def upserts(self):
+        return [call for call in self.calls if call[0] == "upsert"]
+
+
+def _points(prefix, count):
+    return [{"id": f"{prefix}-{i}", "vector": [0.0], "payload": {}} for i in range(count)]
+
+
+def test_points_from_many_files_share_batches_and_end_with_a_barrier():
+    store = RecordingStore()
+    writer = BulkVectorWriter(store, batch_size=4, parallelism=2)
+    committed = []
+    for name in ("a", "b", "c"):
+        writer.add(name, _points(name, 3), on_commit=lambda name=name: committed.append(name))
+
+    stats = writer.close()
+
+    upserts = store.upserts()
+    assert [len(call[1]) for call in upserts] == [4, 4, 1]
+    assert [call[2] for call in upserts] == [False, False, True]
+    # Each file's stale points are removed once, before its first upload
+    deleted = [path for call in store.calls if call[0] == "delete" for path in call[1]]
+    assert sorted(deleted) == ["a", "b", "c"]
+    assert sorted(committed) == ["a", "b", "c"]
+    assert stats["points_written"] == 9
+    assert stats["files_committed"] == 3
+
+
+def test_file_is_not_committed_until_its_last_batch_is_written():
+    store = RecordingStore()
+    writer = BulkVectorWriter(store, batch_size=4)
+    committed = []
+    writer.add("big", _points("big", 6), on_commit=lambda: committed.append("big"))
+    writer._wait_for_uploads()
+    # Two of its points are still buffered
+    assert committed == []
+    writer.close()
+    assert committed == ["big"]
+
+
+def test_failed_batch_is_retried_then_reported_without_commit():
+    store = RecordingStore(failures=1)
+    writer = BulkVectorWriter(store, batch_size=2, max_retries=1, retry_backoff_seconds=0)
+    writer.add("ok", _points("ok", 2))
+    stats = writer.close()
+    assert stats["retries"] == 1
+    assert stats["failed_batches"] == 0
+
+    store = RecordingStore(failures=10)
+    writer = BulkVectorWriter(store, batch_size=2, max_retries=2, retry_backoff_seconds=0)
+    committed, errors = [], []
+    writer.add("bad", _points("bad", 2), on_commit=lambda: committed.append("bad"))
+    stats = writer.close(errors)
+    assert committed == []
+    assert stats["failed_files"] == ["bad"]
+    assert errors == ["Failed to store vectors for bad: qdrant unavailable"]
+
+
+def test_barrier_resends_last_batch_when_buffer_is_empty():
+    store = RecordingStore()
+    writer = BulkVectorWriter(store, batch_size=2)
+    writer.add("a", _points("a", 2))
+    writer.close()
+    assert [call[2] for call in store.upserts()] == [False, True]
+    assert store.upserts()[0][1] == store.upserts()[1][1]
+
+
+def test_from_config_is_opt_in():
+    config = Config()
+    assert BulkVectorWriter.from_config(config, Mock()) is None
+    assert BulkVectorWriter.from_config(Mock(), Mock()) is None
+    config.qdrant_bulk_write = True
+    config.qdrant_write_batch_size = 64
+    writer = BulkVectorWriter.from_config(config, Mock())
+    assert writer.batch_size == 64
+
+    config.qdrant_write_parallelism = 0
+    errors = ConfigurationService()._validate_config_values(config)
+    assert "qdrant_write_parallelism must be a positive integer" in errors
+
+
+def test_file_processor_defers_cache_update_to_bulk_writer(tmp_path):
+    source = tmp_path / "util.py"
+    source.write_text("placeholder\n")
+    config = Config()
+    config.workspace_path = str(tmp_path)
+    config.qdrant_bulk_write = True
+    config.qdrant_write_batch_size = 100
+
+    blocks = [CodeBlock(file_path=str(source), identifier="f", type="function", start_line=1,
+                        end_line=1, content="def f(): return 1", file_hash="h", segment_hash="s")]
+    parser = Mock()
+    parser.parse_file.return_value = blocks
+    embedder = Mock()
+    embedder.model_identifier = "nomic-embed-text"
+    embedder.create_embeddings.return_value = {"embeddings": np.ones((1, 4), dtype=np.float32)}
+    vector_store = Mock()
+    cache_manager = Mock()
+    cache_manager.get_hash.return_value = None
+
+    processor = FileProcessor(config=config, parser=parser, embedder=embedder,
+                              vector_store=vector_store, cache_manager=cache_manager)
+    assert processor.process_single_file(str(source), config)["success"] is True
+    vector_store.upsert_points.assert_not_called()
+    cache_manager.update_hash.assert_not_called()
+
+    stats = processor.flush_vectors([])
+    assert stats["points_written"] == 1
+    vector_store.delete_points_by_file_paths.assert_called_once_with(["util.py"])
+    assert vector_store.upsert_points.call_args.kwargs["wait"] is True
+    cache_manager.update_hash.assert_called_once()
+
+
+def test_every_batch_waits_when_writes_span_shards():
+    config = Config()
+    config.qdrant_bulk_write = True
+    assert BulkVectorWriter.from_config(config, Mock()).wait_every_batch is False
+    config.qdrant_shard_number = 3
+    assert BulkVectorWriter.from_config(config, Mock()).wait_every_batch is True
+    config.qdrant_url = "local:/tmp/qdrant"
+    assert BulkVectorWriter.from_config(config, Mock()).wait_every_batch is False
+
+    # No closing re-send: each upload was confirmed on every shard it touched
+    store = RecordingStore()
+    writer = BulkVectorWriter(store, batch_size=2, parallelism=2, wait_every_batch=True)
+    committed = []
+    writer.add("a", _points("a", 3), on_commit=lambda: committed.append("a"))
+    writer.add("b", _points("b", 1), on_commit=lambda: committed.append("b"))
+    stats = writer.close()
+    assert [(len(call[1]), call[2]) for call in store.upserts()] == [(2, True), (2, True)]
+    assert sorted(committed) == ["a", "b"] and stats["points_written"] == 4
@@ -0,0 +1,191 @@
+"""Tests for the call and import graph and its callers/callees/importers queries."""
+import asyncio
+import os
+from unittest.mock import Mock
+
+import pytest
+
+from code_index.code_graph import CodeGraph, FileFacts, _module_stems, resolve_module
+from code_index.config import Config
+from code_index.config_service import ConfigurationService
+from code_index.mcp_server.tools import graph_tool
+from code_index.models import CodeBlock
+from code_index.services.shared.file_processing_helpers import graph_facts
+from code_index.services.treesitter.file_processor import FileProcessor
+from code_index.services.treesitter.relationship_extractor import RelationshipBlockExtractor, import_targets
+from code_index.symbol_index import SymbolEntry
+
+FACTS = {
+    "src/app.py": FileFacts([SymbolEntry("App", "class", 1, 20), SymbolEntry("run", "function", 2, 10, "App")],
+                            [("App.run", "load_config"), ("App.run", "print")], ["src.config"]),
+    "src/config.py": FileFacts([SymbolEntry("load_config", "function", 1, 5), SymbolEntry("parse", "function", 6, 9)],
+                               [("load_config", "parse"), ("parse", "read_text")], ["os"]),
+    "src/cli.py": FileFacts([SymbolEntry("main", "function", 1, 4)], [("main", "run")], [".app"]),
+    "lib/util/index.ts": FileFacts([SymbolEntry("slugify", "function", 1, 3)]),
+    "lib/main.ts": FileFacts([], [("", "slugify")], ["./util"]),
+}
+
+
+class FakeNode:
+    """Minimal tree-sitter node: type, byte range, rows, parent and named fields."""
+
+    def __init__(self, node_type, start, end, row=0, end_row=0, **fields):
+        self.type = node_type
+        self.start_byte, self.end_byte = start, end
+        self.start_point, self.end_point = (row, 0), (end_row, 0)
+        self.parent = None
+        self.fields = fields
+        for child in fields.values():
+            child.parent = self
+
+    def child_by_field_name(self, name):
+        return self.fields.get(name)
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    root = tmp_path / "ws"
+    for rel_path in FACTS:
+        (root / rel_path).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel_path).write_text("# source\n")
+    config = Config()
+    config.workspace_path = str(root)
+    config.cache_dir = str(tmp_path / "cache")
+    config.code_graph_enabled = True
+    return config
+
+
+def _build(config):
+    graph = CodeGraph.for_workspace(config)
+    for rel_path, facts in FACTS.items():
+        graph.update_file(rel_path, "h1", facts)
+    assert graph.save() is True
+    return graph
+
+
+def _names(results):
+    return [(r["name"], r["depth"]) for r in results]
+
+
+def test_extractor_records_calls_imports_and_name_captured_definitions():
+    text = "class Reader:\n    def parse(self, path):\n        return self.load(path)\n"
+    extractor = RelationshipBlockExtractor(schema_service=Mock())
+    call_start = text.index("self.load")
+    call = FakeNode("call", call_start, call_start + len("self.load(path)"), 2, 2,
+                    function=FakeNode("attribute", call_start, call_start + 9))
+    name = FakeNode("identifier", text.index("parse"), text.index("parse") + 5, 1, 1)
+    method = FakeNode("function_definition", text.index("def"), len(text), 1, 2, name=name, body=call)
+    FakeNode("class_definition", 0, len(text), 0, 2, name=FakeNode("identifier", 6, 12), body=method)
+
+    # Queries capture only the name of a definition; the block still knows its extent and scope
+    definition = extractor._node_to_block(name, "function", text, "a.py", "h")
+    assert (definition.start_line, definition.end_line) == (2, 2)
+    assert (definition.metadata["symbol"], definition.metadata["scope"]) == ("parse", "Reader")
+    assert definition.metadata["symbol_lines"] == [2, 3]
+
+    calls = extractor._node_to_block(call, "call", text, "a.py", "h")
+    assert (calls.metadata["callee"], calls.metadata["caller"]) == ("load", "Reader.parse")
+
+    assert import_targets("from ..models import CodeBlock") == ["..models"]
+    assert import_targets("import os, sys.path as p") == ["os", "sys.path"]
+    assert import_targets("import { x } from './util/x.js';") == ["./util/x.js"]
+    assert import_targets("use crate::store::Vector;") == ["crate::store::Vector"]
+    assert import_targets('#include "reader.h"') == ["reader.h"]
+
+
+def test_module_resolution():
+    names = ["src/app.py", "src/pkg/__init__.py", "src/pkg/io.py", "lib/util/index.ts", "src/store.rs"]
+    stems = _module_stems(names)
+    assert resolve_module(".io", "src/pkg/__init__.py", stems) == 2
+    assert resolve_module("..app", "src/pkg/io.py", stems) == 0
+    assert resolve_module("pkg", "src/app.py", stems) == 1
+    assert resolve_module("src.pkg.io", "tests/test_io.py", stems) == 2
+    assert resolve_module("pkg.io", "tests/test_io.py", stems) == 2
+    assert resolve_module("../lib/util", "web/main.ts", stems) == 3
+    assert resolve_module("../vendor/util", "web/main.ts", stems) is None
+    assert resolve_module("./util", "lib/main.ts", stems) == 3
+    assert resolve_module("crate::store", "src/app.rs", stems) == 4
+    assert resolve_module("os", "src/app.py", stems) is None
+
+
+def test_callers_callees_and_importers_with_depth(workspace):
+    _build(workspace)
+    graph = CodeGraph.for_workspace(workspace)
+
+    assert _names(graph.query("callers", "parse")) == [("load_config", 1)]
+    assert _names(graph.query("callers", "parse", depth=3)) == [("load_config", 1), ("run", 2), ("main", 3)]
+    assert _names(graph.query("callees", "App.run")) == [("load_config", 1), ("print", 1)]
+    assert graph.query("callees", "App.run")[1]["kind"] == "external"
+    assert _names(graph.query("callees", "main", depth=3)) == [("run", 1), ("load_config", 2), ("print", 2),
+                                                                ("parse", 3)]
+    assert graph.query("callees", "main", depth=3, limit=2)[-1]["name"] == "load_config"
+    assert _names(graph.query("callers", "print")) == [("run", 1)]
+    # Top-level calls belong to the file
+    assert _names(graph.query("callers", "slugify")) == [("lib/main.ts", 1)]
+
+    assert _names(graph.query("importers", "src/config.py", depth=2)) == [("src/app.py", 1), ("src/cli.py", 2)]
+    assert _names(graph.query("importers", "os")) == [("src/config.py", 1)]
+    assert _names(graph.query("importers", "lib/util")) == [("lib/main.ts", 1)]
+    located = graph.query("callers", "load_config")[0]
+    assert (located["filePath"], located["startLine"], located["endLine"], located["scope"]) == ("src/app.py", 2, 10, "App")
+    assert graph.query("callers", "missing") == []
+    with pytest.raises(ValueError):
+        graph.query("subclasses", "App")
+
+
+def test_incremental_updates_and_file_processor(workspace):
+    graph = _build(workspace)
+    graph.update_file("src/config.py", "h2", FileFacts([SymbolEntry("load_config", "function", 1, 5)], [], []))
+    os.remove(os.path.join(workspace.workspace_path, "src/cli.py"))
+    assert graph.prune_missing() == 1
+    assert graph.save() is True
+
+    reopened = CodeGraph.for_workspace(workspace)
+    assert reopened.has_file("src/config.py", "h2") and not reopened.has_file("src/cli.py", "h1")
+    assert reopened.query("callers", "parse") == []
+    assert _names(reopened.query("callers", "load_config", depth=5)) == [("run", 1)]
+
+    app = f"{workspace.workspace_path}/src/app.py"
+    parser = Mock()
+    parser.parse_file.return_value = [
+        CodeBlock(app, "run", "function", 2, 2, "run", "h", "s",
+                  metadata={"symbol": "run", "scope": "App", "symbol_lines": [2, 12]}),
+        CodeBlock(app, "parse", "call", 3, 3, "parse", "h", "s", metadata={"callee": "parse", "caller": "App.run"}),
+        CodeBlock(app, "import os", "import", 1, 1, "import os", "h", "s", metadata={"imports": ["os"]}),
+    ]
+    facts = graph_facts(parser.parse_file.return_value)
+    assert (facts.definitions[0].end_line, facts.calls, facts.imports) == (12, [("App.run", "parse")], ["os"])
+
+    cache_manager = Mock()
+    processor = FileProcessor(workspace, parser=parser, embedder=Mock(), vector_store=Mock(),
+                              cache_manager=cache_manager, path_utils=None)
+    cache_manager.get_hash.return_value = processor.get_file_hash(app)
+    warnings = []
+    assert processor.process_single_file(app, warnings=warnings)["skipped"] is True
+    assert processor.flush_local_indexes(warnings) == ["code graph"]
+    assert warnings == []
+    # parse is no longer defined anywhere
+    assert CodeGraph.for_workspace(workspace).query("callees", "App.run")[0]["kind"] == "external"
+
+
+def test_mcp_graph_tool_and_depth_setting(workspace, monkeypatch):
+    context = Mock()
+    context.load_local_config.return_value = workspace
+    monkeypatch.setattr(graph_tool, "_command_context_factory", lambda: context)
+
+    def run(**kwargs):
+        return asyncio.run(graph_tool.graph(Mock(), workspace=workspace.workspace_path, **kwargs))
+
+    assert run(relation="callers", name="parse")["status"] == "not_indexed"
+    _build(workspace)
+    found = run(relation="CALLERS", name="parse", depth=2)
+    assert found["status"] == "success"
+    assert [(r["name"], r["depth"]) for r in found["results"]] == [("load_config", 1), ("run", 2)]
+    assert run(relation="importers", name="src/cli.py")["status"] == "no_results"
+    with pytest.raises(ValueError):
+        run(relation="callers", name="parse", depth=6)
+    with pytest.raises(ValueError):
+        run(relation="implementors", name="parse")
+
+    workspace.code_graph_max_depth = 0
+    assert "code_graph_max_depth must be a positive integer" in ConfigurationService()._validate_config_values(workspace)
@@ -0,0 +1,137 @@
+"""Tests for embedder backend selection and the non-Ollama backends."""
+import logging
+import sys
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+
+from code_index.config import Config
+from code_index.config_service import ConfigurationService
+from code_index.embedder import Embedder, OllamaEmbedder, create_embedder
+from code_index.mcp_server.server import CodeIndexMCPServer
+from code_index.onnx_embedder import OnnxEmbedder, clear_shared_onnx_embedders
+from code_index.openai_embedder import OpenAICompatibleEmbedder
+from code_index.service_validation import ServiceValidator
+from code_index.services.shared.search_strategy_selector import SearchStrategySelector
+
+
+def _config(**values) -> Config:
+    config = Config()
+    for key, value in values.items():
+        setattr(config, key, value)
+    return config
+
+
+def test_create_embedder_defaults_to_ollama():
+    embedder = create_embedder(_config())
+    assert isinstance(embedder, OllamaEmbedder)
+    assert isinstance(embedder, Embedder)
+
+
+def test_create_embedder_selects_backend_and_keeps_model_identifier():
+    openai = create_embedder(_config(embedder_backend="openai", ollama_model="bge-m3:latest",
+                                     embedder_base_url="http://gpu:8000/v1/"))
+    assert isinstance(openai, OpenAICompatibleEmbedder)
+    assert openai.base_url == "http://gpu:8000/v1"
+    assert openai.model_identifier == "bge-m3"
+
+    onnx = create_embedder(_config(embedder_backend="onnx", onnx_model_path="/models/bge/model.onnx"))
+    assert isinstance(onnx, OnnxEmbedder)
+    assert onnx.tokenizer_path == "/models/bge/tokenizer.json"
+
+
+def test_create_embedder_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        create_embedder(_config(embedder_backend="bert"))
+
+
+def test_openai_embedder_orders_results_by_index():
+    embedder = OpenAICompatibleEmbedder(_config(embedder_backend="openai", embedder_api_key="secret"))
+    response = Mock()
+    response.json.return_value = {"data": [{"index": 1, "embedding": [0.0, 1.0]},
+                                           {"index": 0, "embedding": [1.0, 0.0]}]}
+    with patch.object(embedder._session, "post", return_value=response) as post:
+        result = embedder.create_embeddings(["a", "b"])
+
+    assert result["embeddings"].dtype == np.float32
+    assert result["embeddings"].tolist() == [[1.0, 0.0], [0.0, 1.0]]
+    assert post.call_args.args[0] == "http://localhost:8080/v1/embeddings"
+    assert post.call_args.kwargs["headers"]["Authorization"] == "Bearer secret"
+
+
+def test_onnx_embedder_mean_pools_and_normalizes():
+    embedder = OnnxEmbedder(_config(onnx_model_path="model.onnx"))
+    encodings = [SimpleNamespace(ids=[1, 2, 0], attention_mask=[1, 1, 0], type_ids=[0, 0, 0])]
+    embedder._tokenizer = Mock(encode_batch=Mock(return_value=encodings))
+    hidden = np.array([[[3.0, 0.0], [1.0, 0.0], [0.0, 100.0]]], dtype=np.float32)
+    embedder._session = Mock(run=Mock(return_value=[hidden]))
+    embedder._input_names = ["input_ids", "attention_mask"]
+
+    result = embedder.create_embeddings(["def f(): pass"])
+
+    assert result["embeddings"].tolist() == [[1.0, 0.0]]
+    feeds = embedder._session.run.call_args.args[1]
+    assert set(feeds) == {"input_ids", "attention_mask"}
+
+
+def test_onnx_session_is_loaded_once_per_process(tmp_path, monkeypatch):
+    (tmp_path / "model.onnx").write_bytes(b"onnx")
+    (tmp_path / "tokenizer.json").write_text("{}")
+    encoding = SimpleNamespace(ids=[1, 2], attention_mask=[1, 1], type_ids=[0, 0])
+    session = Mock(get_inputs=Mock(return_value=[SimpleNamespace(name="input_ids"),
+                                                  SimpleNamespace(name="attention_mask")]),
+                   run=Mock(return_value=[np.ones((1, 2, 3), dtype=np.float32)]))
+    onnxruntime = SimpleNamespace(SessionOptions=Mock, GraphOptimizationLevel=SimpleNamespace(ORT_ENABLE_ALL=99),
+                                  InferenceSession=Mock(return_value=session))
+    tokenizers = SimpleNamespace(Tokenizer=SimpleNamespace(
+        from_file=Mock(return_value=Mock(encode_batch=Mock(return_value=[encoding])))))
+    monkeypatch.setitem(sys.modules, "onnxruntime", onnxruntime)
+    monkeypatch.setitem(sys.modules, "tokenizers", tokenizers)
+    clear_shared_onnx_embedders()
+    config = _config(embedder_backend="onnx", onnx_model_path=str(tmp_path / "model.onnx"))
+    try:
+        # The MCP warm-up loads the session the searches then use
+        server = CodeIndexMCPServer.__new__(CodeIndexMCPServer)
+        server.config, server.logger = config, logging.getLogger(__name__)
+        server._warm_up_embedder()
+        for _ in range(2):
+            embedder, _ = SearchStrategySelector(config).initialize_components(config)
+            assert embedder.create_embeddings(["query"])["embeddings"].shape == (1, 3)
+        assert onnxruntime.InferenceSession.call_count == 1
+        assert tokenizers.Tokenizer.from_file.call_count == 1
+
+        # Different settings get their own embedder
+        assert create_embedder(_config(embedder_backend="onnx", onnx_model_path=str(tmp_path / "model.onnx"),
+                                       onnx_pooling="cls")) is not embedder
+        assert create_embedder(config) is embedder
+    finally:
+        clear_shared_onnx_embedders()
+
+
+def test_onnx_validation_reports_missing_model(tmp_path):
+    embedder = OnnxEmbedder(_config(onnx_model_path=str(tmp_path / "missing.onnx")))
+    result = embedder.validate_configuration()
+    assert result.valid is False
+    assert result.service == "onnx"
+    assert "ONNX model not found" in result.error
+
+
+def test_service_validator_checks_selected_backend():
+    config = _config(embedder_backend="onnx", onnx_model_path="/nonexistent/model.onnx")
+    validator = ServiceValidator()
+    with patch.object(validator, "validate_ollama_service") as ollama, \
+            patch.object(validator, "validate_qdrant_service"):
+        results = validator.validate_all_services(config)
+    ollama.assert_not_called()
+    assert results[0].service == "onnx"
+    assert results[0].valid is False
+
+
+def test_config_validation_rejects_bad_backend_settings():
+    service = ConfigurationService()
+    errors = service._validate_config_values(_config(embedder_backend="onnx"))
+    assert "embedder_backend='onnx' requires onnx_model_path" in errors
+    errors = service._validate_config_values(_config(embedder_backend="grpc"))
+    assert any("embedder_backend must be one of" in e for e in errors)
@@ -0,0 +1,110 @@
+"""Tests for Ollama keep-alive, embedder warm-up and timing stats."""
+from unittest.mock import Mock, patch
+
+import requests
+
+from code_index.config import Config
+from code_index.config_service import ConfigurationService
+from code_index.embedder import EmbedderTimings, OllamaEmbedder, parse_keep_alive
+from code_index.services.shared.indexing_orchestrator import IndexingOrchestrator
+
+
+def _response(payload):
+    response = Mock()
+    response.json.return_value = payload
+    return response
+
+
+def test_requests_carry_configured_keep_alive():
+    config = Config()
+    config.ollama_keep_alive = "2h"
+    embedder = OllamaEmbedder(config)
+    with patch("code_index.embedder.requests.post",
+               return_value=_response({"embeddings": [[0.1, 0.2]]})) as post:
+        embedder.create_embeddings(["x"])
+    assert post.call_args.kwargs["json"]["keep_alive"] == "2h"
+
+    config.ollama_keep_alive = None
+    embedder = OllamaEmbedder(config)
+    with patch("code_index.embedder.requests.post",
+               return_value=_response({"embeddings": [[0.1, 0.2]]})) as post:
+        embedder.create_embeddings(["x"])
+    assert "keep_alive" not in post.call_args.kwargs["json"]
+
+
+def test_numeric_keep_alive_is_sent_as_seconds(monkeypatch):
+    # Ollama rejects unitless strings, so numbers of seconds go out as integers
+    for configured, sent in (("-1", -1), ("3600", 3600), (" 0 ", 0), (600, 600), ("1h30m", "1h30m")):
+        config = Config()
+        config.ollama_keep_alive = configured
+        with patch("code_index.embedder.requests.post",
+                   return_value=_response({"embeddings": [[0.1, 0.2]]})) as post:
+            OllamaEmbedder(config).create_embeddings(["x"])
+        assert post.call_args.kwargs["json"]["keep_alive"] == sent
+        assert not any("keep_alive" in e for e in ConfigurationService()._validate_config_values(config))
+
+    for bad in ("forever", "30 minutes", "1d", True, 1.5):
+        config = Config()
+        config.ollama_keep_alive = bad
+        assert any(e.startswith("ollama_keep_alive must be a number of seconds")
+                   for e in ConfigurationService()._validate_config_values(config))
+    assert parse_keep_alive("") is None
+
+    # The server's own OLLAMA_KEEP_ALIVE is not picked up as the client setting
+    monkeypatch.setenv("OLLAMA_KEEP_ALIVE", "-1")
+    monkeypatch.delenv("CODE_INDEX_OLLAMA_KEEP_ALIVE", raising=False)
+    assert Config().ollama_keep_alive == "30m"
+    monkeypatch.setenv("CODE_INDEX_OLLAMA_KEEP_ALIVE", "-1")
+    assert Config().ollama_keep_alive == "-1"
+
+
+def test_load_duration_is_not_counted_as_embedding_time():
+    timings = EmbedderTimings()
+    timings.record(texts=8, wall_seconds=5.0, load_seconds=4.5)
+    timings.record(texts=8, wall_seconds=0.5)
+    stats = timings.snapshot()
+    assert stats["requests"] == 2
+    assert stats["embed_seconds"] == 1.0
+    assert stats["model_load_seconds"] == 4.5
+    assert stats["max_model_load_seconds"] == 4.5
+
+
+def test_warm_up_reports_load_time_and_uses_long_timeout():
+    embedder = OllamaEmbedder(Config())
+    payload = {"embeddings": [[0.0]], "load_duration": 2_500_000_000}
+    with patch("code_index.embedder.requests.post", return_value=_response(payload)) as post:
+        outcome = embedder.warm_up()
+    assert outcome["success"] is True
+    assert outcome["load_seconds"] == 2.5
+    assert post.call_args.kwargs["timeout"] >= 300
+    stats = embedder.get_timing_stats()
+    assert stats["model_load_seconds"] == 2.5
+    assert stats["requests"] == 0
+
+
+def test_warm_up_failure_does_not_raise():
+    embedder = OllamaEmbedder(Config())
+    with patch("code_index.embedder.requests.post",
+               side_effect=requests.exceptions.ConnectionError("refused")):
+        outcome = embedder.warm_up()
+    assert outcome["success"] is False
+    assert "refused" in outcome["error"]
+
+
+def test_orchestrator_warms_up_and_reports_embedder_metrics():
+    orchestrator = IndexingOrchestrator()
+    embedder = Mock()
+    embedder.warm_up.return_value = {"success": False, "error": "model not found"}
+    embedder.get_timing_stats.return_value = {"requests": 3, "model_load_seconds": 0.0}
+    warnings = []
+
+    orchestrator._warm_up_embedder(embedder, Config(), warnings)
+    assert warnings == ["Embedding model warm-up failed: model not found"]
+
+    config = Config()
+    config.embedder_warm_up = False
+    orchestrator._warm_up_embedder(embedder, config, warnings)
+    embedder.warm_up.assert_called_once()
+
+    metrics = orchestrator._collect_performance_metrics(Mock(embedder=embedder, near_duplicate_filter=None))
+    assert metrics["embedder"] == {"requests": 3, "model_load_seconds": 0.0}
@@ -0,0 +1,157 @@
+"""Tests for the memory-mapped flat vector store backend."""
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from code_index.config import Config
+from code_index.config_service import ConfigurationService
+from code_index.flat_vector_store import FlatCollection, FlatVectorStore
+from code_index.search import similarity_search_strategy
+from code_index.search.strategy_factory import SearchStrategyFactory
+from code_index.service_validation import ServiceValidator
+from code_index.vector_store import QdrantVectorStore, create_vector_store
+
+
+@pytest.fixture
+def flat_config(tmp_path):
+    config = Config()
+    config.workspace_path = str(tmp_path / "ws")
+    config.vector_store_backend = "flat"
+    config.flat_store_dir = str(tmp_path / "flat")
+    config.embedding_length = 4
+    return config
+
+
+def _point(point_id, file_path, segments, vector, filetype="py", **extra):
+    payload = {"filePath": file_path, "pathSegments": segments, "filetype": filetype, "type": "function",
+               "codeChunk": "def handler(request):\n    return process(request.body)\n",
+               "startLine": 1, "endLine": 2, **extra}
+    return {"id": point_id, "vector": vector, "payload": payload}
+
+
+def test_factory_selects_backend_and_validation(flat_config):
+    store = create_vector_store(flat_config)
+    assert isinstance(store, FlatVectorStore)
+    assert store.validate_configuration().valid is True
+    assert ServiceValidator().validate_vector_store_service(flat_config).service == "flat_vector_store"
+
+    flat_config.vector_store_backend = "qdrant"
+    assert isinstance(create_vector_store(flat_config), QdrantVectorStore)
+
+    flat_config.vector_store_backend = "faiss"
+    flat_config.flat_store_dtype = "bfloat16"
+    errors = ConfigurationService()._validate_config_values(flat_config)
+    assert "vector_store_backend must be one of ['qdrant', 'flat']" in errors
+    assert "flat_store_dtype must be one of ['float32', 'float16', 'int8']" in errors
+
+
+def test_search_applies_workspace_filetype_and_prefix_filters(flat_config):
+    store = FlatVectorStore(flat_config)
+    assert store.initialize() is True
+    assert store.initialize() is False
+    store.upsert_points([
+        _point(1, "src/api/a.py", ["src", "src/api"], [1, 0, 0, 0]),
+        _point(2, "lib/b.py", ["lib"], [0.9, 0.1, 0, 0]),
+        _point(3, "src/c.go", ["src"], [0.8, 0.2, 0, 0], filetype="go"),
+        _point(4, "src/d.py", ["src"], [0, 1, 0, 0]),
+    ])
+
+    hits = store.search([1, 0, 0, 0], min_score=0.5)
+    assert {hit["payload"]["filePath"] for hit in hits} == {"src/api/a.py", "lib/b.py", "src/c.go"}
+    assert max(hit["score"] for hit in hits) == pytest.approx(1.0, abs=1e-3)
+    assert [hit["payload"]["filePath"] for hit in store.search([1, 0, 0, 0], min_score=0.1, filetype_filter="golang")] == ["src/c.go"]
+    assert {hit["payload"]["filePath"] for hit in store.search([1, 0, 0, 0], min_score=0.1, directory_prefix="./src/")} == {
+        "src/api/a.py", "src/c.go"}
+
+    # Points of another workspace in the same collection are only seen without the workspace filter
+    other = Config()
+    other.workspace_path = flat_config.workspace_path + "-other"
+    other.flat_store_dir = flat_config.flat_store_dir
+    other.collection_name_override = store.collection_name
+    other.embedding_length = 4
+    FlatVectorStore(other).upsert_points([_point(5, "x.py", [], [1, 0, 0, 0])])
+    assert len(store.search([1, 0, 0, 0], min_score=0.5)) == 3
+    assert len(store.search([1, 0, 0, 0], min_score=0.5, skip_workspace_filter=True)) == 4
+
+
+def test_int8_storage_keeps_ranking(flat_config):
+    flat_config.flat_store_dtype = "int8"
+    store = FlatVectorStore(flat_config)
+    store.initialize()
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(200, 4)).astype(np.float32)
+    store.upsert_points([_point(i, f"f{i}.py", [], vectors[i].tolist()) for i in range(200)])
+    assert store.collection.dtype == "int8"
+
+    query = rng.normal(size=4).astype(np.float32)
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    exact = unit @ (query / np.linalg.norm(query))
+    hits = store.search(query.tolist(), min_score=-1.0, max_results=5)
+    for hit in hits:
+        assert hit["score"] == pytest.approx(exact[hit["id"]], abs=0.02)
+    assert hits[0]["id"] == int(np.argmax(exact))
+
+
+def test_writes_survive_reopen_and_compaction(flat_config):
+    store = FlatVectorStore(flat_config)
+    store.initialize()
+    store.upsert_points([_point(1, "a.py", [], [1, 0, 0, 0]), _point(2, "b.py", [], [0, 1, 0, 0])])
+    store.upsert_points([_point(1, "a.py", [], [0, 0, 1, 0])])
+    store.delete_points_by_file_paths(["b.py"])
+
+    # A fresh collection object replays the log, ignoring a torn trailing record
+    path = store.path
+    with open(next(path.glob("log.*.jsonl")), "ab") as f:
+        f.write(b'{"op": "delete", "ids"')
+    reopened = FlatCollection(path)
+    reopened.refresh()
+    assert reopened.live_rows == 1
+    assert reopened.payload(reopened._row_of[1])["filePath"] == "a.py"
+
+    store.flush()
+    assert store.collection.pending_log_entries == 0
+    assert store.collection.dead_rows == 0
+    assert len(list(path.glob("vectors.*.bin"))) == 1
+    hits = store.search([0, 0, 1, 0], min_score=0.5)
+    assert [hit["id"] for hit in hits] == [1]
+
+
+def test_payload_updates_and_cluster_members(flat_config):
+    store = FlatVectorStore(flat_config)
+    store.initialize()
+    store.upsert_points([
+        _point(1, "a.py", [], [1, 0, 0, 0], clusterId="c1"),
+        _point(2, "b.py", [], [0, 1, 0, 0]),
+    ])
+    assert set(store.get_cluster_members(["c1"])) == {"c1"}
+
+    store.set_payload([2], {"clusterId": "c1", "duplicateOf": 1})
+    members = store.get_cluster_members(["c1"])
+    assert sorted(member["filePath"] for member in members["c1"]) == ["a.py", "b.py"]
+    assert store.search([0, 1, 0, 0], min_score=0.5)[0]["payload"]["duplicateOf"] == 1
+
+    store.clear_collection()
+    assert store.collection_exists() is True
+    assert store.search([1, 0, 0, 0], min_score=0.0) == []
+    store.delete_collection()
+    assert store.collection_exists() is False
+
+
+def test_similarity_strategy_searches_the_vector_store(flat_config, monkeypatch):
+    embedder = Mock()
+    embedder.create_embeddings.return_value = {"embeddings": [[1, 0, 0, 0]]}
+    monkeypatch.setattr(similarity_search_strategy, "create_embedder", lambda config: embedder)
+    strategy = SearchStrategyFactory().create_strategy(flat_config)
+    assert isinstance(strategy, similarity_search_strategy.SimilaritySearchStrategy)
+    assert strategy.search("request handler", flat_config) == []
+    embedder.create_embeddings.assert_not_called()
+
+    flat_config.search_min_score = 0.5
+    store = FlatVectorStore(flat_config)
+    store.initialize()
+    store.upsert_points([_point(1, "src/a.py", ["src"], [1, 0, 0, 0]), _point(2, "src/b.py", ["src"], [0, 1, 0, 0])])
+    results = strategy.search("request handler", flat_config)
+    assert [(r["rank"], r["file_path"], r["type"]) for r in results] == [(1, "src/a.py", "function")]
+    assert results[0]["score"] == pytest.approx(1.0, abs=1e-3)
+    embedder.create_embeddings.assert_called_once_with(["request handler"])
@@ -0,0 +1,154 @@
+"""Tests for hybrid lexical + vector search and result fusion."""
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from code_index.config import Config
+from code_index.config_service import ConfigurationService
+from code_index.lexical_index import LexicalDocument, LexicalIndex
+from code_index.search_fusion import fuse_hits
+from code_index.service_validation import ValidationResult
+from code_index.services import SearchService
+
+SOURCES = {
+    "src/reader.py": "def parse_file_with_mmap(path):\n    return mmap_reader(path, offset=0)\n",
+    "src/loader.py": "def load_settings(path):\n    return read_file(path, encoding='utf-8')\n",
+}
+
+
+CHUNK = "def handler(request):\n    return process(request.body)\n"
+
+
+def _hit(point_id, score, file_path, **payload):
+    return {"id": point_id, "score": score,
+            "payload": {"filePath": file_path, "codeChunk": CHUNK, "startLine": 1, "endLine": 2,
+                        "type": "function", **payload}}
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    root = tmp_path / "ws"
+    for rel_path, text in SOURCES.items():
+        (root / rel_path).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel_path).write_text(text)
+    config = Config()
+    config.workspace_path = str(root)
+    config.cache_dir = str(tmp_path / "cache")
+    config.search_file_type_weights = {}
+    config.search_path_boosts = []
+    config.search_language_boosts = {}
+    return config
+
+
+def _build_lexical_index(config):
+    index = LexicalIndex.for_workspace(config)
+    for rel_path, text in SOURCES.items():
+        index.update_file(rel_path, "h", [LexicalDocument.from_text(rel_path, 1, 2, "function", text)])
+    index.save()
+
+
+def _service(vector_hits, embed_delay=0.0):
+    embedder = Mock()
+
+    def create_embeddings(texts):
+        time.sleep(embed_delay)
+        return {"embeddings": [[0.1, 0.2]]}
+
+    embedder.create_embeddings.side_effect = create_embeddings
+    vector_store = Mock()
+    vector_store.search.return_value = vector_hits
+    service = SearchService(embedding_cache=Mock(get_embedding=Mock(return_value=None)))
+    service.validate_search_config = Mock(return_value=ValidationResult(service="search_service", valid=True))
+    service._initialize_search_components = Mock(return_value=(embedder, vector_store))
+    return service, vector_store
+
+
+def test_rrf_merges_hits_of_both_legs_by_id():
+    vector = [_hit("b", 0.9, "b.py", clusterId="c1"), _hit("a", 0.7, "a.py")]
+    lexical = [_hit("a", 12.0, "a.py"), _hit("c", 3.0, "c.py")]
+
+    fused = fuse_hits(vector, lexical, method="rrf", rrf_k=60)
+    assert [hit["id"] for hit in fused] == ["a", "b", "c"]
+    assert fused[0]["legScores"] == {"vector": 0.7, "lexical": 12.0}
+    # The vector payload wins for blocks both legs found
+    assert fused[1]["payload"]["clusterId"] == "c1"
+    assert fused[0]["score"] == pytest.approx((1 / 62 + 1 / 61) / (2 / 61))
+
+    # A block ranked first by every leg scores 1.0
+    assert fuse_hits(vector[:1], [vector[0]])[0]["score"] == pytest.approx(1.0)
+
+
+def test_weighted_fusion_normalizes_each_leg():
+    vector = [_hit("a", 0.9, "a.py"), _hit("b", 0.5, "b.py")]
+    lexical = [_hit("b", 20.0, "b.py"), _hit("a", 10.0, "a.py")]
+
+    fused = fuse_hits(vector, lexical, method="weighted", lexical_weight=0.75)
+    assert [hit["id"] for hit in fused] == ["b", "a"]
+    assert fused[0]["score"] == pytest.approx(0.75)
+    assert fused[1]["score"] == pytest.approx(0.25)
+
+    # A dropped leg leaves the other list, scaled to 0-1
+    only_vector = fuse_hits(vector, None, method="weighted")
+    assert [(hit["id"], hit["score"]) for hit in only_vector] == [("a", 1.0), ("b", 0.0)]
+
+
+def test_hybrid_search_finds_exact_identifiers_and_paraphrases(workspace):
+    _build_lexical_index(workspace)
+    workspace.search_mode = "hybrid"
+    service, vector_store = _service([_hit("src/loader.py", 0.8, "src/loader.py"),
+                                      _hit("src/reader.py", 0.5, "src/reader.py")])
+
+    result = service.search_code("parse mmap", workspace, path_prefix="src")
+    assert result.is_successful(), result.errors
+    assert result.search_method == "hybrid"
+    assert result.warnings == []
+    # Both legs found the reader, only the vector leg found the loader
+    assert [match.file_path for match in result.matches] == ["src/reader.py", "src/loader.py"]
+    assert result.matches[0].code_chunk == CHUNK
+    assert vector_store.search.call_args.kwargs["directory_prefix"] == "src"
+
+    lexical = service.search_code("parse_file_with_mmap", workspace, mode="lexical")
+    assert lexical.search_method == "lexical"
+    assert lexical.matches[0].file_path == "src/reader.py"
+    assert lexical.matches[0].code_chunk == SOURCES["src/reader.py"]
+
+
+def test_slow_leg_is_dropped_after_the_budget(workspace):
+    _build_lexical_index(workspace)
+    workspace.search_hybrid_budget_ms = 50
+    service, vector_store = _service([_hit("src/loader.py", 0.8, "src/loader.py")], embed_delay=0.5)
+
+    started = time.time()
+    result = service.search_code("load settings", workspace, mode="hybrid")
+    assert time.time() - started < 0.4
+    assert [match.file_path for match in result.matches] == ["src/loader.py"]
+    assert result.matches[0].code_chunk == SOURCES["src/loader.py"]
+    assert result.warnings == ["Vector search exceeded the 50 ms hybrid budget and was dropped"]
+    vector_store.search.assert_not_called()
+
+
+def test_missing_lexical_index_and_settings_validation(workspace):
+    service, _ = _service([_hit("src/loader.py", 0.8, "src/loader.py")])
+
+    hybrid = service.search_code("load settings", workspace, mode="hybrid")
+    assert hybrid.search_method == "text"
+    assert [match.file_path for match in hybrid.matches] == ["src/loader.py"]
+    assert "No lexical index for this workspace" in hybrid.warnings[0]
+
+    lexical = service.search_code("load settings", workspace, mode="lexical")
+    assert not lexical.is_successful()
+    assert "lexical_index_enabled" in lexical.errors[0]
+    assert not service.search_code("x", workspace, mode="fuzzy").is_successful()
+
+    workspace.search_mode = "keyword"
+    workspace.search_fusion = "max"
+    workspace.search_rrf_k = 0
+    workspace.search_hybrid_lexical_weight = 2
+    workspace.search_hybrid_budget_ms = -1
+    errors = ConfigurationService()._validate_config_values(workspace)
+    assert "search_mode must be one of ['vector', 'lexical', 'hybrid']" in errors
+    assert "search_fusion must be one of ['rrf', 'weighted']" in errors
+    assert "search_rrf_k must be a positive integer" in errors
+    assert "search_hybrid_lexical_weight must be between 0 and 1" in errors
+    assert "search_hybrid_budget_ms must be a non-negative integer" in errors
@@ -0,0 +1,144 @@
+"""Tests for the BM25 lexical index and the text search strategy."""
+import os
+from unittest.mock import Mock
+
+import pytest
+
+from code_index.config import Config
+from code_index.config_service import ConfigurationService
+from code_index import lexical_index
+from code_index.lexical_index import LexicalDocument, LexicalIndex, tokenize_code
+from code_index.models import CodeBlock
+from code_index.search.text_search_strategy import TextSearchStrategy
+from code_index.services.treesitter.file_processor import FileProcessor
+
+SOURCES = {
+    "src/reader.py": "def parse_file_with_mmap(path):\n    return mmap_reader(path)\n",
+    "src/http.ts": "function getHTTPResponse(url) {\n  return fetch(url)\n}\n",
+    "docs/notes.md": "Parsing files is slow without mmap.\nUse the reader.\n",
+}
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    root = tmp_path / "ws"
+    for rel_path, text in SOURCES.items():
+        (root / rel_path).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel_path).write_text(text)
+    config = Config()
+    config.workspace_path = str(root)
+    config.cache_dir = str(tmp_path / "cache")
+    config.lexical_index_enabled = True
+    return config
+
+
+def _document(rel_path, index=0):
+    text = SOURCES[rel_path]
+    return LexicalDocument.from_text(f"{rel_path}#{index}", 1, text.count("\n"), "function", text)
+
+
+def _build(config):
+    index = LexicalIndex.for_workspace(config)
+    for rel_path in SOURCES:
+        index.update_file(rel_path, "h1", [_document(rel_path)])
+    assert index.save() is True
+    return index
+
+
+def test_tokenizer_splits_identifiers():
+    assert tokenize_code("getHTTPResponse") == ["gethttpresponse", "get", "http", "response"]
+    assert tokenize_code("parse_file_with_mmap(x)") == ["parse_file_with_mmap", "parse", "file", "with", "mmap"]
+    assert tokenize_code("_private a b2 HTMLParser") == ["private", "b2", "htmlparser", "html", "parser"]
+
+
+def test_bm25_ranks_exact_identifier_and_applies_filters(workspace):
+    _build(workspace)
+    index = LexicalIndex.for_workspace(workspace)
+
+    hits = index.search("parse_file_with_mmap")
+    assert hits[0]["payload"]["filePath"] == "src/reader.py"
+    assert hits[0]["payload"]["codeChunk"] == SOURCES["src/reader.py"]
+    assert hits[0]["id"] == "src/reader.py#0"
+
+    assert [hit["payload"]["filePath"] for hit in index.search("http response")] == ["src/http.ts"]
+    assert [hit["payload"]["filePath"] for hit in index.search("mmap", filetype="markdown")] == ["docs/notes.md"]
+    assert {hit["payload"]["filePath"] for hit in index.search("mmap", path_prefix="./src/")} == {"src/reader.py"}
+    assert index.search("nonexistent_symbol") == []
+
+
+def test_incremental_updates_survive_reload(workspace, monkeypatch):
+    index = _build(workspace)
+    assert index.has_file("src/reader.py", "h1") is True
+
+    # A new version of one file goes into a segment of its own; the others are not decoded or rewritten
+    monkeypatch.setattr(lexical_index._Segment, "documents", Mock(side_effect=AssertionError("decoded")))
+    index.update_file("src/reader.py", "h2", [LexicalDocument.from_text("r2", 1, 1, "function", "def load_config(): pass")])
+    assert index.save() is True
+    assert sorted(p.name for p in index.directory.iterdir()) == [
+        "lexical.json", "segment.1.bin", "segment.1.json", "segment.2.bin", "segment.2.json"]
+    reloaded = LexicalIndex.for_workspace(workspace)
+    assert reloaded.document_count == 3
+    assert [hit["payload"]["filePath"] for hit in reloaded.search("parse_file_with_mmap")] == ["docs/notes.md"]
+    assert [hit["id"] for hit in reloaded.search("load config")] == ["r2"]
+    monkeypatch.undo()
+
+    # Once dead documents outnumber live ones the segments are merged; a deleted file is pruned on save
+    index.update_file("src/reader.py", "h3", [LexicalDocument.from_text("r3", 1, 1, "function", "def load_config(): pass")])
+    os.remove(os.path.join(workspace.workspace_path, "docs", "notes.md"))
+    assert index.prune_missing() == 1
+    assert index.save() is True
+    assert sorted(p.name for p in index.directory.iterdir()) == ["lexical.json", "segment.3.bin", "segment.3.json"]
+
+    reloaded = LexicalIndex.for_workspace(workspace)
+    assert reloaded.has_file("src/reader.py", "h3") is True
+    assert reloaded.has_file("docs/notes.md", "h1") is False
+    assert reloaded.document_count == 2
+    assert [hit["id"] for hit in reloaded.search("load config")] == ["r3"]
+    assert [hit["payload"]["filePath"] for hit in reloaded.search("http response")] == ["src/http.ts"]
+
+
+def test_segments_are_merged_past_the_limit(workspace):
+    index = _build(workspace)
+    for version in range(2, lexical_index.MAX_SEGMENTS + 2):
+        index.update_file("src/http.ts", f"h{version}", [_document("src/http.ts", version)])
+        assert index.save() is True
+    segments = sorted(p.name for p in index.directory.glob("segment.*.json"))
+    # The large first segment is kept; the small ones are folded into one
+    assert len(segments) < lexical_index.MAX_SEGMENTS and "segment.1.json" in segments
+    reloaded = LexicalIndex.for_workspace(workspace)
+    assert reloaded.document_count == 3
+    assert [hit["id"] for hit in reloaded.search("http response")] == [f"src/http.ts#{lexical_index.MAX_SEGMENTS + 1}"]
+
+
+def test_file_processor_indexes_files_skipped_as_unchanged(workspace):
+    reader = f"{workspace.workspace_path}/src/reader.py"
+    parser = Mock()
+    parser.parse_file.return_value = [CodeBlock(reader, "parse_file_with_mmap", "function", 1, 2,
+                                                SOURCES["src/reader.py"], "h", "s")]
+    cache_manager = Mock()
+    processor = FileProcessor(workspace, parser=parser, embedder=Mock(), vector_store=Mock(),
+                              cache_manager=cache_manager, path_utils=None)
+    current_hash = processor.get_file_hash(reader)
+    # Already embedded by an earlier run, but not in the lexical index yet
+    cache_manager.get_hash.return_value = current_hash
+
+    warnings = []
+    result = processor.process_single_file(reader, warnings=warnings)
+    assert result["skipped"] is True
+    processor.embedder.create_embeddings.assert_not_called()
+    assert processor.flush_local_indexes(warnings) == ["lexical index"]
+    assert warnings == []
+
+    results = TextSearchStrategy().search("mmap reader", workspace)
+    assert [(r["file_path"], r["start_line"], r["end_line"]) for r in results] == [("src/reader.py", 1, 2)]
+    assert results[0]["adjusted_score"] > 0
+
+
+def test_lexical_settings_are_validated():
+    config = Config()
+    assert LexicalIndex.from_config(config) is None
+    config.lexical_bm25_k1 = -1
+    config.lexical_bm25_b = 1.5
+    errors = ConfigurationService()._validate_config_values(config)
+    assert "lexical_bm25_k1 must be zero or greater" in errors
+    assert "lexical_bm25_b must be between 0 and 1" in errors
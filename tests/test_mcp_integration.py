@@ -108,14 +108,18 @@ class TestMCPProtocolIntegration:
             with patch.object(server, '_validate_services', new_callable=AsyncMock):
                 server._register_tools()
                 
-                # Verify all three tools were registered
-                assert mock_fastmcp.tool.call_count == 3
+                # Verify all seven tools were registered
+                assert mock_fastmcp.tool.call_count == 7
                 
                 # Check tool names
                 registered_tools = [call[1]['name'] for call in mock_fastmcp.tool.call_args_list]
                 assert 'index' in registered_tools
                 assert 'search' in registered_tools
+                assert 'search_batch' in registered_tools
                 assert 'collections' in registered_tools
+                assert 'symbols' in registered_tools
+                assert 'graph' in registered_tools
+                assert 'grep' in registered_tools
     
     @pytest.mark.asyncio
     async def test_mcp_server_service_validation_integration(self, temp_workspace, mock_services):
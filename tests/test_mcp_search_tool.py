@@ -13,6 +13,7 @@ from unittest.mock import MagicMock, Mock
 import pytest
 
 from src.code_index.config import Config
+from src.code_index.flat_vector_store import FlatVectorStore
 from src.code_index.mcp_server.tools.search_tool import (
     _create_code_snippet,
     _format_search_results,
@@ -170,9 +171,6 @@ class TestSearchTool:
         search_service.search_code.return_value = failing_result
 
         collection_manager = MagicMock()
-        collection_manager.list_collections.return_value = [
-            {"workspace_path": temp_workspace, "name": "test-collection"}
-        ]
 
         deps = SearchDependencies(
             config=config,
@@ -199,9 +197,6 @@ class TestSearchTool:
         search_service.search_code.side_effect = Exception("Search service failed")
 
         collection_manager = MagicMock()
-        collection_manager.list_collections.return_value = [
-            {"workspace_path": temp_workspace, "name": "test-collection"}
-        ]
 
         deps = SearchDependencies(
             config=config,
@@ -263,9 +258,6 @@ class TestSearchTool:
         search_service.search_code.return_value = successful_result
 
         collection_manager = MagicMock()
-        collection_manager.list_collections.return_value = [
-            {"workspace_path": temp_workspace, "name": "test-collection"}
-        ]
 
         deps = SearchDependencies(
             config=config,
@@ -296,12 +288,13 @@ class TestSearchTool:
         assert "def main()" in first_result["snippet"]
 
     @pytest.mark.asyncio
-    async def test_search_tool_not_indexed(self, mock_context, temp_workspace, command_context_mock):
+    async def test_search_tool_not_indexed(self, mock_context, temp_workspace, command_context_mock,
+                                           mock_qdrant_vector_store):
         """Test search tool with not indexed workspace."""
         config = Config()
+        mock_qdrant_vector_store.collection_exists.return_value = False
 
         collection_manager = MagicMock()
-        collection_manager.list_collections.return_value = []
 
         deps = SearchDependencies(
             config=config,
@@ -323,6 +316,38 @@ class TestSearchTool:
         assert "not indexed" in result["message"]
         assert result["workspace"] == temp_workspace
 
+    @pytest.mark.asyncio
+    async def test_search_tool_flat_backend_without_qdrant(self, mock_context, temp_workspace, command_context_mock,
+                                                           tmp_path):
+        """The flat backend decides whether the workspace is indexed without reaching Qdrant."""
+        config = Config()
+        config.workspace_path = temp_workspace
+        config.qdrant_url = "http://127.0.0.1:9"
+        config.vector_store_backend = "flat"
+        config.flat_store_dir = str(tmp_path / "flat")
+        config.embedding_length = 4
+
+        search_service = MagicMock()
+        search_service.search_code.return_value = SearchResult(
+            query="handler", matches=[SearchMatch(file_path="main.py", start_line=1, end_line=2,
+                                                  code_chunk="def main():\n    pass\n", match_type="function",
+                                                  score=0.8, adjusted_score=0.8)],
+            total_found=1, execution_time_seconds=0.01, search_method="vector", config_summary={},
+            errors=[], warnings=[],
+        )
+        deps = SearchDependencies(config=config, search_service=search_service, collection_manager=None)
+        command_context_mock.load_search_dependencies.side_effect = None
+        command_context_mock.load_search_dependencies.return_value = deps
+
+        result = await search(ctx=mock_context, query="handler", workspace=temp_workspace)
+        assert result["status"] == "not_indexed"
+        search_service.search_code.assert_not_called()
+
+        FlatVectorStore(config).initialize()
+        result = await search(ctx=mock_context, query="handler", workspace=temp_workspace)
+        assert result["status"] == "success"
+        assert result["results"][0]["filePath"] == "main.py"
+
     @pytest.mark.asyncio
     async def test_search_tool_empty_results(self, mock_context, temp_workspace, command_context_mock):
         """Test search tool returning no matches."""
@@ -344,9 +369,6 @@ class TestSearchTool:
         search_service.search_code.return_value = empty_result
 
         collection_manager = MagicMock()
-        collection_manager.list_collections.return_value = [
-            {"workspace_path": temp_workspace, "name": "test-collection"}
-        ]
 
         deps = SearchDependencies(
             config=config,
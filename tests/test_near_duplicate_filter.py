@@ -0,0 +1,263 @@
+"""Tests for MinHash/LSH near-duplicate chunk clustering."""
+from unittest.mock import Mock
+
+import pytest
+
+from code_index.config import Config
+from code_index.models import CodeBlock
+from code_index.services.embedding.near_duplicate_filter import (
+    MinHasher,
+    NearDuplicateFilter,
+    choose_bands,
+    collapse_duplicate_hits,
+)
+from code_index.services.shared.file_processing_helpers import prepare_vector_points
+from code_index.services.treesitter.file_processor import FileProcessor
+
+
+def _test_case(name: str, value: int) -> str:
+    return (
+        f"def test_{name}(client):\n"
+        "    response = client.post('/api/items', json={'name': 'widget', 'price': 10})\n"
+        "    assert response.status_code == 201\n"
+        "    body = response.json()\n"
+        "    assert body['name'] == 'widget'\n"
+        f"    assert body['price'] == {value}\n"
+        "    assert 'id' in body and body['id'] > 0\n"
+    )
+
+
+UNRELATED = (
+    "class LruCache:\n"
+    "    def __init__(self, capacity):\n"
+    "        self.capacity = capacity\n"
+    "        self.entries = OrderedDict()\n"
+    "    def get(self, key):\n"
+    "        value = self.entries.pop(key)\n"
+    "        self.entries[key] = value\n"
+    "        return value\n"
+)
+
+
+def _locations(count, path="tests/test_api.py"):
+    return [{"filePath": path, "startLine": i * 10 + 1, "endLine": i * 10 + 8} for i in range(count)]
+
+
+class TestMinHasher:
+    def test_signature_is_deterministic(self):
+        first = MinHasher(num_perm=32).signature(UNRELATED)
+        second = MinHasher(num_perm=32).signature(UNRELATED)
+        assert first is not None
+        assert (first == second).all()
+
+    def test_short_text_has_no_signature(self):
+        assert MinHasher(shingle_size=5).signature("x = 1") is None
+
+    def test_similar_texts_agree_on_most_slots(self):
+        hasher = MinHasher(num_perm=128)
+        a = hasher.signature(_test_case("create_item", 10))
+        b = hasher.signature(_test_case("create_item_again", 10))
+        c = hasher.signature(UNRELATED)
+        assert (a == b).mean() > 0.7
+        assert (a == c).mean() < 0.2
+
+    def test_choose_bands_divides_num_perm(self):
+        bands, rows = choose_bands(64, 0.9)
+        assert bands * rows == 64
+        assert abs((1 / bands) ** (1 / rows) - 0.9) < 0.05
+
+
+class TestNearDuplicateFilter:
+    def test_clusters_copies_within_a_file(self):
+        dedup = NearDuplicateFilter(threshold=0.8)
+        texts = [_test_case("a", 10), UNRELATED, _test_case("a", 10)]
+        plan = dedup.plan(["p0", "p1", "p2"], texts, _locations(3))
+
+        assert plan.embed_indices == [0, 1]
+        assert plan.duplicate_of == [None, None, "p0"]
+        assert plan.cluster_ids == ["p0", "p1", "p0"]
+        assert plan.local_sources == {2: 0}
+        assert plan.resolve([[1.0], [2.0]]) == [[1.0], [2.0], [1.0]]
+
+    def test_share_mode_reuses_vectors_across_files(self):
+        dedup = NearDuplicateFilter(threshold=0.8)
+        first = dedup.plan(["p0"], [_test_case("a", 10)], _locations(1))
+        dedup.remember(first, first.resolve([[0.5, 0.5]]))
+
+        second = dedup.plan(["q0"], [_test_case("a", 10)], _locations(1, "tests/test_other.py"))
+        assert second.embed_indices == []
+        assert second.duplicate_of == ["p0"]
+        assert second.resolve([]) == [[0.5, 0.5]]
+
+    def test_share_mode_embeds_when_representative_vector_is_not_cached(self):
+        dedup = NearDuplicateFilter(threshold=0.8, max_cached_embeddings=0)
+        dedup.plan(["p0"], [_test_case("a", 10)], _locations(1))
+        second = dedup.plan(["q0"], [_test_case("a", 10)], _locations(1))
+        assert second.embed_indices == [0]
+        assert second.duplicate_of == ["p0"]
+
+    def test_skip_mode_drops_duplicates_of_a_stored_representative_in_the_same_file(self):
+        dedup = NearDuplicateFilter(threshold=0.8, mode="skip")
+        plan = dedup.plan(["p0", "p1"], [_test_case("a", 10)] * 2, _locations(2))
+        assert plan.embed_indices == [0]
+        assert plan.resolve([[1.0]]) == [[1.0], [1.0]]
+        assert plan.members == {0: [_locations(2)[1]]}
+        assert plan.is_skipped(1, stored={0}) is True
+        # A representative that was not stored leaves its duplicate to be stored
+        assert plan.is_skipped(1, stored=set()) is False
+
+        # Duplicates of an earlier file's representative are stored as in share mode
+        dedup.remember(plan, [[1.0], None])
+        later = dedup.plan(["q0"], [_test_case("a", 10)], _locations(1, "tests/test_other.py"))
+        assert later.duplicate_of == ["p0"] and later.members == {}
+        assert later.resolve([]) == [[1.0]]
+        assert later.is_skipped(0, stored={0}) is False
+
+    def test_unrelated_chunks_are_not_clustered(self):
+        dedup = NearDuplicateFilter(threshold=0.9)
+        plan = dedup.plan(["p0", "p1"], [_test_case("a", 10), UNRELATED], _locations(2))
+        assert plan.duplicate_of == [None, None]
+        assert dedup.get_stats() == {"chunks_seen": 2, "duplicates": 0, "clusters": 2}
+
+    def test_from_config_disabled_by_default(self):
+        assert NearDuplicateFilter.from_config(Config()) is None
+
+    def test_invalid_mode_rejected(self):
+        with pytest.raises(ValueError):
+            NearDuplicateFilter(mode="merge")
+
+
+class TestCollapseDuplicateHits:
+    def test_keeps_best_hit_and_lists_siblings(self):
+        hits = [
+            {"id": 1, "score": 0.9, "payload": {"filePath": "a.py", "startLine": 1, "endLine": 5, "clusterId": "c"}},
+            {"id": 2, "score": 0.8, "payload": {"filePath": "b.py", "startLine": 3, "endLine": 7, "clusterId": "c"}},
+            {"id": 3, "score": 0.7, "payload": {"filePath": "c.py", "startLine": 1, "endLine": 2}},
+        ]
+        stored = {"c": [{"filePath": "a.py", "startLine": 1, "endLine": 5},
+                        {"filePath": "d.py", "startLine": 9, "endLine": 13}]}
+
+        collapsed = collapse_duplicate_hits(hits, stored)
+
+        assert [h["id"] for h in collapsed] == [1, 3]
+        assert collapsed[0]["payload"]["clusterSiblings"] == [
+            {"filePath": "b.py", "startLine": 3, "endLine": 7},
+            {"filePath": "d.py", "startLine": 9, "endLine": 13},
+        ]
+
+
+def _block(path, content, start):
+    return CodeBlock(file_path=path, identifier=None, type="function_definition",
+                     start_line=start, end_line=start + 6, content=content,
+                     file_hash="h", segment_hash=f"s{start}")
+
+
+def test_file_processor_embeds_only_representatives(tmp_path):
+    source = tmp_path / "test_api.py"
+    source.write_text("placeholder\n")
+
+    config = Config()
+    config.workspace_path = str(tmp_path)
+    config.near_duplicate_filter_enabled = True
+    config.near_duplicate_threshold = 0.8
+
+    blocks = [_block(str(source), _test_case("a", 10), 1),
+              _block(str(source), _test_case("a", 10), 10),
+              _block(str(source), UNRELATED, 20)]
+    parser = Mock()
+    parser.parse_file.return_value = blocks
+    embedder = Mock()
+    embedder.model_identifier = "nomic-embed-text"
+    embedder.create_embeddings.side_effect = lambda texts: {"embeddings": [[float(i)] for i in range(len(texts))]}
+    vector_store = Mock()
+    cache_manager = Mock()
+    cache_manager.get_hash.return_value = None
+
+    processor = FileProcessor(config=config, parser=parser, embedder=embedder,
+                              vector_store=vector_store, cache_manager=cache_manager)
+    result = processor.process_single_file(str(source), config)
+
+    assert result["success"] is True
+    embedder.create_embeddings.assert_called_once()
+    assert len(embedder.create_embeddings.call_args[0][0]) == 2
+
+    points = vector_store.upsert_points.call_args[0][0]
+    assert len(points) == 3
+    representative, duplicate = points[0], points[1]
+    assert duplicate["vector"] == representative["vector"]
+    assert duplicate["payload"]["duplicateOf"] == representative["id"]
+    assert duplicate["payload"]["clusterId"] == representative["payload"]["clusterId"] == representative["id"]
+
+
+class _FakeStore:
+    """Vector store double that keeps points by id."""
+
+    def __init__(self):
+        self.points = {}
+
+    def delete_points_by_file_path(self, rel_path):
+        self.points = {k: p for k, p in self.points.items() if p["payload"]["filePath"] != rel_path}
+
+    def upsert_points(self, points):
+        self.points.update({point["id"]: point for point in points})
+
+    def files(self):
+        return sorted(point["payload"]["filePath"] for point in self.points.values())
+
+
+class _FakeCache:
+    def __init__(self):
+        self.hashes = {}
+
+    def get_hash(self, file_path):
+        return self.hashes.get(file_path)
+
+    def update_hash(self, file_path, file_hash):
+        self.hashes[file_path] = file_hash
+
+
+def _skip_mode_run(config, store, cache, paths):
+    parser = Mock()
+    parser.parse_file.side_effect = lambda path: [_block(path, open(path).read(), 1)]
+    embedder = Mock(model_identifier="nomic-embed-text")
+    embedder.create_embeddings.side_effect = lambda texts: {"embeddings": [[1.0, 0.0]] * len(texts)}
+    processor = FileProcessor(config=config, parser=parser, embedder=embedder,
+                              vector_store=store, cache_manager=cache)
+    return [processor.process_single_file(str(path), config) for path in paths]
+
+
+def test_skip_mode_keeps_cross_file_duplicates_across_incremental_runs(tmp_path):
+    original, copy = tmp_path / "test_a.py", tmp_path / "test_b.py"
+    original.write_text(_test_case("a", 10))
+    copy.write_text(_test_case("a", 10))
+    config = Config()
+    config.workspace_path = str(tmp_path)
+    config.near_duplicate_filter_enabled = True
+    config.near_duplicate_threshold = 0.8
+    config.near_duplicate_mode = "skip"
+    store, cache = _FakeStore(), _FakeCache()
+
+    _skip_mode_run(config, store, cache, [original, copy])
+    assert store.files() == ["test_a.py", "test_b.py"]
+
+    # The next run re-indexes the edited original; the unchanged copy is skipped by its cache hash
+    original.write_text(UNRELATED)
+    results = _skip_mode_run(config, store, cache, [original, copy])
+    assert results[0]["success"] is True and results[1].get("skipped") is True
+    assert store.files() == ["test_a.py", "test_b.py"]
+    assert [p["payload"]["codeChunk"] for p in store.points.values() if p["payload"]["filePath"] == "test_b.py"] == \
+        [_test_case("a", 10)]
+
+
+def test_skip_mode_stores_duplicate_when_representative_is_too_short():
+    config = Config()
+    config.block_extraction = {"min_content_length": {"default": len(_test_case("a", 10).strip())}}
+    dedup = NearDuplicateFilter(threshold=0.8, mode="skip")
+    # The copy picks up a trailing comment and is long enough to keep
+    texts = [_test_case("a", 10), _test_case("a", 10) + "    # ok\n"]
+    blocks = [_block("/ws/t.py", texts[0][:-30], 1), _block("/ws/t.py", texts[1], 10)]
+    plan = dedup.plan(["p0", "p1"], texts, _locations(2, "t.py"))
+    assert plan.duplicate_of == [None, "p0"]
+    points = prepare_vector_points("/ws/t.py", blocks, plan.resolve([[1.0]]), "t.py", Mock(), config, plan)
+    assert [p["payload"]["startLine"] for p in points] == [10]
+    assert points[0]["payload"]["duplicateOf"] == "p0"
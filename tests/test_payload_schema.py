@@ -0,0 +1,70 @@
+"""Tests for the payload index schema manager."""
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from qdrant_client.models import FieldCondition, Filter, MatchValue, PayloadSchemaType
+
+from code_index.collections import CollectionManager
+from code_index.payload_schema import PAYLOAD_SCHEMA, PayloadSchemaManager, filter_keys, path_segments
+
+
+def _client(payload_schema):
+    client = Mock()
+    client.get_collection.return_value = SimpleNamespace(payload_schema=payload_schema)
+    return client
+
+
+def test_path_segments_lists_directory_prefixes():
+    assert path_segments("src/code_index/cli.py") == ["src", "src/code_index"]
+    assert path_segments("src\\app\\main.rs") == ["src", "src/app"]
+    assert path_segments("setup.py") == []
+
+
+def test_ensure_indexes_creates_missing_and_migrates_wrong_types():
+    existing = {name: SimpleNamespace(data_type=PayloadSchemaType.KEYWORD) for name in PAYLOAD_SCHEMA}
+    del existing["filePath"]
+    existing["type"] = SimpleNamespace(data_type=PayloadSchemaType.TEXT)
+    client = _client(existing)
+
+    report = PayloadSchemaManager(client, "repo").ensure_indexes()
+
+    assert report["created"] == ["filePath"]
+    assert report["migrated"] == ["type"]
+    client.delete_payload_index.assert_called_once_with(collection_name="repo", field_name="type")
+    created = [call.kwargs["field_name"] for call in client.create_payload_index.call_args_list]
+    assert created == ["filePath", "type"]
+
+
+def test_up_to_date_collection_only_reads_schema():
+    client = _client({name: {"data_type": "keyword"} for name in PAYLOAD_SCHEMA})
+    report = PayloadSchemaManager(client, "repo").ensure_indexes()
+    assert report["created"] == [] and report["migrated"] == []
+    client.create_payload_index.assert_not_called()
+
+
+def test_unindexed_filter_fields_are_reported_once(caplog):
+    client = _client({"workspace_hash": {"data_type": "keyword"}})
+    client.create_payload_index.side_effect = RuntimeError("forbidden")
+    manager = PayloadSchemaManager(client, "repo")
+    manager.ensure_indexes()
+
+    query_filter = Filter(must=[
+        FieldCondition(key="workspace_hash", match=MatchValue(value="h")),
+        Filter(should=[FieldCondition(key="filetype", match=MatchValue(value="py"))]),
+    ])
+    assert filter_keys(query_filter) == {"workspace_hash", "filetype"}
+    assert manager.check_filter(query_filter, "search") == ["filetype"]
+    manager.check_filter(query_filter, "search")
+    warnings = [r for r in caplog.records if "unindexed payload field 'filetype'" in r.getMessage()]
+    assert len(warnings) == 1
+
+
+def test_get_metadata_for_path_filters_on_stored_field():
+    manager = CollectionManager.__new__(CollectionManager)
+    manager.collection_name = "repo"
+    manager.client = Mock()
+    manager.client.scroll.return_value = ([SimpleNamespace(payload={"filePath": "a.py"})], None)
+
+    assert manager.get_metadata_for_path("a.py") == {"filePath": "a.py"}
+    condition = manager.client.scroll.call_args.kwargs["scroll_filter"].must[0]
+    assert condition.key == "filePath"
@@ -0,0 +1,93 @@
+"""Tests for the shared storage of the local indexes and how the file processor drives them."""
+import json
+from unittest.mock import Mock
+
+import pytest
+
+from code_index.code_graph import CodeGraph, FileFacts
+from code_index.config import Config
+from code_index.lexical_index import LexicalIndex
+from code_index.models import CodeBlock
+from code_index.services.treesitter.file_processor import FileProcessor
+from code_index.symbol_index import SymbolEntry, SymbolIndex
+from code_index.trigram_index import TrigramIndex
+
+READER = "class Reader:\n    def parse_file(self, path):\n        return path\n"
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    root = tmp_path / "ws"
+    (root / "src").mkdir(parents=True)
+    (root / "src/reader.py").write_text(READER)
+    config = Config()
+    config.workspace_path = str(root)
+    config.cache_dir = str(tmp_path / "cache")
+    config.lexical_index_enabled = True
+    config.symbol_index_enabled = True
+    config.code_graph_enabled = True
+    config.trigram_index_enabled = True
+    return config
+
+
+def test_generations_replace_each_other(workspace):
+    symbols = SymbolIndex.for_workspace(workspace)
+    assert not symbols.exists() and not symbols.has_file("src/reader.py", "h1")
+    symbols.update_file("src/reader.py", "h1", [SymbolEntry("Reader", "class", 1, 3)])
+    assert symbols.save() is True and symbols.save() is False
+    symbols.remove_file("src/missing.py")
+    assert symbols.save() is False
+    symbols.remove_file("src/reader.py")
+    assert symbols.save() is True
+    with open(symbols.directory / "symbols.json") as f:
+        meta = json.load(f)
+    assert (meta["format"], meta["generation"], meta["files"]) == (1, 2, {"names": [], "hashes": []})
+
+    graph = CodeGraph.for_workspace(workspace)
+    for generation in (1, 2):
+        graph.update_file("src/reader.py", f"h{generation}", FileFacts([SymbolEntry("Reader", "class", 1, 3)]))
+        assert graph.save() is True
+        assert sorted(p.name for p in graph.directory.iterdir()) == [f"graph.{generation}.npz", "graph.json"]
+    assert CodeGraph.for_workspace(workspace).has_file("src/reader.py", "h2")
+
+
+def test_file_processor_updates_and_saves_every_local_index(workspace):
+    reader = f"{workspace.workspace_path}/src/reader.py"
+    parser = Mock()
+    parser.parse_file.return_value = [
+        CodeBlock(reader, "parse_file", "function", 2, 3, READER, "h", "s",
+                  metadata={"symbol": "parse_file", "scope": "Reader"}),
+    ]
+    cache_manager = Mock()
+    processor = FileProcessor(workspace, parser=parser, embedder=Mock(), vector_store=Mock(),
+                              cache_manager=cache_manager, path_utils=None)
+    assert [local.name for local in processor.local_indexes] == [
+        "lexical index", "symbol index", "code graph", "trigram index"]
+    current_hash = processor.get_file_hash(reader)
+    cache_manager.get_hash.return_value = current_hash
+
+    # A parse failure of a skipped file still lets the trigram index catch up
+    parser.parse_file.side_effect = RuntimeError("parser crashed")
+    warnings = []
+    processor._index_unchanged_file(reader, "src/reader.py", current_hash, warnings)
+    assert warnings == ["Local indexing failed for src/reader.py: parser crashed"]
+    assert processor.flush_local_indexes(warnings) == ["trigram index"]
+
+    parser.parse_file.side_effect = None
+    warnings = []
+    assert processor.process_single_file(reader, warnings=warnings)["skipped"] is True
+    assert processor.flush_local_indexes(warnings) == ["lexical index", "symbol index", "code graph"]
+    assert warnings == []
+    assert LexicalIndex.for_workspace(workspace).has_file("src/reader.py", current_hash)
+    assert SymbolIndex.for_workspace(workspace).lookup("parse_file")[0]["scope"] == "Reader"
+    assert TrigramIndex.for_workspace(workspace).grep("parse_file").candidate_files == 1
+
+    # Every index already has this version; nothing is parsed or written again
+    parser.parse_file.reset_mock()
+    assert processor.process_single_file(reader, warnings=warnings)["skipped"] is True
+    parser.parse_file.assert_not_called()
+    assert processor.flush_local_indexes(warnings) == []
+
+    processor.symbol_index.update_file = Mock(side_effect=OSError("disk full"))
+    processor._update_local_indexes(reader, "src/reader.py", "h2", parser.parse_file.return_value, warnings)
+    assert warnings == ["Could not update the symbol index for src/reader.py: disk full"]
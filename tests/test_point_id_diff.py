@@ -0,0 +1,68 @@
+"""Tests for per-file point-ID sets and ID-diff upserts."""
+import json
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from code_index.cache import CacheManager
+from code_index.services.batch.bulk_vector_writer import BulkVectorWriter
+from code_index.services.shared import file_processing_helpers as helpers
+
+
+def _points(*ids):
+    return [{"id": point_id, "vector": [0.0], "payload": {}} for point_id in ids]
+
+
+def _cache(tmp_path):
+    return CacheManager(str(tmp_path / "ws"), SimpleNamespace(cache_dir=str(tmp_path / "cache")))
+
+
+def test_point_ids_are_only_trusted_for_the_cached_version(tmp_path):
+    cache = _cache(tmp_path)
+    cache.set_point_ids("/ws/a.py", "h1", ["b", "a"])
+    # Hash not recorded yet: the IDs may not describe what Qdrant holds
+    assert cache.get_point_ids("/ws/a.py") is None
+    cache.update_hash("/ws/a.py", "h1")
+    assert cache.get_point_ids("/ws/a.py") == {"a", "b"}
+
+    cache.save_point_ids()
+    with open(cache.point_ids_path) as f:
+        assert json.load(f) == {"/ws/a.py": {"hash": "h1", "ids": ["a", "b"]}}
+    assert _cache(tmp_path).get_point_ids("/ws/a.py") == {"a", "b"}
+
+    cache.update_hash("/ws/a.py", "h2")
+    assert cache.get_point_ids("/ws/a.py") is None
+
+
+def test_store_vectors_with_known_ids_deletes_only_stale_ids():
+    vector_store = Mock()
+    errors = []
+    assert helpers.store_vectors(vector_store, "a.py", _points("x", "y"), errors,
+                                 previous_ids={"x", "old"}) is True
+    vector_store.delete_points_by_file_path.assert_not_called()
+    vector_store.delete_points.assert_called_once_with(["old"])
+
+    vector_store = Mock()
+    helpers.store_vectors(vector_store, "a.py", _points("x"), errors)
+    vector_store.delete_points_by_file_path.assert_called_once_with("a.py")
+    vector_store.delete_points.assert_not_called()
+
+
+def test_failed_stale_delete_leaves_file_uncommitted():
+    vector_store = Mock()
+    vector_store.delete_points.side_effect = RuntimeError("timeout")
+    errors = []
+    assert helpers.store_vectors(vector_store, "a.py", _points("x"), errors, previous_ids={"old"}) is False
+    assert errors == ["Failed to store vectors for a.py: timeout"]
+
+
+def test_bulk_writer_skips_filter_delete_for_known_files():
+    vector_store = Mock()
+    writer = BulkVectorWriter(vector_store, batch_size=10)
+    committed = []
+    writer.add("known.py", _points("k1"), on_commit=lambda: committed.append("known"), previous_ids={"k1", "k0"})
+    writer.add("new.py", _points("n1"), on_commit=lambda: committed.append("new"))
+    writer.close()
+
+    vector_store.delete_points_by_file_paths.assert_called_once_with(["new.py"])
+    vector_store.delete_points.assert_called_once_with(["k0"])
+    assert committed == ["known", "new"]
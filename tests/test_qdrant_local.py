@@ -0,0 +1,108 @@
+"""Tests for the embedded ``local:<path>`` Qdrant backend."""
+import pytest
+
+from code_index.collections import CollectionManager
+from code_index.config import Config
+from code_index.config_service import ConfigurationService
+from code_index.qdrant_local import close_local_clients, is_local_url, local_storage_path
+from code_index.service_validation import ServiceValidator
+from code_index.tenancy import workspace_hash
+from code_index.vector_store import QdrantVectorStore
+
+
+@pytest.fixture
+def local_config(tmp_path):
+    config = Config()
+    config.workspace_path = str(tmp_path)
+    config.qdrant_url = f"local:{tmp_path / 'qdrant'}"
+    config.embedding_length = 4
+    yield config
+    close_local_clients()
+
+
+def _point(point_id, workspace, file_path, segments, vector):
+    return {"id": point_id, "vector": vector, "payload": {
+        "filePath": file_path, "pathSegments": segments, "filetype": "py", "type": "function",
+        "codeChunk": "def handler(request):\n    return process(request.body, validate=True)\n",
+        "startLine": 1, "endLine": 2, "workspace_hash": workspace_hash(workspace)}}
+
+
+def test_local_urls_are_recognized_and_validated(tmp_path):
+    assert is_local_url("local:/tmp/qdrant") is True
+    assert is_local_url("http://localhost:6333") is False
+    assert local_storage_path("local::memory:") == ":memory:"
+    assert local_storage_path("local:/tmp/qdrant") == "/tmp/qdrant"
+
+    config = Config()
+    config.qdrant_url = "local:"
+    errors = ConfigurationService()._validate_config_values(config)
+    assert any("needs a storage path" in error for error in errors)
+
+    assert ConfigurationService()._apply_validated_override(config, "qdrant_url", f"local:{tmp_path}", "cli")
+    assert config.qdrant_url == f"local:{tmp_path}"
+
+
+def test_store_and_collection_manager_share_embedded_storage(local_config):
+    store = QdrantVectorStore(local_config)
+    manager = CollectionManager(local_config)
+    assert store.local_mode is True
+    assert store.client is manager.client
+
+    validation = store.validate_configuration()
+    assert validation.valid is True
+    assert validation.details["mode"] == "local"
+    assert ServiceValidator().validate_qdrant_service(local_config).valid is True
+
+    assert store.initialize() is True
+    assert store.initialize() is False
+    assert store.begin_bulk_load() is None
+    assert [info["name"] for info in manager.list_collections()] == [store.collection_name]
+
+
+def test_index_search_and_delete_without_a_server(local_config):
+    local_config.qdrant_shard_key = "directory"
+    store = QdrantVectorStore(local_config)
+    assert store.shard_key_mode == "none"
+    store.initialize()
+
+    workspace = local_config.workspace_path
+    store.upsert_points([
+        _point("00000000-0000-0000-0000-000000000001", workspace, "src/api/a.py", ["src", "src/api"], [1, 0, 0, 0]),
+        _point("00000000-0000-0000-0000-000000000002", workspace, "lib/b.py", ["lib"], [0.9, 0.1, 0, 0]),
+    ])
+
+    hits = store.search([1, 0, 0, 0], min_score=0.1)
+    assert {hit["payload"]["filePath"] for hit in hits} == {"src/api/a.py", "lib/b.py"}
+    scoped = store.search([1, 0, 0, 0], min_score=0.1, directory_prefix="src")
+    assert [hit["payload"]["filePath"] for hit in scoped] == ["src/api/a.py"]
+
+    store.delete_points_by_file_paths(["lib/b.py"])
+    assert [hit["payload"]["filePath"] for hit in store.search([1, 0, 0, 0], min_score=0.1)] == ["src/api/a.py"]
+
+    # A second process-level handle reopens the same folder after the first is closed
+    close_local_clients()
+    reopened = QdrantVectorStore(local_config)
+    assert reopened.initialize() is False
+    assert len(reopened.search([1, 0, 0, 0], min_score=0.1)) == 1
+
+
+def test_directory_search_warns_about_points_without_path_segments(local_config, caplog):
+    store = QdrantVectorStore(local_config)
+    store.initialize()
+    workspace = local_config.workspace_path
+    root = _point("00000000-0000-0000-0000-000000000001", workspace, "setup.py", [], [1, 0, 0, 0])
+    store.upsert_points([root])
+    with caplog.at_level("WARNING", logger="code_index.vector_store"):
+        assert store.search([1, 0, 0, 0], min_score=0.1, directory_prefix="src") == []
+    assert "without pathSegments" not in caplog.text
+
+    # Points written before pathSegments existed never match a directory filter
+    legacy = _point("00000000-0000-0000-0000-000000000002", workspace, "src/api/a.py", [], [1, 0, 0, 0])
+    del legacy["payload"]["pathSegments"]
+    store.upsert_points([legacy])
+    caplog.clear()
+    stale = QdrantVectorStore(local_config)
+    with caplog.at_level("WARNING", logger="code_index.vector_store"):
+        assert stale.search([1, 0, 0, 0], min_score=0.1, directory_prefix="src") == []
+        stale.search([1, 0, 0, 0], min_score=0.1, directory_prefix="src")
+    assert caplog.text.count("has points indexed without pathSegments") == 1
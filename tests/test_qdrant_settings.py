@@ -0,0 +1,98 @@
+"""Tests for collection quantization, on-disk storage and HNSW settings."""
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from qdrant_client.models import (
+    BinaryQuantization,
+    HnswConfigDiff,
+    ProductQuantization,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+)
+
+from code_index.config import Config
+from code_index.config_service import ConfigurationService
+from code_index.qdrant_settings import (
+    build_hnsw_config,
+    build_quantization_config,
+    build_search_params,
+    describe_storage,
+    format_quantization,
+)
+from code_index.vector_store import QdrantVectorStore
+
+
+def _config(**values) -> Config:
+    config = Config()
+    for key, value in values.items():
+        setattr(config, key, value)
+    return config
+
+
+def test_defaults_keep_plain_float32_collections():
+    config = Config()
+    assert build_quantization_config(config) is None
+    assert build_hnsw_config(config) is None
+    assert build_search_params(config) is None
+    # Mock configs are treated as unset
+    assert build_quantization_config(Mock()) is None
+    assert build_search_params(Mock()) is None
+
+
+def test_quantization_modes_map_to_qdrant_models():
+    scalar = build_quantization_config(_config(qdrant_quantization="scalar", qdrant_scalar_quantile=0.95))
+    assert isinstance(scalar, ScalarQuantization)
+    assert scalar.scalar.type == ScalarType.INT8
+    assert scalar.scalar.quantile == 0.95
+    assert scalar.scalar.always_ram is True
+
+    assert isinstance(build_quantization_config(_config(qdrant_quantization="binary")), BinaryQuantization)
+    product = build_quantization_config(_config(qdrant_quantization="product", qdrant_product_compression="x32"))
+    assert isinstance(product, ProductQuantization)
+    assert product.product.compression.value == "x32"
+
+    params = build_search_params(_config(qdrant_quantization="binary", qdrant_quantization_oversampling=3,
+                                         qdrant_search_hnsw_ef=128))
+    assert params.quantization.rescore is True
+    assert params.quantization.oversampling == 3.0
+    assert params.hnsw_ef == 128
+
+
+def test_initialize_creates_collection_with_storage_settings():
+    store = QdrantVectorStore.__new__(QdrantVectorStore)
+    store.collection_name = "repo"
+    store.vector_size = 8
+    store._config = _config(qdrant_quantization="scalar", qdrant_vectors_on_disk=True,
+                            qdrant_payload_on_disk=True, qdrant_hnsw_m=32, qdrant_hnsw_ef_construct=200)
+    store.client = Mock()
+    store.client.get_collections.return_value = SimpleNamespace(collections=[])
+
+    assert store.initialize() is True
+    kwargs = store.client.create_collection.call_args.kwargs
+    assert kwargs["vectors_config"].on_disk is True
+    assert kwargs["on_disk_payload"] is True
+    assert kwargs["hnsw_config"] == HnswConfigDiff(m=32, ef_construct=200)
+    assert isinstance(kwargs["quantization_config"], ScalarQuantization)
+
+
+def test_describe_storage_reads_collection_config():
+    collection_config = SimpleNamespace(
+        params=SimpleNamespace(vectors=SimpleNamespace(size=768, on_disk=True), on_disk_payload=False),
+        hnsw_config=SimpleNamespace(m=16, ef_construct=100),
+        quantization_config=ScalarQuantization(scalar=ScalarQuantizationConfig(
+            type=ScalarType.INT8, quantile=0.99, always_ram=True)),
+    )
+    storage = describe_storage(collection_config)
+    assert storage["vectors_on_disk"] is True
+    assert storage["payload_on_disk"] is False
+    assert storage["hnsw_m"] == 16
+    assert format_quantization(storage["quantization"]) == "scalar int8 quantile=0.99 always_ram"
+    assert describe_storage({"params": {"size": 384}}) == {}
+
+
+def test_config_validation_rejects_unknown_quantization():
+    errors = ConfigurationService()._validate_config_values(
+        _config(qdrant_quantization="int4", qdrant_product_compression="x3"))
+    assert "qdrant_quantization must be one of ['none', 'scalar', 'binary', 'product']" in errors
+    assert any(e.startswith("qdrant_product_compression must be one of") for e in errors)
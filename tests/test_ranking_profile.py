@@ -0,0 +1,142 @@
+"""Tests for the compiled ranking profile used by every search backend."""
+import json
+import os
+import random
+
+import pytest
+
+from code_index import search_scoring
+from code_index.config import Config
+from code_index.qdrant_local import close_local_clients
+from code_index.search_scoring import RankingProfile, configured_min_content_length
+from code_index.tenancy import workspace_hash
+from code_index.vector_store import QdrantVectorStore
+
+
+@pytest.fixture
+def config(tmp_path):
+    (tmp_path / "code_index.json").write_text(json.dumps({"block_extraction": {"min_content_length": {"default": 0}}}))
+    config = Config()
+    config.workspace_path = str(tmp_path)
+    config.search_file_type_weights = {".PY": 1.2, ".md": 0.5}
+    config.search_path_boosts = [{"pattern": "SRC/", "weight": 1.5}, {"pattern": "src/core", "weight": 2.0},
+                                 {"pattern": "c++", "weight": 1.1}, {"pattern": "", "weight": 9.0}]
+    config.search_language_boosts = {"Function": 1.3}
+    config.search_exclude_patterns = ["vendor/", "a+b"]
+    return config
+
+
+def _reference_rank(config, hits, max_results, filetype_filter=None, min_content_len=0):
+    """The per-hit ranking the profile replaces."""
+    kept = []
+    for h in hits:
+        p = h["payload"]["filePath"].lower()
+        if any(str(x).lower() in p for x in config.search_exclude_patterns):
+            continue
+        chunk = h["payload"].get("codeChunk", "")
+        if min_content_len > 0 and len(chunk.strip()) < min_content_len:
+            continue
+        w = config.search_file_type_weights
+        file_w = {k.lower(): v for k, v in w.items()}.get(os.path.splitext(p)[1], 1.0)
+        path_w = 1.0
+        for rule in config.search_path_boosts:
+            if rule["pattern"] and rule["pattern"].lower() in p:
+                path_w *= rule["weight"]
+        lang = h["payload"].get("type", "")
+        boosts = {k.lower(): v for k, v in config.search_language_boosts.items()}
+        lang_w = boosts.get(lang.lower(), 1.0) if lang and not filetype_filter else 1.0
+        kept.append((h["id"], h["score"] * file_w * path_w * lang_w, h["score"]))
+    kept.sort(key=lambda x: (x[1], x[2]), reverse=True)
+    return [(i, a) for i, a, _ in kept[:max_results]]
+
+
+def _hits(count, seed=7):
+    rng = random.Random(seed)
+    paths = ["src/core/io.py", "src/app.py", "docs/readme.md", "vendor/lib.py", "lib/c++/x.cpp", "a+b/z.py",
+             "SRC/Upper.PY", "tests/test_io.py"]
+    return [{"id": i, "score": rng.choice([0.5, 0.75, rng.random()]),
+             "payload": {"filePath": rng.choice(paths), "type": rng.choice(["function", "class", "", "FUNCTION"]),
+                         "codeChunk": "x" * rng.randint(0, 40)}}
+            for i in range(count)]
+
+
+def _ranked(hits):
+    return [(h["id"], h["adjustedScore"]) for h in hits]
+
+
+def test_profile_ranks_like_the_per_hit_reference(config):
+    profile = RankingProfile.for_config(config)
+    for max_results, filetype, min_len in ((10, None, 0), (500, None, 20), (25, "py", 5), (0, None, 0)):
+        hits = _hits(300)
+        expected = _reference_rank(config, hits, max_results, filetype, min_len)
+        assert _ranked(profile.rank(hits, max_results, filetype, min_len)) == expected
+    assert profile.rank([], 5) == []
+
+
+def test_patterns_are_compiled_once_and_matched_literally(config):
+    profile = RankingProfile.for_config(config)
+    # Both overlapping boosts apply; patterns and paths are compared lowercased
+    assert profile.path_weights("Src/Core/io.PY") == (False, 1.2, 3.0)
+    assert profile.path_weights("lib/c++/x.cpp") == (False, 1.0, 1.1)
+    assert profile.path_weights("lib/ccc/x.cpp") == (False, 1.0, 1.0)
+    assert profile.path_weights("x/a+b/y.md")[0] is True and profile.path_weights("x/aab/y.md")[0] is False
+    assert profile.language_weight("FUNCTION") == 1.3 and profile.language_weight("") == 1.0
+
+
+def test_profiles_are_reused_until_settings_change(config):
+    first = RankingProfile.for_config(config)
+    assert RankingProfile.for_config(config) is first
+    config.search_exclude_patterns = ["docs/"]
+    changed = RankingProfile.for_config(config)
+    assert changed is not first and changed.path_weights("docs/a.md")[0] is True
+    config.search_exclude_patterns = ["vendor/", "a+b"]
+    assert RankingProfile.for_config(config) is first
+
+
+def test_min_content_length_file_is_parsed_once_per_change(config, tmp_path, monkeypatch):
+    loads = []
+    real_load = json.load
+    monkeypatch.setattr(search_scoring.json, "load", lambda f: loads.append(f.name) or real_load(f))
+    path = tmp_path / "code_index.json"
+    path.write_text(json.dumps({"block_extraction": {"min_content_length": {"default": 12}}}))
+    assert [configured_min_content_length(config) for _ in range(3)] == [12, 12, 12]
+    assert len(loads) == 1
+    assert RankingProfile.for_config(config).min_content_length == 12
+
+    path.write_text(json.dumps({"block_extraction": {"min_content_length": {"default": 345}}}))
+    assert configured_min_content_length(config) == 345 and len(loads) == 2
+    # A loaded config keeps its profile; reloading it picks up the edited file
+    assert RankingProfile.for_config(config).min_content_length == 12
+    reloaded = Config()
+    reloaded.update_from_dict(config.to_dict())
+    assert RankingProfile.for_config(reloaded).min_content_length == 345
+
+
+def test_profile_is_remembered_on_the_config(config, monkeypatch):
+    first = RankingProfile.for_config(config)
+    lookups = []
+    monkeypatch.setattr(search_scoring, "configured_min_content_length", lambda cfg: lookups.append(cfg) or 0)
+    monkeypatch.setattr(RankingProfile, "signature", staticmethod(lambda cfg: lookups.append(cfg) or ""))
+    assert [RankingProfile.for_config(config) for _ in range(3)] == [first] * 3
+    assert lookups == []
+    config.workspace_path = config.workspace_path + "/"
+    RankingProfile.for_config(config)
+    assert len(lookups) == 2
+
+
+def test_search_records_time_outside_qdrant(config, tmp_path):
+    config.qdrant_url = f"local:{tmp_path / 'qdrant'}"
+    config.embedding_length = 2
+    store = QdrantVectorStore(config)
+    store.initialize()
+    store.upsert_points([{"id": 1, "vector": [1.0, 0.0], "payload": {
+        "filePath": "src/core/io.py", "pathSegments": ["src"], "filetype": "py", "type": "function",
+        "codeChunk": "def read(): pass", "startLine": 1, "endLine": 1,
+        "workspace_hash": workspace_hash(config.workspace_path)}}])
+    try:
+        hits = store.search([1.0, 0.0], min_score=0.1)
+        assert [round(h["adjustedScore"], 4) for h in hits] == [round(1.2 * 3.0 * 1.3, 4)]
+        stats = store.last_search_stats
+        assert stats["qdrant_ms"] > 0 and stats["local_ms"] >= 0
+    finally:
+        close_local_clients()
@@ -0,0 +1,201 @@
+"""Tests for overlap collapsing and MMR diversity re-ranking of search results."""
+import json
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from code_index.config import Config
+from code_index.config_service import ConfigurationService
+from code_index.flat_vector_store import FlatVectorStore
+from code_index.lexical_index import LexicalDocument, LexicalIndex
+from code_index.qdrant_local import close_local_clients
+from code_index.search_fusion import fuse_hits
+from code_index.service_validation import ValidationResult
+from code_index.services import SearchService
+from code_index.services.shared.result_ranker import ResultRanker, collapse_overlapping_hits, mmr_select
+from code_index.tenancy import workspace_hash
+from code_index.vector_store import QdrantVectorStore
+
+# A class, two of its methods, a near-copy of the class in another file and two unrelated blocks
+BLOCKS = [
+    (1, "src/reader.py", 1, 40, "class", [1.0, 0.0, 0.0]),
+    (2, "src/reader.py", 5, 12, "function", [0.99, 0.1, 0.0]),
+    (3, "src/reader.py", 14, 30, "function", [0.98, 0.15, 0.0]),
+    (4, "src/reader_copy.py", 1, 40, "class", [0.97, 0.2, 0.0]),
+    (5, "src/writer.py", 1, 20, "class", [0.6, 0.0, 0.8]),
+    (6, "src/io.py", 1, 9, "function", [0.5, 0.8, 0.3]),
+]
+
+
+def _hit(point_id, file_path, start, end, kind, vector, score=None, **extra):
+    payload = {"filePath": file_path, "startLine": start, "endLine": end, "type": kind,
+               "codeChunk": f"block {point_id}", **extra}
+    score = score if score is not None else 1.0 - point_id / 100
+    return {"id": point_id, "score": score, "adjustedScore": score, "payload": payload, "vector": vector}
+
+
+def _ids(hits):
+    return [h["id"] for h in hits]
+
+
+def test_collapse_overlapping_hits():
+    hits = [_hit(*block) for block in BLOCKS]
+    hits.insert(1, _hit(7, "src/reader.py", 41, 60, "function", None))
+    # Split parts of one block are kept even where they overlap a better hit
+    hits.append(_hit(8, "src/reader.py", 30, 45, "class", None, splitIndex=0, splitTotal=2, parentBlockId="p"))
+    collapsed = collapse_overlapping_hits(hits)
+    assert _ids(collapsed) == [1, 7, 4, 5, 6, 8]
+    assert collapsed[0]["payload"]["overlappingRanges"] == [
+        {"startLine": 5, "endLine": 12, "type": "function"}, {"startLine": 14, "endLine": 30, "type": "function"}]
+    assert "overlappingRanges" not in collapsed[1]["payload"]
+    assert collapse_overlapping_hits([]) == []
+
+
+def test_mmr_trades_relevance_for_diversity():
+    hits = [_hit(*block) for block in BLOCKS]
+    assert _ids(mmr_select(hits, 4, 1.0)) == [1, 2, 3, 4]
+    # The near-identical blocks give way to the io and writer blocks
+    assert _ids(mmr_select(hits, 4, 0.5)) == [1, 6, 5, 2]
+    assert _ids(mmr_select(hits, 10, 0.5)) == [1, 6, 5, 2, 3, 4]
+    assert mmr_select(hits, 0, 0.5) == []
+
+    # Hits without vectors are similar to nothing; without any vectors the ranking is kept
+    hits[4]["vector"] = None
+    assert _ids(mmr_select(hits, 3, 0.5)) == [1, 5, 6]
+    for hit in hits:
+        hit["vector"] = None
+    assert _ids(mmr_select(hits, 3, 0.5)) == [1, 2, 3]
+
+
+def test_ranker_settings_and_diversify():
+    config = Config()
+    ranker = ResultRanker(config)
+    assert ranker.collapse_overlaps and not ranker.needs_vectors()
+    assert ranker.candidate_count(10) == 20
+    assert _ids(ranker.diversify([_hit(*block) for block in BLOCKS], 2)) == [1, 4]
+
+    config.search_mmr_lambda = 0.5
+    assert ranker.needs_vectors()
+    assert _ids(ranker.diversify([_hit(*block) for block in BLOCKS], 3)) == [1, 6, 5]
+
+    config.search_collapse_overlaps = False
+    config.search_mmr_lambda = 1.0
+    assert ranker.candidate_count(10) == 10
+    assert _ids(ranker.diversify([_hit(*block) for block in BLOCKS], 3)) == [1, 2, 3]
+
+    for bad in (1.5, -0.1, True):
+        config.search_mmr_lambda = bad
+        assert "search_mmr_lambda must be between 0 and 1" in ConfigurationService()._validate_config_values(config)
+
+
+@pytest.mark.parametrize("min_content_length", [0, 5])
+def test_search_service_returns_distinct_code(tmp_path, min_content_length):
+    # A minimum content length makes the Qdrant store fetch vectors with the hydrated payloads
+    (tmp_path / "code_index.json").write_text(
+        json.dumps({"block_extraction": {"min_content_length": {"default": min_content_length}}}))
+    config = Config()
+    config.workspace_path = str(tmp_path)
+    config.qdrant_url = f"local:{tmp_path / 'qdrant'}"
+    config.embedding_length = 3
+    config.search_min_score = 0.1
+    config.search_max_results = 3
+    config.search_file_type_weights = {}
+    config.search_path_boosts = []
+    config.search_language_boosts = {}
+    config.search_mmr_lambda = 0.3
+    store = QdrantVectorStore(config)
+    store.initialize()
+    store.upsert_points([{"id": point_id, "vector": vector, "payload": {
+        "filePath": path, "pathSegments": ["src"], "filetype": "py", "type": kind, "codeChunk": f"code of {point_id}",
+        "startLine": start, "endLine": end, "workspace_hash": workspace_hash(config.workspace_path)}}
+        for point_id, path, start, end, kind, vector in BLOCKS])
+    try:
+        hits = store.search([1.0, 0.0, 0.0], min_score=0.1, max_results=6, with_vectors=True)
+        assert all(len(h["vector"]) == 3 for h in hits)
+
+        service = SearchService(embedding_cache=Mock(get_embedding=Mock(return_value=None)))
+        service.validate_search_config = Mock(return_value=ValidationResult(service="search_service", valid=True))
+        embedder = Mock(create_embeddings=Mock(return_value={"embeddings": [[1.0, 0.0, 0.0]]}))
+        service._initialize_search_components = Mock(return_value=(embedder, store))
+        result = service.search_code("reader", config, mode="vector")
+        assert [(m.file_path, m.start_line) for m in result.matches] == [
+            ("src/reader.py", 1), ("src/io.py", 1), ("src/writer.py", 1)]
+        assert [r["startLine"] for r in result.matches[0].metadata["overlapping_ranges"]] == [5, 14]
+
+        config.search_collapse_overlaps = False
+        config.search_mmr_lambda = 1.0
+        plain = service.search_code("reader", config, mode="vector")
+        assert [m.start_line for m in plain.matches] == [1, 5, 14]
+    finally:
+        close_local_clients()
+
+
+def test_flat_store_returns_vectors(tmp_path):
+    (tmp_path / "code_index.json").write_text(json.dumps({"block_extraction": {"min_content_length": {"default": 0}}}))
+    config = Config()
+    config.workspace_path = str(tmp_path / "ws")
+    config.vector_store_backend = "flat"
+    config.flat_store_dir = str(tmp_path / "flat")
+    config.embedding_length = 3
+    store = FlatVectorStore(config)
+    store.initialize()
+    store.upsert_points([{"id": point_id, "vector": vector, "payload": {
+        "filePath": path, "pathSegments": ["src"], "filetype": "py", "type": kind, "codeChunk": f"code of {point_id}",
+        "startLine": start, "endLine": end, "workspace_hash": workspace_hash(config.workspace_path)}}
+        for point_id, path, start, end, kind, vector in BLOCKS])
+    hits = store.search_batch([[0.0, 0.0, 1.0]], min_score=0.1, max_results=2, with_vectors=True)[0]
+    assert _ids(hits) == [5, 6]
+    assert np.allclose(hits[0]["vector"], [0.6, 0.0, 0.8], atol=1e-2)
+    assert "vector" not in store.search([0.0, 0.0, 1.0], min_score=0.1)[0]
+
+
+def test_hybrid_search_keeps_vectors_for_mmr(tmp_path):
+    vector_hits = [_hit(*block) for block in BLOCKS[:2]]
+    lexical_hits = [{"id": "2", "score": 3.0, "payload": {"filePath": "src/reader.py"}},
+                    {"id": "9", "score": 1.0, "payload": {"filePath": "src/other.py"}}]
+    fused = {str(h["id"]): h for h in fuse_hits(vector_hits, lexical_hits)}
+    assert fused["2"]["vector"] == BLOCKS[1][5] and "vector" not in fused["9"]
+
+    workspace = tmp_path / "ws"
+    workspace.mkdir()
+    (workspace / "code_index.json").write_text(json.dumps({"block_extraction": {"min_content_length": {"default": 0}}}))
+    config = Config()
+    config.workspace_path = str(workspace)
+    config.vector_store_backend = "flat"
+    config.flat_store_dir = str(tmp_path / "flat")
+    config.cache_dir = str(tmp_path / "cache")
+    config.embedding_length = 3
+    config.search_min_score = 0.1
+    config.search_max_results = 3
+    config.search_file_type_weights = {}
+    config.search_path_boosts = []
+    config.search_language_boosts = {}
+    config.search_collapse_overlaps = False
+    store = FlatVectorStore(config)
+    store.initialize()
+    store.upsert_points([{"id": point_id, "vector": vector, "payload": {
+        "filePath": path, "pathSegments": ["src"], "filetype": "py", "type": kind, "codeChunk": f"code of {point_id}",
+        "startLine": start, "endLine": end, "workspace_hash": workspace_hash(config.workspace_path)}}
+        for point_id, path, start, end, kind, vector in BLOCKS])
+    documents = {}
+    for point_id, path, start, end, kind, _ in BLOCKS:
+        documents.setdefault(path, []).append(
+            LexicalDocument.from_text(str(point_id), start, end, kind, "reader" if point_id <= 4 else "writer"))
+    lexical = LexicalIndex.for_workspace(config)
+    for path, file_documents in documents.items():
+        lexical.update_file(path, "h", file_documents)
+    lexical.save()
+
+    service = SearchService(embedding_cache=Mock(get_embedding=Mock(return_value=None)))
+    service.validate_search_config = Mock(return_value=ValidationResult(service="search_service", valid=True))
+    embedder = Mock(create_embeddings=Mock(return_value={"embeddings": [[1.0, 0.0, 0.0]]}))
+    service._initialize_search_components = Mock(return_value=(embedder, store))
+    plain = service.search_code("reader", config, mode="hybrid")
+    assert {m.file_path for m in plain.matches} <= {"src/reader.py", "src/reader_copy.py"}
+
+    # The fused hits carry the vector leg's vectors, so MMR swaps near-copies for other code
+    config.search_mmr_lambda = 0.3
+    diverse = service.search_code("reader", config, mode="hybrid")
+    assert [m.file_path for m in diverse.matches][0] == "src/reader.py"
+    assert {"src/writer.py", "src/io.py"} <= {m.file_path for m in diverse.matches}
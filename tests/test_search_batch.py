@@ -0,0 +1,182 @@
+"""Tests for batch search: one embedding request and one vector store round trip for many queries."""
+import asyncio
+import json
+from unittest.mock import Mock
+
+import pytest
+from click.testing import CliRunner
+
+from code_index.cli import cli
+from code_index.config import Config
+from code_index.mcp_server.tools import search_tool
+from code_index.models import SearchMatch, SearchResult
+from code_index.qdrant_local import close_local_clients
+from code_index.service_validation import ValidationResult
+from code_index.services import SearchService
+from code_index.services.shared.command_context import SearchDependencies
+from code_index.tenancy import workspace_hash
+from code_index.vector_store import QdrantVectorStore
+
+CHUNKS = {
+    1: "def parse_file_with_mmap(path):\n    return mmap_reader(path, offset=0)\n",
+    2: "def load_settings(path):\n    return read_config(path, encoding='utf-8')\n",
+    3: "class RequestHandler:\n    def handle(self, request):\n        return self.process(request)\n",
+}
+VECTORS = {1: [0.6, 0.8], 2: [1.0, 0.0], 3: [0.8, 0.6]}
+
+
+@pytest.fixture
+def config(tmp_path):
+    config = Config()
+    config.workspace_path = str(tmp_path)
+    config.qdrant_url = f"local:{tmp_path / 'qdrant'}"
+    config.embedding_length = 2
+    config.qdrant_sparse_vectors = True
+    config.search_min_score = 0.1
+    config.search_file_type_weights = {}
+    config.search_path_boosts = []
+    config.search_language_boosts = {}
+    yield config
+    close_local_clients()
+
+
+@pytest.fixture
+def store(config):
+    store = QdrantVectorStore(config)
+    store.initialize()
+    store.upsert_points([{"id": point_id, "vector": VECTORS[point_id], "payload": {
+        "filePath": f"src/f{point_id}.py", "pathSegments": ["src"], "filetype": "py", "type": "function",
+        "codeChunk": chunk, "startLine": 1, "endLine": 2,
+        "workspace_hash": workspace_hash(config.workspace_path)}}
+        for point_id, chunk in CHUNKS.items()])
+    return store
+
+
+def _ids(hits):
+    return [hit["id"] for hit in hits]
+
+
+def _service(embedder, store, cache=None):
+    service = SearchService(embedding_cache=cache or Mock(get_embedding=Mock(return_value=None)))
+    service.validate_search_config = Mock(return_value=ValidationResult(service="search_service", valid=True))
+    service._initialize_search_components = Mock(return_value=(embedder, store))
+    return service
+
+
+def test_vector_store_batch_matches_single_searches(store):
+    queries = [[1.0, 0.0], [0.6, 0.8], [0.0, 1.0]]
+    batch = store.search_batch(queries, min_score=0.1, max_results=2)
+    assert [_ids(hits) for hits in batch] == [_ids(store.search(q, min_score=0.1, max_results=2)) for q in queries]
+    assert [round(hit["score"], 4) for hit in batch[0]] == [1.0, 0.8]
+
+    # Query texts make each request a dense + sparse fusion, as in hybrid_search()
+    fused = store.search_batch([[1.0, 0.0], [1.0, 0.0]], min_score=0.1, query_texts=["parse mmap", "?"])
+    assert _ids(fused[0])[:2] == [1, 2]
+    assert _ids(fused[1]) == _ids(store.search([1.0, 0.0], min_score=0.1))
+
+    assert store.search_batch([[1.0, 0.0]], directory_prefix="lib") == [[]]
+    assert store.search_batch([]) == []
+
+
+def test_search_service_embeds_once_and_queries_once(config, store):
+    store.search_batch = Mock(wraps=store.search_batch)
+    store.search = Mock(side_effect=AssertionError("search() must not be called per query"))
+    cache = Mock(get_embedding=Mock(side_effect=lambda q: [0.6, 0.8] if q == "cached" else None))
+    embedder = Mock(create_embeddings=Mock(return_value={"embeddings": [[1.0, 0.0], [0.0, 1.0]]}))
+    service = _service(embedder, store, cache)
+
+    results = service.search_batch(["settings", "cached", "handler", "settings"], config, mode="vector")
+    # Only the distinct uncached queries are embedded, in one request
+    embedder.create_embeddings.assert_called_once_with(["settings", "handler"])
+    store.search_batch.assert_called_once()
+    assert [r.query for r in results] == ["settings", "cached", "handler", "settings"]
+    assert all(r.is_successful() and r.search_method == "text" for r in results)
+    assert [r.matches[0].file_path for r in results] == ["src/f2.py", "src/f1.py", "src/f1.py", "src/f2.py"]
+    assert cache.set_embedding.call_count == 2
+
+    # Collections with sparse vectors fuse each query inside the same batch
+    embedder.create_embeddings.return_value = {"embeddings": [[1.0, 0.0]]}
+    hybrid = service.search_batch(["parse mmap"], config, mode="hybrid")
+    assert hybrid[0].search_method == "hybrid"
+    assert hybrid[0].matches[0].file_path == "src/f1.py"
+
+
+def test_search_service_batch_cache_errors_and_lexical(config, store):
+    config.search_cache_enabled = True
+    SearchService.invalidate_workspace_cache(config.workspace_path)
+    embedder = Mock(create_embeddings=Mock(return_value={"embeddings": [[1.0, 0.0]]}))
+    service = _service(embedder, store)
+    first = service.search_batch(["settings"], config, mode="vector")
+    embedder.create_embeddings.reset_mock()
+    # Cached results are reused; only the new query is embedded and searched
+    embedder.create_embeddings.return_value = {"embeddings": [[0.0, 1.0]]}
+    again = service.search_batch(["settings", "handler"], config, mode="vector")
+    embedder.create_embeddings.assert_called_once_with(["handler"])
+    assert again[0].matches == first[0].matches and again[1].matches[0].file_path == "src/f1.py"
+    SearchService.invalidate_workspace_cache(config.workspace_path)
+
+    failing = _service(Mock(create_embeddings=Mock(return_value={"embeddings": []})), store)
+    errors = failing.search_batch(["a", "b"], config, mode="vector")
+    assert [r.errors for r in errors] == [["Failed to generate embedding for search query"]] * 2
+
+    service.search_code = Mock(side_effect=lambda query, *args: query.upper())
+    assert service.search_batch(["x", "y"], config, mode="lexical") == ["X", "Y"]
+
+
+def _result(query, files):
+    matches = [SearchMatch(file_path=f, start_line=1, end_line=2, code_chunk="def f():\n    pass",
+                           match_type="function", score=0.9, adjusted_score=0.9, metadata={}) for f in files]
+    return SearchResult(query=query, matches=matches, total_found=len(matches), execution_time_seconds=0.1,
+                        search_method="text", config_summary={}, errors=[], warnings=[])
+
+
+def test_cli_queries_file(monkeypatch, tmp_path):
+    search_service = Mock()
+    search_service.search_batch.side_effect = lambda queries, cfg, **kwargs: [
+        _result(q, ["src/a.py"] if q == "first" else []) for q in queries]
+    deps = SearchDependencies(config=Config(), search_service=search_service, collection_manager=Mock())
+    monkeypatch.setattr("code_index.cli.command_context.load_search_dependencies", lambda **kwargs: deps)
+    queries_file = tmp_path / "queries.txt"
+    queries_file.write_text("first\n\n# comment\nsecond\n")
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["search", "--json", "--queries-file", str(queries_file)])
+    assert result.exit_code == 0, result.output
+    data = json.loads(result.output)
+    assert [(d["query"], len(d["results"])) for d in data] == [("first", 1), ("second", 0)]
+    assert data[0]["results"][0]["filePath"] == "src/a.py"
+    assert search_service.search_batch.call_args[0][0] == ["first", "second"]
+
+    text = runner.invoke(cli, ["search", "--queries-file", str(queries_file)])
+    assert "=== second ===\nNo results found." in text.output
+    assert runner.invoke(cli, ["search", "--queries-file", str(queries_file), "both"]).exit_code == 2
+    assert runner.invoke(cli, ["search"]).exit_code == 2
+
+
+def test_mcp_search_batch_tool(monkeypatch, tmp_path):
+    search_service = Mock()
+    search_service.search_batch.side_effect = lambda queries, cfg, **kwargs: [
+        _result(q, ["src/a.py"] if q == "first" else []) for q in queries]
+    store = Mock()
+    store.collection_exists.return_value = True
+    context = Mock()
+    context.load_search_dependencies.return_value = SearchDependencies(
+        config=Config(), search_service=search_service, collection_manager=Mock())
+    monkeypatch.setattr(search_tool, "_command_context_factory", lambda: context)
+    monkeypatch.setattr(search_tool, "create_vector_store", lambda config: store)
+
+    def run(**kwargs):
+        return asyncio.run(search_tool.search_batch(Mock(), workspace=str(tmp_path), **kwargs))
+
+    found = run(queries=["first", "second"], path="src", mode="VECTOR")
+    assert found["status"] == "success" and found["query_count"] == 2
+    assert [(r["query"], r["status"], r["result_count"]) for r in found["results"]] == [
+        ("first", "success", 1), ("second", "no_results", 0)]
+    assert search_service.search_batch.call_args[1] == {"filetype": None, "path_prefix": "src", "mode": "vector"}
+    assert run(queries=["second"])["status"] == "no_results"
+
+    for bad in ([], ["ok", ""], "first", ["q"] * (search_tool.MAX_BATCH_QUERIES + 1)):
+        with pytest.raises(ValueError):
+            run(queries=bad)
+    store.collection_exists.return_value = False
+    assert run(queries=["first"])["status"] == "not_indexed"
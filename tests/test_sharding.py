@@ -0,0 +1,111 @@
+"""Tests for sharded collections and shard-aware writes and searches."""
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from qdrant_client.models import ShardingMethod
+
+from code_index.config import Config
+from code_index.config_service import ConfigurationService
+from code_index.qdrant_settings import build_sharding_args, shard_key_for_payload, shard_key_for_prefix
+from code_index.services.batch.bulk_vector_writer import BulkVectorWriter
+from code_index.vector_store import QdrantVectorStore
+
+
+def _point(point_id, file_path, segments, filetype="py"):
+    return {"id": point_id, "vector": [0.1, 0.2],
+            "payload": {"filePath": file_path, "pathSegments": segments, "filetype": filetype}}
+
+
+def _store(tmp_path, mode="directory", known=("src",)):
+    config = Config()
+    config.workspace_path = str(tmp_path)
+    config.qdrant_shard_key = mode
+    config.qdrant_shard_number = 2
+    store = QdrantVectorStore(config)
+    store.client = Mock()
+    store.client.list_shard_keys.return_value = SimpleNamespace(
+        shard_keys=[SimpleNamespace(key=key) for key in known])
+    store.client.query_points.return_value = SimpleNamespace(points=[])
+    return store
+
+
+def test_sharding_args_and_shard_keys():
+    config = Config()
+    assert build_sharding_args(config) == {}
+
+    config.qdrant_shard_number = 4
+    config.qdrant_replication_factor = 2
+    config.qdrant_shard_key = "directory"
+    assert build_sharding_args(config) == {"shard_number": 4, "replication_factor": 2,
+                                           "sharding_method": ShardingMethod.CUSTOM}
+
+    assert shard_key_for_payload("directory", {"pathSegments": ["src", "src/api"]}) == "src"
+    assert shard_key_for_payload("directory", {"pathSegments": []}) == "_root"
+    assert shard_key_for_payload("language", {"filetype": "go"}) == "go"
+    assert shard_key_for_payload("none", {"filetype": "go"}) is None
+    assert shard_key_for_prefix("directory", "./src/api/") == "src"
+    assert shard_key_for_prefix("directory", ".") is None
+    assert shard_key_for_prefix("directory", "src/api/") == "src"
+
+
+def test_upsert_groups_points_by_shard_and_creates_new_keys(tmp_path):
+    store = _store(tmp_path)
+    store.upsert_points([
+        _point(1, "src/a.py", ["src"]),
+        _point(2, "README.md", [], filetype="md"),
+        _point(3, "src/api/b.py", ["src", "src/api"]),
+    ])
+
+    store.client.create_shard_key.assert_called_once()
+    assert store.client.create_shard_key.call_args.kwargs["shard_key"] == "_root"
+    assert store.client.create_shard_key.call_args.kwargs["shards_number"] == 2
+    calls = {call.kwargs["shard_key_selector"]: [p.id for p in call.kwargs["points"]]
+             for call in store.client.upsert.call_args_list}
+    assert calls == {"src": [1, 3], "_root": [2]}
+
+
+def test_subtree_search_targets_one_shard(tmp_path):
+    store = _store(tmp_path)
+    store.search([0.1, 0.2], directory_prefix="./src/api/")
+
+    kwargs = store.client.query_points.call_args.kwargs
+    assert kwargs["shard_key_selector"] == "src"
+    conditions = {condition.key: condition.match.value for condition in kwargs["query_filter"].must}
+    assert conditions["pathSegments"] == "src/api"
+
+    # A directory that was never written has no shard and no results
+    store.client.query_points.reset_mock()
+    assert store.search([0.1, 0.2], directory_prefix="docs") == []
+    store.client.query_points.assert_not_called()
+
+    # Without custom sharding the prefix only filters
+    plain = _store(tmp_path, mode="none")
+    plain.search([0.1, 0.2], directory_prefix="src")
+    assert "shard_key_selector" not in plain.client.query_points.call_args.kwargs
+
+
+def test_bulk_writer_batches_each_shard_separately():
+    store = Mock()
+    store.shard_key_for.side_effect = lambda point: point["payload"]["pathSegments"][0]
+    writer = BulkVectorWriter(store, batch_size=2, parallelism=1)
+
+    writer.add("src/a.py", [_point(1, "src/a.py", ["src"]), _point(2, "src/a.py", ["src"])], previous_ids=set())
+    writer.add("lib/b.py", [_point(3, "lib/b.py", ["lib"])], previous_ids=set())
+    writer.add("src/c.py", [_point(4, "src/c.py", ["src"])], previous_ids=set())
+    writer.close([])
+
+    batches = [([p["id"] for p in call.args[0]], call.kwargs["wait"]) for call in store.upsert_points.call_args_list]
+    # The full src batch went out during add; each shard then got its own wait=True barrier
+    assert batches[0] == ([1, 2], False)
+    assert sorted(batches[1:]) == [([3], True), ([4], True)]
+
+
+def test_sharding_settings_are_validated():
+    config = Config()
+    config.qdrant_shard_number = 0
+    config.qdrant_replication_factor = "2"
+    config.qdrant_shard_key = "module"
+    errors = ConfigurationService()._validate_config_values(config)
+    assert "qdrant_shard_number must be a positive integer or null" in errors
+    assert "qdrant_replication_factor must be a positive integer or null" in errors
+    assert "qdrant_shard_key must be one of ['none', 'directory', 'language']" in errors
@@ -0,0 +1,153 @@
+"""Tests for the shared multi-tenant collection mode."""
+import hashlib
+import os
+import uuid
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from code_index.collections import CollectionManager
+from code_index.collections_commands import _resolve_canonical_id_for_delete
+from code_index.config import Config
+from code_index.config_service import ConfigurationService
+from code_index.models import CodeBlock
+from code_index.payload_schema import PAYLOAD_SCHEMA, PayloadSchemaManager
+from code_index.qdrant_local import close_local_clients
+from code_index.qdrant_settings import build_hnsw_config
+from code_index.services.shared.file_processing_helpers import lexical_documents, prepare_vector_points
+from code_index.tenancy import resolve_tenant, split_tenant_ref, tenant_ref
+from code_index.vector_store import QdrantVectorStore
+
+TENANT_A = "a" * 64
+TENANT_B = "b" * 16 + "0" * 48
+
+
+def _facet_client():
+    client = Mock()
+    client.facet.return_value = SimpleNamespace(hits=[
+        SimpleNamespace(value=TENANT_A, count=12),
+        SimpleNamespace(value=TENANT_B, count=3),
+    ])
+    return client
+
+
+def _store(tmp_path, **overrides):
+    config = Config()
+    config.workspace_path = str(tmp_path)
+    config.qdrant_shared_collection = "code_index_shared"
+    for key, value in overrides.items():
+        setattr(config, key, value)
+    store = QdrantVectorStore(config)
+    store.client = _facet_client()
+    return store
+
+
+def test_tenant_refs_round_trip():
+    assert tenant_ref("shared", TENANT_A) == "shared/" + "a" * 16
+    assert split_tenant_ref("shared/" + "a" * 16) == ("shared", "a" * 16)
+    assert split_tenant_ref("ws-0123") == ("ws-0123", None)
+    assert resolve_tenant(_facet_client(), "shared", "bbbb") == TENANT_B
+    assert resolve_tenant(_facet_client(), "shared", "cccc") is None
+
+
+def test_shared_store_uses_tenant_index_and_per_tenant_hnsw(tmp_path):
+    store = _store(tmp_path)
+    assert store.collection_name == "code_index_shared"
+    assert store.tenant_mode is True
+
+    hnsw = build_hnsw_config(store._config, tenant=True)
+    assert hnsw.m == 0 and hnsw.payload_m == 16
+
+    client = Mock()
+    client.get_collection.return_value = SimpleNamespace(
+        payload_schema={name: {"data_type": "keyword"} for name in PAYLOAD_SCHEMA})
+    report = PayloadSchemaManager(client, "code_index_shared", tenant_field="workspace_hash").ensure_indexes()
+    assert report["migrated"] == ["workspace_hash"]
+    field_schema = client.create_payload_index.call_args.kwargs["field_schema"]
+    assert field_schema.is_tenant is True
+
+
+def test_shared_store_clears_only_its_workspace(tmp_path):
+    store = _store(tmp_path)
+    assert store.begin_bulk_load() is None
+
+    store.delete_collection()
+    store.client.delete_collection.assert_not_called()
+    selector = store.client.delete.call_args.kwargs["points_selector"]
+    expected = hashlib.sha256(os.path.abspath(str(tmp_path)).encode()).hexdigest()
+    assert selector.must[0].key == "workspace_hash"
+    assert selector.must[0].match.value == expected
+
+
+def test_tenant_ref_override_scopes_search_to_that_workspace(tmp_path):
+    store = _store(tmp_path, collection_name_override="code_index_shared/bbbbbbbbbbbbbbbb")
+    store.client.query_points.return_value = SimpleNamespace(points=[])
+    store.search([0.1, 0.2], skip_workspace_filter=True)
+    query_filter = store.client.query_points.call_args.kwargs["query_filter"]
+    assert query_filter.must[0].match.value == TENANT_B
+
+
+def test_collection_manager_lists_and_deletes_workspaces(tmp_path):
+    config = Config()
+    config.workspace_path = str(tmp_path)
+    config.qdrant_shared_collection = "shared"
+    manager = CollectionManager(config)
+    manager.client = _facet_client()
+    manager.client.scroll.return_value = ([SimpleNamespace(payload={"workspace_path": "/repos/a"})], None)
+
+    entries = manager.list_tenant_infos("shared", {"name": "shared", "points_count": 15, "dimension": 768})
+    assert [(e["name"], e["points_count"]) for e in entries] == [("shared/" + "a" * 16, 12),
+                                                               ("shared/" + "b" * 16, 3)]
+    assert entries[0]["workspace_path"] == "/repos/a"
+    assert entries[0]["dimension"] == 768
+
+    assert manager.delete_collection("shared/" + "b" * 16) is True
+    manager.client.delete_collection.assert_not_called()
+    selector = manager.client.delete.call_args.kwargs["points_selector"]
+    assert selector.must[0].match.value == TENANT_B
+    assert _resolve_canonical_id_for_delete(manager, "shared/" + "b" * 16) == "b" * 16
+
+
+def test_shared_collection_name_is_validated():
+    config = Config()
+    config.qdrant_shared_collection = "team/shared"
+    config.qdrant_tenant_payload_m = 0
+    errors = ConfigurationService()._validate_config_values(config)
+    assert "qdrant_shared_collection must be a collection name without '/' or null" in errors
+    assert "qdrant_tenant_payload_m must be a positive integer" in errors
+
+
+def test_nested_workspaces_keep_their_own_points(tmp_path):
+    outer, inner = tmp_path / "repo", tmp_path / "repo" / "sub"
+    source = inner / "x.py"
+    block = CodeBlock(str(source), "f", "function", 1, 2, "def f():\n    return 1\n", "h", "s")
+    embedder = Mock(model_identifier="nomic-embed-text")
+    stores = []
+    for workspace in (outer, inner):
+        workspace.mkdir(parents=True, exist_ok=True)
+        (workspace / "code_index.json").write_text('{"block_extraction": {"min_content_length": {"default": 0}}}')
+        config = Config()
+        config.workspace_path = str(workspace)
+        config.qdrant_url = f"local:{tmp_path / 'qdrant'}"
+        config.qdrant_shared_collection = "code_index_shared"
+        config.embedding_length = 2
+        store = QdrantVectorStore(config)
+        store.initialize()
+        rel_path = os.path.relpath(source, workspace)
+        points = prepare_vector_points(str(source), [block], [[1.0, 0.0]], rel_path, embedder, config)
+        assert [d.point_id for d in lexical_documents(str(source), [block], store._workspace_hash())] == \
+            [points[0]["id"]]
+        store.upsert_points(points)
+        stores.append(store)
+    try:
+        assert stores[0].client.count(collection_name="code_index_shared").count == 2
+        for store, rel_path in zip(stores, ("sub/x.py", "x.py")):
+            hits = store.search([1.0, 0.0], min_score=0.0)
+            assert [h["payload"]["filePath"] for h in hits] == [rel_path]
+
+        # Per-workspace collections keep the ids they always had
+        config = Config()
+        config.workspace_path = str(outer)
+        points = prepare_vector_points(str(source), [block], [[1.0, 0.0]], "sub/x.py", embedder, config)
+        assert points[0]["id"] == str(uuid.uuid5(uuid.NAMESPACE_URL, f"{source}:1:2:None"))
+    finally:
+        close_local_clients()
@@ -0,0 +1,134 @@
+"""Tests for sparse vectors and server-side hybrid search in Qdrant."""
+from unittest.mock import Mock
+
+import pytest
+from qdrant_client.models import Fusion, FusionQuery, RrfQuery
+
+from code_index.config import Config
+from code_index.qdrant_local import close_local_clients
+from code_index.qdrant_settings import describe_storage
+from code_index.service_validation import ValidationResult
+from code_index.services import SearchService
+from code_index.sparse_vectors import (
+    build_fusion_query, document_sparse_vector, fused_score_scale, query_sparse_vector, term_index,
+)
+from code_index.tenancy import workspace_hash
+from code_index.vector_store import QdrantVectorStore
+
+CHUNKS = {
+    1: "def parse_file_with_mmap(path):\n    return mmap_reader(path, offset=0)\n",
+    2: "def load_settings(path):\n    return read_config(path, encoding='utf-8')\n",
+    3: "class RequestHandler:\n    def handle(self, request):\n        return self.process(request)\n",
+}
+
+
+@pytest.fixture
+def sparse_config(tmp_path):
+    config = Config()
+    config.workspace_path = str(tmp_path)
+    config.qdrant_url = f"local:{tmp_path / 'qdrant'}"
+    config.embedding_length = 2
+    config.qdrant_sparse_vectors = True
+    config.search_file_type_weights = {}
+    config.search_path_boosts = []
+    config.search_language_boosts = {}
+    yield config
+    close_local_clients()
+
+
+def _points(config):
+    # The dense vectors rank the loader first for the query vector [1, 0]
+    vectors = {1: [0.6, 0.8], 2: [1.0, 0.0], 3: [0.8, 0.6]}
+    return [{"id": point_id, "vector": vectors[point_id], "payload": {
+        "filePath": f"src/f{point_id}.py", "pathSegments": ["src"], "filetype": "py", "type": "function",
+        "codeChunk": chunk, "startLine": 1, "endLine": 2,
+        "workspace_hash": workspace_hash(config.workspace_path)}}
+        for point_id, chunk in CHUNKS.items()]
+
+
+def test_sparse_vectors_weight_identifier_terms():
+    vector = document_sparse_vector("mmap mmap parse_file_with_mmap")
+    assert vector.indices == sorted(vector.indices)
+    weights = dict(zip(vector.indices, vector.values))
+    assert set(weights) == {term_index(t) for t in ("mmap", "parse_file_with_mmap", "parse", "file", "with")}
+    # Term frequency saturates below k1 + 1
+    assert weights[term_index("parse")] < weights[term_index("mmap")] < 2.2
+
+    query = query_sparse_vector("parseFile parse")
+    assert query.indices == sorted({term_index("parsefile"), term_index("parse"), term_index("file")})
+    assert query.values == [1.0, 1.0, 1.0]
+    assert query_sparse_vector("a + b") is None
+
+
+def test_fusion_query_follows_search_settings():
+    config = Config()
+    query = build_fusion_query(config)
+    assert isinstance(query, RrfQuery)
+    assert (query.rrf.k, query.rrf.weights) == (60, None)
+    assert fused_score_scale(config) == pytest.approx(2 / 60)
+
+    config.search_hybrid_lexical_weight = 0.75
+    assert build_fusion_query(config).rrf.weights == [0.25, 0.75]
+    assert fused_score_scale(config) == pytest.approx(1 / (4 + 59) + 1 / (4 / 3 + 59))
+
+    config.search_fusion = "weighted"
+    assert build_fusion_query(config) == FusionQuery(fusion=Fusion.DBSF)
+
+
+def test_hybrid_query_runs_inside_qdrant(sparse_config):
+    store = QdrantVectorStore(sparse_config)
+    assert store.initialize() is True
+    assert store.has_sparse_vectors() is True
+    store.upsert_points(_points(sparse_config))
+
+    info = store.client.get_collection(store.collection_name)
+    assert describe_storage(info.config)["sparse_vectors"] == ["text"]
+
+    dense = store.search([1.0, 0.0], min_score=0.1)
+    assert dense[0]["id"] == 2
+    hybrid = store.hybrid_search([1.0, 0.0], "parse mmap", min_score=0.1)
+    # Found by both legs, the exact identifier match overtakes the dense favourite
+    assert [hit["id"] for hit in hybrid][:2] == [1, 2]
+    assert all(0 < hit["score"] <= 1.0 for hit in hybrid)
+    assert [hit["id"] for hit in store.hybrid_search([1.0, 0.0], "parse mmap", directory_prefix="lib")] == []
+
+    # A query without index terms is a plain dense search
+    assert [hit["id"] for hit in store.hybrid_search([1.0, 0.0], "?", min_score=0.1)] == [hit["id"] for hit in dense]
+
+
+def test_collections_without_sparse_vectors_stay_dense(sparse_config):
+    sparse_config.qdrant_sparse_vectors = False
+    store = QdrantVectorStore(sparse_config)
+    store.initialize()
+    sparse_config.qdrant_sparse_vectors = True
+    reopened = QdrantVectorStore(sparse_config)
+    assert reopened.has_sparse_vectors() is False
+    reopened.upsert_points(_points(sparse_config))
+    assert len(reopened.search([1.0, 0.0], min_score=0.1)) == 3
+
+    service = SearchService(embedding_cache=Mock(get_embedding=Mock(return_value=None)))
+    service.validate_search_config = Mock(return_value=ValidationResult(service="search_service", valid=True))
+    service._initialize_search_components = Mock(
+        return_value=(Mock(create_embeddings=Mock(return_value={"embeddings": [[1.0, 0.0]]})), reopened))
+    result = service.search_code("parse mmap", sparse_config, mode="hybrid")
+    assert result.search_method == "text"
+    assert "No lexical index for this workspace" in result.warnings[0]
+
+
+def test_search_service_uses_server_side_hybrid(sparse_config):
+    store = QdrantVectorStore(sparse_config)
+    store.initialize()
+    store.upsert_points(_points(sparse_config))
+    embedder = Mock(create_embeddings=Mock(return_value={"embeddings": [[1.0, 0.0]]}))
+
+    service = SearchService(embedding_cache=Mock(get_embedding=Mock(return_value=None)))
+    service.validate_search_config = Mock(return_value=ValidationResult(service="search_service", valid=True))
+    service._initialize_search_components = Mock(return_value=(embedder, store))
+
+    # No local lexical index exists for this workspace
+    result = service.search_code("parse mmap", sparse_config, mode="hybrid")
+    assert result.is_successful(), result.errors
+    assert result.search_method == "hybrid"
+    assert result.warnings == []
+    assert [match.file_path for match in result.matches][:2] == ["src/f1.py", "src/f2.py"]
+    embedder.create_embeddings.assert_called_once_with(["parse mmap"])
@@ -0,0 +1,152 @@
+"""Tests for the workspace symbol table and definition lookups."""
+import asyncio
+import os
+from unittest.mock import Mock
+
+import pytest
+
+from code_index.config import Config
+from code_index.mcp_server.tools import symbols_tool
+from code_index.models import CodeBlock
+from code_index.services.treesitter.file_processor import FileProcessor
+from code_index.services.treesitter.relationship_extractor import RelationshipBlockExtractor
+from code_index.symbol_index import SymbolEntry, SymbolIndex
+
+READER = "class Reader:\n    def parse_file(self, path):\n        return path\n"
+
+
+class FakeNode:
+    """Minimal tree-sitter node: type, byte range, rows, parent and named fields."""
+
+    def __init__(self, node_type, start, end, row=0, end_row=0, **fields):
+        self.type = node_type
+        self.start_byte, self.end_byte = start, end
+        self.start_point, self.end_point = (row, 0), (end_row, 0)
+        self.parent = None
+        self.fields = fields
+        for child in fields.values():
+            child.parent = self
+
+    def child_by_field_name(self, name):
+        return self.fields.get(name)
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    root = tmp_path / "ws"
+    (root / "src").mkdir(parents=True)
+    (root / "src/reader.py").write_text(READER)
+    (root / "src/handlers.py").write_text("class RequestHandler:\n    pass\n")
+    config = Config()
+    config.workspace_path = str(root)
+    config.cache_dir = str(tmp_path / "cache")
+    config.symbol_index_enabled = True
+    return config
+
+
+def _build(config):
+    index = SymbolIndex.for_workspace(config)
+    index.update_file("src/reader.py", "h1", [SymbolEntry("Reader", "class", 1, 3),
+                                              SymbolEntry("parse_file", "function", 2, 3, "Reader")])
+    index.update_file("src/handlers.py", "h1", [SymbolEntry("RequestHandler", "class", 1, 2),
+                                                SymbolEntry("parse_request", "function", 5, 9)])
+    assert index.save() is True
+    return index
+
+
+def test_extractor_records_definition_names_and_scopes():
+    text = READER
+    method_name = FakeNode("identifier", text.index("parse_file"), text.index("parse_file") + 10)
+    method = FakeNode("function_definition", text.index("def"), len(text), 1, 2, name=method_name)
+    body = FakeNode("block", text.index("def"), len(text), body=method)
+    cls = FakeNode("class_definition", 0, len(text), 0, 2, name=FakeNode("identifier", 6, 12), body=body)
+    extractor = RelationshipBlockExtractor(schema_service=Mock())
+
+    block = extractor._node_to_block(method, "function", text, "src/reader.py", "h")
+    assert (block.metadata["symbol"], block.metadata["scope"]) == ("parse_file", "Reader")
+    assert (block.start_line, block.end_line) == (2, 3)
+    assert extractor._node_to_block(cls, "class", text, "src/reader.py", "h").metadata["scope"] == ""
+
+    # Anonymous functions are named by their binding; calls get no symbol
+    js = "const load = () => fetch(url)"
+    arrow = FakeNode("arrow_function", 13, len(js))
+    FakeNode("variable_declarator", 6, len(js), name=FakeNode("identifier", 6, 10), value=arrow)
+    assert extractor._node_to_block(arrow, "function", js, "a.js", "h").metadata["symbol"] == "load"
+    assert "symbol" not in extractor._node_to_block(arrow, "call", js, "a.js", "h").metadata
+
+
+def test_lookup_exact_prefix_fuzzy_and_qualified(workspace):
+    _build(workspace)
+    index = SymbolIndex.for_workspace(workspace)
+
+    assert index.lookup("parse_file") == [{"name": "parse_file", "kind": "function", "filePath": "src/reader.py",
+                                           "startLine": 2, "endLine": 3, "scope": "Reader"}]
+    assert index.lookup("READER")[0]["name"] == "Reader"
+    assert [r["name"] for r in index.lookup("parse", match="prefix")] == ["parse_file", "parse_request"]
+    assert [r["name"] for r in index.lookup("Reader.parse", match="prefix")] == ["parse_file"]
+    assert [r["name"] for r in index.lookup("handler", match="fuzzy")] == ["RequestHandler"]
+    assert [r["name"] for r in index.lookup("RequestHandlr", match="fuzzy")] == ["RequestHandler"]
+    assert [r["name"] for r in index.lookup("r", match="prefix", kind="class")] == ["Reader", "RequestHandler"]
+    assert index.lookup("parse", match="prefix", limit=1)[0]["name"] == "parse_file"
+    with pytest.raises(ValueError):
+        index.lookup("x", match="regex")
+
+
+def test_incremental_updates_and_pruning(workspace):
+    index = _build(workspace)
+    assert index.has_file("src/reader.py", "h1") and not index.has_file("src/reader.py", "h2")
+
+    index.update_file("src/reader.py", "h2", [SymbolEntry("Reader", "class", 1, 3),
+                                              SymbolEntry("read_all", "function", 2, 3, "Reader")])
+    os.remove(os.path.join(workspace.workspace_path, "src/handlers.py"))
+    assert index.prune_missing() == 1
+    assert index.save() is True
+
+    reopened = SymbolIndex.for_workspace(workspace)
+    assert reopened.symbol_count == 2
+    assert reopened.lookup("parse_file") == []
+    assert reopened.lookup("read_all")[0]["scope"] == "Reader"
+    assert reopened.has_file("src/reader.py", "h2")
+
+
+def test_file_processor_fills_the_table_for_unchanged_files(workspace):
+    reader = f"{workspace.workspace_path}/src/reader.py"
+    parser = Mock()
+    parser.parse_file.return_value = [
+        CodeBlock(reader, "parse_file", "function", 2, 3, READER, "h", "s",
+                  metadata={"relationship_type": "function", "symbol": "parse_file", "scope": "Reader"}),
+        CodeBlock(reader, "return path", "call", 3, 3, READER, "h", "s", metadata={"relationship_type": "call"}),
+    ]
+    cache_manager = Mock()
+    processor = FileProcessor(workspace, parser=parser, embedder=Mock(), vector_store=Mock(),
+                              cache_manager=cache_manager, path_utils=None)
+    assert processor.lexical_index is None
+    cache_manager.get_hash.return_value = processor.get_file_hash(reader)
+
+    warnings = []
+    assert processor.process_single_file(reader, warnings=warnings)["skipped"] is True
+    processor.embedder.create_embeddings.assert_not_called()
+    assert processor.flush_local_indexes(warnings) == ["symbol index"]
+    assert warnings == []
+    assert [r["name"] for r in SymbolIndex.for_workspace(workspace).lookup("parse", match="prefix")] == ["parse_file"]
+
+    workspace.symbol_index_enabled = False
+    assert SymbolIndex.from_config(workspace) is None
+
+
+def test_mcp_symbols_tool(workspace, monkeypatch):
+    context = Mock()
+    context.load_local_config.return_value = workspace
+    monkeypatch.setattr(symbols_tool, "_command_context_factory", lambda: context)
+
+    missing = asyncio.run(symbols_tool.symbols(Mock(), "Reader", workspace=workspace.workspace_path))
+    assert missing["status"] == "not_indexed"
+
+    _build(workspace)
+    found = asyncio.run(symbols_tool.symbols(Mock(), "reader.parse_file", workspace=workspace.workspace_path))
+    assert found["status"] == "success"
+    assert [(r["filePath"], r["startLine"]) for r in found["results"]] == [("src/reader.py", 2)]
+    none = asyncio.run(symbols_tool.symbols(Mock(), "nothing", workspace=workspace.workspace_path, match="fuzzy"))
+    assert none["status"] == "no_results"
+    with pytest.raises(ValueError):
+        asyncio.run(symbols_tool.symbols(Mock(), "Reader", workspace=workspace.workspace_path, match="glob"))
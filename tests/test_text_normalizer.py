@@ -0,0 +1,119 @@
+"""Tests for embedding-text normalization."""
+from unittest.mock import Mock
+
+from code_index.config import Config
+from code_index.config_service import ConfigurationService
+from code_index.models import CodeBlock
+from code_index.services.embedding.text_normalizer import EmbeddingTextNormalizer
+from code_index.services.treesitter.file_processor import FileProcessor
+
+
+LICENSED_SOURCE = (
+    "// Copyright (c) 2024 Example Corp.\n"
+    "// SPDX-License-Identifier: MIT\n"
+    "\n"
+    "export function add(a, b) {\n"
+    "        if (a   ===  b) {\n"
+    "                return a * 2;   \n"
+    "        }\n"
+    "\n"
+    "\n"
+    "\n"
+    "        return a + b;\n"
+    "}\n"
+)
+
+
+def test_collapses_whitespace_and_strips_banner():
+    normalizer = EmbeddingTextNormalizer(prefix_metadata=False)
+    text = normalizer.normalize(LICENSED_SOURCE, "src/math.js")
+
+    assert text == (
+        "export function add(a, b) {\n"
+        " if (a === b) {\n"
+        "  return a * 2;\n"
+        " }\n"
+        "\n"
+        " return a + b;\n"
+        "}"
+    )
+
+
+def test_keeps_leading_comment_without_banner_keywords():
+    normalizer = EmbeddingTextNormalizer(prefix_metadata=False)
+    source = "# Parse the config file.\ndef load():\n    return 1\n"
+    assert normalizer.normalize(source, "pkg/config.py").startswith("# Parse the config file.")
+
+
+def test_block_comment_banner_is_stripped():
+    normalizer = EmbeddingTextNormalizer(prefix_metadata=False)
+    source = "/*\n * Licensed under the Apache License 2.0\n */\nfn main() {}\n"
+    assert normalizer.normalize(source, "src/main.rs") == "fn main() {}"
+
+
+def test_metadata_prefix_uses_path_and_symbol():
+    normalizer = EmbeddingTextNormalizer()
+    assert normalizer.normalize("def run():\n    pass\n", "app/cli.py", "run") == "app/cli.py::run\ndef run():\n pass"
+    assert normalizer.normalize("x = 1\n", "app/settings.py").startswith("app/settings.py\n")
+
+
+def test_configured_patterns_apply_per_extension():
+    normalizer = EmbeddingTextNormalizer(
+        prefix_metadata=False,
+        strip_patterns={"py": [r"\s*# noqa.*$"], "*": [r"^\s*# TODO.*\n"]},
+    )
+    source = "# TODO: remove\nimport os  # noqa: F401\n"
+    assert normalizer.normalize(source, "a.py") == "import os"
+    assert normalizer.normalize(source, "a.rb") == "import os # noqa: F401"
+
+
+def test_from_config_disabled_by_default():
+    assert EmbeddingTextNormalizer.from_config(Config()) is None
+    config = Config()
+    config.embedding_text_normalization = True
+    config.embedding_text_max_blank_lines = 0
+    normalizer = EmbeddingTextNormalizer.from_config(config)
+    assert normalizer is not None
+    assert normalizer.max_blank_lines == 0
+
+
+def test_invalid_strip_patterns_are_config_errors():
+    config = Config()
+    config.embedding_text_strip_patterns = {".py": [r"^#.*$", "(unclosed"], "*": "TODO"}
+    errors = ConfigurationService()._validate_config_values(config)
+    assert any(e.startswith("embedding_text_strip_patterns['.py'] has an invalid regular expression '(unclosed'")
+               for e in errors)
+    assert "embedding_text_strip_patterns['*'] must be a list of regular expressions" in errors
+
+    config.embedding_text_strip_patterns = {".py": [r"^#.*$"]}
+    assert not any("embedding_text_strip_patterns" in e for e in ConfigurationService()._validate_config_values(config))
+
+
+def test_file_processor_embeds_normalized_text_but_stores_original(tmp_path):
+    source = tmp_path / "math.js"
+    source.write_text(LICENSED_SOURCE)
+
+    config = Config()
+    config.workspace_path = str(tmp_path)
+    config.embedding_text_normalization = True
+
+    block = CodeBlock(file_path=str(source), identifier="add", type="function", start_line=1,
+                      end_line=12, content=LICENSED_SOURCE, file_hash="h", segment_hash="s")
+    parser = Mock()
+    parser.parse_file.return_value = [block]
+    embedder = Mock()
+    embedder.model_identifier = "nomic-embed-text"
+    embedder.create_embeddings.return_value = {"embeddings": [[0.1, 0.2]]}
+    vector_store = Mock()
+    cache_manager = Mock()
+    cache_manager.get_hash.return_value = None
+
+    processor = FileProcessor(config=config, parser=parser, embedder=embedder,
+                              vector_store=vector_store, cache_manager=cache_manager)
+    assert processor.process_single_file(str(source), config)["success"] is True
+
+    sent = embedder.create_embeddings.call_args[0][0][0]
+    assert sent.startswith("math.js::add\nexport function add")
+    assert "Copyright" not in sent
+    stored = vector_store.upsert_points.call_args[0][0][0]["payload"]["codeChunk"]
+    assert stored == LICENSED_SOURCE
@@ -0,0 +1,149 @@
+"""Tests for the trigram index and grep over literal and regex patterns."""
+import asyncio
+import os
+from unittest.mock import Mock
+
+import pytest
+
+from code_index.config import Config
+from code_index.config_service import ConfigurationService
+from code_index.mcp_server.tools import grep_tool
+from code_index.services.treesitter.file_processor import FileProcessor
+from code_index.trigram_index import TrigramIndex, file_trigrams, query_plan
+
+FILES = {
+    "src/config.py": "def load_config(path):\n    return Parse(path)\n",
+    "src/app.py": "from config import load_config\n\ncfg = load_config('x')  # load_config twice\n",
+    "cmd/main.go": "func main() {\n\tfmt.Println(\"héllo\", json.Marshal(v))\n}\n",
+    "docs/notes.md": "Nothing to see here.\n",
+}
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    root = tmp_path / "ws"
+    for rel_path, text in FILES.items():
+        (root / rel_path).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel_path).write_text(text, encoding="utf-8")
+    (root / "logo.png").write_bytes(b"\x89PNG\0\0load_config")
+    config = Config()
+    config.workspace_path = str(root)
+    config.cache_dir = str(tmp_path / "cache")
+    config.trigram_index_enabled = True
+    return config
+
+
+def _build(config):
+    index = TrigramIndex.for_workspace(config)
+    for rel_path in list(FILES) + ["logo.png"]:
+        index.update_file(rel_path, "h1")
+    assert index.save() is True
+    return index
+
+
+def _lines(result):
+    return [(h["filePath"], h["line"], h["column"]) for h in result.hits]
+
+
+def test_query_plans():
+    assert [int(t) for t in file_trigrams(b"aBcD")] == [0x616263, 0x626364]
+    assert query_plan("load_config") == b"load_config"
+    assert query_plan("ab") is None
+    assert query_plan(r"load_\w+\(", regex=True) == b"load_"
+    assert query_plan(r"(Marshal|Println)\(v", regex=True) == ("or", [b"Marshal", b"Println"])
+    assert query_plan(r"foo.*bar(baz)?", regex=True) == ("and", [b"foo", b"bar"])
+    assert query_plan(r"ab|cdef", regex=True) is None
+    assert query_plan(r"(?:xyz)+qq", regex=True) == b"xyz"
+
+
+def test_literal_grep_prunes_and_reports_line_accurate_hits(workspace):
+    _build(workspace)
+    index = TrigramIndex.for_workspace(workspace)
+
+    result = index.grep("load_config")
+    # The binary file has the trigrams but is neither indexed nor scanned
+    assert (result.candidate_files, result.total_files) == (2, 5)
+    assert _lines(result) == [("src/app.py", 1, 20), ("src/app.py", 3, 7), ("src/config.py", 1, 5)]
+    assert result.hits[1]["text"] == "cfg = load_config('x')  # load_config twice"
+
+    assert index.grep("parse(").hits == []
+    assert _lines(index.grep("parse(", ignore_case=True)) == [("src/config.py", 2, 12)]
+    assert _lines(index.grep("héllo")) == [("cmd/main.go", 2, 15)]
+    assert _lines(index.grep("load_config", path_prefix="./src/config.py")) == [("src/config.py", 1, 5)]
+    assert index.grep("load_config", path_prefix="src/conf").hits == []
+    assert index.grep("load_config", filetype="go").candidate_files == 0
+    limited = index.grep("load_config", max_results=2)
+    assert limited.truncated and len(limited.hits) == 2
+
+
+def test_regex_grep(workspace):
+    index = _build(workspace)
+    result = index.grep(r"(Marshal|Parse)\(", regex=True)
+    assert result.candidate_files == 2
+    assert _lines(result) == [("cmd/main.go", 2, 28), ("src/config.py", 2, 12)]
+    assert _lines(index.grep(r"^\w+ = ", regex=True)) == [("src/app.py", 3, 1)]
+    assert index.grep(r"^\w+ = ", regex=True).candidate_files == 1
+    # Nothing to narrow by: every indexed file is read
+    assert index.grep(r"^\w+\s=", regex=True).candidate_files == 5
+    assert _lines(index.grep(r"MARSHAL", regex=True, ignore_case=True, path_prefix="cmd")) == [("cmd/main.go", 2, 28)]
+    with pytest.raises(ValueError):
+        index.grep("(unclosed", regex=True)
+
+
+def test_updates_pruning_and_file_processor(workspace):
+    index = _build(workspace)
+    root = workspace.workspace_path
+    with open(os.path.join(root, "src/config.py"), "w") as f:
+        f.write("def read_settings(path):\n    return path\n")
+    index.update_file("src/config.py", "h2")
+    os.remove(os.path.join(root, "src/app.py"))
+    assert index.prune_missing() == 1
+    assert index.save() is True
+
+    reopened = TrigramIndex.for_workspace(workspace)
+    assert reopened.has_file("src/config.py", "h2") and not reopened.has_file("src/app.py", "h1")
+    assert reopened.grep("load_config").candidate_files == 0
+    assert _lines(reopened.grep("read_settings")) == [("src/config.py", 1, 5)]
+
+    # Unchanged files missing from the index are added without parsing them
+    notes = os.path.join(root, "docs/notes.md")
+    parser, cache_manager = Mock(), Mock()
+    processor = FileProcessor(workspace, parser=parser, embedder=Mock(), vector_store=Mock(),
+                              cache_manager=cache_manager, path_utils=None)
+    with open(notes, "a") as f:
+        f.write("A new trigram-only line\n")
+    cache_manager.get_hash.return_value = processor.get_file_hash(notes)
+    warnings = []
+    assert processor.process_single_file(notes, warnings=warnings)["skipped"] is True
+    parser.parse_file.assert_not_called()
+    assert processor.flush_local_indexes(warnings) == ["trigram index"]
+    assert warnings == []
+    assert _lines(TrigramIndex.for_workspace(workspace).grep("trigram-only")) == [("docs/notes.md", 2, 7)]
+
+    workspace.trigram_index_enabled = False
+    assert TrigramIndex.from_config(workspace) is None
+    workspace.trigram_max_file_bytes = 0
+    assert "trigram_max_file_bytes must be a positive integer" in ConfigurationService()._validate_config_values(workspace)
+
+
+def test_mcp_grep_tool(workspace, monkeypatch):
+    context = Mock()
+    context.load_local_config.return_value = workspace
+    monkeypatch.setattr(grep_tool, "_command_context_factory", lambda: context)
+
+    def run(**kwargs):
+        return asyncio.run(grep_tool.grep(Mock(), workspace=workspace.workspace_path, **kwargs))
+
+    assert run(pattern="load_config")["status"] == "not_indexed"
+    _build(workspace)
+    found = run(pattern="LOAD_CONFIG(", ignore_case=True, filetype="py")
+    assert found["status"] == "success"
+    assert [(r["filePath"], r["line"]) for r in found["results"]] == [("src/app.py", 3), ("src/config.py", 1)]
+    assert (found["files_searched"], found["files_indexed"], found["truncated"]) == (2, 5, False)
+    assert run(pattern="nowhere to be found")["status"] == "no_results"
+    with pytest.raises(ValueError):
+        run(pattern="")
+    with pytest.raises(ValueError):
+        run(pattern="[a-", regex=True)
+    with pytest.raises(ValueError):
+        run(pattern="x", max_results=0)
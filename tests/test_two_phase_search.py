@@ -0,0 +1,136 @@
+"""Tests for two-phase search: rank on small payload fields, then fetch full payloads for the top hits."""
+import json
+import math
+from unittest.mock import Mock
+
+import pytest
+
+from code_index.config import Config
+from code_index.models import CodeBlock
+from code_index.qdrant_local import close_local_clients
+from code_index.search_scoring import HitScorer, content_length, payload_size
+from code_index.services.shared.file_processing_helpers import prepare_vector_points
+from code_index.tenancy import workspace_hash
+from code_index.vector_store import QdrantVectorStore
+
+SHORT = "x = 1"
+LONG = "def handler(request):\n    body = request.read()\n    return respond(body, status=200)\n" * 4
+
+
+@pytest.fixture
+def config(tmp_path):
+    # The workspace config file takes precedence over the one in the working directory
+    _min_content_length(tmp_path, 0)
+    config = Config()
+    config.workspace_path = str(tmp_path)
+    config.qdrant_url = f"local:{tmp_path / 'qdrant'}"
+    config.embedding_length = 2
+    config.search_min_score = 0.0
+    config.search_file_type_weights = {".md": 0.5}
+    config.search_path_boosts = []
+    config.search_language_boosts = {}
+    yield config
+    close_local_clients()
+
+
+def _min_content_length(workspace, length):
+    (workspace / "code_index.json").write_text(json.dumps({"block_extraction": {"min_content_length": {"default": length}}}))
+
+
+def _point(point_id, config, chunk, file_path, legacy=False):
+    angle = point_id / 100.0
+    payload = {"filePath": file_path, "pathSegments": [file_path.split("/")[0]], "filetype": file_path.rsplit(".", 1)[1],
+               "type": "function", "codeChunk": chunk, "startLine": point_id, "endLine": point_id + 3,
+               "workspace_hash": workspace_hash(config.workspace_path)}
+    if not legacy:
+        payload["contentLength"] = len(chunk.strip())
+    return {"id": point_id, "vector": [math.cos(angle), math.sin(angle)], "payload": payload}
+
+
+@pytest.fixture
+def store(config):
+    store = QdrantVectorStore(config)
+    store.initialize()
+    # Every third point was indexed before contentLength was stored
+    store.upsert_points([
+        _point(i, config, SHORT if i % 4 == 0 else LONG, f"src/m{i}.py" if i % 5 else f"docs/d{i}.md", legacy=i % 3 == 0)
+        for i in range(1, 41)])
+    return store
+
+
+def _search(store, config, two_phase, **kwargs):
+    config.search_two_phase = two_phase
+    return store.search([1.0, 0.0], min_score=0.0, **kwargs), dict(store.last_search_stats)
+
+
+def _ranking(hits):
+    return [(h["id"], round(h["adjustedScore"], 6), h["payload"]["codeChunk"]) for h in hits]
+
+
+def test_scoring_helpers():
+    assert content_length({"contentLength": 7, "codeChunk": "ignored"}) == 7
+    assert content_length({"codeChunk": "  abc \n"}) == 3
+    assert content_length({"filePath": "a.py"}) is None
+    assert payload_size(None) == 0
+    assert payload_size({"a": "é"}) == len('{"a":"é"}'.encode("utf-8"))
+
+    # Hits without a known length are left for the caller to check
+    hits = [{"id": 1, "score": 0.9, "payload": {"filePath": "a.py", "type": "function"}},
+            {"id": 2, "score": 0.8, "payload": {"filePath": "b.py", "contentLength": 3}}]
+    assert [h["id"] for h in HitScorer(Config()).rank(hits, 5, min_content_len=10)] == [1]
+
+
+def test_min_content_length_fetches_full_payloads_for_returned_hits_only(config, store, tmp_path):
+    _min_content_length(tmp_path, 20)
+    single, single_stats = _search(store, config, False, max_results=10)
+    store.client.retrieve = Mock(wraps=store.client.retrieve)
+    two, two_stats = _search(store, config, True, max_results=10)
+
+    assert _ranking(two) == _ranking(single)
+    assert two[0]["payload"] == single[0]["payload"] and "contentLength" not in two[0]["payload"]
+    assert all(h["payload"]["codeChunk"] == LONG for h in two)
+    assert {k: single_stats[k] for k in ("two_phase", "candidates", "hydrated", "returned")} == {
+        "two_phase": False, "candidates": 40, "hydrated": 0, "returned": 10}
+    # Point 12 has no contentLength and turns out too short once fetched; the next candidate replaces it
+    assert store.client.retrieve.call_count == 2
+    assert [call.kwargs["ids"] for call in store.client.retrieve.call_args_list][1] == [17]
+    assert (two_stats["candidates"], two_stats["hydrated"], two_stats["returned"]) == (40, 11, 10)
+    assert two_stats["payload_bytes"] * 2 < single_stats["payload_bytes"]
+
+
+def test_full_payloads_in_one_request_when_nothing_is_over_fetched(config, store):
+    store.client.retrieve = Mock(wraps=store.client.retrieve)
+    hits, stats = _search(store, config, True, max_results=5)
+    assert [h["id"] for h in hits] == [1, 2, 3, 4, 5]
+    assert stats["two_phase"] is False and stats["candidates"] == 5
+    store.client.retrieve.assert_not_called()
+
+
+def test_batch_hydrates_every_query_in_one_request(config, store, tmp_path):
+    _min_content_length(tmp_path, 20)
+    config.search_two_phase = True
+    store.client.retrieve = Mock(wraps=store.client.retrieve)
+    queries = [[1.0, 0.0], [0.0, 1.0], [1.0, 0.0]]
+    batch = store.search_batch(queries, min_score=0.0, max_results=3)
+    store.client.retrieve.assert_called_once()
+    assert sorted(store.client.retrieve.call_args.kwargs["ids"]) == [1, 2, 3, 37, 38, 39]
+    assert store.last_search_stats["returned"] == 9
+    config.search_two_phase = False
+    assert [_ranking(hits) for hits in batch] == [
+        _ranking(hits) for hits in store.search_batch(queries, min_score=0.0, max_results=3)]
+
+    # Excluded and known-short hits are dropped before anything is fetched
+    config.search_two_phase = True
+    config.search_exclude_patterns = ["docs/"]
+    store.client.retrieve.reset_mock()
+    hits = store.search([1.0, 0.0], min_score=0.0, max_results=50)
+    assert all(h["payload"]["filePath"].startswith("src/") for h in hits)
+    assert (len(store.client.retrieve.call_args.kwargs["ids"]), len(hits)) == (27, 24)
+    assert store.search([1.0, 0.0], directory_prefix="lib") == []
+
+
+def test_indexed_payload_records_content_length(config):
+    block = CodeBlock("/ws/src/a.py", "f", "function", 1, 2, "  def f():\n    pass\n", "h", "s")
+    points = prepare_vector_points("/ws/src/a.py", [block], [[1.0, 0.0]], "src/a.py", Mock(), config)
+    assert points[0]["payload"]["contentLength"] == len("def f():\n    pass")
+    assert Config().search_two_phase is True
@@ -0,0 +1,107 @@
+"""Tests for NumPy embedding transport from embedder to Qdrant."""
+import base64
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+
+from code_index.config import Config
+from code_index.embedder import OllamaEmbedder
+from code_index.models import CodeBlock
+from code_index.services.embedding.streaming_embedder import StreamingEmbedder
+from code_index.services.treesitter.file_processor import FileProcessor
+from code_index.vector_codec import (
+    as_matrix,
+    decode_base64_vectors,
+    resolve_dtype,
+    vector_to_list,
+    vectors_to_lists,
+)
+
+
+def test_as_matrix_keeps_matching_arrays_without_copy():
+    matrix = np.ones((3, 4), dtype=np.float32)
+    assert as_matrix(matrix) is matrix
+    assert as_matrix([[1, 2], [3, 4]], np.float16).dtype == np.float16
+    assert as_matrix([]).shape == (0, 0)
+    with pytest.raises(ValueError):
+        as_matrix([[1.0, 2.0], [3.0]])
+
+
+def test_resolve_dtype_rejects_unknown_names():
+    assert resolve_dtype("float16") == np.float16
+    assert resolve_dtype(None) == np.float32
+    with pytest.raises(ValueError):
+        resolve_dtype("int8")
+
+
+def test_decode_base64_vectors():
+    raw = np.array([0.5, -1.25], dtype="<f4")
+    decoded = decode_base64_vectors([base64.b64encode(raw.tobytes()).decode()])
+    assert decoded.tolist() == [[0.5, -1.25]]
+
+
+def test_vectors_to_lists_converts_rows_and_passes_lists_through():
+    matrix = np.array([[1.0, 2.0], [3.0, 4.0]], dtype=np.float16)
+    converted = vectors_to_lists([matrix[0], [9.0, 9.0], matrix[1]])
+    assert converted == [[1.0, 2.0], [9.0, 9.0], [3.0, 4.0]]
+    assert all(type(value) is float for value in converted[0])
+    assert vector_to_list(matrix[1]) == [3.0, 4.0]
+
+
+def test_ollama_embedder_returns_matrix_in_configured_dtype():
+    config = Config()
+    config.embedding_dtype = "float16"
+    embedder = OllamaEmbedder(config)
+    response = Mock()
+    response.json.return_value = {"embeddings": [[0.1, 0.2], [0.3, 0.4]]}
+    with patch("code_index.embedder.requests.post", return_value=response):
+        embeddings = embedder.create_embeddings(["a", "b"])["embeddings"]
+    assert isinstance(embeddings, np.ndarray)
+    assert embeddings.shape == (2, 2)
+    assert embeddings.dtype == np.float16
+
+
+def test_streaming_embedder_accepts_list_and_array_output():
+    embedder = Mock()
+    embedder.create_embeddings.side_effect = [
+        {"embeddings": np.ones((2, 3), dtype=np.float32)},
+        {"embeddings": [[2.0, 2.0, 2.0]]},
+    ]
+    streaming = StreamingEmbedder(embedder, batch_size=2)
+    result = streaming.embed_all(["a", "b", "c"])
+    assert result.shape == (3, 3)
+    assert result[2].tolist() == [2.0, 2.0, 2.0]
+
+
+def test_file_processor_passes_matrix_rows_to_vector_store(tmp_path):
+    source = tmp_path / "util.py"
+    source.write_text("placeholder\n")
+    config = Config()
+    config.workspace_path = str(tmp_path)
+    config.batch_segment_threshold = 2
+
+    blocks = [CodeBlock(file_path=str(source), identifier=f"f{i}", type="function", start_line=i,
+                        end_line=i, content=f"def f{i}(): return {i}", file_hash="h", segment_hash=f"s{i}")
+              for i in range(3)]
+    parser = Mock()
+    parser.parse_file.return_value = blocks
+    embedder = Mock()
+    embedder.model_identifier = "nomic-embed-text"
+    embedder.create_embeddings.side_effect = lambda texts: {
+        "embeddings": np.arange(len(texts) * 4, dtype=np.float32).reshape(len(texts), 4)
+    }
+    vector_store = Mock()
+    cache_manager = Mock()
+    cache_manager.get_hash.return_value = None
+
+    processor = FileProcessor(config=config, parser=parser, embedder=embedder,
+                              vector_store=vector_store, cache_manager=cache_manager)
+    assert processor.process_single_file(str(source), config)["success"] is True
+
+    points = vector_store.upsert_points.call_args[0][0]
+    assert len(points) == 3
+    assert all(isinstance(point["vector"], np.ndarray) for point in points)
+    # Rows of the second batch follow the first in one contiguous matrix
+    assert points[2]["vector"].tolist() == [0.0, 1.0, 2.0, 3.0]
+    assert points[0]["vector"].base is points[2]["vector"].base
@@ -0,0 +1,144 @@
+"""Tests for the write-ahead vector spool."""
+import threading
+from unittest.mock import Mock
+
+import numpy as np
+
+from code_index.config import Config
+from code_index.config_service import ConfigurationService
+from code_index.models import CodeBlock
+from code_index.services.batch.vector_spool import SpoolDrainer, SpoolEntry, VectorSpool
+from code_index.services.treesitter.file_processor import FileProcessor
+
+
+def _entry(file_path="/repo/a.py", file_hash="h1", count=2):
+    return SpoolEntry(
+        file_path=file_path,
+        rel_path=file_path.rsplit("/", 1)[-1],
+        file_hash=file_hash,
+        point_ids=[f"id-{i}" for i in range(count)],
+        payloads=[{"filePath": "a.py", "startLine": i} for i in range(count)],
+        vectors=np.arange(count * 3, dtype=np.float32).reshape(count, 3),
+    )
+
+
+def test_entry_round_trip_and_pending_lookup(tmp_path):
+    spool = VectorSpool(str(tmp_path))
+    path = spool.append(_entry())
+
+    loaded = spool.load(path)
+    assert loaded.point_ids == ["id-0", "id-1"]
+    assert loaded.payloads[1] == {"filePath": "a.py", "startLine": 1}
+    np.testing.assert_array_equal(loaded.vectors, np.arange(6, dtype=np.float32).reshape(2, 3))
+    assert [point["id"] for point in loaded.points()] == ["id-0", "id-1"]
+
+    # A fresh spool over the same directory finds what the previous run left
+    reopened = VectorSpool(str(tmp_path))
+    assert reopened.has_pending("/repo/a.py", "h1") is True
+    assert reopened.has_pending("/repo/a.py", "h2") is False
+    reopened.remove(path)
+    assert reopened.pending() == []
+    assert reopened.has_pending("/repo/a.py", "h1") is False
+
+
+def test_unreadable_entries_are_discarded(tmp_path):
+    (tmp_path / "00000000000000000001-000001.spool").write_bytes(b"garbage")
+    spool = VectorSpool(str(tmp_path))
+    assert spool.has_pending("/repo/a.py", "h1") is False
+    assert spool.pending() == []
+
+
+def test_drainer_retries_until_written_and_keeps_order(tmp_path):
+    spool = VectorSpool(str(tmp_path))
+    written = []
+    failures = {"count": 2}
+
+    def write(entry, on_written):
+        if failures["count"]:
+            failures["count"] -= 1
+            return False
+        written.append(entry.file_path)
+        on_written()
+        return True
+
+    drainer = SpoolDrainer(spool, write, initial_backoff_seconds=0.01)
+    for name in ("a", "b", "c"):
+        drainer.submit(spool.append(_entry(file_path=f"/repo/{name}.py")))
+    stats = drainer.close(timeout_seconds=5)
+
+    assert written == ["/repo/a.py", "/repo/b.py", "/repo/c.py"]
+    assert stats["retries"] == 2
+    assert stats["drained"] == 3
+    assert stats["pending"] == 0
+
+
+def test_drainer_close_leaves_unwritten_entries_for_replay(tmp_path):
+    spool = VectorSpool(str(tmp_path))
+    drainer = SpoolDrainer(spool, lambda entry, on_written: False, initial_backoff_seconds=0.01)
+    drainer.submit(spool.append(_entry()))
+    assert drainer.close(timeout_seconds=0.05)["pending"] == 1
+
+    written = threading.Event()
+
+    def write(entry, on_written):
+        on_written()
+        written.set()
+        return True
+
+    replaying = SpoolDrainer(VectorSpool(str(tmp_path)), write)
+    assert replaying.replay() == 1
+    assert replaying.close(timeout_seconds=5)["pending"] == 0
+    assert written.is_set()
+
+
+def test_file_processor_spools_and_skips_reembedding(tmp_path):
+    source = tmp_path / "util.py"
+    source.write_text("placeholder\n")
+    config = Config()
+    config.workspace_path = str(tmp_path)
+    config.vector_spool_enabled = True
+    config.vector_spool_dir = str(tmp_path / "spool")
+
+    blocks = [CodeBlock(file_path=str(source), identifier="f", type="function", start_line=1,
+                        end_line=1, content="def f(): return 1", file_hash="h", segment_hash="s")]
+    parser = Mock()
+    parser.parse_file.return_value = blocks
+    embedder = Mock()
+    embedder.model_identifier = "nomic-embed-text"
+    embedder.create_embeddings.return_value = {"embeddings": np.ones((1, 4), dtype=np.float32)}
+    vector_store = Mock()
+    vector_store.upsert_points.side_effect = ConnectionError("qdrant unavailable")
+    cache_manager = Mock()
+    cache_manager.get_hash.return_value = None
+    cache_manager.get_point_ids.return_value = None
+
+    processor = FileProcessor(config=config, parser=parser, embedder=embedder,
+                              vector_store=vector_store, cache_manager=cache_manager)
+    assert processor.process_single_file(str(source), config)["success"] is True
+    config.vector_spool_drain_timeout_seconds = 0
+    warnings = []
+    processor.flush_vectors([], warnings)
+    cache_manager.update_hash.assert_not_called()
+    assert warnings == ["1 files are still in the vector spool and will be written on the next run"]
+
+    # The next run writes the spooled points without embedding the file again
+    vector_store.upsert_points.side_effect = None
+    embedder.create_embeddings.reset_mock()
+    rerun = FileProcessor(config=config, parser=parser, embedder=embedder,
+                          vector_store=vector_store, cache_manager=cache_manager)
+    result = rerun.process_single_file(str(source), config)
+    assert result["reason"] == "spooled"
+    embedder.create_embeddings.assert_not_called()
+    config.vector_spool_drain_timeout_seconds = 5
+    rerun.flush_vectors([], [])
+    cache_manager.update_hash.assert_called_once()
+    assert rerun.vector_spool.pending() == []
+
+
+def test_spool_settings_are_validated():
+    config = Config()
+    config.vector_spool_dir = " "
+    config.vector_spool_drain_timeout_seconds = -1
+    errors = ConfigurationService()._validate_config_values(config)
+    assert "vector_spool_dir must be a non-empty string or null" in errors
+    assert "vector_spool_drain_timeout_seconds must be zero or greater" in errors